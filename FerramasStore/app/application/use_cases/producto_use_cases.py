@@ -1,5 +1,7 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional
+from ferramas_comun.lecturas import TAMANO_TANDA, ProductoLectura
 from app.domain.models import Producto, Categoria
+from app.domain.operaciones_masivas import FiltroProductos, CambiosProductos
 from app.domain.repositories import ProductoRepositoryInterface, CategoriaRepositoryInterface
 
 
@@ -8,21 +10,30 @@ class GetProductosPorCategoriaUseCase:
         self.producto_repository = producto_repository
         self.categoria_repository = categoria_repository
     
-    def execute(self, categoria_nombre: str) -> tuple[List[Producto], Optional[str]]:
+    def execute(self, categoria_nombre: str) -> tuple[List[ProductoLectura], Optional[str]]:
         """
         Obtiene productos por nombre de categoría
         Retorna: (lista_productos, mensaje_error)
         """
+        _, productos, error = self.execute_con_categoria(categoria_nombre)
+        return productos, error
+    
+    def execute_con_categoria(self, categoria_nombre: str) -> tuple[Optional[Categoria], List[ProductoLectura], Optional[str]]:
+        """
+        Como `execute`, pero también devuelve la categoría (None si no existe)
+        Retorna: (categoria, lista_productos, mensaje_error)
+        """
+        categoria = None
         try:
             categoria = self.categoria_repository.get_by_name(categoria_nombre)
             if not categoria:
-                return [], f'Categoría "{categoria_nombre}" no encontrada'
+                return None, [], f'Categoría "{categoria_nombre}" no encontrada'
             
-            productos = self.producto_repository.get_by_categoria(categoria, en_venta=True)
-            return productos, None
+            productos = self.producto_repository.listar(categoria_id=categoria.id, en_venta=True)
+            return categoria, productos, None
             
         except Exception as e:
-            return [], f'Error al cargar productos: {str(e)}'
+            return categoria, [], f'Error al cargar productos: {str(e)}'
 
 
 class CreateProductoUseCase:
@@ -41,15 +52,36 @@ class CreateProductoUseCase:
             return None, f'Error al crear producto: {str(e)}'
 
 
+class ActualizarProductosMasivoUseCase:
+    def __init__(self, producto_repository: ProductoRepositoryInterface):
+        self.producto_repository = producto_repository
+    
+    def execute(self, filtro: FiltroProductos, cambios: CambiosProductos, dry_run: bool = False) -> tuple[int, Optional[str]]:
+        """
+        Cambia precio, descuento, stock o estado de venta de muchos productos a la vez
+        Retorna: (productos_afectados, mensaje_error). Con dry_run solo los cuenta.
+        """
+        try:
+            return self.producto_repository.update_masivo(filtro, cambios, dry_run), None
+        except ValueError as e:
+            return 0, str(e)
+
+
 class GetAllProductosUseCase:
     def __init__(self, producto_repository: ProductoRepositoryInterface):
         self.producto_repository = producto_repository
     
-    def execute(self) -> List[Producto]:
+    def execute(self) -> List[ProductoLectura]:
+        """
+        Obtiene todos los productos (de solo lectura)
+        """
+        return self.producto_repository.listar()
+    
+    def iterar(self, tamano: int = TAMANO_TANDA) -> Iterator[ProductoLectura]:
         """
-        Obtiene todos los productos
+        Recorre todos los productos de a `tamano` filas, sin cargarlos todos en memoria
         """
-        return self.producto_repository.get_all()
+        return self.producto_repository.iterar(tamano=tamano)
 
 
 class GetAllCategoriasUseCase:
@@ -7,3 +7,9 @@ class AppConfig(AppConfig):
 
     def ready(self):
         import app.domain.signals
+        import app.infrastructure.autenticacion
+        import app.infrastructure.cache_proxy
+        import app.infrastructure.cargadores
+        import app.infrastructure.cola.servicio
+        import app.infrastructure.snapshot.servicio
+        import app.infrastructure.sugerencias.servicio
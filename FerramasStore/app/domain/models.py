@@ -1,5 +1,12 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth.models import User
+from ferramas_comun import promociones
+from ferramas_comun.lecturas import precio_con_descuento
 
 class Usuario(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -31,14 +38,143 @@ class Producto(models.Model):
     destacado = models.BooleanField(default=False)
     descuento = models.DecimalField(max_digits=5, decimal_places=2, default=0.00, help_text="Porcentaje de descuento")
 
+    class Meta:
+        indexes = [
+            # La búsqueda del admin usa LIKE, que en SQLite no distingue mayúsculas:
+            # solo puede usar índices con collation NOCASE.
+            models.Index(Collate('nombre', 'NOCASE'), name='producto_nombre_nocase'),
+            models.Index(Collate('sku', 'NOCASE'), name='producto_sku_nocase'),
+        ]
+
     def __str__(self):
         return self.nombre
 
     @property
     def precio_final(self):
-        if self.descuento:
-            return round(self.precio * (1 - self.descuento / 100), 2)
-        return self.precio
+        return precio_con_descuento(self.precio, self.descuento)
+
+class ProductoCambio(models.Model):
+    """
+    Feed de cambios del catálogo: una fila por producto con su último cambio.
+    La mantienen triggers de SQLite (migración 0006), así que registra las
+    escrituras de Django, de la API FastAPI y de las cargas masivas por igual.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OPERACIONES = [(UPSERT, 'Alta o modificación'), (DELETE, 'Eliminación')]
+
+    secuencia = models.BigAutoField(primary_key=True)
+    producto_id = models.IntegerField(unique=True)  # sin FK: el tombstone sobrevive al producto
+    operacion = models.CharField(max_length=6, choices=OPERACIONES)
+    fecha = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.secuencia} {self.operacion} {self.producto_id}'
+
+class EstadisticaCategoria(models.Model):
+    """
+    Totales del catálogo por categoría. Los mantienen triggers de SQLite sobre
+    `app_producto` (migración 0009) y `recalcular_estadisticas` los rearma desde
+    cero. Los montos se guardan en centavos para que sumar y restar no acumule
+    error de redondeo.
+    """
+    categoria = models.OneToOneField(Categoria, on_delete=models.DO_NOTHING, db_constraint=False,
+                                     primary_key=True, related_name='estadistica')
+    productos = models.IntegerField(default=0)
+    en_venta = models.IntegerField(default=0)
+    unidades = models.BigIntegerField(default=0)  # suma del stock
+    valor_stock_centavos = models.BigIntegerField(default=0)  # suma de precio * stock
+    descuento_centesimas = models.BigIntegerField(default=0)  # suma de descuentos, en centésimas de punto
+    destacados = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.categoria_id}: {self.productos} productos'
+
+    @property
+    def valor_stock(self):
+        return Decimal(self.valor_stock_centavos) / 100
+
+    @property
+    def descuento_promedio(self):
+        if not self.productos:
+            return Decimal(0)
+        return round(Decimal(self.descuento_centesimas) / 100 / self.productos, 2)
+
+class ProductoRelacionado(models.Model):
+    """
+    Productos relacionados precalculados por `calcular_relacionados` (TF-IDF de
+    nombre y descripción, dentro de la categoría). La clave primaria
+    (producto, posicion) en una tabla WITHOUT ROWID deja la lista de cada
+    producto contigua: leerla es un solo recorrido del índice.
+    """
+    pk = models.CompositePrimaryKey('producto', 'posicion')
+    # Sin restricción en la base ni cascada en Python: los productos dados de baja se
+    # filtran al leer y el cálculo incremental limpia sus filas.
+    producto = models.ForeignKey(Producto, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                                 related_name='relacionados')
+    posicion = models.PositiveSmallIntegerField()
+    relacionado = models.ForeignKey(Producto, on_delete=models.DO_NOTHING, db_constraint=False,
+                                    related_name='relacionado_en')
+    puntaje = models.FloatField()  # similitud coseno, de 0 a 1
+
+    def __str__(self):
+        return f'{self.producto_id} -> {self.relacionado_id} ({self.puntaje:.2f})'
+
+class FirmaRelacionados(models.Model):
+    """
+    Huella del texto (categoría, nombre y descripción) con que se calculó la
+    lista de cada producto. Los cambios de precio o stock no la alteran, así
+    que el cálculo incremental los salta.
+    """
+    producto_id = models.IntegerField(primary_key=True)  # sin FK, como ProductoCambio
+    firma = models.BigIntegerField()
+
+    def __str__(self):
+        return f'{self.producto_id} {self.firma:x}'
+
+class CalculoRelacionados(models.Model):
+    """Registro de cada ejecución de `calcular_relacionados`; la última da el cursor del feed de cambios."""
+    secuencia = models.BigIntegerField()  # último ProductoCambio considerado
+    completo = models.BooleanField()
+    productos = models.IntegerField()  # productos recalculados
+    relaciones = models.IntegerField()
+    duracion = models.FloatField()  # segundos
+    # df de cada palabra en el último cálculo completo; los incrementales lo reutilizan.
+    vocabulario = models.JSONField(null=True, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{"Completo" if self.completo else "Incremental"} {self.fecha:%Y-%m-%d %H:%M}'
+
+class Promocion(models.Model):
+    """
+    Regla de descuento del motor de promociones (`ferramas_comun.promociones`).
+    Sin SKU ni categoría aplica a todo el catálogo.
+    """
+    nombre = models.CharField(max_length=100)
+    porcentaje = models.DecimalField(max_digits=5, decimal_places=2,
+                                     validators=[MinValueValidator(0), MaxValueValidator(100)])
+    sku = models.CharField(max_length=50, blank=True, null=True)
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, blank=True, null=True, related_name='promociones')
+    cantidad_minima = models.PositiveIntegerField(default=1, help_text="Unidades del producto en el carrito")
+    segmento = models.CharField(max_length=10, choices=promociones.SEGMENTOS, default=promociones.TODOS)
+    desde = models.DateTimeField(blank=True, null=True)
+    hasta = models.DateTimeField(blank=True, null=True)
+    acumulable = models.BooleanField(default=False, help_text="Se aplica además del mayor descuento no acumulable")
+    activa = models.BooleanField(default=True)
+    actualizada = models.DateTimeField(auto_now=True)  # forma parte de la versión de las reglas
+
+    class Meta:
+        verbose_name_plural = 'promociones'
+
+    def __str__(self):
+        return f'{self.nombre} ({self.porcentaje}%)'
+
+    def clean(self):
+        if self.sku and self.categoria_id:
+            raise ValidationError('Una promoción es por SKU o por categoría, no ambas.')
+        if self.desde and self.hasta and self.desde >= self.hasta:
+            raise ValidationError('La fecha de término debe ser posterior a la de inicio.')
 
 class Subscriber(models.Model):
     email = models.EmailField(unique=True)
@@ -46,3 +182,44 @@ class Subscriber(models.Model):
 
     def __str__(self):
         return self.email
+
+class Trabajo(models.Model):
+    """
+    Trabajo de la cola persistente (`app.infrastructure.cola`). Lo encolan
+    Django y la API FastAPI; lo ejecuta `procesar_trabajos`. Los terminados se
+    borran: en la tabla quedan los pendientes, los en curso y los fallidos.
+    Las fechas son segundos Unix (`time.time()`), como las escribe el trabajador.
+    """
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    FALLIDO = 'fallido'
+    ESTADOS = [(PENDIENTE, 'Pendiente'), (EN_CURSO, 'En curso'), (FALLIDO, 'Fallido')]
+
+    cola = models.CharField(max_length=50, default='default')
+    tarea = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict)
+    prioridad = models.IntegerField(default=0)  # mayor primero
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    # Desde cuándo se puede tomar: programado, espera entre reintentos o fin de la visibilidad.
+    disponible_en = models.FloatField()
+    intentos = models.IntegerField(default=0)
+    max_intentos = models.IntegerField(default=5)
+    periodo = models.FloatField(blank=True, null=True)  # segundos; si está, es recurrente
+    clave = models.CharField(max_length=100, blank=True, null=True)  # un solo pendiente por clave
+    token = models.CharField(max_length=32, blank=True, null=True)  # de la reserva vigente
+    error = models.TextField(blank=True, null=True)  # del último intento fallido
+    creado_en = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # El trabajador toma por cola, prioridad y antigüedad; los fallidos no entran al índice.
+            models.Index(fields=['cola', '-prioridad', 'disponible_en'], name='app_trabajo_disponibles',
+                         condition=models.Q(estado__in=['pendiente', 'en_curso'])),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['clave'], condition=models.Q(estado='pendiente'),
+                                    name='app_trabajo_clave_pendiente'),
+        ]
+
+    def __str__(self):
+        return f'{self.tarea} #{self.id} ({self.estado})'
@@ -0,0 +1,31 @@
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class FiltroProductos:
+    """Qué productos se modifican. Los criterios se combinan con AND; vacío = todo el catálogo."""
+    categoria_id: Optional[int] = None
+    ids: Optional[List[int]] = None
+    stock_max: Optional[int] = None  # stock <= stock_max (0 = sin stock)
+    en_venta: Optional[bool] = None
+
+
+@dataclass(frozen=True)
+class CambiosProductos:
+    """Qué se cambia. `precio_porcentaje` ajusta el precio actual (5 = +5 %, -10 = -10 %)."""
+    descuento: Optional[Decimal] = None
+    precio_porcentaje: Optional[Decimal] = None
+    en_venta: Optional[bool] = None
+    stock: Optional[int] = None
+
+    def validar(self):
+        if all(getattr(self, campo.name) is None for campo in fields(self)):
+            raise ValueError('No se indicó ningún cambio')
+        if self.descuento is not None and not 0 <= self.descuento <= 100:
+            raise ValueError('El descuento debe estar entre 0 y 100')
+        if self.precio_porcentaje is not None and self.precio_porcentaje <= -100:
+            raise ValueError('El ajuste de precio debe ser mayor a -100 %')
+        if self.stock is not None and self.stock < 0:
+            raise ValueError('El stock no puede ser negativo')
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+from ferramas_comun.lecturas import TAMANO_TANDA, ProductoLectura
 from app.domain.models import Producto, Categoria
+from app.domain.operaciones_masivas import FiltroProductos, CambiosProductos
 
 
 class ProductoRepositoryInterface(ABC):
@@ -16,17 +18,48 @@ class ProductoRepositoryInterface(ABC):
     def get_by_categoria(self, categoria: Categoria, en_venta: bool = True) -> List[Producto]:
         pass
     
+    @abstractmethod
+    def get_many(self, producto_ids: Iterable[int]) -> Dict[int, Producto]:
+        """Productos de `producto_ids` (con su categoría) en una consulta, por id; los que no existen no aparecen."""
+        pass
+    
+    @abstractmethod
+    def listar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None) -> List[ProductoLectura]:
+        """Productos de solo lectura (con su categoría) ordenados por id, para listados."""
+        pass
+    
+    @abstractmethod
+    def iterar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None,
+               tamano: int = TAMANO_TANDA) -> Iterator[ProductoLectura]:
+        """Como `listar`, pero leídos de a `tamano` filas: la memoria no depende del tamaño del catálogo."""
+        pass
+    
     @abstractmethod
     def create(self, producto_data: dict) -> Producto:
         pass
     
+    @abstractmethod
+    def bulk_create(self, productos_data: List[dict]) -> List[Producto]:
+        """Crea todos los productos con INSERTs por lote; devuelve los modelos con su id."""
+        pass
+    
     @abstractmethod
     def update(self, producto_id: int, producto_data: dict) -> Optional[Producto]:
         pass
     
+    @abstractmethod
+    def bulk_update(self, cambios: Dict[int, dict]) -> int:
+        """`cambios`: producto_id -> campos nuevos. Devuelve cuántos productos existían y se actualizaron."""
+        pass
+    
     @abstractmethod
     def delete(self, producto_id: int) -> bool:
         pass
+    
+    @abstractmethod
+    def update_masivo(self, filtro: FiltroProductos, cambios: CambiosProductos, dry_run: bool = False) -> int:
+        """Aplica `cambios` a todos los productos de `filtro`; devuelve cuántos son (o serían) afectados."""
+        pass
 
 
 class CategoriaRepositoryInterface(ABC):
@@ -38,6 +71,11 @@ class CategoriaRepositoryInterface(ABC):
     def get_by_id(self, categoria_id: int) -> Optional[Categoria]:
         pass
     
+    @abstractmethod
+    def get_many(self, categoria_ids: Iterable[int]) -> Dict[int, Categoria]:
+        """Categorías de `categoria_ids` en una consulta, por id; las que no existen no aparecen."""
+        pass
+    
     @abstractmethod
     def get_by_name(self, nombre: str) -> Optional[Categoria]:
         pass
@@ -45,3 +83,12 @@ class CategoriaRepositoryInterface(ABC):
     @abstractmethod
     def create(self, categoria_data: dict) -> Categoria:
         pass
+    
+    @abstractmethod
+    def bulk_create(self, categorias_data: List[dict]) -> List[Categoria]:
+        pass
+    
+    @abstractmethod
+    def bulk_update(self, cambios: Dict[int, dict]) -> int:
+        """`cambios`: categoria_id -> campos nuevos. Devuelve cuántas categorías existían y se actualizaron."""
+        pass
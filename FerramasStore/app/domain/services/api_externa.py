@@ -3,7 +3,7 @@ import requests
 API_BASE = "http://127.0.0.1:8001"
 
 def crear_preferencia_pago(data: dict) -> dict:
-    url = f"{API_BASE}/mercado-pago/crear"
+    url = f"{API_BASE}/mercado-pago/crear-pago"
     response = requests.post(url, json=data)
     response.raise_for_status()
     return response.json()
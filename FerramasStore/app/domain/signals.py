@@ -1,9 +1,19 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
 from django.contrib.auth.models import User
-from .models import Usuario
+from .models import Usuario, Producto, Categoria
+
+# Se envía después de cualquier escritura del catálogo (incluidas las masivas,
+# que no disparan post_save). Los caches derivados se suscriben a esta señal.
+catalogo_modificado = Signal()
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     if created:
-        Usuario.objects.create(user=instance)
+        # `register` deja el teléfono en el User para crear el perfil completo con un solo INSERT.
+        Usuario.objects.create(user=instance, telefono=getattr(instance, 'telefono', None))
+
+@receiver([post_save, post_delete], sender=Producto)
+@receiver([post_save, post_delete], sender=Categoria)
+def notificar_cambio_catalogo(sender, instance, **kwargs):
+    catalogo_modificado.send(sender=sender, instancias=[instance])
@@ -0,0 +1,49 @@
+"""
+Usuario autenticado sin consultar la base en cada request.
+
+`AuthenticationMiddleware` llama a `get_user(id)` en cada request con sesión.
+Este backend guarda el `User`, junto con su perfil `Usuario`, en la caché de
+sesiones y lo borra cuando cualquiera de los dos se guarda o se elimina:
+cambiar la contraseña, dar de baja al usuario o editar el perfil se ve en el
+request siguiente. Con Redis eso vale para todos los workers; sin él, la caché
+es de cada worker y los demás lo ven al vencer `USUARIO_CACHE_TTL` (ver
+`settings.CACHES`). Los permisos y grupos no se guardan; se consultan, como
+siempre, solo donde se usan (el admin).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+
+from app.domain.models import Usuario
+
+
+def _clave(user_id) -> str:
+    # Con el nombre de la base: dos instalaciones (o los tests) que comparten un Redis no se pisan.
+    return f"usuario:{connections['default'].settings_dict['NAME']}:{user_id}"
+
+
+def _cache():
+    return caches['sesiones']
+
+
+class BackendUsuariosCacheados(ModelBackend):
+    def get_user(self, user_id):
+        user = _cache().get(_clave(user_id))
+        if user is None:
+            user = User._default_manager.select_related('usuario').filter(pk=user_id).first()
+            if user is None:
+                return None
+            _cache().set(_clave(user_id), user, settings.USUARIO_CACHE_TTL)
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidar_usuario(sender, instance, **kwargs):
+    _cache().delete(_clave(instance.pk if sender is User else instance.user_id))
+
+
+for _modelo in (User, Usuario):
+    post_save.connect(invalidar_usuario, sender=_modelo, dispatch_uid=f'invalidar_usuario_{_modelo.__name__}')
+    post_delete.connect(invalidar_usuario, sender=_modelo, dispatch_uid=f'invalidar_usuario_{_modelo.__name__}_baja')
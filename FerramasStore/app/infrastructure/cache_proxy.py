@@ -0,0 +1,167 @@
+"""
+Integración con un proxy inverso con caché (Varnish, Fastly, nginx).
+
+- Cada respuesta del catálogo lleva el header `Surrogate-Key` con las claves de
+  lo que contiene: `producto-<id>`, `categoria-<id>`, `productos` (listados de
+  todo el catálogo), `categorias` y `catalogo` (todas). `PoliticasCacheMiddleware`
+  agrega el `Cache-Control` de la ruta según `settings.POLITICAS_CACHE`.
+- Cada escritura del catálogo (`catalogo_modificado`) purga, después del
+  commit, solo las claves afectadas: `DespachadorPurgas` las junta y las manda
+  en un hilo de fondo a `settings.PURGA_CACHE_URL` (vacío = no se purga).
+
+Misma idea que `api/app/core/cache_proxy.py`.
+"""
+import threading
+import time
+from typing import Iterable, Optional, Set, Tuple
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+from app.domain.models import Categoria, Producto
+from app.domain.signals import catalogo_modificado
+
+HEADER = 'Surrogate-Key'
+CATALOGO = 'catalogo'
+PRODUCTOS = 'productos'
+CATEGORIAS = 'categorias'
+# Con más productos en una respuesta se usa `productos` en vez de una clave por producto (el header tiene límite).
+MAXIMO_CLAVES_PRODUCTO = 100
+# Claves por purga: Fastly acepta hasta 256 en un mismo request.
+LOTE_PURGA = 256
+
+
+def clave_producto(producto_id: int) -> str:
+    return f'producto-{producto_id}'
+
+
+def clave_categoria(categoria_id: int) -> str:
+    return f'categoria-{categoria_id}'
+
+
+def claves_productos(pares: Iterable[Tuple[int, int]]) -> Set[str]:
+    """Claves de una respuesta con los productos (id, categoria_id) de `pares`."""
+    pares = list(pares)
+    claves = {CATALOGO}
+    claves.update(clave_categoria(categoria_id) for _, categoria_id in pares if categoria_id is not None)
+    if len(pares) > MAXIMO_CLAVES_PRODUCTO:
+        claves.add(PRODUCTOS)
+    else:
+        claves.update(clave_producto(producto_id) for producto_id, _ in pares)
+    return claves
+
+
+def claves_categorias(categoria_ids: Iterable[int]) -> Set[str]:
+    return {CATALOGO, CATEGORIAS, *(clave_categoria(categoria_id) for categoria_id in categoria_ids)}
+
+
+def etiquetar(response, claves: Iterable[str]):
+    response[HEADER] = ' '.join(sorted(claves))
+    return response
+
+
+def claves_a_purgar(sender, instancias: Optional[Iterable] = None) -> Set[str]:
+    """Claves que invalida una escritura; sin instancias (updates masivos) se purga todo el catálogo."""
+    if instancias is None:
+        return {CATALOGO}
+    claves = set()
+    for instancia in instancias:
+        if isinstance(instancia, Producto):
+            claves.update((PRODUCTOS, clave_producto(instancia.pk), clave_categoria(instancia.categoria_id)))
+        elif isinstance(instancia, Categoria):
+            claves.update((CATEGORIAS, clave_categoria(instancia.pk)))
+    return claves
+
+
+class DespachadorPurgas:
+    """
+    Manda las purgas en un hilo de fondo. Las claves de escrituras seguidas
+    (`espera` segundos) se juntan en un solo request. Si el proxy no responde se
+    reintenta `reintentos` veces; después se descartan y lo guardado dura, como
+    mucho, el `s-maxage` de su ruta.
+    """
+
+    def __init__(self, url: str, metodo: str = 'POST', espera: float = 0.05, timeout: float = 2.0,
+                 reintentos: int = 3, espera_reintento: float = 1.0):
+        self.url = url
+        self.metodo = metodo
+        self.espera = espera
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_reintento = espera_reintento
+        self._claves: Set[str] = set()
+        self._cambio = threading.Condition()
+        self._hilo = None
+
+    def purgar(self, claves: Iterable[str]):
+        with self._cambio:
+            self._claves.update(claves)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='purgas-cache', daemon=True)
+                self._hilo.start()
+
+    def esperar(self, timeout: float = 5.0) -> bool:
+        """True cuando no quedan purgas por mandar (para los tests y al apagar)."""
+        limite = time.monotonic() + timeout
+        with self._cambio:
+            while self._hilo is not None:
+                queda = limite - time.monotonic()
+                if queda <= 0:
+                    return False
+                self._cambio.wait(queda)
+        return True
+
+    def _bucle(self):
+        fallas = 0
+        while True:
+            time.sleep(self.espera_reintento * fallas if fallas else self.espera)
+            with self._cambio:
+                claves, self._claves = sorted(self._claves), set()
+            if self._enviar(claves):
+                fallas = 0
+            elif fallas < self.reintentos:
+                fallas += 1
+                with self._cambio:
+                    self._claves.update(claves)
+            else:
+                fallas = 0
+            with self._cambio:
+                if not self._claves:
+                    self._hilo = None
+                    self._cambio.notify_all()
+                    return
+
+    def _enviar(self, claves) -> bool:
+        try:
+            for inicio in range(0, len(claves), LOTE_PURGA):
+                respuesta = requests.request(self.metodo, self.url, timeout=self.timeout,
+                                             headers={HEADER: ' '.join(claves[inicio:inicio + LOTE_PURGA])})
+                respuesta.raise_for_status()
+        except requests.RequestException:
+            return False
+        return True
+
+
+_despachador: Optional[DespachadorPurgas] = None
+
+
+def despachador() -> Optional[DespachadorPurgas]:
+    global _despachador
+    url = getattr(settings, 'PURGA_CACHE_URL', '')
+    if not url:
+        return None
+    if _despachador is None or _despachador.url != url:
+        _despachador = DespachadorPurgas(url, getattr(settings, 'PURGA_CACHE_METODO', 'POST'))
+    return _despachador
+
+
+def purgar_cambios(sender, instancias=None, **kwargs):
+    destino = despachador()
+    if destino is not None:
+        claves = claves_a_purgar(sender, instancias)
+        # Se purga lo ya confirmado: si se purgara antes, el proxy podría volver a guardar la versión vieja.
+        transaction.on_commit(lambda: destino.purgar(claves))
+
+
+catalogo_modificado.connect(purgar_cambios, dispatch_uid='purgas_cache_proxy')
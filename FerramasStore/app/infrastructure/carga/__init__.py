@@ -0,0 +1 @@
+# Load testing
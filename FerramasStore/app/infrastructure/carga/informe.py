@@ -0,0 +1,155 @@
+"""
+Resultados de una prueba de carga: requests por segundo, percentiles de
+latencia y tasa de errores por paso, comparados contra los SLO.
+
+Los percentiles son exactos (se guardan todas las latencias): una prueba de
+unos minutos son a lo más unos cientos de miles de números.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+TOTAL = 'total'
+
+
+@dataclass(frozen=True)
+class Slo:
+    p95: float  # segundos
+    errores: float = 0.01  # fracción máxima de requests con error
+
+
+# Referencia: el catálogo por defecto de `generar_catalogo` (10.000 productos), 10 usuarios y `runserver`,
+# con margen. Una página de categoría y `/productos/` de la API devuelven la categoría o el catálogo
+# completos: son los pasos más lentos. `pagar` incluye la latencia de Mercado Pago (0,3 s de mediana).
+SLO_POR_DEFECTO: Dict[str, Slo] = {
+    'portada': Slo(0.2),
+    'categoria': Slo(8.0),
+    'sugerir': Slo(0.1),
+    'listado': Slo(0.3),
+    'listado_api': Slo(2.0),
+    'vitrina': Slo(0.6),
+    'cotizar': Slo(0.3),
+    'checkout': Slo(0.2),
+    'pagar': Slo(1.5, errores=0.02),
+    'dolar': Slo(0.5),
+    TOTAL: Slo(2.5),
+}
+
+
+def percentil(ordenadas: List[float], p: float) -> float:
+    """Percentil `p` (0-100) por rango más cercano de una lista ya ordenada."""
+    if not ordenadas:
+        return 0.0
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+class ResumenPaso(NamedTuple):
+    paso: str
+    requests: int
+    errores: int
+    rps: float
+    p50: float
+    p95: float
+    p99: float
+    maximo: float
+
+    @property
+    def tasa_errores(self) -> float:
+        return self.errores / self.requests if self.requests else 0.0
+
+
+class Registro:
+    """Latencias y errores por paso, de todos los usuarios (hilos)."""
+
+    def __init__(self):
+        self._latencias: Dict[str, List[float]] = defaultdict(list)
+        self._errores: Dict[str, int] = defaultdict(int)
+        self._causas: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.inicio: Optional[float] = None
+        self.fin: Optional[float] = None
+
+    def abrir(self):
+        """Empieza la medición (lo anterior era calentamiento y no cuenta)."""
+        with self._lock:
+            self._latencias.clear()
+            self._errores.clear()
+            self._causas.clear()
+            self.inicio = time.monotonic()
+
+    def cerrar(self):
+        self.fin = time.monotonic()
+
+    def anotar(self, paso: str, segundos: float, error: Optional[str] = None):
+        with self._lock:
+            if self.inicio is None:
+                return
+            self._latencias[paso].append(segundos)
+            if error:
+                self._errores[paso] += 1
+                self._causas[f'{paso}: {error}'] += 1
+
+    @property
+    def duracion(self) -> float:
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.monotonic()) - self.inicio
+
+    def causas(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._causas.items(), key=lambda item: -item[1]))
+
+    def resumen(self) -> List[ResumenPaso]:
+        with self._lock:
+            latencias = {paso: sorted(valores) for paso, valores in self._latencias.items()}
+            errores = dict(self._errores)
+        latencias[TOTAL] = sorted(valor for valores in latencias.values() for valor in valores)
+        errores[TOTAL] = sum(errores.values())
+        duracion = max(self.duracion, 1e-9)
+        return [
+            ResumenPaso(paso, len(valores), errores.get(paso, 0), len(valores) / duracion,
+                        percentil(valores, 50), percentil(valores, 95), percentil(valores, 99),
+                        valores[-1] if valores else 0.0)
+            for paso, valores in sorted(latencias.items(), key=lambda item: (item[0] == TOTAL, item[0]))
+        ]
+
+
+def evaluar(resumenes: List[ResumenPaso], slos: Dict[str, Slo]) -> List[str]:
+    """Incumplimientos de los SLO; vacía si todo está dentro."""
+    incumplidos = []
+    for resumen in resumenes:
+        slo = slos.get(resumen.paso)
+        if slo is None or not resumen.requests:
+            continue
+        if resumen.p95 > slo.p95:
+            incumplidos.append(f'{resumen.paso}: p95 {resumen.p95 * 1000:.0f} ms > {slo.p95 * 1000:.0f} ms')
+        if resumen.tasa_errores > slo.errores:
+            incumplidos.append(f'{resumen.paso}: errores {resumen.tasa_errores:.1%} > {slo.errores:.1%}')
+    return incumplidos
+
+
+def tabla(resumenes: List[ResumenPaso], slos: Dict[str, Slo]) -> str:
+    lineas = [f"{'paso':<12} {'requests':>8} {'req/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+              f"{'máx ms':>7} {'errores':>8}  SLO (p95 / errores)"]
+    for r in resumenes:
+        slo = slos.get(r.paso)
+        objetivo = f'{slo.p95 * 1000:.0f} ms / {slo.errores:.1%}' if slo else '-'
+        lineas.append(f'{r.paso:<12} {r.requests:>8} {r.rps:>7.1f} {r.p50 * 1000:>7.0f} {r.p95 * 1000:>7.0f} '
+                      f'{r.p99 * 1000:>7.0f} {r.maximo * 1000:>7.0f} {r.tasa_errores:>8.1%}  {objetivo}')
+    return '\n'.join(lineas)
+
+
+def leer_slos(textos: List[str], base: Dict[str, Slo] = None) -> Dict[str, Slo]:
+    """`paso=p95_ms` o `paso=p95_ms:errores_%` (p. ej. `pagar=2000:5`) sobre los SLO de `base`."""
+    slos = dict(SLO_POR_DEFECTO if base is None else base)
+    for texto in textos:
+        paso, _, valor = texto.partition('=')
+        p95, _, errores = valor.partition(':')
+        try:
+            slos[paso.strip()] = Slo(float(p95) / 1000, float(errores) / 100 if errores else Slo(0).errores)
+        except ValueError:
+            raise ValueError(f"SLO inválido: '{texto}' (se espera paso=p95_ms[:errores_%])") from None
+    return slos
@@ -0,0 +1,107 @@
+"""
+Levanta Django y la API en subprocesos locales para una prueba de carga.
+
+La API se inicia con uvicorn apuntando a los upstreams falsos
+(`MINDICADOR_URL`, `MERCADOPAGO_URL`) y Django con `runserver` apuntando a esa
+API (`API_EXTERNA_BASE`). Los dos usan la base configurada, u otra con `base`
+(`DATABASE_URL`, con su propio snapshot al lado): el tráfico de la prueba solo
+lee el catálogo, y los pagos terminan en el Mercado Pago falso.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+
+DIRECTORIO_API = Path(settings.BASE_DIR).parent / 'api'
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ServicioLocal:
+    """Un subproceso HTTP; `iniciar()` vuelve cuando `url + ruta_salud` responde."""
+
+    def __init__(self, nombre: str, comando: List[str], directorio: Path, puerto: int,
+                 entorno: Dict[str, str] = None, ruta_salud: str = '/'):
+        self.nombre = nombre
+        self.comando = comando
+        self.directorio = directorio
+        self.puerto = puerto
+        self.entorno = {**os.environ, **(entorno or {})}
+        self.ruta_salud = ruta_salud
+        self._log = tempfile.TemporaryFile()
+        self._proceso = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.puerto}'
+
+    def iniciar(self, espera: float = 60.0):
+        self._proceso = subprocess.Popen(self.comando, cwd=self.directorio, env=self.entorno,
+                                         stdout=subprocess.DEVNULL, stderr=self._log)
+        limite = time.monotonic() + espera
+        while time.monotonic() < limite:
+            if self._proceso.poll() is not None:
+                raise RuntimeError(f'{self.nombre} terminó al iniciar:\n{self.salida()}')
+            try:
+                if requests.get(self.url + self.ruta_salud, timeout=1).status_code < 500:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        self.detener()
+        raise RuntimeError(f'{self.nombre} no respondió en {espera:.0f} s:\n{self.salida()}')
+
+    def detener(self):
+        if self._proceso is not None and self._proceso.poll() is None:
+            self._proceso.terminate()
+            try:
+                self._proceso.wait(10)
+            except subprocess.TimeoutExpired:
+                self._proceso.kill()
+                self._proceso.wait()
+
+    def salida(self, lineas: int = 30) -> str:
+        self._log.seek(0)
+        return '\n'.join(self._log.read().decode(errors='replace').splitlines()[-lineas:])
+
+
+def entorno_base(base: Optional[str]) -> Dict[str, str]:
+    if not base:
+        return {}
+    ruta = Path(base).resolve()
+    return {'DATABASE_URL': f'sqlite:///{ruta}', 'CATALOGO_SNAPSHOT': str(ruta.with_suffix('.snap'))}
+
+
+def api(mindicador_url: str, mercadopago_url: str, workers: int = 1, base: str = None) -> ServicioLocal:
+    puerto = puerto_libre()
+    return ServicioLocal(
+        'API (uvicorn)',
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(puerto),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log',
+         # Como detrás de un proxy: los clientes reutilizan la conexión entre pasos sin que se cierre antes.
+         '--timeout-keep-alive', '75'],
+        DIRECTORIO_API, puerto,
+        {'MINDICADOR_URL': mindicador_url, 'MERCADOPAGO_URL': mercadopago_url, **entorno_base(base)},
+        ruta_salud='/productos/categorias/',
+    )
+
+
+def django(api_url: str, base: str = None) -> ServicioLocal:
+    puerto = puerto_libre()
+    return ServicioLocal(
+        'Django (runserver)',
+        [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{puerto}', '--noreload'],
+        Path(settings.BASE_DIR), puerto,
+        {'API_EXTERNA_BASE': api_url, **entorno_base(base)},
+    )
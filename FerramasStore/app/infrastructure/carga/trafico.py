@@ -0,0 +1,217 @@
+"""
+Tráfico de una prueba de carga en lazo cerrado.
+
+Cada usuario virtual es un hilo con su propia sesión HTTP: elige un escenario
+según la mezcla (`MEZCLA_POR_DEFECTO`), ejecuta sus pasos en orden con una
+pausa entre uno y otro (`pensar`, exponencial) y vuelve a empezar. Como cada
+usuario espera su respuesta antes de seguir, el sistema recibe tanta carga
+como puede atender: si se pone lento, baja el throughput en vez de acumularse
+una cola infinita, y eso es lo que se compara entre versiones.
+
+Escenarios:
+- navegar: portada, una página de categoría y un autocompletado.
+- listar: una página de `/api/productos/` (Django), `/productos/` de la API y la vitrina.
+- cotizar: cotización de un carrito de 1 a 5 productos.
+- comprar: checkout, cotización y pago (Django -> API -> Mercado Pago). El pago
+  exige sesión: con `credenciales`, cada usuario virtual entra por el
+  formulario de login antes de empezar, fuera de la medición.
+- dolar: página del valor del dólar (Django -> API -> mindicador).
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from django.urls import reverse
+
+from app.infrastructure.carga.informe import Registro
+
+PAGINAS_CATEGORIA = [
+    'herra_manuales', 'materiales_basicos', 'equipos_seguridad',
+    'tornillos_anclaje', 'fijaciones', 'equipos_medicion',
+]
+MEZCLA_POR_DEFECTO = {'navegar': 45, 'listar': 25, 'cotizar': 15, 'comprar': 10, 'dolar': 5}
+# Páginas del listado que se traen al inicio para armar carritos y búsquedas.
+PAGINAS_MUESTRA = 5
+
+
+@dataclass
+class Destinos:
+    django: str
+    api: str
+
+
+@dataclass
+class Catalogo:
+    productos: List[dict] = field(default_factory=list)  # {id, nombre, precio} de una muestra
+    paginas: int = 1  # páginas de /api/productos/
+
+
+def descubrir_catalogo(destinos: Destinos, timeout: float = 10.0) -> Catalogo:
+    """Muestra de productos (las primeras páginas del listado de Django) para los escenarios."""
+    catalogo = Catalogo()
+    with requests.Session() as sesion:
+        for pagina in range(1, PAGINAS_MUESTRA + 1):
+            respuesta = sesion.get(f'{destinos.django}{reverse("producto-list")}', params={'page': pagina},
+                                   timeout=timeout)
+            if respuesta.status_code != 200:
+                break
+            datos = respuesta.json()
+            if pagina == 1:
+                catalogo.paginas = max(1, -(-datos['count'] // max(len(datos['results']), 1)))
+            catalogo.productos.extend({'id': p['id'], 'nombre': p['nombre'], 'precio': p['precio']}
+                                      for p in datos['results'])
+            if not datos.get('next'):
+                break
+    return catalogo
+
+
+class Usuario:
+    """Un usuario virtual; los pasos anotan su latencia en el `Registro` compartido."""
+
+    def __init__(self, destinos: Destinos, catalogo: Catalogo, registro: Registro, azar: random.Random,
+                 timeout: float, credenciales: Optional[Tuple[str, str]] = None):
+        self.destinos = destinos
+        self.credenciales = credenciales
+        self.catalogo = catalogo
+        self.registro = registro
+        self.azar = azar
+        self.timeout = timeout
+        self.sesion = requests.Session()
+
+    def pedir(self, paso: str, metodo: str, url: str, **kwargs) -> requests.Response:
+        inicio = time.perf_counter()
+        respuesta, error = None, None
+        try:
+            respuesta = self.sesion.request(metodo, url, timeout=self.timeout, **kwargs)
+            # El cuerpo también cuenta: se lee entero antes de parar el reloj.
+            respuesta.content
+            if respuesta.status_code >= 400:
+                error = f'HTTP {respuesta.status_code}'
+        except requests.Timeout:
+            error = 'timeout'
+        except requests.RequestException as e:
+            error = type(e).__name__
+        self.registro.anotar(paso, time.perf_counter() - inicio, error)
+        return respuesta
+
+    def iniciar_sesion(self):
+        """Entra por el formulario de login, como el navegador; la sesión y el token CSRF quedan en `sesion`."""
+        url = f'{self.destinos.django}{reverse("login")}'
+        self.sesion.get(url, timeout=self.timeout)
+        usuario, clave = self.credenciales
+        respuesta = self.sesion.post(url, data={
+            'usuario': usuario, 'password': clave, 'csrfmiddlewaretoken': self.sesion.cookies.get('csrftoken', ''),
+        }, allow_redirects=False, timeout=self.timeout)
+        if respuesta.status_code != 302:
+            raise RuntimeError(f"No se pudo iniciar sesión como '{usuario}' (HTTP {respuesta.status_code}).")
+
+    def _producto(self) -> dict:
+        return self.azar.choice(self.catalogo.productos)
+
+    def _carrito(self) -> dict:
+        productos = self.azar.sample(self.catalogo.productos, min(len(self.catalogo.productos), self.azar.randint(1, 5)))
+        return {'items': [{'id': p['id'], 'cantidad': self.azar.randint(1, 3)} for p in productos]}
+
+    # Pasos
+    def portada(self):
+        self.pedir('portada', 'GET', f'{self.destinos.django}{reverse("index")}')
+
+    def categoria(self):
+        self.pedir('categoria', 'GET', f'{self.destinos.django}{reverse(self.azar.choice(PAGINAS_CATEGORIA))}')
+
+    def sugerir(self):
+        if self.catalogo.productos:
+            prefijo = self._producto()['nombre'].split()[0][:self.azar.randint(2, 4)]
+            self.pedir('sugerir', 'GET', f'{self.destinos.django}{reverse("sugerir_productos")}', params={'q': prefijo})
+
+    def listado(self):
+        pagina = self.azar.randint(1, min(self.catalogo.paginas, 50))
+        self.pedir('listado', 'GET', f'{self.destinos.django}{reverse("producto-list")}', params={'page': pagina})
+
+    def listado_api(self):
+        self.pedir('listado_api', 'GET', f'{self.destinos.api}/productos/')
+
+    def vitrina(self):
+        self.pedir('vitrina', 'GET', f'{self.destinos.api}/vitrina/',
+                   params={'limite': 24, 'offset': 24 * self.azar.randint(0, 9)})
+
+    def cotizar(self):
+        if self.catalogo.productos:
+            self.pedir('cotizar', 'POST', f'{self.destinos.django}{reverse("cotizar_carrito")}', json=self._carrito())
+
+    def checkout(self):
+        self.pedir('checkout', 'GET', f'{self.destinos.django}{reverse("checkout")}')
+
+    def pagar(self):
+        producto = self._producto() if self.catalogo.productos else {'nombre': 'Producto de prueba', 'precio': 1000}
+        self.pedir('pagar', 'POST', f'{self.destinos.django}{reverse("crear_pago_externo")}', json={
+            'title': producto['nombre'], 'quantity': self.azar.randint(1, 3), 'unit_price': float(producto['precio']),
+        }, headers={'X-CSRFToken': self.sesion.cookies.get('csrftoken', '')})
+
+    def dolar(self):
+        self.pedir('dolar', 'GET', f'{self.destinos.django}{reverse("valor_dolar_page")}')
+
+
+ESCENARIOS: Dict[str, List[Callable[[Usuario], None]]] = {
+    'navegar': [Usuario.portada, Usuario.categoria, Usuario.sugerir],
+    'listar': [Usuario.listado, Usuario.listado_api, Usuario.vitrina],
+    'cotizar': [Usuario.cotizar],
+    'comprar': [Usuario.checkout, Usuario.cotizar, Usuario.pagar],
+    'dolar': [Usuario.dolar],
+}
+
+
+def leer_mezcla(texto: str) -> Dict[str, float]:
+    """`navegar=45,listar=25,...`; los escenarios que no aparecen no se ejecutan."""
+    mezcla = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        nombre, _, peso = parte.partition('=')
+        if nombre not in ESCENARIOS:
+            raise ValueError(f"Escenario desconocido: '{nombre}' (hay {', '.join(ESCENARIOS)})")
+        mezcla[nombre] = float(peso or 1)
+    if not mezcla or sum(mezcla.values()) <= 0:
+        raise ValueError('La mezcla no tiene escenarios con peso')
+    return mezcla
+
+
+def ejecutar(destinos: Destinos, catalogo: Catalogo, usuarios: int, duracion: float, calentamiento: float = 0.0,
+             pensar: float = 0.5, mezcla: Dict[str, float] = None, semilla: int = 1,
+             timeout: float = 10.0, credenciales: Optional[Tuple[str, str]] = None) -> Registro:
+    """Corre `usuarios` usuarios durante `calentamiento` + `duracion` segundos; mide solo `duracion`."""
+    mezcla = mezcla or MEZCLA_POR_DEFECTO
+    nombres, pesos = list(mezcla), list(mezcla.values())
+    registro = Registro()
+    virtuales = [Usuario(destinos, catalogo, registro, random.Random(semilla * 10_007 + numero), timeout, credenciales)
+                 for numero in range(usuarios)]
+    if credenciales:
+        for virtual in virtuales:
+            virtual.iniciar_sesion()
+    fin = time.monotonic() + calentamiento + duracion
+
+    def usuario(virtual: Usuario):
+        azar = virtual.azar
+        with virtual.sesion:
+            while time.monotonic() < fin:
+                for paso in ESCENARIOS[azar.choices(nombres, pesos)[0]]:
+                    if time.monotonic() >= fin:
+                        break
+                    paso(virtual)
+                    if pensar > 0:
+                        time.sleep(min(azar.expovariate(1 / pensar), max(0.0, fin - time.monotonic())))
+
+    hilos = [threading.Thread(target=usuario, args=(virtual,), name=f'usuario-{numero}', daemon=True)
+             for numero, virtual in enumerate(virtuales)]
+    if not calentamiento:
+        registro.abrir()
+    for hilo in hilos:
+        hilo.start()
+    if calentamiento:
+        time.sleep(calentamiento)
+        registro.abrir()
+    for hilo in hilos:
+        hilo.join()
+    registro.cerrar()
+    return registro
@@ -0,0 +1,126 @@
+"""
+Servidores locales que reemplazan a mindicador.cl y a Mercado Pago en las
+pruebas de carga.
+
+Cada uno responde con la forma que espera la API (`serie` del dólar,
+`init_point` de una preferencia) después de una latencia simulada, y falla con
+la probabilidad `errores` (un 500, o se queda sin responder si `colgar` es
+True, para ejercitar los plazos). Corren en hilos dentro del proceso que los
+crea; `url` es la base que se le pasa a la API (`MINDICADOR_URL`,
+`MERCADOPAGO_URL`).
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class Comportamiento:
+    latencia: float = 0.05  # segundos, mediana
+    dispersion: float = 0.3  # sigma de la lognormal: unas pocas respuestas tardan varias veces la mediana
+    errores: float = 0.0  # probabilidad de responder 500
+    colgar: float = 0.0  # probabilidad de no responder nunca (el cliente corta por timeout)
+
+    def demora(self, azar: random.Random) -> float:
+        if self.latencia <= 0:
+            return 0.0
+        return azar.lognormvariate(0, self.dispersion) * self.latencia
+
+
+class UpstreamFalso:
+    """Base: atiende cada request en su hilo, con la demora y los errores de `comportamiento`."""
+
+    def __init__(self, comportamiento: Comportamiento = None, semilla: int = None):
+        self.comportamiento = comportamiento or Comportamiento()
+        self.atendidos = 0
+        self.fallados = 0
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._cerrado = threading.Event()
+        upstream = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                upstream._atender(self)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._servidor.server_port}'
+
+    def cerrar(self):
+        self._cerrado.set()
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def responder(self, metodo: str, ruta: str, cuerpo: bytes):
+        """(status, objeto JSON) para un request que no falló; lo define cada upstream."""
+        raise NotImplementedError
+
+    def _atender(self, manejador):
+        largo = int(manejador.headers.get('Content-Length') or 0)
+        cuerpo = manejador.rfile.read(largo) if largo else b''
+        with self._lock:
+            self.atendidos += 1
+            demora = self.comportamiento.demora(self._azar)
+            sorteo = self._azar.random()
+        if sorteo < self.comportamiento.colgar:
+            # Sin respuesta hasta que se cierre el servidor: quien llama corta por su timeout.
+            self._cerrado.wait()
+            return
+        time.sleep(demora)
+        if sorteo < self.comportamiento.colgar + self.comportamiento.errores:
+            with self._lock:
+                self.fallados += 1
+            status, datos = 500, {'message': 'Error simulado'}
+        else:
+            status, datos = self.responder(manejador.command, manejador.path, cuerpo)
+        contenido = json.dumps(datos).encode()
+        manejador.send_response(status)
+        manejador.send_header('Content-Type', 'application/json')
+        manejador.send_header('Content-Length', str(len(contenido)))
+        manejador.end_headers()
+        manejador.wfile.write(contenido)
+
+
+class MindicadorFalso(UpstreamFalso):
+    """`GET /dolar` como https://mindicador.cl/api/dolar (se usa con `MINDICADOR_URL=<url>`)."""
+
+    VALOR = 950.0
+
+    def responder(self, metodo, ruta, cuerpo):
+        if metodo != 'GET' or not ruta.startswith('/dolar'):
+            return 404, {'message': 'Ruta no simulada'}
+        return 200, {
+            'codigo': 'dolar',
+            'serie': [{'fecha': time.strftime('%Y-%m-%dT03:00:00.000Z'), 'valor': self.VALOR}],
+        }
+
+
+class MercadoPagoFalso(UpstreamFalso):
+    """`POST /checkout/preferences` como la API de Mercado Pago (se usa con `MERCADOPAGO_URL=<url>`)."""
+
+    def responder(self, metodo, ruta, cuerpo):
+        if metodo != 'POST' or not ruta.startswith('/checkout/preferences'):
+            return 404, {'message': 'Ruta no simulada'}
+        with self._lock:
+            numero = self.atendidos
+        preferencia = f'carga-{numero}'
+        return 201, {
+            'id': preferencia,
+            'init_point': f'{self.url}/checkout/v1/redirect?pref_id={preferencia}',
+            'items': json.loads(cuerpo or b'{}').get('items', []),
+        }
@@ -0,0 +1,57 @@
+"""
+Cargadores por id con alcance de request (`ferramas_comun.cargadores`).
+
+Cada cargador resuelve sus pedidos con un solo `get_many` del repositorio. Lo
+cargado queda en caché hasta el final del request.
+
+`CargadoresMiddleware` abre el alcance con `alcance()`; fuera de un request
+(comandos, tareas) cada llamada a `productos()`/`categorias()` devuelve un
+cargador nuevo. Una escritura del catálogo (`catalogo_modificado`) vacía los
+cargadores del request en curso.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from ferramas_comun.cargadores import Cargador
+
+from app.domain.models import Categoria, Producto
+from app.domain.signals import catalogo_modificado
+from app.infrastructure.repositories.producto_repository import DjangoCategoriaRepository, DjangoProductoRepository
+
+_cargadores: ContextVar[Optional[dict]] = ContextVar('cargadores', default=None)
+
+
+def _cargador(nombre: str, buscar_muchos) -> Cargador:
+    cargadores = _cargadores.get()
+    if cargadores is None:
+        return Cargador(buscar_muchos)
+    if nombre not in cargadores:
+        cargadores[nombre] = Cargador(buscar_muchos)
+    return cargadores[nombre]
+
+
+def productos() -> Cargador[Producto]:
+    return _cargador('productos', DjangoProductoRepository().get_many)
+
+
+def categorias() -> Cargador[Categoria]:
+    return _cargador('categorias', DjangoCategoriaRepository().get_many)
+
+
+def olvidar_cargadores(sender, **kwargs):
+    for cargador in (_cargadores.get() or {}).values():
+        cargador.olvidar()
+
+
+catalogo_modificado.connect(olvidar_cargadores, dispatch_uid='cargadores_request')
+
+
+@contextmanager
+def alcance():
+    """Mientras dura, `productos()` y `categorias()` devuelven siempre los mismos cargadores."""
+    token = _cargadores.set({})
+    try:
+        yield
+    finally:
+        _cargadores.reset(token)
@@ -0,0 +1,80 @@
+"""
+La cola de trabajos (`ferramas_comun.cola_trabajos`) desde Django: encolar dentro de la
+transacción en curso y las tareas que ejecuta `procesar_trabajos`.
+
+Nombres de tarea registrados (la API FastAPI encola `relacionados.incremental`):
+
+    relacionados.incremental   recalcula los relacionados de lo que cambió (recurrente y
+                               adelantado por cada cambio del catálogo hecho desde Django
+                               o desde la API FastAPI)
+    estadisticas.recalcular    rearma las estadísticas por categoría (recurrente, diario)
+"""
+import functools
+from typing import Optional
+
+from django.db import close_old_connections, connection, transaction
+from ferramas_comun import cola_trabajos
+
+from app.domain.signals import catalogo_modificado
+
+# Segundos que espera el cálculo de relacionados: los cambios de ese lapso se juntan en uno solo.
+RETRASO_RELACIONADOS = 60
+# (tarea, segundos entre ejecuciones). El periódico de relacionados cubre los avisos perdidos
+# y las escrituras hechas por fuera de Django y de la API: lee el feed de cambios.
+RECURRENTES = [
+    ('relacionados.incremental', 15 * 60),
+    ('estadisticas.recalcular', 24 * 3600),
+]
+
+
+def encolar(tarea: str, argumentos: Optional[dict] = None, **opciones):
+    """
+    Encola con la conexión de Django: si la transacción en curso se revierte,
+    el trabajo tampoco existe. Opciones como en `cola_trabajos.fila`.
+    """
+    with connection.cursor() as cursor:
+        # El cursor de Django usa el formato `%s`.
+        cursor.execute(cola_trabajos.INSERTAR.replace('?', '%s'), cola_trabajos.fila(tarea, argumentos, **opciones))
+
+
+def programar_recurrentes():
+    for nombre, periodo in RECURRENTES:
+        encolar(nombre, clave=nombre, periodo=periodo)
+
+
+def tarea(nombre: str):
+    """Como `cola_trabajos.tarea`; además cierra la conexión de Django del hilo después de cada ejecución."""
+    def registrar(funcion):
+        @functools.wraps(funcion)
+        def ejecutar(**argumentos):
+            try:
+                funcion(**argumentos)
+            finally:
+                close_old_connections()
+        cola_trabajos.tarea(nombre)(ejecutar)
+        return funcion
+    return registrar
+
+
+# Los módulos de las tareas se importan al ejecutarlas: el cálculo de relacionados usa numpy y
+# scipy, que solo necesita el trabajador, y este módulo se importa al arrancar Django.
+@tarea('relacionados.incremental')
+def calcular_relacionados():
+    from app.infrastructure.relacionados.calculo import calcular_incremental
+    calcular_incremental()
+
+
+@tarea('estadisticas.recalcular')
+def recalcular_estadisticas():
+    from app.infrastructure.estadisticas import recalcular
+    recalcular()
+
+
+def encolar_relacionados(**kwargs):
+    # Después del commit, fuera del camino de la escritura. Si el aviso se perdiera, no
+    # se pierde el cambio: el cálculo incremental lee el feed desde su última ejecución.
+    transaction.on_commit(lambda: encolar('relacionados.incremental', clave='relacionados.incremental',
+                                          en=RETRASO_RELACIONADOS))
+
+
+catalogo_modificado.connect(encolar_relacionados, dispatch_uid='cola_relacionados')
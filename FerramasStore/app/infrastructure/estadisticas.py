@@ -0,0 +1,53 @@
+"""
+Estadísticas del catálogo por categoría para el panel de operaciones.
+
+La tabla `app_estadisticacategoria` la mantienen triggers de SQLite
+(migración 0009), así que leerla cuesta lo mismo con cien productos que con un
+millón: una fila por categoría. `recalcular()` la rearma con una agregación
+completa, por si se desfasó (p. ej. una carga con los triggers deshabilitados).
+"""
+from typing import List
+
+from django.db import connection, transaction
+
+from app.domain.models import Categoria, EstadisticaCategoria
+
+RECALCULAR = [
+    'DELETE FROM app_estadisticacategoria',
+    """
+    INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                          valor_stock_centavos, descuento_centesimas, destacados)
+    SELECT categoria_id, COUNT(*), SUM(COALESCE(en_venta, 0)), SUM(COALESCE(stock, 0)),
+           SUM(CAST(ROUND(COALESCE(precio, 0) * COALESCE(stock, 0) * 100) AS INTEGER)),
+           SUM(CAST(ROUND(COALESCE(descuento, 0) * 100) AS INTEGER)), SUM(COALESCE(destacado, 0))
+    FROM app_producto GROUP BY categoria_id
+    """,
+]
+
+
+def recalcular() -> int:
+    """Reemplaza las estadísticas por una agregación de `app_producto`. Devuelve las categorías con productos."""
+    # En una transacción: los triggers de otras escrituras esperan y no se pierde ninguna.
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in RECALCULAR:
+            cursor.execute(sql)
+        return cursor.rowcount
+
+
+def estadisticas_categorias() -> List[dict]:
+    """Una entrada por categoría (las vacías en cero), con una sola consulta."""
+    resultado = []
+    for categoria in Categoria.objects.select_related('estadistica').order_by('id'):
+        # Una categoría sin productos no tiene fila: sus valores por defecto son cero.
+        estadistica = getattr(categoria, 'estadistica', None) or EstadisticaCategoria(categoria=categoria)
+        resultado.append({
+            'categoria_id': categoria.id,
+            'nombre': categoria.nombre,
+            'productos': estadistica.productos,
+            'en_venta': estadistica.en_venta,
+            'unidades': estadistica.unidades,
+            'valor_stock': estadistica.valor_stock,
+            'descuento_promedio': estadistica.descuento_promedio,
+            'destacados': estadistica.destacados,
+        })
+    return resultado
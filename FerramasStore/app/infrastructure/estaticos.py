@@ -0,0 +1,93 @@
+"""
+Pipeline de archivos estáticos para producción (`collectstatic`).
+
+1. Minifica CSS y JS al copiarlos a STATIC_ROOT, con `rcssmin`/`rjsmin` si
+   están instalados; sin ellos se publican tal cual.
+2. `ManifestStaticFilesStorage` les agrega el hash del contenido al nombre
+   (`styles.3f2a9c.css`) y escribe `staticfiles.json`, que usa `{% static %}`.
+3. Cada archivo comprimible se guarda además como `.gz` y, si está instalado
+   el paquete `brotli`, como `.br`, para servirlos sin comprimir por request
+   (ver `EstaticosPrecomprimidosMiddleware`).
+"""
+import gzip
+import os
+from io import BytesIO
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+try:
+    from rjsmin import jsmin
+except ImportError:  # opcional: sin rjsmin el JS se publica sin minificar
+    jsmin = None
+
+try:
+    from rcssmin import cssmin
+except ImportError:  # opcional: sin rcssmin el CSS se publica sin minificar
+    cssmin = None
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml', '.ico')
+TAMANO_MINIMO_COMPRESION = 256
+
+
+def comprimir(contenido: bytes) -> dict:
+    """Variantes precomprimidas de `contenido`: {'.gz': bytes, '.br': bytes}."""
+    variantes = {}
+    buffer = BytesIO()
+    # mtime=0 para que el .gz sea determinista (mismo contenido, mismos bytes).
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as archivo:
+        archivo.write(contenido)
+    variantes['.gz'] = buffer.getvalue()
+    if brotli is not None:
+        variantes['.br'] = brotli.compress(contenido, quality=11)
+    return variantes
+
+
+class AlmacenamientoPrecomprimido(ManifestStaticFilesStorage):
+    # Algunos templates referencian imágenes que no están en el repo: en vez de
+    # romper el render se usa el nombre sin hash.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def _save(self, name, content):
+        minificar = {'.css': cssmin, '.js': jsmin}.get(os.path.splitext(name)[1])
+        if minificar is not None and not name.endswith(('.min.css', '.min.js')):
+            # chunks() rebobina el archivo: Django ya lo leyó para calcular el hash.
+            texto = b''.join(content.chunks()).decode('utf-8')
+            content = ContentFile(minificar(texto).encode('utf-8'))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        procesados = set()
+        for original, procesado, resultado in super().post_process(paths, dry_run, **options):
+            if not isinstance(resultado, Exception) and not dry_run:
+                for nombre in (original, procesado):
+                    if nombre and nombre not in procesados:
+                        procesados.add(nombre)
+                        self._precomprimir(nombre)
+            yield original, procesado, resultado
+
+    def _precomprimir(self, nombre):
+        if not nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+            return
+        with self.open(nombre) as archivo:
+            contenido = archivo.read()
+        if len(contenido) < TAMANO_MINIMO_COMPRESION:
+            return
+        for extension, comprimido in comprimir(contenido).items():
+            # Solo vale la pena si realmente ahorra bytes.
+            if len(comprimido) < len(contenido):
+                if self.exists(nombre + extension):
+                    self.delete(nombre + extension)
+                # Storage.save, no self._save: el contenido ya está comprimido y no se minifica.
+                super()._save(nombre + extension, ContentFile(comprimido))
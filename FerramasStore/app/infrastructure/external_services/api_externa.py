@@ -1,22 +1,75 @@
+import time
+
 import requests
+from django.conf import settings
+from app.infrastructure import plazo
+from app.infrastructure.metricas import medir_http
+from app.infrastructure.external_services.cache_respuestas import CacheRespuestas
+from app.infrastructure.external_services.replica_productos import ReplicaProductos
+
+API_BASE = getattr(settings, 'API_EXTERNA_BASE', "http://127.0.0.1:8001")
+TIMEOUT = getattr(settings, 'API_EXTERNA_TIMEOUT', 3)
+TIMEOUT_PAGOS = getattr(settings, 'API_EXTERNA_TIMEOUT_PAGOS', 8)
+
+# Lecturas con cache local: (segundos frescos, segundos extra sirviendo la copia si la API falla)
+TTL_PRODUCTOS = (30, 24 * 3600)
+TTL_VALOR_DOLAR = (10 * 60, 3 * 24 * 3600)
+TTL_VITRINA = (30, 24 * 3600)
+TAMANO_PAGINA_CAMBIOS = 1000
+
+cache = CacheRespuestas(settings.API_EXTERNA_CACHE_DIR)
+# Los productos se replican con el feed de cambios: cada sincronización trae solo el delta.
+replica = ReplicaProductos(settings.API_EXTERNA_CACHE_DIR)
+
+
+# Cada llamada usa como timeout lo que le queda al plazo de la vista (si tiene) y se lo pasa a la API.
+def _get(url):
+    def pedir(headers):
+        tiempo = plazo.timeout(TIMEOUT)
+        with medir_http():
+            return requests.get(url, headers={**headers, **plazo.headers(tiempo)}, timeout=tiempo)
+    return pedir
 
-API_BASE = "http://127.0.0.1:8001"
 
 def crear_preferencia_pago(data: dict) -> dict:
-    url = f"{API_BASE}/mercado-pago/crear"
-    response = requests.post(url, json=data)
+    url = f"{API_BASE}/mercado-pago/crear-pago"
+    tiempo = plazo.timeout(TIMEOUT_PAGOS)
+    with medir_http():
+        response = requests.post(url, json=data, headers=plazo.headers(tiempo), timeout=tiempo)
     response.raise_for_status()
     return response.json()
 
 
+def _pagina_cambios(since):
+    tiempo = plazo.timeout(TIMEOUT)
+    with medir_http():
+        return requests.get(f"{API_BASE}/productos/cambios", headers=plazo.headers(tiempo),
+                            params={'since': since, 'limite': TAMANO_PAGINA_CAMBIOS}, timeout=tiempo)
+
+
 def obtener_productos():
-    url = f"{API_BASE}/productos/"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    return replica.obtener(*TTL_PRODUCTOS, pedir=_pagina_cambios)
 
 def obtener_valor_dolar():
-    url = "http://127.0.0.1:8001/banco-central/"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    url = f"{API_BASE}/banco-central/valor-dolar"
+    return cache.obtener(url, *TTL_VALOR_DOLAR, pedir=_get(url))
+
+def obtener_vitrina(categoria_id=None, limite=50, offset=0):
+    """
+    Productos (con `precio_usd`), categorías y dólar en un solo request a la API,
+    que los consulta en paralelo. Los componentes que no llegaron vienen en `errores`.
+    """
+    parametros = {'limite': limite, 'offset': offset}
+    if categoria_id is not None:
+        parametros['categoria_id'] = categoria_id
+    url = requests.Request('GET', f"{API_BASE}/vitrina/", params=parametros).prepare().url
+    return cache.obtener(url, *TTL_VITRINA, pedir=_get(url))
+
+
+# Si la última sincronización falló (o no alcanzó el plazo) se está sirviendo una copia vieja.
+def productos_desactualizados() -> bool:
+    return time.time() - replica.sincronizado_en > TTL_PRODUCTOS[0]
+
+def valor_dolar_desactualizado() -> bool:
+    entrada = cache.entrada(f"{API_BASE}/banco-central/valor-dolar")
+    return entrada is not None and entrada.edad() > TTL_VALOR_DOLAR[0]
@@ -0,0 +1,154 @@
+"""
+Cache de respuestas de la API externa con semántica stale-while-revalidate y
+stale-if-error.
+
+- Mientras una entrada es fresca (`ttl_fresco`) se sirve sin tocar la red.
+- Al vencer, y mientras no supere `stale_if_error` segundos más, se sirve la
+  copia al instante y se revalida en un hilo de fondo (uno por url) con
+  `If-None-Match`; un 304 solo renueva la entrada. Ningún request espera a la
+  API mientras haya una copia que servir.
+- Si la revalidación falla, no se vuelve a intentar hasta pasados
+  `espera_tras_error` segundos: con la API caída no se lanza un hilo por request.
+- Sin copia utilizable, el request espera la respuesta (y ve el error).
+- La última copia buena se guarda en disco (escritura atómica), así que
+  sobrevive a reinicios del servidor.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+
+@dataclass
+class Entrada:
+    datos: Any
+    etag: Optional[str]
+    obtenido_en: float  # time.time() de la última respuesta 200/304
+
+    def edad(self) -> float:
+        return time.time() - self.obtenido_en
+
+
+class CacheRespuestas:
+    def __init__(self, directorio: Path, espera_tras_error: float = 10.0):
+        self.directorio = Path(directorio)
+        self.espera_tras_error = espera_tras_error
+        self._entradas: Dict[str, Entrada] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock_global = threading.Lock()
+        self._revalidando: Dict[str, threading.Thread] = {}
+        self._reintentar_en: Dict[str, float] = {}  # url -> time.monotonic() desde el que se puede reintentar
+
+    def _lock(self, url: str) -> threading.Lock:
+        with self._lock_global:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def _ruta(self, url: str) -> Path:
+        return self.directorio / (hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def _leer_disco(self, url: str) -> Optional[Entrada]:
+        try:
+            with open(self._ruta(url), encoding='utf-8') as archivo:
+                guardado = json.load(archivo)
+            return Entrada(guardado['datos'], guardado.get('etag'), guardado['obtenido_en'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _escribir_disco(self, url: str, entrada: Entrada):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+                json.dump({'url': url, 'datos': entrada.datos, 'etag': entrada.etag,
+                           'obtenido_en': entrada.obtenido_en}, archivo)
+            os.replace(temporal, self._ruta(url))
+        except OSError:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+
+    def entrada(self, url: str) -> Optional[Entrada]:
+        entrada = self._entradas.get(url)
+        if entrada is None:
+            entrada = self._leer_disco(url)
+            if entrada is not None:
+                self._entradas[url] = entrada
+        return entrada
+
+    def obtener(self, url: str, ttl_fresco: float, stale_if_error: float,
+                pedir: Callable[[dict], requests.Response]) -> Any:
+        """
+        Devuelve los datos de `url`. `pedir(headers)` hace la petición real;
+        recibe los headers condicionales y debe devolver la respuesta sin
+        llamar a `raise_for_status`.
+        """
+        entrada = self.entrada(url)
+        if entrada is not None and entrada.edad() < ttl_fresco:
+            return entrada.datos
+        if entrada is not None and entrada.edad() < ttl_fresco + stale_if_error:
+            self._revalidar_en_segundo_plano(url, pedir)
+            return entrada.datos
+
+        with self._lock(url):
+            entrada = self.entrada(url)
+            if entrada is not None and entrada.edad() < ttl_fresco + stale_if_error:
+                return entrada.datos
+            return self._revalidar(url, entrada, pedir).datos
+
+    def _revalidar(self, url: str, entrada: Optional[Entrada], pedir: Callable[[dict], requests.Response]) -> Entrada:
+        headers = {'If-None-Match': entrada.etag} if entrada is not None and entrada.etag else {}
+        response = pedir(headers)
+        if response.status_code == 304 and entrada is not None:
+            entrada.obtenido_en = time.time()
+            self._escribir_disco(url, entrada)
+            return entrada
+        response.raise_for_status()
+        nueva = Entrada(response.json(), response.headers.get('ETag'), time.time())
+        self._entradas[url] = nueva
+        self._escribir_disco(url, nueva)
+        return nueva
+
+    def _revalidar_en_segundo_plano(self, url: str, pedir: Callable[[dict], requests.Response]):
+        with self._lock_global:
+            if url in self._revalidando or time.monotonic() < self._reintentar_en.get(url, 0):
+                return
+            hilo = threading.Thread(target=self._revalidar_copia, args=(url, pedir), name='revalidar-cache',
+                                    daemon=True)
+            self._revalidando[url] = hilo
+        hilo.start()
+
+    def _revalidar_copia(self, url: str, pedir: Callable[[dict], requests.Response]):
+        revalidada = False
+        try:
+            with self._lock(url):
+                self._revalidar(url, self.entrada(url), pedir)
+            revalidada = True
+        except (requests.RequestException, ValueError):
+            pass  # se sigue sirviendo la copia; se reintenta después de la espera
+        finally:
+            with self._lock_global:
+                del self._revalidando[url]
+                if revalidada:
+                    self._reintentar_en.pop(url, None)
+                else:
+                    self._reintentar_en[url] = time.monotonic() + self.espera_tras_error
+
+    def esperar_revalidaciones(self, timeout: Optional[float] = None):
+        """Espera a que terminen las revalidaciones de fondo en curso (tests, cierre ordenado)."""
+        with self._lock_global:
+            hilos = list(self._revalidando.values())
+        for hilo in hilos:
+            hilo.join(timeout)
+
+    def invalidar(self, url: str):
+        self._entradas.pop(url, None)
+        try:
+            os.unlink(self._ruta(url))
+        except OSError:
+            pass
@@ -0,0 +1,105 @@
+"""
+Réplica local del catálogo de la API externa, sincronizada con el feed
+incremental `GET /productos/cambios?since=<cursor>`.
+
+En cada sincronización solo viajan los productos modificados o eliminados
+desde el último cursor. Igual que `CacheRespuestas`, la réplica se guarda en
+disco (escritura atómica) y se sigue sirviendo si la API no responde.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import requests
+
+
+class ReplicaProductos:
+    def __init__(self, directorio: Path, nombre: str = 'replica_productos.json'):
+        self.ruta = Path(directorio) / nombre
+        self.cursor = 0
+        self.productos: Dict[int, dict] = {}
+        self.sincronizado_en = 0.0
+        self._lock = threading.Lock()
+        self._cargada = False
+
+    def _leer_disco(self):
+        try:
+            with open(self.ruta, encoding='utf-8') as archivo:
+                guardado = json.load(archivo)
+            self.cursor = guardado['cursor']
+            self.productos = {int(pid): producto for pid, producto in guardado['productos'].items()}
+            self.sincronizado_en = guardado['sincronizado_en']
+        except (OSError, ValueError, KeyError):
+            pass
+        self._cargada = True
+
+    def _escribir_disco(self):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=self.ruta.parent, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+                json.dump({'cursor': self.cursor, 'productos': self.productos,
+                           'sincronizado_en': self.sincronizado_en}, archivo)
+            os.replace(temporal, self.ruta)
+        except OSError:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+
+    def _lista(self) -> List[dict]:
+        return [self.productos[pid] for pid in sorted(self.productos)]
+
+    def _sincronizar(self, pedir: Callable[[int], requests.Response]):
+        cursor, productos = self.cursor, dict(self.productos)
+        while True:
+            response = pedir(cursor)
+            if response.status_code == 410 and cursor:
+                # La API ya no reconoce el cursor (base recreada): réplica completa desde cero.
+                cursor, productos = 0, {}
+                continue
+            response.raise_for_status()
+            pagina = response.json()
+            for cambio in pagina['cambios']:
+                if cambio['operacion'] == 'delete':
+                    productos.pop(cambio['producto_id'], None)
+                else:
+                    productos[cambio['producto_id']] = cambio['producto']
+            cursor = pagina['cursor']
+            if not pagina['hay_mas']:
+                break
+        self.cursor, self.productos, self.sincronizado_en = cursor, productos, time.time()
+        self._escribir_disco()
+
+    def obtener(self, ttl_fresco: float, stale_if_error: float,
+                pedir: Callable[[int], requests.Response]) -> List[dict]:
+        """
+        Devuelve los productos replicados. `pedir(since)` consulta una página
+        del feed y devuelve la respuesta sin llamar a `raise_for_status`.
+        """
+        if not self._cargada:
+            with self._lock:
+                if not self._cargada:
+                    self._leer_disco()
+        edad = time.time() - self.sincronizado_en
+        if edad < ttl_fresco:
+            return self._lista()
+
+        tiene_datos = self.sincronizado_en > 0
+        # Si otro hilo ya está sincronizando, se sirve la réplica actual sin esperar.
+        if not self._lock.acquire(blocking=not tiene_datos):
+            return self._lista()
+        try:
+            if time.time() - self.sincronizado_en < ttl_fresco:
+                return self._lista()
+            try:
+                self._sincronizar(pedir)
+            except (requests.RequestException, ValueError, KeyError):
+                if tiene_datos and edad < ttl_fresco + stale_if_error:
+                    return self._lista()
+                raise
+            return self._lista()
+        finally:
+            self._lock.release()
@@ -0,0 +1,10 @@
+"""
+Métricas por request para Django (`ferramas_comun.metricas`).
+
+`MetricasMiddleware` (presentation) abre una `Medicion` por request; las
+consultas se cuentan con `connection.execute_wrapper` y las llamadas a la API
+externa con `medir_http()`. Los histogramas se exponen en `/metrics`.
+"""
+from ferramas_comun.metricas import Medicion, RegistroMetricas, medicion_actual, medir_http  # noqa: F401
+
+registro = RegistroMetricas('ferramas_django')
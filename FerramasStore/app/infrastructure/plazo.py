@@ -0,0 +1,58 @@
+"""
+Plazo (deadline) por request para las llamadas a la API externa.
+
+Las vistas que dependen de la API fijan su plazo con `@con_plazo(segundos)`.
+Cada llamada de `api_externa` usa como timeout lo que queda y se lo manda a la
+API en `X-Deadline-Ms`; la API lo sigue descontando en sus consultas y en las
+llamadas a mindicador o Mercado Pago. Misma idea que `api/app/core/plazo.py`.
+"""
+import functools
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+import requests
+
+HEADER = 'X-Deadline-Ms'
+# Por debajo de esto no vale la pena llamar a la API: se falla de inmediato.
+MINIMO_UTIL = 0.05
+
+_limite: ContextVar[Optional[float]] = ContextVar('plazo_limite', default=None)
+
+
+class PlazoVencido(requests.Timeout):
+    """Es un `requests.Timeout`: la caché de respuestas sirve la última copia buena, como con cualquier timeout."""
+
+
+def restante() -> Optional[float]:
+    limite = _limite.get()
+    return None if limite is None else limite - time.monotonic()
+
+
+def timeout(maximo: float) -> float:
+    """Timeout para una llamada a la API: lo que queda del plazo, sin pasar de `maximo`."""
+    queda = restante()
+    if queda is None:
+        return maximo
+    if queda < MINIMO_UTIL:
+        raise PlazoVencido('No queda tiempo para llamar a la API externa')
+    return min(maximo, queda)
+
+
+def headers(tiempo: float) -> dict:
+    """Header para la API con el timeout de la llamada: la API no sigue trabajando después de que aquí se dejó de esperar."""
+    return {HEADER: str(max(0, int(tiempo * 1000)))}
+
+
+def con_plazo(segundos: float):
+    """Decorador de vista: todas las llamadas a la API durante la vista comparten `segundos`."""
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            token = _limite.set(time.monotonic() + segundos)
+            try:
+                return vista(*args, **kwargs)
+            finally:
+                _limite.reset(token)
+        return envoltura
+    return decorador
@@ -0,0 +1,107 @@
+"""
+Motor de promociones (`ferramas_comun.promociones`) sobre la conexión de Django.
+
+Cada worker guarda su `FuenteReglas`: como mucho cada `INTERVALO` segundos
+revisa la versión de las reglas con una sola consulta, y con la versión igual
+reutiliza el motor y los precios que ya calculó.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Sequence
+
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from ferramas_comun.promociones import CLIENTES, CONSULTA, INVITADOS, FuenteReglas, MotorPromociones, ProductoConPrecio
+
+from app.domain.models import Promocion
+from app.infrastructure import cache_proxy, cargadores
+from app.infrastructure.snapshot.servicio import snapshot_actual
+
+MAXIMO_CANTIDAD = 10_000  # unidades por línea del carrito
+
+_fuente = FuenteReglas()
+
+
+def _consultar(version: str):
+    with connection.cursor() as cursor:
+        cursor.execute(CONSULTA.replace('?', '%s'), [version])
+        return cursor.fetchall()
+
+
+def motor() -> MotorPromociones:
+    # Con la base en memoria de los tests se revisa en cada request: el conteo de consultas no depende del reloj.
+    return _fuente.motor(_consultar, 0 if connection.is_in_memory_db() else None)
+
+
+def invalidar(**kwargs):
+    """Fuerza la revisión de la versión en el próximo precio (escrituras de este proceso)."""
+    _fuente.invalidar()
+    # Los precios finales de Django y de la API dependen de las reglas: el proxy descarta todo el catálogo.
+    destino = cache_proxy.despachador()
+    if destino is not None:
+        transaction.on_commit(lambda: destino.purgar({cache_proxy.CATALOGO}))
+
+
+post_save.connect(invalidar, sender=Promocion, dispatch_uid='promociones_guardadas')
+post_delete.connect(invalidar, sender=Promocion, dispatch_uid='promociones_eliminadas')
+
+
+def segmento(usuario) -> str:
+    return CLIENTES if usuario is not None and usuario.is_authenticated else INVITADOS
+
+
+def con_precios(productos: Iterable, segmento_cliente: str) -> List[ProductoConPrecio]:
+    """Un listado con el precio de cada producto para el segmento, en una pasada."""
+    productos = list(productos)
+    if not productos:
+        return []
+    motor_actual = motor()
+    return [
+        ProductoConPrecio(producto, motor_actual.precio(
+            producto.precio, producto.descuento, producto.categoria_id, producto.sku, 1, segmento_cliente,
+        ))
+        for producto in productos
+    ]
+
+
+def _productos(ids: Sequence[int]) -> Dict[int, object]:
+    snapshot = snapshot_actual()
+    if snapshot is not None:
+        encontrados = {}
+        for producto_id in ids:
+            producto = snapshot.producto(producto_id)
+            if producto is not None and producto.en_venta:
+                encontrados[producto_id] = producto
+        # Un producto recién creado puede no estar todavía en el snapshot.
+        if len(encontrados) == len(ids):
+            return encontrados
+    # Cargador del request: una consulta para todos los ids, y ninguna para los ya cargados.
+    return {producto.id: producto for producto in cargadores.productos().cargar_muchos(ids)
+            if producto is not None and producto.en_venta}
+
+
+def cotizar_carrito(items: Dict[int, int], segmento_cliente: str) -> dict:
+    """
+    `items`: producto_id -> cantidad. Precios por línea (con escalones por
+    cantidad) y totales; los productos que no existen o no están en venta se
+    omiten.
+    """
+    if not items:
+        return {'lineas': [], 'total_sin_descuento': Decimal(0), 'total': Decimal(0)}
+    motor_actual = motor()
+    productos = _productos(sorted(items))
+    lineas, total_sin_descuento, total = [], Decimal(0), Decimal(0)
+    for producto_id, cantidad in items.items():
+        producto = productos.get(producto_id)
+        if producto is None:
+            continue
+        precio = motor_actual.precio(producto.precio, producto.descuento, producto.categoria_id, producto.sku,
+                                     cantidad, segmento_cliente)
+        subtotal = precio.final * cantidad
+        lineas.append({
+            'id': producto_id, 'nombre': producto.nombre, 'cantidad': cantidad,
+            'precio': precio.precio, 'precio_final': precio.final, 'descuento': precio.descuento,
+            'promociones': list(precio.promociones), 'subtotal': subtotal,
+        })
+        total_sin_descuento += precio.precio * cantidad
+        total += subtotal
+    return {'lineas': lineas, 'total_sin_descuento': total_sin_descuento, 'total': total}
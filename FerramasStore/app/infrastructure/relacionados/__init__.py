@@ -0,0 +1 @@
+# Related products
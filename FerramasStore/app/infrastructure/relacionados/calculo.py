@@ -0,0 +1,308 @@
+"""
+Cálculo por lotes de `app_productorelacionado` (ver `tfidf.py`).
+
+- Completo: una pasada por todo el catálogo para contar la frecuencia de cada
+  palabra y otra por categoría para calcular los vecinos. En memoria hay una
+  sola categoría a la vez, y se escribe bloque por bloque en transacciones
+  cortas para no bloquear la base compartida.
+- Incremental: lee el feed de cambios (`app_productocambio`) desde el último
+  cálculo. Los productos cuyo texto no cambió (precio, stock, descuento) se
+  saltan comparando su `FirmaRelacionados`. Por cada producto con texto
+  nuevo, dado de alta o de baja se recalculan su lista, las listas que lo
+  contenían y las de los vecinos de su ventana a los que ahora les toca
+  tenerlo. Reutiliza el vocabulario del último cálculo completo; si cambió
+  más de `umbral` del catálogo, hace uno completo.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django.db import connection, transaction
+from ferramas_comun.indice_prefijos import normalizar
+
+from app.domain.models import CalculoRelacionados
+from app.infrastructure.relacionados.tfidf import (
+    Vocabulario, bloques, clave_bloque, disponible, filas_relacionados, np, parecidos, vecinos, vecinos_de,
+)
+
+K = 8  # relacionados por producto
+VENTANA = 2_000  # productos con los que se compara cada uno dentro de un bloque grande
+UMBRAL_COMPLETO = 0.1  # fracción del catálogo modificada a partir de la cual conviene recalcular todo
+LOTE_LECTURA = 10_000
+LOTE_IDS = 500  # ids por IN (...)
+
+INSERTAR = (
+    'INSERT INTO app_productorelacionado (producto_id, posicion, relacionado_id, puntaje) '
+    'VALUES (%s, %s, %s, %s)'
+)
+BORRAR = 'DELETE FROM app_productorelacionado WHERE producto_id = %s'
+GUARDAR_FIRMA = 'INSERT OR REPLACE INTO app_firmarelacionados (producto_id, firma) VALUES (%s, %s)'
+BORRAR_FIRMA = 'DELETE FROM app_firmarelacionados WHERE producto_id = %s'
+
+Producto = Tuple[int, str, Optional[str]]  # (id, nombre, descripcion)
+
+
+@dataclass
+class ResultadoCalculo:
+    completo: bool
+    productos: int = 0  # productos cuya lista se recalculó
+    relaciones: int = 0  # filas escritas
+    duracion: float = 0.0
+
+
+def firma(categoria_id: int, nombre: Optional[str], descripcion: Optional[str]) -> int:
+    texto = f'{categoria_id}\x00{nombre or ""}\x00{descripcion or ""}'.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(texto, digest_size=8).digest(), 'big', signed=True)
+
+
+def _filas(sql: str, parametros: Sequence = ()) -> Iterator[tuple]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        while True:
+            filas = cursor.fetchmany(LOTE_LECTURA)
+            if not filas:
+                return
+            yield from filas
+
+
+def _en_lotes(valores: Sequence, tamano: int = LOTE_IDS) -> Iterator[Sequence]:
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def _marcadores(valores: Sequence) -> str:
+    return ', '.join(['%s'] * len(valores))
+
+
+def _ultima_secuencia() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT COALESCE(MAX(secuencia), 0) FROM app_productocambio')
+        return cursor.fetchone()[0]
+
+
+def _guardar(ids: Iterable[int], filas: Iterable[tuple], firmas: Iterable[Tuple[int, int]] = ()) -> int:
+    """Cambia las listas de `ids` por `filas` (y guarda sus firmas) en una sola transacción."""
+    # En orden de clave primaria las inserciones van a páginas contiguas del árbol.
+    filas = sorted(filas)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(BORRAR, [(producto_id,) for producto_id in ids])
+        cursor.executemany(INSERTAR, filas)
+        cursor.executemany(GUARDAR_FIRMA, list(firmas))
+    return len(filas)
+
+
+def _productos_categoria(categoria_id: int) -> List[Producto]:
+    return list(_filas(
+        'SELECT id, nombre, descripcion FROM app_producto WHERE categoria_id = %s AND en_venta = 1 ORDER BY id',
+        [categoria_id],
+    ))
+
+
+def _bloques_categoria(productos: List[Producto], k: int,
+                       con: Optional[Set[int]] = None) -> Tuple[List[List[Producto]], List[Producto]]:
+    """
+    Bloques de la categoría, cada uno ordenado por nombre normalizado (así la
+    ventana de cada producto son los de nombre más parecido), y los productos
+    que no quedaron en ningún bloque. Con `con`, solo los bloques que tienen
+    alguno de esos ids.
+    """
+    ordenados, en_bloque = [], set()
+    for posiciones in bloques([clave_bloque(nombre) for _, nombre, _ in productos], k):
+        en_bloque.update(posiciones)
+        if con is not None and not any(productos[p][0] in con for p in posiciones):
+            continue
+        ordenados.append(sorted((productos[p] for p in posiciones), key=lambda producto: normalizar(producto[1])))
+    return ordenados, [producto for posicion, producto in enumerate(productos) if posicion not in en_bloque]
+
+
+def _ids(miembros: List[Producto]) -> 'np.ndarray':
+    return np.fromiter((producto_id for producto_id, _, _ in miembros), dtype=np.int64, count=len(miembros))
+
+
+def _firmas(categoria_id: int, productos: Iterable[Producto]) -> List[Tuple[int, int]]:
+    return [(producto_id, firma(categoria_id, nombre, descripcion)) for producto_id, nombre, descripcion in productos]
+
+
+def _calcular_categoria(categoria_id: int, vocabulario: Vocabulario, k: int, ventana: int) -> Tuple[int, int]:
+    productos = _productos_categoria(categoria_id)
+    grupos, solos = _bloques_categoria(productos, k)
+    relaciones = 0
+    for miembros in grupos:
+        ids = _ids(miembros)
+        posiciones, puntajes = vecinos(vocabulario.vectorizar((n, d) for _, n, d in miembros), k, ventana)
+        relaciones += _guardar(ids.tolist(), filas_relacionados(ids, posiciones, puntajes), _firmas(categoria_id, miembros))
+    # Únicos en su categoría: se quedan sin relacionados.
+    _guardar([producto[0] for producto in solos], [], _firmas(categoria_id, solos))
+    return len(productos), relaciones
+
+
+def _exigir_numpy():
+    if not disponible:
+        raise RuntimeError('El cálculo de relacionados necesita NumPy y SciPy (pip install numpy scipy).')
+
+
+def calcular_completo(k: int = K, ventana: int = VENTANA) -> ResultadoCalculo:
+    _exigir_numpy()
+    inicio = time.perf_counter()
+    resultado = ResultadoCalculo(completo=True)
+    # El cursor se toma antes de leer: lo que cambie durante el cálculo entra en el próximo incremental.
+    secuencia = _ultima_secuencia()
+    vocabulario = Vocabulario.contar(_filas('SELECT nombre, descripcion FROM app_producto WHERE en_venta = 1'))
+    for categoria_id in [fila[0] for fila in _filas('SELECT id FROM app_categoria ORDER BY id')]:
+        productos, relaciones = _calcular_categoria(categoria_id, vocabulario, k, ventana)
+        resultado.productos += productos
+        resultado.relaciones += relaciones
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Productos eliminados, dados de baja o de categorías que ya no existen.
+        for tabla in ('app_productorelacionado', 'app_firmarelacionados'):
+            cursor.execute(
+                f'DELETE FROM {tabla} WHERE producto_id NOT IN (SELECT id FROM app_producto WHERE en_venta = 1)'
+            )
+    resultado.duracion = time.perf_counter() - inicio
+    CalculoRelacionados.objects.create(
+        secuencia=secuencia, completo=True, productos=resultado.productos, relaciones=resultado.relaciones,
+        duracion=resultado.duracion, vocabulario=vocabulario.exportar(),
+    )
+    return resultado
+
+
+def _cambios_de_texto(secuencia: int) -> Tuple[Dict[int, int], List[int]]:
+    """
+    Productos del feed cuyo texto cambió o que entraron en venta (id ->
+    categoría) y los que salieron (eliminados o dados de baja).
+    """
+    cambiados, bajas = {}, []
+    for producto_id, categoria_id, nombre, descripcion, en_venta, anterior in _filas(
+        'SELECT c.producto_id, p.categoria_id, p.nombre, p.descripcion, p.en_venta, f.firma '
+        'FROM app_productocambio c '
+        'LEFT JOIN app_producto p ON p.id = c.producto_id '
+        'LEFT JOIN app_firmarelacionados f ON f.producto_id = c.producto_id '
+        'WHERE c.secuencia > %s',
+        [secuencia],
+    ):
+        if categoria_id is not None and en_venta:
+            if firma(categoria_id, nombre, descripcion) != anterior:
+                cambiados[producto_id] = categoria_id
+        elif anterior is not None:
+            bajas.append(producto_id)
+    return cambiados, bajas
+
+
+def _apuntan_a(ids: Sequence[int]) -> Dict[int, int]:
+    """Productos en venta que tienen alguno de `ids` en su lista (id -> categoría)."""
+    apuntan = {}
+    for lote in _en_lotes(ids):
+        apuntan.update(_filas(
+            'SELECT DISTINCT r.producto_id, p.categoria_id FROM app_productorelacionado r '
+            'JOIN app_producto p ON p.id = r.producto_id '
+            f'WHERE p.en_venta = 1 AND r.relacionado_id IN ({_marcadores(lote)})',
+            lote,
+        ))
+    return apuntan
+
+
+def _listas_actuales(ids: Sequence[int]) -> Dict[int, Tuple[int, float]]:
+    """Largo y puntaje más bajo de la lista de cada id."""
+    listas = {}
+    for lote in _en_lotes(ids):
+        for producto_id, largo, minimo in _filas(
+            'SELECT producto_id, COUNT(*), MIN(puntaje) FROM app_productorelacionado '
+            f'WHERE producto_id IN ({_marcadores(lote)}) GROUP BY producto_id',
+            lote,
+        ):
+            listas[producto_id] = (largo, minimo)
+    return listas
+
+
+def _tramos(rangos: Iterable[Tuple[int, int]], total: int) -> List[Tuple[int, int]]:
+    """Une los rangos [desde, hasta) que se tocan, recortados a [0, total)."""
+    tramos = []
+    for desde, hasta in sorted((max(desde, 0), min(hasta, total)) for desde, hasta in rangos):
+        if tramos and desde <= tramos[-1][1]:
+            tramos[-1] = (tramos[-1][0], max(tramos[-1][1], hasta))
+        else:
+            tramos.append((desde, hasta))
+    return tramos
+
+
+def _actualizar_bloque(miembros: List[Producto], categoria_id: int, cambiados: Set[int], apuntan: Set[int],
+                       vocabulario: Vocabulario, k: int, ventana: int) -> Tuple[int, int]:
+    """
+    Recalcula dentro de un bloque ordenado las listas que tocan `cambiados` y
+    `apuntan`. Devuelve (productos, relaciones).
+    """
+    total = len(miembros)
+    ids = _ids(miembros)
+    nuevos = [p for p, (producto_id, _, _) in enumerate(miembros) if producto_id in cambiados]
+    viejos = [p for p, (producto_id, _, _) in enumerate(miembros) if producto_id in apuntan]
+    # La ventana de un producto abarca a lo más `ventana` posiciones a cada lado, y la de
+    # un vecino suyo otra `ventana` más allá: eso es lo único que hay que vectorizar.
+    rangos = [(p - 2 * ventana, p + 2 * ventana + 1) for p in nuevos] + [(p - ventana, p + ventana + 1) for p in viejos]
+    productos = relaciones = 0
+    for desde, hasta in _tramos(rangos, total):
+        matriz = vocabulario.vectorizar((n, d) for _, n, d in miembros[desde:hasta])
+        en_tramo = [p for p in nuevos if desde <= p < hasta]
+        recalcular = set(en_tramo).union(p for p in viejos if desde <= p < hasta)
+        # Un vecino necesita al producto nuevo si le gana al último de su lista actual.
+        candidatos: Dict[int, float] = {}
+        for p in en_tramo:
+            for vecino, puntaje in zip(*parecidos(matriz, p, ventana, total, desde)):
+                candidatos[vecino] = max(candidatos.get(vecino, 0.0), puntaje)
+        listas = _listas_actuales(ids[sorted(candidatos)].tolist())
+        for vecino, puntaje in candidatos.items():
+            largo, minimo = listas.get(int(ids[vecino]), (0, 0.0))
+            if largo < k or puntaje > minimo:
+                recalcular.add(vecino)
+        filas = sorted(recalcular)
+        posiciones, puntajes = vecinos_de(matriz, filas, k, ventana, total, desde)
+        relaciones += _guardar(
+            ids[filas].tolist(), filas_relacionados(ids, posiciones, puntajes, ids[filas]),
+            _firmas(categoria_id, (miembros[p] for p in en_tramo)),
+        )
+        productos += len(filas)
+    return productos, relaciones
+
+
+def calcular_incremental(k: int = K, ventana: int = VENTANA, umbral: float = UMBRAL_COMPLETO) -> ResultadoCalculo:
+    _exigir_numpy()
+    ultimo = CalculoRelacionados.objects.order_by('-id').first()
+    modelo = CalculoRelacionados.objects.filter(completo=True).order_by('-id').values_list('vocabulario', flat=True).first()
+    if ultimo is None or modelo is None:
+        return calcular_completo(k, ventana)
+    secuencia = _ultima_secuencia()
+    if secuencia < ultimo.secuencia:
+        # Feed de otra base (p. ej. recreada): el cursor no sirve.
+        return calcular_completo(k, ventana)
+    resultado = ResultadoCalculo(completo=False)
+    if secuencia == ultimo.secuencia:
+        return resultado
+
+    inicio = time.perf_counter()
+    vocabulario = Vocabulario.importar(modelo)
+    cambiados, bajas = _cambios_de_texto(ultimo.secuencia)
+    if len(cambiados) + len(bajas) > umbral * max(vocabulario.total, 1):
+        return calcular_completo(k, ventana)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(BORRAR, [(producto_id,) for producto_id in bajas])
+        cursor.executemany(BORRAR_FIRMA, [(producto_id,) for producto_id in bajas])
+    apuntan = _apuntan_a(sorted(set(cambiados).union(bajas)))
+    for categoria_id in sorted(set(cambiados.values()).union(apuntan.values())):
+        nuevos = {p for p, c in cambiados.items() if c == categoria_id}
+        viejos = {p for p, c in apuntan.items() if c == categoria_id} - nuevos
+        grupos, solos = _bloques_categoria(_productos_categoria(categoria_id), k, nuevos | viejos)
+        for miembros in grupos:
+            productos, relaciones = _actualizar_bloque(miembros, categoria_id, nuevos, viejos, vocabulario, k, ventana)
+            resultado.productos += productos
+            resultado.relaciones += relaciones
+        solos = [producto for producto in solos if producto[0] in nuevos or producto[0] in viejos]
+        _guardar([producto[0] for producto in solos], [],
+                 _firmas(categoria_id, (producto for producto in solos if producto[0] in nuevos)))
+        resultado.productos += len(solos)
+    resultado.duracion = time.perf_counter() - inicio
+    CalculoRelacionados.objects.create(
+        secuencia=secuencia, completo=False, productos=resultado.productos, relaciones=resultado.relaciones,
+        duracion=resultado.duracion,
+    )
+    return resultado
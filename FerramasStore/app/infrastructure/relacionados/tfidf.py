@@ -0,0 +1,232 @@
+"""
+Vectores TF-IDF y vecinos más cercanos por coseno para "productos relacionados".
+
+Cada producto es un vector TF-IDF (NumPy/SciPy, `float32`) de las palabras de
+su nombre (con el doble de peso) y de su descripción, normalizado a largo 1:
+el producto punto entre dos filas es su similitud coseno.
+
+Comparar todos contra todos no escala (10¹² pares con un millón de
+productos), así que los candidatos se acotan por bloques:
+
+- solo productos de la misma categoría y con la misma primera palabra del
+  nombre ("Martillo ...", "Taladro ..."); los bloques con menos de k + 1
+  productos se juntan en un bloque "resto" por categoría;
+- un bloque más grande que `ventana` se ordena por nombre y se compara por
+  tramos: cada tramo de `ventana / 2` filas contra las `ventana` columnas que
+  lo rodean (vecindario ordenado). Así cada producto se compara con a lo más
+  `ventana` productos y la memoria del producto matricial queda acotada.
+"""
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # opcional: sin NumPy/SciPy no se calculan relacionados
+    np = sparse = None
+
+from ferramas_comun.indice_prefijos import PALABRAS_VACIAS, normalizar
+
+disponible = np is not None
+
+PESO_NOMBRE = 2  # las palabras del nombre cuentan el doble que las de la descripción
+MINIMO_DOCUMENTOS = 2  # una palabra que está en un solo producto no lo relaciona con nada
+PUNTAJE_MINIMO = 0.05
+MAXIMO_COLUMNAS_DENSAS = 2_048
+
+_PALABRA = re.compile(r'\w+')
+
+
+def palabras(texto: Optional[str]) -> List[str]:
+    """'Martillo de Acero 1/2"' -> ['martillo', 'acero']: sin tildes, palabras vacías ni letras sueltas."""
+    if not texto:
+        return []
+    return [p for p in _PALABRA.findall(normalizar(texto)) if len(p) > 1 and p not in PALABRAS_VACIAS]
+
+
+def clave_bloque(nombre: Optional[str]) -> str:
+    """Primera palabra del nombre: en el catálogo es el tipo de producto ("Martillo", "Llave")."""
+    for palabra in _PALABRA.findall(normalizar(nombre or '')):
+        if palabra not in PALABRAS_VACIAS:
+            return palabra
+    return ''
+
+
+class Vocabulario:
+    """Palabras con su frecuencia de documentos (df) e IDF suavizado, como el de scikit-learn."""
+
+    def __init__(self, documentos: Dict[str, int], total: int):
+        self.documentos = documentos
+        self.total = total
+        terminos = sorted(t for t, df in documentos.items() if df >= MINIMO_DOCUMENTOS)
+        self.columnas = {termino: columna for columna, termino in enumerate(terminos)}
+        df = np.fromiter((documentos[t] for t in terminos), dtype=np.float64, count=len(terminos))
+        self.idf = (np.log((1 + total) / (1 + df)) + 1).astype(np.float32)
+
+    @classmethod
+    def contar(cls, textos: Iterable[Tuple[str, Optional[str]]]) -> 'Vocabulario':
+        """`textos`: (nombre, descripcion). Se recorre una sola vez, sin guardarlo."""
+        documentos, total = Counter(), 0
+        for nombre, descripcion in textos:
+            documentos.update(set(palabras(nombre)).union(palabras(descripcion)))
+            total += 1
+        return cls(dict(documentos), total)
+
+    def exportar(self) -> dict:
+        return {'total': self.total, 'documentos': self.documentos}
+
+    @classmethod
+    def importar(cls, datos: dict) -> 'Vocabulario':
+        return cls(datos['documentos'], datos['total'])
+
+    def __len__(self):
+        return len(self.columnas)
+
+    def vectorizar(self, textos: Iterable[Tuple[str, Optional[str]]]) -> 'sparse.csr_matrix':
+        """Matriz CSR (productos x palabras) con filas TF-IDF de norma 1. Las palabras nuevas se ignoran."""
+        columnas = self.columnas
+        indptr, indices, datos = array('q', [0]), array('i'), array('f')
+        for nombre, descripcion in textos:
+            conteo = Counter()
+            for palabra in palabras(nombre):
+                conteo[palabra] += PESO_NOMBRE
+            conteo.update(palabras(descripcion))
+            for palabra, veces in conteo.items():
+                columna = columnas.get(palabra)
+                if columna is not None:
+                    indices.append(columna)
+                    datos.append(veces)
+            indptr.append(len(indices))
+        matriz = sparse.csr_matrix(
+            (np.frombuffer(datos, dtype=np.float32), np.frombuffer(indices, dtype=np.int32),
+             np.frombuffer(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(columnas)),
+        )
+        matriz.data *= self.idf[matriz.indices]
+        normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1), dtype=np.float32).ravel())
+        normas[normas == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / normas) @ matriz, dtype=np.float32)
+
+
+def bloques(claves: Sequence[str], k: int) -> List[List[int]]:
+    """
+    Agrupa las posiciones por clave; las claves con menos de k + 1 productos
+    (que no alcanzarían a llenar su lista) van juntas a un bloque final.
+    """
+    por_clave: Dict[str, List[int]] = {}
+    for posicion, clave in enumerate(claves):
+        por_clave.setdefault(clave, []).append(posicion)
+    grandes, resto = [], []
+    for posiciones in por_clave.values():
+        if len(posiciones) > k:
+            grandes.append(posiciones)
+        else:
+            resto.extend(posiciones)
+    if len(resto) > 1:
+        grandes.append(resto)
+    return grandes
+
+
+def _similitud(filas: 'sparse.csr_matrix', columnas: 'sparse.csr_matrix') -> 'np.ndarray':
+    # Productos parecidos comparten pocas palabras: con el vocabulario del tramo
+    # las matrices densas son chicas y BLAS es varias veces más rápido que sparse @ sparse.
+    usadas = np.unique(columnas.indices)
+    if len(usadas) <= MAXIMO_COLUMNAS_DENSAS:
+        return filas[:, usadas].toarray() @ columnas[:, usadas].toarray().T
+    return (filas @ columnas.T).toarray()
+
+
+def ventana_de(posicion: int, total: int, ventana: int) -> Tuple[int, int]:
+    """Rango [desde, hasta) de `ventana` posiciones centrado en `posicion` dentro de un bloque de `total`."""
+    if total <= ventana:
+        return 0, total
+    desde = min(max(posicion - ventana // 2, 0), total - ventana)
+    return desde, desde + ventana
+
+
+def _mejores(similitud: 'np.ndarray', desde: int, k: int) -> Tuple['np.ndarray', 'np.ndarray']:
+    # Las k columnas de mayor similitud de cada fila, ordenadas, como posiciones del bloque.
+    cantidad = min(k, similitud.shape[1] - 1)
+    posiciones = np.full((similitud.shape[0], k), -1, dtype=np.int64)
+    puntajes = np.zeros((similitud.shape[0], k), dtype=np.float32)
+    if cantidad <= 0:
+        return posiciones, puntajes
+    mejores = np.argpartition(similitud, -cantidad, axis=1)[:, -cantidad:]
+    valores = np.take_along_axis(similitud, mejores, axis=1)
+    orden = np.argsort(-valores, axis=1, kind='stable')
+    mejores = np.take_along_axis(mejores, orden, axis=1) + desde
+    valores = np.take_along_axis(valores, orden, axis=1)
+    debiles = valores < PUNTAJE_MINIMO
+    mejores[debiles] = -1
+    valores[debiles] = 0
+    posiciones[:, :cantidad] = mejores
+    puntajes[:, :cantidad] = valores
+    return posiciones, puntajes
+
+
+def vecinos(matriz: 'sparse.csr_matrix', k: int, ventana: int) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Los k vecinos más parecidos de cada fila de `matriz` (un bloque ya
+    ordenado), sin contar la fila misma. Devuelve (posiciones, puntajes), dos
+    matrices n x k ordenadas de mayor a menor puntaje; -1 donde no hay vecino
+    con puntaje de al menos `PUNTAJE_MINIMO`.
+    """
+    n = matriz.shape[0]
+    posiciones = np.full((n, k), -1, dtype=np.int64)
+    puntajes = np.zeros((n, k), dtype=np.float32)
+    # Por tramos de media ventana: las filas de un tramo comparten las columnas y el
+    # producto es una sola multiplicación de matrices.
+    paso = n if n <= ventana else max(ventana // 2, 1)
+    for inicio in range(0, n, paso):
+        fin = min(inicio + paso, n)
+        desde, hasta = ventana_de(inicio + paso // 2, n, ventana)
+        similitud = _similitud(matriz[inicio:fin], matriz[desde:hasta])
+        filas = np.arange(fin - inicio)
+        similitud[filas, filas + inicio - desde] = -1  # el producto no es su propio relacionado
+        posiciones[inicio:fin], puntajes[inicio:fin] = _mejores(similitud, desde, k)
+    return posiciones, puntajes
+
+
+def vecinos_de(matriz: 'sparse.csr_matrix', filas: Sequence[int], k: int, ventana: int, total: int,
+               desplazamiento: int = 0) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Como `vecinos`, pero solo para las posiciones `filas` de un bloque de
+    `total` productos, cada una contra su propia ventana. `matriz` puede ser un
+    tramo del bloque que empieza en `desplazamiento` y contiene esas ventanas.
+    """
+    posiciones = np.full((len(filas), k), -1, dtype=np.int64)
+    puntajes = np.zeros((len(filas), k), dtype=np.float32)
+    for indice, fila in enumerate(filas):
+        desde, hasta = ventana_de(fila, total, ventana)
+        similitud = _similitud(matriz[fila - desplazamiento], matriz[desde - desplazamiento:hasta - desplazamiento])
+        similitud[0, fila - desde] = -1
+        posiciones[indice], puntajes[indice] = _mejores(similitud, desde, k)
+    return posiciones, puntajes
+
+
+def parecidos(matriz: 'sparse.csr_matrix', fila: int, ventana: int, total: int,
+              desplazamiento: int = 0) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Posiciones de la ventana de `fila` con similitud de al menos `PUNTAJE_MINIMO`, y esas similitudes."""
+    desde, hasta = ventana_de(fila, total, ventana)
+    similitud = _similitud(matriz[fila - desplazamiento], matriz[desde - desplazamiento:hasta - desplazamiento])[0]
+    similitud[fila - desde] = -1
+    cercanos = np.flatnonzero(similitud >= PUNTAJE_MINIMO)
+    return cercanos + desde, similitud[cercanos]
+
+
+def filas_relacionados(ids: 'np.ndarray', posiciones: 'np.ndarray', puntajes: 'np.ndarray',
+                       productos: Optional['np.ndarray'] = None) -> List[Tuple[int, int, int, float]]:
+    """
+    Filas (producto_id, posicion, relacionado_id, puntaje) para la tabla.
+    `ids` son los del bloque ordenado; `productos`, los ids de cada fila de
+    `posiciones` (por defecto, `ids`).
+    """
+    productos = ids if productos is None else productos
+    # Los -1 quedan siempre al final de cada fila: las posiciones válidas son 0, 1, 2...
+    validos = posiciones >= 0
+    producto = np.broadcast_to(productos[:, None], posiciones.shape)[validos]
+    posicion = np.broadcast_to(np.arange(posiciones.shape[1]), posiciones.shape)[validos]
+    return list(zip(producto.tolist(), posicion.tolist(), ids[posiciones[validos]].tolist(),
+                    np.round(puntajes[validos], 4).tolist()))
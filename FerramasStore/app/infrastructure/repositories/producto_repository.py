@@ -1,24 +1,153 @@
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+from django.db import transaction
+from django.db.models import F, Model, QuerySet
+from django.db.models.functions import Round
+from django.utils import timezone
+from ferramas_comun.lecturas import TAMANO_TANDA, CategoriaLectura, ProductoLectura, precio_con_descuento
 from app.domain.models import Producto, Categoria
+from app.domain.operaciones_masivas import FiltroProductos, CambiosProductos
 from app.domain.repositories import ProductoRepositoryInterface, CategoriaRepositoryInterface
+from app.domain.signals import catalogo_modificado
+
+# Filas por sentencia en las actualizaciones masivas por lotes
+TAMANO_LOTE_MASIVO = 5000
+
+# En el orden de los campos de ProductoLectura, con la categoría al final.
+CAMPOS_LECTURA = ('id', 'nombre', 'descripcion', 'precio', 'descuento', 'stock', 'en_venta', 'destacado', 'sku',
+                  'categoria_id', 'categoria__nombre', 'categoria__descripcion')
+
+
+def filtrar_productos(filtro: FiltroProductos) -> QuerySet:
+    queryset = Producto.objects.all()
+    if filtro.categoria_id is not None:
+        queryset = queryset.filter(categoria_id=filtro.categoria_id)
+    if filtro.ids is not None:
+        queryset = queryset.filter(id__in=filtro.ids)
+    if filtro.stock_max is not None:
+        queryset = queryset.filter(stock__lte=filtro.stock_max)
+    if filtro.en_venta is not None:
+        queryset = queryset.filter(en_venta=filtro.en_venta)
+    return queryset
+
+
+def _valores_update(cambios: CambiosProductos) -> dict:
+    # queryset.update() no aplica auto_now: la fecha se fija explícitamente.
+    valores = {'fecha_actualizacion': timezone.now()}
+    if cambios.descuento is not None:
+        valores['descuento'] = cambios.descuento
+    if cambios.precio_porcentaje is not None:
+        valores['precio'] = Round(F('precio') * (1 + cambios.precio_porcentaje / 100), 2)
+    if cambios.en_venta is not None:
+        valores['en_venta'] = cambios.en_venta
+    if cambios.stock is not None:
+        valores['stock'] = cambios.stock
+    return valores
+
+
+def actualizar_queryset(queryset: QuerySet, cambios: CambiosProductos, dry_run: bool = False,
+                        tamano_lote: Optional[int] = None) -> int:
+    """
+    Aplica `cambios` a `queryset` con un solo `UPDATE ... WHERE`, o con un
+    `UPDATE ... WHERE id IN (...)` por lote si se indica `tamano_lote` (para no
+    bloquear la base compartida durante un cambio sobre todo el catálogo).
+    Con `dry_run` solo cuenta los productos afectados.
+    """
+    cambios.validar()
+    if dry_run:
+        return queryset.count()
+    valores = _valores_update(cambios)
+    if not tamano_lote:
+        afectados = queryset.update(**valores)
+    else:
+        afectados, ultimo = 0, 0
+        ordenado = queryset.order_by('id').values_list('id', flat=True)
+        while True:
+            ids = list(ordenado.filter(id__gt=ultimo)[:tamano_lote])
+            if not ids:
+                break
+            with transaction.atomic():
+                afectados += Producto.objects.filter(id__in=ids).update(**valores)
+            ultimo = ids[-1]
+    # update() no dispara post_save: se avisa a los caches del catálogo.
+    catalogo_modificado.send(sender=Producto)
+    return afectados
+
+
+def _lecturas(filas: Iterable[tuple]) -> Iterator[ProductoLectura]:
+    # Una sola CategoriaLectura por categoría, compartida por todos sus productos.
+    categorias = {}
+    for (pid, nombre, descripcion, precio, descuento, stock, en_venta, destacado, sku,
+         categoria_id, categoria_nombre, categoria_descripcion) in filas:
+        categoria = categorias.get(categoria_id)
+        if categoria is None:
+            categoria = categorias[categoria_id] = CategoriaLectura(categoria_id, categoria_nombre,
+                                                                    categoria_descripcion)
+        yield ProductoLectura(pid, nombre, descripcion, precio, precio_con_descuento(precio, descuento), descuento,
+                              stock, en_venta, destacado, sku, categoria_id, categoria)
+
+
+def _bulk_update(modelo, objetos: Dict[int, Model], cambios: Dict[int, dict], **fijos) -> int:
+    # Un SELECT (quien llama) y un UPDATE ... CASE por lote, en vez de un SELECT y un UPDATE por objeto.
+    campos = set(fijos)
+    for objeto_id, objeto in objetos.items():
+        for campo, valor in {**cambios[objeto_id], **fijos}.items():
+            setattr(objeto, campo, valor)
+        campos.update(cambios[objeto_id])
+    if objetos:
+        with transaction.atomic():
+            modelo.objects.bulk_update(list(objetos.values()), sorted(campos))
+        # bulk_update() no dispara post_save: se avisa a los caches del catálogo.
+        catalogo_modificado.send(sender=modelo, instancias=list(objetos.values()))
+    return len(objetos)
+
+
+def _bulk_create(modelo, objetos: List[Model]) -> List[Model]:
+    if objetos:
+        with transaction.atomic():
+            objetos = modelo.objects.bulk_create(objetos)
+        catalogo_modificado.send(sender=modelo, instancias=objetos)
+    return objetos
+
+
+def _filas_lectura(categoria_id: Optional[int], en_venta: Optional[bool]) -> QuerySet:
+    queryset = Producto.objects.all()
+    if categoria_id is not None:
+        queryset = queryset.filter(categoria_id=categoria_id)
+    if en_venta is not None:
+        queryset = queryset.filter(en_venta=en_venta)
+    return queryset.order_by('id').values_list(*CAMPOS_LECTURA)
 
 
 class DjangoProductoRepository(ProductoRepositoryInterface):
+    def listar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None) -> List[ProductoLectura]:
+        return list(_lecturas(_filas_lectura(categoria_id, en_venta)))
+    
+    def iterar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None,
+               tamano: int = TAMANO_TANDA) -> Iterator[ProductoLectura]:
+        return _lecturas(_filas_lectura(categoria_id, en_venta).iterator(chunk_size=tamano))
+    
     def get_all(self) -> List[Producto]:
-        return list(Producto.objects.all())
+        return list(Producto.objects.select_related('categoria'))
     
     def get_by_id(self, producto_id: int) -> Optional[Producto]:
-        try:
-            return Producto.objects.get(id=producto_id)
-        except Producto.DoesNotExist:
-            return None
+        # Con el cargador del request: los get_by_id de un request se juntan en un get_many
+        # y el mismo id no se vuelve a consultar. Importado aquí: cargadores usa este módulo.
+        from app.infrastructure import cargadores
+        return cargadores.productos().cargar(producto_id)
     
     def get_by_categoria(self, categoria: Categoria, en_venta: bool = True) -> List[Producto]:
-        return list(Producto.objects.filter(categoria=categoria, en_venta=en_venta))
+        # Los templates muestran producto.categoria.nombre: se trae en el mismo JOIN.
+        return list(Producto.objects.filter(categoria_id=categoria.id, en_venta=en_venta).select_related('categoria'))
+    
+    def get_many(self, producto_ids: Iterable[int]) -> Dict[int, Producto]:
+        return Producto.objects.select_related('categoria').in_bulk(set(producto_ids))
     
     def create(self, producto_data: dict) -> Producto:
         return Producto.objects.create(**producto_data)
     
+    def bulk_create(self, productos_data: List[dict]) -> List[Producto]:
+        return _bulk_create(Producto, [Producto(**datos) for datos in productos_data])
+    
     def update(self, producto_id: int, producto_data: dict) -> Optional[Producto]:
         try:
             producto = Producto.objects.get(id=producto_id)
@@ -36,6 +165,14 @@ class DjangoProductoRepository(ProductoRepositoryInterface):
             return True
         except Producto.DoesNotExist:
             return False
+    
+    def bulk_update(self, cambios: Dict[int, dict]) -> int:
+        # bulk_update() no aplica auto_now: la fecha se fija explícitamente.
+        productos = Producto.objects.in_bulk(set(cambios))
+        return _bulk_update(Producto, productos, cambios, fecha_actualizacion=timezone.now())
+    
+    def update_masivo(self, filtro: FiltroProductos, cambios: CambiosProductos, dry_run: bool = False) -> int:
+        return actualizar_queryset(filtrar_productos(filtro), cambios, dry_run)
 
 
 class DjangoCategoriaRepository(CategoriaRepositoryInterface):
@@ -43,10 +180,11 @@ class DjangoCategoriaRepository(CategoriaRepositoryInterface):
         return list(Categoria.objects.all())
     
     def get_by_id(self, categoria_id: int) -> Optional[Categoria]:
-        try:
-            return Categoria.objects.get(id=categoria_id)
-        except Categoria.DoesNotExist:
-            return None
+        from app.infrastructure import cargadores
+        return cargadores.categorias().cargar(categoria_id)
+    
+    def get_many(self, categoria_ids: Iterable[int]) -> Dict[int, Categoria]:
+        return Categoria.objects.in_bulk(set(categoria_ids))
     
     def get_by_name(self, nombre: str) -> Optional[Categoria]:
         try:
@@ -56,3 +194,9 @@ class DjangoCategoriaRepository(CategoriaRepositoryInterface):
     
     def create(self, categoria_data: dict) -> Categoria:
         return Categoria.objects.create(**categoria_data)
+    
+    def bulk_create(self, categorias_data: List[dict]) -> List[Categoria]:
+        return _bulk_create(Categoria, [Categoria(**datos) for datos in categorias_data])
+    
+    def bulk_update(self, cambios: Dict[int, dict]) -> int:
+        return _bulk_update(Categoria, self.get_many(cambios), cambios)
@@ -0,0 +1,51 @@
+from typing import Iterator, List, Optional
+from ferramas_comun.lecturas import TAMANO_TANDA, ProductoLectura
+from app.domain.models import Producto, Categoria
+from app.infrastructure.repositories.producto_repository import DjangoProductoRepository, DjangoCategoriaRepository
+from app.infrastructure.snapshot.servicio import snapshot_actual
+
+
+class SnapshotProductoRepository(DjangoProductoRepository):
+    """
+    Lecturas de listado desde el snapshot mmap del catálogo; si todavía no hay
+    snapshot se usa el ORM. `get_by_id` y las escrituras siguen yendo a la base,
+    porque quien las usa espera un modelo que se pueda guardar.
+    """
+
+    def get_all(self) -> List[Producto]:
+        snapshot = snapshot_actual()
+        if snapshot is None:
+            return super().get_all()
+        return list(snapshot.productos())
+
+    def listar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None) -> List[ProductoLectura]:
+        return list(self.iterar(categoria_id, en_venta))
+
+    def iterar(self, categoria_id: Optional[int] = None, en_venta: Optional[bool] = None,
+               tamano: int = TAMANO_TANDA) -> Iterator[ProductoLectura]:
+        snapshot = snapshot_actual()
+        if snapshot is None or (categoria_id is not None and snapshot.categoria(categoria_id) is None):
+            return super().iterar(categoria_id, en_venta, tamano)
+        if categoria_id is not None:
+            return snapshot.productos_de_categoria(categoria_id, en_venta=en_venta)
+        return (p for p in snapshot.productos_por_id() if en_venta is None or p.en_venta == en_venta)
+
+    def get_by_categoria(self, categoria: Categoria, en_venta: bool = True) -> List[Producto]:
+        snapshot = snapshot_actual()
+        if snapshot is None or snapshot.categoria(categoria.id) is None:
+            return super().get_by_categoria(categoria, en_venta)
+        return list(snapshot.productos_de_categoria(categoria.id, en_venta=en_venta))
+
+
+class SnapshotCategoriaRepository(DjangoCategoriaRepository):
+    def get_all(self) -> List[Categoria]:
+        snapshot = snapshot_actual()
+        if snapshot is None:
+            return super().get_all()
+        return snapshot.categorias()
+
+    def get_by_name(self, nombre: str) -> Optional[Categoria]:
+        snapshot = snapshot_actual()
+        categoria = snapshot.categoria_por_nombre(nombre) if snapshot is not None else None
+        # Una categoría recién creada puede no estar aún en el snapshot.
+        return categoria or super().get_by_name(nombre)
@@ -0,0 +1 @@
+# Catalog snapshot
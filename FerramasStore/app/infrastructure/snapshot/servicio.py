@@ -0,0 +1,51 @@
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from ferramas_comun.catalogo_snapshot import CatalogoSnapshot, LectorSnapshot, ReconstructorSnapshot, monto_decimal
+
+from app.domain.signals import catalogo_modificado
+
+_lector: Optional[LectorSnapshot] = None
+_reconstructor: Optional[ReconstructorSnapshot] = None
+
+
+def _ruta_snapshot() -> Optional[str]:
+    # Con la base en memoria de los tests no hay archivo compartido que proteger.
+    if not getattr(settings, 'CATALOGO_SNAPSHOT', None) or connection.is_in_memory_db():
+        return None
+    return str(settings.CATALOGO_SNAPSHOT)
+
+
+def reconstructor() -> Optional[ReconstructorSnapshot]:
+    global _reconstructor
+    ruta = _ruta_snapshot()
+    if ruta is None:
+        return None
+    if _reconstructor is None or _reconstructor.ruta_snapshot != ruta:
+        _reconstructor = ReconstructorSnapshot(str(connection.settings_dict['NAME']), ruta)
+    return _reconstructor
+
+
+def snapshot_actual() -> Optional[CatalogoSnapshot]:
+    """Snapshot vigente, o None si no existe todavía (en ese caso se pide generarlo)."""
+    global _lector
+    ruta = _ruta_snapshot()
+    if ruta is None:
+        return None
+    if _lector is None or _lector.ruta != ruta:
+        _lector = LectorSnapshot(ruta, monto=monto_decimal)
+    actual = _lector.actual()
+    if actual is None:
+        reconstructor().solicitar()
+    return actual
+
+
+def solicitar_reconstruccion(**kwargs):
+    tarea = reconstructor()
+    if tarea is not None:
+        # Se regenera con los datos ya confirmados, no dentro de la transacción en curso.
+        transaction.on_commit(tarea.solicitar)
+
+
+catalogo_modificado.connect(solicitar_reconstruccion, dispatch_uid='snapshot_catalogo')
@@ -0,0 +1 @@
+# Typeahead index
@@ -0,0 +1,42 @@
+from typing import List, Optional
+
+from django.db import connection
+from ferramas_comun.indice_prefijos import ServicioSugerencias, Sugerencia
+
+from app.domain.signals import catalogo_modificado
+
+_servicio: Optional[ServicioSugerencias] = None
+_base: Optional[str] = None
+
+
+def _consultar(sql: str, parametros: tuple):
+    with connection.cursor() as cursor:
+        # El cursor de Django usa el formato `%s` (también para el log de consultas).
+        cursor.execute(sql.replace('?', '%s'), parametros)
+        yield from cursor
+
+
+def servicio() -> ServicioSugerencias:
+    global _servicio, _base
+    nombre = str(connection.settings_dict['NAME'])
+    if _servicio is None or _base != nombre:
+        # Con la base en memoria de los tests otro hilo no ve los datos: todo se hace en el request.
+        _servicio = ServicioSugerencias(
+            _consultar,
+            en_segundo_plano=not connection.is_in_memory_db(),
+            al_terminar_hilo=lambda: connection.close(),
+        )
+        _base = nombre
+    return _servicio
+
+
+def sugerir(consulta: str, limite: int = 10) -> List[Sugerencia]:
+    return servicio().sugerir(consulta, limite)
+
+
+def marcar_pendiente(**kwargs):
+    if _servicio is not None:
+        _servicio.marcar_pendiente()
+
+
+catalogo_modificado.connect(marcar_pendiente, dispatch_uid='indice_sugerencias')
@@ -0,0 +1,41 @@
+import resource
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.infrastructure.relacionados import tfidf
+from app.infrastructure.relacionados.calculo import (
+    K, UMBRAL_COMPLETO, VENTANA, calcular_completo, calcular_incremental,
+)
+
+
+class Command(BaseCommand):
+    help = ("Calcula los productos relacionados (TF-IDF de nombre y descripción dentro de cada categoría). "
+            "Por defecto es incremental: solo recalcula lo que cambió desde la ejecución anterior.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help="Recalcula todo el catálogo.")
+        parser.add_argument('--k', type=int, default=K, help="Relacionados por producto.")
+        parser.add_argument('--ventana', type=int, default=VENTANA,
+                            help="Productos con los que se compara cada uno dentro de un bloque grande.")
+        parser.add_argument('--umbral', type=float, default=UMBRAL_COMPLETO,
+                            help="Fracción del catálogo modificada desde la que el incremental pasa a completo.")
+
+    def handle(self, *args, **options):
+        if not tfidf.disponible:
+            raise CommandError("El cálculo de relacionados necesita NumPy y SciPy (pip install numpy scipy).")
+        if options['completo']:
+            resultado = calcular_completo(options['k'], options['ventana'])
+        else:
+            resultado = calcular_incremental(options['k'], options['ventana'], options['umbral'])
+
+        tipo = 'Cálculo completo' if resultado.completo else 'Cálculo incremental'
+        if not resultado.completo and not resultado.productos:
+            self.stdout.write(f"{tipo}: sin cambios desde la ejecución anterior.")
+            return
+        # ru_maxrss viene en KiB en Linux: es el pico de memoria del proceso.
+        memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"{tipo}: {resultado.productos} productos, {resultado.relaciones} relaciones "
+            f"en {resultado.duracion:.1f} s ({resultado.productos / max(resultado.duracion, 1e-9):,.0f} productos/s, "
+            f"memoria máxima {memoria:,.0f} MB)."
+        ))
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ferramas_comun.catalogo_sintetico import ConfiguracionCatalogo, cargar_catalogo, contar_filas
+from ferramas_comun.catalogo_snapshot import generar_snapshot
+
+
+class Command(BaseCommand):
+    help = "Genera un catálogo sintético determinista y lo carga en la base SQLite compartida."
+
+    def add_arguments(self, parser):
+        defaults = ConfiguracionCatalogo()
+        parser.add_argument('--productos', type=int, default=defaults.productos)
+        parser.add_argument('--categorias', type=int, default=defaults.categorias)
+        parser.add_argument('--semilla', type=int, default=defaults.semilla)
+        parser.add_argument('--sesgo-categorias', type=float, default=defaults.sesgo_categorias,
+                            help="Exponente Zipf del reparto por categoría (0 = uniforme).")
+        parser.add_argument('--precio-mediana', type=float, default=defaults.precio_mediana)
+        parser.add_argument('--precio-dispersion', type=float, default=defaults.precio_dispersion)
+        parser.add_argument('--stock-promedio', type=float, default=defaults.stock_promedio)
+        parser.add_argument('--prob-sin-stock', type=float, default=defaults.prob_sin_stock)
+        parser.add_argument('--prob-descuento', type=float, default=defaults.prob_descuento)
+        parser.add_argument('--prob-destacado', type=float, default=defaults.prob_destacado)
+        parser.add_argument('--prob-en-venta', type=float, default=defaults.prob_en_venta)
+        parser.add_argument('--lote', type=int, default=50_000, help="Filas por executemany.")
+        parser.add_argument('--limpiar', action='store_true',
+                            help="Elimina los productos existentes antes de cargar.")
+
+    def handle(self, *args, **options):
+        if options['categorias'] < 1:
+            raise CommandError("--categorias debe ser al menos 1.")
+        config = ConfiguracionCatalogo(
+            productos=options['productos'],
+            categorias=options['categorias'],
+            semilla=options['semilla'],
+            sesgo_categorias=options['sesgo_categorias'],
+            precio_mediana=options['precio_mediana'],
+            precio_dispersion=options['precio_dispersion'],
+            stock_promedio=options['stock_promedio'],
+            prob_sin_stock=options['prob_sin_stock'],
+            prob_descuento=options['prob_descuento'],
+            prob_destacado=options['prob_destacado'],
+            prob_en_venta=options['prob_en_venta'],
+        )
+        ruta_db = settings.DATABASES['default']['NAME']
+
+        inicio = time.perf_counter()
+        resultado = cargar_catalogo(ruta_db, config, limpiar=options['limpiar'], tamano_lote=options['lote'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['productos']} productos en {resultado['categorias']} categorías "
+            f"cargados en {duracion:.1f} s ({resultado['productos'] / max(duracion, 1e-9):,.0f} filas/s)."
+        ))
+        self.stdout.write(f"Total en app_producto: {contar_filas(ruta_db)}")
+
+        # La carga masiva no pasa por las señales: el snapshot se regenera aquí.
+        if settings.CATALOGO_SNAPSHOT:
+            inicio = time.perf_counter()
+            generar_snapshot(str(ruta_db), settings.CATALOGO_SNAPSHOT)
+            self.stdout.write(f"Snapshot del catálogo regenerado en {time.perf_counter() - inicio:.1f} s.")
@@ -0,0 +1,122 @@
+import json
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.infrastructure.carga import informe, servicios, trafico
+from app.infrastructure.carga.upstreams import Comportamiento, MercadoPagoFalso, MindicadorFalso
+
+
+class Command(BaseCommand):
+    help = ("Prueba de carga en lazo cerrado: levanta la API, Django y upstreams falsos de mindicador y "
+            "Mercado Pago, reproduce una mezcla de tráfico y compara latencias y errores con los SLO. "
+            "Termina con error si algún SLO no se cumple.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10, help="Usuarios virtuales simultáneos.")
+        parser.add_argument('--duracion', type=float, default=60, help="Segundos medidos.")
+        parser.add_argument('--calentamiento', type=float, default=10, help="Segundos previos sin medir.")
+        parser.add_argument('--pensar', type=float, default=0.5, help="Pausa media entre pasos, en segundos.")
+        parser.add_argument('--mezcla', default=','.join(f'{k}={v}' for k, v in trafico.MEZCLA_POR_DEFECTO.items()),
+                            help=f"Pesos de los escenarios ({', '.join(trafico.ESCENARIOS)}).")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--timeout', type=float, default=10, help="Timeout de cada request del cliente.")
+        parser.add_argument('--slo', action='append', default=[], metavar='PASO=P95_MS[:ERRORES_%]',
+                            help="Reemplaza un SLO, p. ej. --slo pagar=2000:5 (se puede repetir).")
+        parser.add_argument('--latencia-dolar', type=float, default=0.08, help="Mediana de mindicador, en segundos.")
+        parser.add_argument('--errores-dolar', type=float, default=0.0, help="Probabilidad de 500 de mindicador.")
+        parser.add_argument('--colgar-dolar', type=float, default=0.0,
+                            help="Probabilidad de que mindicador no responda.")
+        parser.add_argument('--latencia-pago', type=float, default=0.3, help="Mediana de Mercado Pago, en segundos.")
+        parser.add_argument('--errores-pago', type=float, default=0.0, help="Probabilidad de 500 de Mercado Pago.")
+        parser.add_argument('--colgar-pago', type=float, default=0.0,
+                            help="Probabilidad de que Mercado Pago no responda.")
+        parser.add_argument('--workers-api', type=int, default=1, help="Workers de uvicorn.")
+        parser.add_argument('--base', metavar='RUTA',
+                            help="Base SQLite de los servicios que se levantan (ya migrada y con catálogo).")
+        parser.add_argument('--api-url', help="Usa una API ya levantada (con sus propios upstreams).")
+        parser.add_argument('--django-url', help="Usa un Django ya levantado.")
+        parser.add_argument('--credenciales', metavar='USUARIO:CLAVE',
+                            help="Usuario con el que paga el escenario comprar (el pago exige sesión).")
+        parser.add_argument('--json', metavar='ARCHIVO', help="Guarda el resumen en JSON para comparar corridas.")
+
+    def handle(self, *args, **options):
+        try:
+            mezcla = trafico.leer_mezcla(options['mezcla'])
+            slos = informe.leer_slos(options['slo'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        credenciales = None
+        if options['credenciales']:
+            usuario, separador, clave = options['credenciales'].partition(':')
+            if not separador:
+                raise CommandError("--credenciales va como USUARIO:CLAVE.")
+            credenciales = (usuario, clave)
+        elif 'comprar' in mezcla:
+            raise CommandError("El escenario comprar paga con un usuario: indica --credenciales USUARIO:CLAVE "
+                               "o quítalo de --mezcla.")
+
+        self.upstreams = {}
+        with ExitStack() as pila:
+            destinos = self._levantar(pila, options)
+            catalogo = trafico.descubrir_catalogo(destinos)
+            if not catalogo.productos:
+                raise CommandError("El catálogo está vacío: carga uno con `python manage.py generar_catalogo`.")
+            self.stdout.write(
+                f"{options['usuarios']} usuarios, {options['calentamiento']:.0f} s de calentamiento y "
+                f"{options['duracion']:.0f} s medidos contra {destinos.django} y {destinos.api}..."
+            )
+            try:
+                registro = trafico.ejecutar(
+                    destinos, catalogo, options['usuarios'], options['duracion'], options['calentamiento'],
+                    options['pensar'], mezcla, options['semilla'], options['timeout'], credenciales,
+                )
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        resumenes = registro.resumen()
+        incumplidos = informe.evaluar(resumenes, slos)
+        self.stdout.write(informe.tabla(resumenes, slos))
+        for nombre, upstream in self.upstreams.items():
+            self.stdout.write(f'{nombre}: {upstream.atendidos} requests, {upstream.fallados} con error simulado')
+        causas = registro.causas()
+        if causas:
+            self.stdout.write('Errores: ' + ', '.join(f'{causa} ({veces})' for causa, veces in causas.items()))
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    'opciones': {clave: options[clave] for clave in ('usuarios', 'duracion', 'pensar', 'mezcla')},
+                    'duracion': registro.duracion,
+                    'pasos': [{**r._asdict(), 'tasa_errores': r.tasa_errores} for r in resumenes],
+                    'errores': causas,
+                    'incumplidos': incumplidos,
+                }, archivo, ensure_ascii=False, indent=2)
+        if incumplidos:
+            raise CommandError('SLO no cumplidos:\n  ' + '\n  '.join(incumplidos))
+        self.stdout.write(self.style.SUCCESS('Todos los SLO se cumplen.'))
+
+    def _levantar(self, pila: ExitStack, options) -> trafico.Destinos:
+        api_url = options['api_url']
+        if not api_url:
+            mindicador = MindicadorFalso(Comportamiento(
+                options['latencia_dolar'], errores=options['errores_dolar'], colgar=options['colgar_dolar']),
+                semilla=options['semilla'])
+            pila.callback(mindicador.cerrar)
+            mercado_pago = MercadoPagoFalso(Comportamiento(
+                options['latencia_pago'], errores=options['errores_pago'], colgar=options['colgar_pago']),
+                semilla=options['semilla'])
+            pila.callback(mercado_pago.cerrar)
+            self.upstreams = {'mindicador (falso)': mindicador, 'Mercado Pago (falso)': mercado_pago}
+            api = servicios.api(mindicador.url, mercado_pago.url, options['workers_api'], options['base'])
+            api_url = self._iniciar(pila, api)
+        django_url = options['django_url'] or self._iniciar(pila, servicios.django(api_url, options['base']))
+        return trafico.Destinos(django=django_url.rstrip('/'), api=api_url.rstrip('/'))
+
+    def _iniciar(self, pila: ExitStack, servicio: servicios.ServicioLocal) -> str:
+        self.stdout.write(f"Iniciando {servicio.nombre} en {servicio.url}...")
+        try:
+            servicio.iniciar()
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        pila.callback(servicio.detener)
+        return servicio.url
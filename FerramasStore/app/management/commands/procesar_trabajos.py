@@ -0,0 +1,81 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from ferramas_comun import cola_trabajos
+
+from app.infrastructure.cola.servicio import programar_recurrentes
+
+COLA_BENCHMARK = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = ("Ejecuta los trabajos de la cola persistente (app_trabajo) hasta recibir SIGINT/SIGTERM. "
+            "Se pueden levantar varios, en la misma máquina o no, sobre la misma base.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colas', nargs='+', default=[cola_trabajos.COLA], help="Colas que atiende.")
+        parser.add_argument('--hilos', type=int, default=4, help="Trabajos simultáneos en hilos.")
+        parser.add_argument('--procesos', type=int, default=0,
+                            help="Trabajos simultáneos en procesos (para tareas de CPU); reemplaza a --hilos.")
+        parser.add_argument('--visibilidad', type=float, default=cola_trabajos.VISIBILIDAD,
+                            help="Segundos tras los que un trabajo de un trabajador caído vuelve a la cola.")
+        parser.add_argument('--hasta-vaciar', action='store_true',
+                            help="Termina cuando no quedan trabajos disponibles.")
+        parser.add_argument('--benchmark', type=int, metavar='N',
+                            help=f"Encola N trabajos vacíos en la cola '{COLA_BENCHMARK}' y mide trabajos/s.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError("La cola necesita la base SQLite en un archivo.")
+        ruta = str(connection.settings_dict['NAME'])
+        if options['benchmark']:
+            self._benchmark(ruta, options)
+            return
+
+        programar_recurrentes()
+        # Con --procesos los hijos se crean con fork: no pueden heredar conexiones abiertas.
+        connections.close_all()
+        trabajador = cola_trabajos.Trabajador(ruta, options['colas'], options['hilos'], options['procesos'],
+                                         options['visibilidad'])
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(senal, lambda *_: trabajador.detener())
+        self.stdout.write(f"Procesando {', '.join(options['colas'])} "
+                          f"con {options['procesos'] or options['hilos']} "
+                          f"{'procesos' if options['procesos'] else 'hilos'}...")
+        trabajador.ejecutar(hasta_vaciar=options['hasta_vaciar'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{trabajador.terminados} trabajos terminados, {trabajador.errores} con error."
+        ))
+
+    def _benchmark(self, ruta, options):
+        cantidad = options['benchmark']
+        cola = cola_trabajos.Cola(ruta)
+
+        # De a uno, cada uno en su transacción: como encola un request.
+        muestra = min(cantidad, 1000)
+        inicio = time.perf_counter()
+        for _ in range(muestra):
+            cola.encolar('cola.nada', cola=COLA_BENCHMARK)
+        de_a_uno = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        cola.encolar_lote(cola_trabajos.fila('cola.nada', cola=COLA_BENCHMARK) for _ in range(cantidad - muestra))
+        en_lote = time.perf_counter() - inicio
+
+        connections.close_all()
+        trabajador = cola_trabajos.Trabajador(ruta, [COLA_BENCHMARK], options['hilos'], options['procesos'])
+        inicio = time.perf_counter()
+        trabajador.ejecutar(hasta_vaciar=True)
+        procesando = time.perf_counter() - inicio
+        cola.cerrar()
+
+        self.stdout.write(f"Encolar de a uno: {muestra / de_a_uno:,.0f} trabajos/s ({muestra} trabajos).")
+        if cantidad > muestra:
+            self.stdout.write(f"Encolar en lote: {(cantidad - muestra) / en_lote:,.0f} trabajos/s "
+                              f"({cantidad - muestra} trabajos).")
+        self.stdout.write(self.style.SUCCESS(
+            f"Procesar: {trabajador.terminados / procesando:,.0f} trabajos/s ({trabajador.terminados} en "
+            f"{procesando:.2f} s con {options['procesos'] or options['hilos']} "
+            f"{'procesos' if options['procesos'] else 'hilos'})."
+        ))
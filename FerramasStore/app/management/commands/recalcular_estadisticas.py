@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from app.infrastructure.estadisticas import recalcular
+
+
+class Command(BaseCommand):
+    help = ("Rearma las estadísticas por categoría (app_estadisticacategoria) desde app_producto. "
+            "Los triggers las mantienen al día; esto solo hace falta si se desfasaron.")
+
+    def handle(self, *args, **options):
+        categorias = recalcular()
+        self.stdout.write(self.style.SUCCESS(f"Estadísticas recalculadas para {categorias} categorías."))
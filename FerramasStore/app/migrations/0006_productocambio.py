@@ -0,0 +1,82 @@
+from django.db import migrations, models
+
+# La tabla puede existir ya si la API FastAPI arrancó antes (la crea con el mismo
+# DDL en api/app/productos/domain/models_sql.py), por eso todo es IF NOT EXISTS.
+CREAR_TABLA = """
+CREATE TABLE IF NOT EXISTS "app_productocambio" (
+    "secuencia" integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "producto_id" integer NOT NULL UNIQUE,
+    "operacion" varchar(6) NOT NULL,
+    "fecha" datetime NOT NULL
+)
+"""
+
+# INSERT OR REPLACE borra la fila anterior del producto y asigna una secuencia nueva:
+# la tabla queda compactada (una fila por producto) y la secuencia nunca retrocede.
+TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_insert AFTER INSERT ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_update AFTER UPDATE ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_delete AFTER DELETE ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (OLD.id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Los productos incluyen su categoría: renombrarla los cambia a todos.
+    """
+    CREATE TRIGGER IF NOT EXISTS app_categoria_cambio_update AFTER UPDATE ON app_categoria
+    WHEN OLD.nombre IS NOT NEW.nombre OR OLD.descripcion IS NOT NEW.descripcion BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        SELECT id, 'upsert', CURRENT_TIMESTAMP FROM app_producto WHERE categoria_id = NEW.id;
+    END
+    """,
+]
+
+POBLAR = """
+INSERT OR IGNORE INTO app_productocambio (producto_id, operacion, fecha)
+SELECT id, 'upsert', fecha_actualizacion FROM app_producto ORDER BY id
+"""
+
+BORRAR = [
+    'DROP TRIGGER IF EXISTS app_producto_cambio_insert',
+    'DROP TRIGGER IF EXISTS app_producto_cambio_update',
+    'DROP TRIGGER IF EXISTS app_producto_cambio_delete',
+    'DROP TRIGGER IF EXISTS app_categoria_cambio_update',
+    'DROP TABLE IF EXISTS "app_productocambio"',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_subscriber'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ProductoCambio',
+                    fields=[
+                        ('secuencia', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('producto_id', models.IntegerField(unique=True)),
+                        ('operacion', models.CharField(choices=[('upsert', 'Alta o modificación'), ('delete', 'Eliminación')], max_length=6)),
+                        ('fecha', models.DateTimeField()),
+                    ],
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL([CREAR_TABLA, *TRIGGERS, POBLAR], reverse_sql=BORRAR),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:56
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_productocambio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(django.db.models.functions.comparison.Collate('nombre', 'NOCASE'), name='producto_nombre_nocase'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(django.db.models.functions.comparison.Collate('sku', 'NOCASE'), name='producto_sku_nocase'),
+        ),
+    ]
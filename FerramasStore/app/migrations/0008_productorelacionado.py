@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# WITHOUT ROWID: las filas quedan guardadas en el orden de la clave primaria, así la
+# lista de un producto es contigua. IF NOT EXISTS porque la API FastAPI crea la misma
+# tabla (api/app/productos/domain/models_sql.py) si arranca antes.
+CREAR_TABLA = """
+CREATE TABLE IF NOT EXISTS "app_productorelacionado" (
+    "producto_id" bigint NOT NULL,
+    "posicion" smallint unsigned NOT NULL CHECK ("posicion" >= 0),
+    "relacionado_id" bigint NOT NULL,
+    "puntaje" real NOT NULL,
+    PRIMARY KEY ("producto_id", "posicion")
+) WITHOUT ROWID
+"""
+
+# El cálculo incremental busca qué listas apuntan a un producto que cambió.
+CREAR_INDICE = """
+CREATE INDEX IF NOT EXISTS "app_productorelacionado_relacionado_id_cd0b4e97"
+ON "app_productorelacionado" ("relacionado_id")
+"""
+
+BORRAR = ['DROP TABLE IF EXISTS "app_productorelacionado"']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_indices_busqueda_producto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalculoRelacionados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secuencia', models.BigIntegerField()),
+                ('completo', models.BooleanField()),
+                ('productos', models.IntegerField()),
+                ('relaciones', models.IntegerField()),
+                ('duracion', models.FloatField()),
+                ('vocabulario', models.JSONField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FirmaRelacionados',
+            fields=[
+                ('producto_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('firma', models.BigIntegerField()),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ProductoRelacionado',
+                    fields=[
+                        ('pk', models.CompositePrimaryKey('producto', 'posicion', blank=True, editable=False, primary_key=True, serialize=False)),
+                        ('posicion', models.PositiveSmallIntegerField()),
+                        ('puntaje', models.FloatField()),
+                        ('producto', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='relacionados', to='app.producto')),
+                        ('relacionado', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='relacionado_en', to='app.producto')),
+                    ],
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL([CREAR_TABLA, CREAR_INDICE], reverse_sql=BORRAR),
+            ],
+        ),
+    ]
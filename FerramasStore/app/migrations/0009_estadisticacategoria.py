@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# IF NOT EXISTS porque la API FastAPI crea la misma tabla y los mismos triggers
+# (api/app/productos/domain/models_sql.py) si arranca antes.
+CREAR_TABLA = """
+CREATE TABLE IF NOT EXISTS "app_estadisticacategoria" (
+    "categoria_id" bigint NOT NULL PRIMARY KEY,
+    "productos" integer NOT NULL,
+    "en_venta" integer NOT NULL,
+    "unidades" bigint NOT NULL,
+    "valor_stock_centavos" bigint NOT NULL,
+    "descuento_centesimas" bigint NOT NULL,
+    "destacados" integer NOT NULL
+)
+"""
+
+# Un producto suma sus valores a la fila de su categoría al entrar y los resta al
+# salir; una modificación es una salida de OLD más una entrada de NEW (así también
+# cubre el cambio de categoría). Los montos van en centavos: enteros exactos.
+TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_insert AFTER INSERT ON app_producto BEGIN
+        INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                              valor_stock_centavos, descuento_centesimas, destacados)
+        VALUES (NEW.categoria_id, 1, COALESCE(NEW.en_venta, 0), COALESCE(NEW.stock, 0),
+                CAST(ROUND(COALESCE(NEW.precio, 0) * COALESCE(NEW.stock, 0) * 100) AS INTEGER),
+                CAST(ROUND(COALESCE(NEW.descuento, 0) * 100) AS INTEGER), COALESCE(NEW.destacado, 0))
+        ON CONFLICT (categoria_id) DO UPDATE SET
+            productos = productos + excluded.productos,
+            en_venta = en_venta + excluded.en_venta,
+            unidades = unidades + excluded.unidades,
+            valor_stock_centavos = valor_stock_centavos + excluded.valor_stock_centavos,
+            descuento_centesimas = descuento_centesimas + excluded.descuento_centesimas,
+            destacados = destacados + excluded.destacados;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_delete AFTER DELETE ON app_producto BEGIN
+        UPDATE app_estadisticacategoria SET
+            productos = productos - 1,
+            en_venta = en_venta - COALESCE(OLD.en_venta, 0),
+            unidades = unidades - COALESCE(OLD.stock, 0),
+            valor_stock_centavos = valor_stock_centavos
+                - CAST(ROUND(COALESCE(OLD.precio, 0) * COALESCE(OLD.stock, 0) * 100) AS INTEGER),
+            descuento_centesimas = descuento_centesimas - CAST(ROUND(COALESCE(OLD.descuento, 0) * 100) AS INTEGER),
+            destacados = destacados - COALESCE(OLD.destacado, 0)
+        WHERE categoria_id = OLD.categoria_id;
+    END
+    """,
+    # Solo si cambia alguna columna que entra en las estadísticas (nombre o sku no).
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_update
+    AFTER UPDATE OF categoria_id, precio, stock, descuento, destacado, en_venta ON app_producto BEGIN
+        UPDATE app_estadisticacategoria SET
+            productos = productos - 1,
+            en_venta = en_venta - COALESCE(OLD.en_venta, 0),
+            unidades = unidades - COALESCE(OLD.stock, 0),
+            valor_stock_centavos = valor_stock_centavos
+                - CAST(ROUND(COALESCE(OLD.precio, 0) * COALESCE(OLD.stock, 0) * 100) AS INTEGER),
+            descuento_centesimas = descuento_centesimas - CAST(ROUND(COALESCE(OLD.descuento, 0) * 100) AS INTEGER),
+            destacados = destacados - COALESCE(OLD.destacado, 0)
+        WHERE categoria_id = OLD.categoria_id;
+        INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                              valor_stock_centavos, descuento_centesimas, destacados)
+        VALUES (NEW.categoria_id, 1, COALESCE(NEW.en_venta, 0), COALESCE(NEW.stock, 0),
+                CAST(ROUND(COALESCE(NEW.precio, 0) * COALESCE(NEW.stock, 0) * 100) AS INTEGER),
+                CAST(ROUND(COALESCE(NEW.descuento, 0) * 100) AS INTEGER), COALESCE(NEW.destacado, 0))
+        ON CONFLICT (categoria_id) DO UPDATE SET
+            productos = productos + excluded.productos,
+            en_venta = en_venta + excluded.en_venta,
+            unidades = unidades + excluded.unidades,
+            valor_stock_centavos = valor_stock_centavos + excluded.valor_stock_centavos,
+            descuento_centesimas = descuento_centesimas + excluded.descuento_centesimas,
+            destacados = destacados + excluded.destacados;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_categoria_estadistica_delete AFTER DELETE ON app_categoria BEGIN
+        DELETE FROM app_estadisticacategoria WHERE categoria_id = OLD.id;
+    END
+    """,
+]
+
+# Idempotente: si la API ya había creado y llenado la tabla, la reemplaza por lo mismo.
+POBLAR = [
+    'DELETE FROM app_estadisticacategoria',
+    """
+    INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                          valor_stock_centavos, descuento_centesimas, destacados)
+    SELECT categoria_id, COUNT(*), SUM(COALESCE(en_venta, 0)), SUM(COALESCE(stock, 0)),
+           SUM(CAST(ROUND(COALESCE(precio, 0) * COALESCE(stock, 0) * 100) AS INTEGER)),
+           SUM(CAST(ROUND(COALESCE(descuento, 0) * 100) AS INTEGER)), SUM(COALESCE(destacado, 0))
+    FROM app_producto GROUP BY categoria_id
+    """,
+]
+
+BORRAR = [
+    'DROP TRIGGER IF EXISTS app_producto_estadistica_insert',
+    'DROP TRIGGER IF EXISTS app_producto_estadistica_delete',
+    'DROP TRIGGER IF EXISTS app_producto_estadistica_update',
+    'DROP TRIGGER IF EXISTS app_categoria_estadistica_delete',
+    'DROP TABLE IF EXISTS "app_estadisticacategoria"',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_productorelacionado'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='EstadisticaCategoria',
+                    fields=[
+                        ('categoria', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='estadistica', serialize=False, to='app.categoria')),
+                        ('productos', models.IntegerField(default=0)),
+                        ('en_venta', models.IntegerField(default=0)),
+                        ('unidades', models.BigIntegerField(default=0)),
+                        ('valor_stock_centavos', models.BigIntegerField(default=0)),
+                        ('descuento_centesimas', models.BigIntegerField(default=0)),
+                        ('destacados', models.IntegerField(default=0)),
+                    ],
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL([CREAR_TABLA, *TRIGGERS, *POBLAR], reverse_sql=BORRAR),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Reemplaza el 10 % fijo que `checkout` aplicaba a los clientes con sesión iniciada.
+# Acumulable: antes se sumaba al descuento propio de cada producto.
+DESCUENTO_CLIENTES = 'Descuento clientes registrados'
+
+
+def crear_descuento_clientes(apps, schema_editor):
+    Promocion = apps.get_model('app', 'Promocion')
+    Promocion.objects.create(nombre=DESCUENTO_CLIENTES, porcentaje=10, segmento='clientes', acumulable=True)
+
+
+def eliminar_descuento_clientes(apps, schema_editor):
+    Promocion = apps.get_model('app', 'Promocion')
+    Promocion.objects.filter(nombre=DESCUENTO_CLIENTES).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_estadisticacategoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Promocion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('porcentaje', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('sku', models.CharField(blank=True, max_length=50, null=True)),
+                ('cantidad_minima', models.PositiveIntegerField(default=1, help_text='Unidades del producto en el carrito')),
+                ('segmento', models.CharField(choices=[('todos', 'Todos'), ('clientes', 'Clientes registrados'), ('invitados', 'Invitados')], default='todos', max_length=10)),
+                ('desde', models.DateTimeField(blank=True, null=True)),
+                ('hasta', models.DateTimeField(blank=True, null=True)),
+                ('acumulable', models.BooleanField(default=False, help_text='Se aplica además del mayor descuento no acumulable')),
+                ('activa', models.BooleanField(default=True)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='promociones', to='app.categoria')),
+            ],
+            options={
+                'verbose_name_plural': 'promociones',
+            },
+        ),
+        migrations.RunPython(crear_descuento_clientes, eliminar_descuento_clientes),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:58
+
+from django.db import migrations, models
+from ferramas_comun import cola_trabajos
+
+# El DDL vive en ferramas_comun: la API FastAPI crea la misma tabla con él si arranca
+# antes (IF NOT EXISTS); las dos encolan en ella.
+CREAR = cola_trabajos.CREAR
+
+BORRAR = ['DROP TABLE IF EXISTS "app_trabajo"']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_promocion'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='Trabajo',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('cola', models.CharField(default='default', max_length=50)),
+                        ('tarea', models.CharField(max_length=100)),
+                        ('argumentos', models.JSONField(default=dict)),
+                        ('prioridad', models.IntegerField(default=0)),
+                        ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('fallido', 'Fallido')], default='pendiente', max_length=10)),
+                        ('disponible_en', models.FloatField()),
+                        ('intentos', models.IntegerField(default=0)),
+                        ('max_intentos', models.IntegerField(default=5)),
+                        ('periodo', models.FloatField(blank=True, null=True)),
+                        ('clave', models.CharField(blank=True, max_length=100, null=True)),
+                        ('token', models.CharField(blank=True, max_length=32, null=True)),
+                        ('error', models.TextField(blank=True, null=True)),
+                        ('creado_en', models.FloatField()),
+                    ],
+                    options={
+                        'indexes': [models.Index(condition=models.Q(('estado__in', ['pendiente', 'en_curso'])), fields=['cola', '-prioridad', 'disponible_en'], name='app_trabajo_disponibles')],
+                        'constraints': [models.UniqueConstraint(condition=models.Q(('estado', 'pendiente')), fields=('clave',), name='app_trabajo_clave_pendiente')],
+                    },
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(CREAR, reverse_sql=BORRAR),
+            ],
+        ),
+    ]
@@ -1,7 +1,199 @@
-from django.contrib import admin
-from app.domain.models import Producto, Categoria, Subscriber
+import time
+from datetime import datetime, timezone
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.paginator import Paginator
+from django.db import DatabaseError, IntegrityError, connections
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+from app.domain.models import Producto, Categoria, Promocion, Subscriber, Trabajo
+from app.domain.operaciones_masivas import CambiosProductos
+from app.infrastructure.repositories.producto_repository import actualizar_queryset, TAMANO_LOTE_MASIVO
+
+
+class DescuentoForm(forms.Form):
+    descuento = forms.DecimalField(min_value=0, max_value=100, decimal_places=2, label='Descuento (%)')
+
+    def cambios(self):
+        return CambiosProductos(descuento=self.cleaned_data['descuento'])
+
+
+class AjustePrecioForm(forms.Form):
+    porcentaje = forms.DecimalField(decimal_places=2, label='Ajuste de precio (%)',
+                                    help_text='Positivo sube el precio, negativo lo baja. Ej: 5 = +5 %.')
+
+    def clean_porcentaje(self):
+        porcentaje = self.cleaned_data['porcentaje']
+        if porcentaje <= -100:
+            raise forms.ValidationError('El ajuste debe ser mayor a -100 %.')
+        return porcentaje
+
+    def cambios(self):
+        return CambiosProductos(precio_porcentaje=self.cleaned_data['porcentaje'])
+
+
+class ConfirmarForm(forms.Form):
+    def __init__(self, *args, cambios=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cambios = cambios
+
+    def cambios(self):
+        return self._cambios
+
+
+def _accion_masiva(modeladmin, request, queryset, titulo, form_class, **form_kwargs):
+    """
+    Acción en dos pasos: primero muestra cuántos productos se modificarán (dry-run)
+    y pide los valores; al confirmar aplica un UPDATE por lote de productos.
+    """
+    if 'aplicar' in request.POST:
+        form = form_class(request.POST, **form_kwargs)
+        if form.is_valid():
+            afectados = actualizar_queryset(queryset, form.cambios(), tamano_lote=TAMANO_LOTE_MASIVO)
+            modeladmin.message_user(request, f'{afectados} productos actualizados.', messages.SUCCESS)
+            return None
+    else:
+        form = form_class(**form_kwargs)
+    return TemplateResponse(request, 'admin/app/producto/actualizacion_masiva.html', {
+        **modeladmin.admin_site.each_context(request),
+        'title': titulo,
+        'opts': modeladmin.model._meta,
+        'form': form,
+        'afectados': queryset.count(),
+        'accion': request.POST['action'],
+        'seleccionados': request.POST.getlist(ACTION_CHECKBOX_NAME),
+        'select_across': request.POST.get('select_across', '0'),
+        'checkbox_name': ACTION_CHECKBOX_NAME,
+    })
+
+
+@admin.action(description='Aplicar descuento a los %(verbose_name_plural)s seleccionados', permissions=['change'])
+def aplicar_descuento(modeladmin, request, queryset):
+    return _accion_masiva(modeladmin, request, queryset, 'Aplicar descuento', DescuentoForm)
+
+
+@admin.action(description='Ajustar precio (%%) de los %(verbose_name_plural)s seleccionados', permissions=['change'])
+def ajustar_precio(modeladmin, request, queryset):
+    return _accion_masiva(modeladmin, request, queryset, 'Ajustar precio', AjustePrecioForm)
+
+
+@admin.action(description='Dar de baja los %(verbose_name_plural)s seleccionados sin stock', permissions=['change'])
+def dar_de_baja_sin_stock(modeladmin, request, queryset):
+    return _accion_masiva(modeladmin, request, queryset.filter(stock=0, en_venta=True),
+                          'Dar de baja productos sin stock', ConfirmarForm,
+                          cambios=CambiosProductos(en_venta=False))
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Evita el COUNT(*) completo del changelist. Sin filtros usa la cantidad de filas
+    que guarda ANALYZE en sqlite_stat1; con filtros o búsqueda cuenta como máximo
+    `TOPE` filas, así que se navegan a lo sumo TOPE / list_per_page páginas (para
+    llegar más lejos hay que acotar el filtro).
+    """
+    TOPE = 10_000
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list.query
+        if not consulta.where:
+            estimado = _filas_estimadas(self.object_list.db, self.object_list.model._meta.db_table)
+            if estimado is not None:
+                return estimado
+        return self.object_list[:self.TOPE].count()
+
+
+def _filas_estimadas(alias, tabla):
+    with connections[alias].cursor() as cursor:
+        try:
+            cursor.execute("SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [tabla])
+        except DatabaseError:
+            return None  # sin ANALYZE no existe sqlite_stat1
+        fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+
+class StockFilter(admin.SimpleListFilter):
+    title = 'stock'
+    parameter_name = 'stock'
+
+    def lookups(self, request, model_admin):
+        return [('0', 'Sin stock'), ('bajo', 'Bajo (1 a 9)'), ('ok', '10 o más')]
+
+    def queryset(self, request, queryset):
+        if self.value() == '0':
+            return queryset.filter(stock=0)
+        if self.value() == 'bajo':
+            return queryset.filter(stock__gte=1, stock__lte=9)
+        if self.value() == 'ok':
+            return queryset.filter(stock__gte=10)
+        return queryset
+
+
+class ProductoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'sku', 'categoria', 'precio', 'descuento', 'stock', 'en_venta', 'destacado')
+    list_display_links = ('id', 'nombre')
+    list_select_related = ('categoria',)
+    # '^' y '=' generan LIKE 'texto%' y LIKE 'texto', que usan los índices NOCASE;
+    # '%texto%' obligaría a recorrer toda la tabla.
+    search_fields = ('^nombre', '=sku')
+    search_help_text = 'Comienzo del nombre o SKU exacto.'
+    list_filter = ('en_venta', 'destacado', StockFilter, 'categoria')
+    autocomplete_fields = ('categoria',)
+    readonly_fields = ('fecha_creacion', 'fecha_actualizacion')
+    ordering = ('-id',)
+    list_per_page = 50
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    actions = [aplicar_descuento, ajustar_precio, dar_de_baja_sin_stock]
+
+
+class CategoriaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'descripcion')
+    search_fields = ('nombre',)
+    ordering = ('nombre',)
+
+
+class PromocionAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'porcentaje', 'sku', 'categoria', 'cantidad_minima', 'segmento', 'desde', 'hasta',
+                    'acumulable', 'activa')
+    list_select_related = ('categoria',)
+    list_filter = ('activa', 'segmento', 'acumulable', 'categoria')
+    search_fields = ('nombre', '=sku')
+    autocomplete_fields = ('categoria',)
+    readonly_fields = ('actualizada',)
+
+
+@admin.action(description='Reintentar los %(verbose_name_plural)s seleccionados', permissions=['change'])
+def reintentar(modeladmin, request, queryset):
+    # Los en curso los tiene un trabajador: no se tocan.
+    try:
+        reintentados = queryset.exclude(estado=Trabajo.EN_CURSO).update(
+            estado=Trabajo.PENDIENTE, intentos=0, disponible_en=time.time(), token=None,
+        )
+    except IntegrityError:
+        modeladmin.message_user(request, 'Ya hay un trabajo pendiente con la misma clave.', messages.ERROR)
+        return
+    modeladmin.message_user(request, f'{reintentados} trabajos reintentados.', messages.SUCCESS)
+
+
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tarea', 'cola', 'estado', 'prioridad', 'intentos', 'max_intentos', 'disponible')
+    list_filter = ('estado', 'cola', 'tarea')
+    ordering = ('-id',)
+    readonly_fields = ('token', 'creado_en')
+    actions = [reintentar]
+
+    @admin.display(description='Disponible', ordering='disponible_en')
+    def disponible(self, trabajo):
+        return datetime.fromtimestamp(trabajo.disponible_en, tz=timezone.utc)
+
 
 # Register your models here.
-admin.site.register(Producto)
-admin.site.register(Categoria)
+admin.site.register(Producto, ProductoAdmin)
+admin.site.register(Categoria, CategoriaAdmin)
+admin.site.register(Promocion, PromocionAdmin)
 admin.site.register(Subscriber)
+admin.site.register(Trabajo, TrabajoAdmin)
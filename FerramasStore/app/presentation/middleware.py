@@ -0,0 +1,157 @@
+import json
+import mimetypes
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from app.infrastructure import cargadores
+from app.infrastructure.metricas import Medicion, medicion_actual, registro
+
+
+class MetricasMiddleware:
+    """
+    Mide cada request: tiempo total, tiempo y cantidad de consultas SQL y
+    tiempo en llamadas HTTP salientes. Agrega el header `Server-Timing`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+
+        def medir_sql(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                medicion.db_segundos += time.perf_counter() - inicio
+                medicion.consultas += 1
+
+        try:
+            with connection.execute_wrapper(medir_sql):
+                response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+
+        total = time.perf_counter() - medicion.inicio
+        response['Server-Timing'] = medicion.server_timing(total)
+        match = getattr(request, 'resolver_match', None)
+        ruta = match.view_name if match else 'sin_ruta'
+        registro.registrar(request.method, ruta, response.status_code, total, medicion)
+        return response
+
+
+
+class CargadoresMiddleware:
+    """
+    Cargadores por id de un request (`app.infrastructure.cargadores`): los
+    `pedir(id)` hechos durante el request se resuelven juntos con un `IN`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with cargadores.alcance():
+            return self.get_response(request)
+
+
+
+class PoliticasCacheMiddleware:
+    """
+    `Cache-Control` por nombre de ruta (`settings.POLITICAS_CACHE`) para el
+    proxy inverso. Solo en lecturas exitosas que no fijaron el suyo; una
+    respuesta que deja cookies (sesión, CSRF) nunca se marca como pública.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+                or response.has_header('Cache-Control')):
+            return response
+        match = getattr(request, 'resolver_match', None)
+        politica = settings.POLITICAS_CACHE.get(match.view_name) if match else None
+        if politica is None:
+            return response
+        if response.cookies:
+            patch_cache_control(response, private=True)
+        else:
+            response['Cache-Control'] = politica
+        return response
+
+
+class EstaticosPrecomprimidosMiddleware:
+    """
+    Sirve STATIC_ROOT (lo que deja `collectstatic`) sin pasar por las vistas:
+    elige la variante `.br` o `.gz` según `Accept-Encoding` y marca los nombres
+    con hash del manifest como inmutables por un año. Los nombres sin hash se
+    revalidan siempre. Si STATIC_ROOT no tiene el archivo, sigue la cadena normal.
+    """
+
+    INMUTABLE = 60 * 60 * 24 * 365
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefijo = '/' + settings.STATIC_URL.lstrip('/')
+        self.raiz = str(settings.STATIC_ROOT) if getattr(settings, 'STATIC_ROOT', None) else None
+        self._con_hash = (None, set())  # (mtime del manifest, nombres)
+
+    def _nombres_con_hash(self):
+        # Se relee cuando cambia el manifest: un collectstatic nuevo no necesita reiniciar el servidor.
+        manifest = Path(self.raiz) / 'staticfiles.json'
+        try:
+            mtime = manifest.stat().st_mtime_ns
+        except OSError:
+            return set()
+        if self._con_hash[0] != mtime:
+            try:
+                with open(manifest, encoding='utf-8') as archivo:
+                    nombres = set(json.load(archivo)['paths'].values())
+            except (OSError, ValueError, KeyError):
+                nombres = set()
+            self._con_hash = (mtime, nombres)
+        return self._con_hash[1]
+
+    def __call__(self, request):
+        if self.raiz is None or request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefijo):
+            return self.get_response(request)
+        nombre = request.path[len(self.prefijo):]
+        try:
+            ruta = Path(safe_join(self.raiz, nombre))
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not ruta.is_file():
+            return self.get_response(request)
+
+        aceptadas = {parte.split(';')[0].strip() for parte in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')}
+        variante, codificacion = ruta, None
+        for extension, nombre_codificacion in (('.br', 'br'), ('.gz', 'gzip')):
+            candidata = ruta.with_name(ruta.name + extension)
+            if nombre_codificacion in aceptadas and candidata.is_file():
+                variante, codificacion = candidata, nombre_codificacion
+                break
+
+        tipo, _ = mimetypes.guess_type(ruta.name)
+        response = FileResponse(open(variante, 'rb'), content_type=tipo or 'application/octet-stream')
+        del response['Content-Disposition']
+        if codificacion:
+            response['Content-Encoding'] = codificacion
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if nombre in self._nombres_con_hash():
+            patch_cache_control(response, public=True, max_age=self.INMUTABLE, immutable=True)
+        else:
+            response['Last-Modified'] = http_date(ruta.stat().st_mtime)
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
@@ -1,73 +1,77 @@
 
 # FerramasStore/app/presentation/views.py
+import json
+import requests
 from ..domain.models import Producto, Categoria
 from .serializers import ProductoSerializer, CategoriaSerializer
 # Django imports
 from django.shortcuts import render, redirect
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 # Django REST Framework imports
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, routers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 # Clean Architecture imports
 from app.application.use_cases.producto_use_cases import GetProductosPorCategoriaUseCase
-from app.infrastructure.repositories.producto_repository import DjangoProductoRepository, DjangoCategoriaRepository
+from app.infrastructure.repositories.snapshot_repository import SnapshotProductoRepository, SnapshotCategoriaRepository
 # External API services
-from app.infrastructure.external_services.api_externa import obtener_valor_dolar, obtener_productos, crear_preferencia_pago
+from app.infrastructure.external_services.api_externa import (
+    obtener_valor_dolar, obtener_productos, crear_preferencia_pago, productos_desactualizados, valor_dolar_desactualizado,
+)
+from app.infrastructure.plazo import con_plazo
+# Métricas
+from app.infrastructure.metricas import registro
+from app.infrastructure.sugerencias.servicio import sugerir
+from app.infrastructure.estadisticas import estadisticas_categorias as leer_estadisticas_categorias
+from app.infrastructure import cache_proxy, promociones
 
 # Dependency injection
-producto_repository = DjangoProductoRepository()
-categoria_repository = DjangoCategoriaRepository()
+producto_repository = SnapshotProductoRepository()
+categoria_repository = SnapshotCategoriaRepository()
 get_productos_por_categoria_use_case = GetProductosPorCategoriaUseCase(producto_repository, categoria_repository)
 
 def index(request):
     return render(request, 'pages/mainPage.html')
 
-def herra_manuales(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Herramientas Manuales")
-    context = {'productos': productos}
+def _pagina_categoria(request, categoria_nombre: str, template: str):
+    categoria, productos, error = get_productos_por_categoria_use_case.execute_con_categoria(categoria_nombre)
+    context = {'productos': promociones.con_precios(productos, promociones.segmento(request.user))}
     if error:
         context['error'] = error
-    return render(request, 'pages/herra-manuales.html', context)
+    response = render(request, template, context)
+    # Para el proxy: la página se purga con cualquier cambio de la categoría o de sus productos.
+    claves = cache_proxy.claves_productos((p.id, p.categoria_id) for p in productos)
+    if categoria is not None:
+        claves.add(cache_proxy.clave_categoria(categoria.id))
+    return cache_proxy.etiquetar(response, claves)
+
+def herra_manuales(request):
+    return _pagina_categoria(request, "Herramientas Manuales", 'pages/herra-manuales.html')
 
 def materiales_basicos(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Materiales Básicos")
-    context = {'productos': productos}
-    if error:
-        context['error'] = error
-    return render(request, 'pages/materiales-basicos.html', context)
+    return _pagina_categoria(request, "Materiales Básicos", 'pages/materiales-basicos.html')
 
 def equipos_seguridad(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Equipos de Seguridad")
-    context = {'productos': productos}
-    if error:
-        context['error'] = error
-    return render(request, 'pages/equipos-seguridad.html', context)
+    return _pagina_categoria(request, "Equipos de Seguridad", 'pages/equipos-seguridad.html')
 
 def tornillos_anclaje(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Tornillos y Anclajes")
-    context = {'productos': productos}
-    if error:
-        context['error'] = error
-    return render(request, 'pages/tornillos-anclaje.html', context)
+    return _pagina_categoria(request, "Tornillos y Anclajes", 'pages/tornillos-anclaje.html')
 
 def fijaciones(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Fijaciones")
-    context = {'productos': productos}
-    if error:
-        context['error'] = error
-    return render(request, 'pages/fijaciones.html', context)
+    return _pagina_categoria(request, "Fijaciones", 'pages/fijaciones.html')
 
 def equipos_medicion(request):
-    productos, error = get_productos_por_categoria_use_case.execute("Equipos de Medición")
-    context = {'productos': productos}
-    if error:
-        context['error'] = error
-    return render(request, 'pages/equipos-medicion.html', context)
+    return _pagina_categoria(request, "Equipos de Medición", 'pages/equipos-medicion.html')
 
 def login_view(request):
     next_url = request.GET.get('next') or request.POST.get('next') or '/checkout/'
@@ -96,8 +100,8 @@ def register(request):
         password2 = request.POST['password2']
         telefono = request.POST['telefono']
 
-        if password != password2:
-            messages.error(request, "Las contraseñas no coinciden.")
+        def error(mensaje):
+            messages.error(request, mensaje)
             return render(request, 'pages/register.html', {
                 'next': next_url,
                 'nombre': nombre,
@@ -106,78 +110,125 @@ def register(request):
                 'telefono': telefono,
             })
 
-        if User.objects.filter(username=usuario).exists():
-            messages.error(request, "El usuario ya existe.")
-            return render(request, 'pages/register.html', {
-                'next': next_url,
-                'nombre': nombre,
-                'usuario': usuario,
-                'correo': correo,
-                'telefono': telefono,
-            })
-
-        if User.objects.filter(email=correo).exists():
-            messages.error(request, "El correo ya está registrado.")
-            return render(request, 'pages/register.html', {
-                'next': next_url,
-                'nombre': nombre,
-                'usuario': usuario,
-                'correo': correo,
-                'telefono': telefono,
-            })
+        if password != password2:
+            return error("Las contraseñas no coinciden.")
 
-        user = User.objects.create_user(
-            username=usuario,
-            email=correo,
-            password=password,
-            first_name=nombre
+        user = User(
+            username=User.normalize_username(usuario),
+            email=User.objects.normalize_email(correo),
+            first_name=nombre,
         )
-        user.usuario.telefono = telefono
-        user.usuario.save()
+        # Usuario y correo en una sola consulta.
+        existentes = list(User.objects.filter(Q(username=user.username) | Q(email=user.email))
+                          .values_list('username', flat=True)[:2])
+        if user.username in existentes:
+            return error("El usuario ya existe.")
+        if existentes:
+            return error("El correo ya está registrado.")
+
+        user.set_password(password)
+        user.telefono = telefono  # lo usa la señal que crea el perfil
+        try:
+            # User y perfil (con su teléfono) en una transacción: dos INSERT.
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # Otro registro con el mismo usuario entró entre la consulta y el INSERT.
+            return error("El usuario ya existe.")
 
         # Redirigir a login con next
         return redirect(f'/login/?next={next_url}')
     return render(request, 'pages/register.html', {'next': next_url})
 
 def checkout(request):
-    discount_percentage = 0  # Por defecto sin descuento
-    if request.user.is_authenticated:
-        discount_percentage = 10  # Ejemplo de 10% de descuento para clientes logueados
-
+    # Los precios del carrito (con las promociones del cliente) los calcula cotizar_carrito.
     return render(request, 'pages/checkout.html', {
-        'discount_percentage': discount_percentage,
         'user': request.user
     })
 
+@csrf_exempt
+@require_POST
+def cotizar_carrito(request):
+    """
+    Recibe {"items": [{"id": 1, "cantidad": 2}, ...]} (el carrito del navegador)
+    y devuelve los precios vigentes por línea y el total, con las promociones
+    del segmento del usuario. Solo lee: no guarda nada.
+    """
+    try:
+        datos = json.loads(request.body or b'{}')
+        items = {}
+        for item in datos.get('items', []):
+            producto_id, cantidad = int(item['id']), int(item.get('cantidad', 1))
+            if not 1 <= cantidad <= promociones.MAXIMO_CANTIDAD:
+                raise ValueError(f'Cantidad inválida para el producto {producto_id}')
+            items[producto_id] = items.get(producto_id, 0) + cantidad
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return JsonResponse({'error': str(e) or 'Carrito inválido'}, status=400)
+    return JsonResponse(promociones.cotizar_carrito(items, promociones.segmento(request.user)))
+
 def logout_view(request):
     logout(request)
     # Puedes redirigir a la página principal, login, o donde prefieras
     return redirect('index')
 
+# Plazos de las vistas que llaman a la API externa: pasado el plazo se muestra lo que haya (o un aviso) en vez de esperar.
+PLAZO_LECTURAS = 2.0
+PLAZO_PAGOS = 8.0
+AVISO_SIN_RESPUESTA = 'El servicio externo no respondió a tiempo.'
+AVISO_COPIA_ANTERIOR = 'El servicio externo no respondió a tiempo; se muestra la última información disponible.'
+
+@con_plazo(PLAZO_LECTURAS)
 def productos_externos_page(request):
+    aviso = None
     try:
         productos = obtener_productos()
-        
+        if productos_desactualizados():
+            aviso = AVISO_COPIA_ANTERIOR
     except Exception as e:
         productos = []
-    return render(request, 'pages/productos/productos-externos.html', {'productos': productos})
+        aviso = AVISO_SIN_RESPUESTA if isinstance(e, requests.Timeout) else 'No se pudieron cargar los productos externos.'
+    return render(request, 'pages/productos/productos-externos.html', {'productos': productos, 'aviso': aviso})
 
+@con_plazo(PLAZO_LECTURAS)
 def valor_dolar_page(request):
     try:
         data = obtener_valor_dolar()
         return render(request, 'pages/banco_central/valor-dolar.html', {
             'valor': data['valor'],
             'fecha': data['fecha'],
-            'error': None
+            'error': None,
+            'aviso': AVISO_COPIA_ANTERIOR if valor_dolar_desactualizado() else None,
         })
     except Exception as e:
         return render(request, 'pages/banco_central/valor-dolar.html', {
             'valor': None,
             'fecha': None,
-            'error': str(e)
+            'error': AVISO_SIN_RESPUESTA if isinstance(e, requests.Timeout) else str(e)
         })
 
+def sugerir_productos(request):
+    # Autocompletado: responde desde el índice en memoria, sin consultar la base en cada tecla.
+    try:
+        limite = min(max(int(request.GET.get('limite', 10)), 1), 50)
+    except ValueError:
+        limite = 10
+    sugerencias = sugerir(request.GET.get('q', '')[:100], limite)
+    response = JsonResponse([sugerencia._asdict() for sugerencia in sugerencias], safe=False)
+    # Un producto nuevo puede aparecer en cualquier búsqueda: también se purga con `productos`.
+    return cache_proxy.etiquetar(response, {cache_proxy.CATALOGO, cache_proxy.PRODUCTOS,
+                                            *(cache_proxy.clave_producto(s.id) for s in sugerencias)})
+
+def estadisticas_categorias(request):
+    # Lee la tabla de totales que mantienen los triggers: una fila por categoría, sin agregar app_producto.
+    estadisticas = leer_estadisticas_categorias()
+    response = JsonResponse(estadisticas, safe=False)
+    return cache_proxy.etiquetar(response, cache_proxy.claves_categorias(e['categoria_id'] for e in estadisticas))
+
+def metricas(request):
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4')
+
 @csrf_exempt
+@con_plazo(PLAZO_PAGOS)
 def crear_pago_page(request):
     init_point = None
     error = None
@@ -194,6 +245,8 @@ def crear_pago_page(request):
             }
             resultado = crear_preferencia_pago(data)
             init_point = resultado.get("init_point")
+        except requests.Timeout:
+            error = 'Mercado Pago no respondió a tiempo. Intenta nuevamente.'
         except Exception as e:
             error = str(e)
 
@@ -211,17 +264,63 @@ def crear_pago_page(request):
 
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
-    queryset = Categoria.objects.all()
+class EtiquetasCacheMixin:
+    """Agrega a las lecturas exitosas el header Surrogate-Key con lo que contiene la respuesta."""
+
+    def claves_cache(self, items) -> set:
+        raise NotImplementedError
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            datos = response.data
+            items = datos.get('results', [datos]) if isinstance(datos, dict) else datos
+            cache_proxy.etiquetar(response, self.claves_cache(items))
+        return response
+
+class CategoriaViewSet(EtiquetasCacheMixin, viewsets.ModelViewSet):
+    queryset = Categoria.objects.order_by('id')
     permission_classes = [permissions.AllowAny]
     serializer_class = CategoriaSerializer
 
-class ProductoViewSet(viewsets.ModelViewSet):
-    queryset = Producto.objects.all()
+    def claves_cache(self, items):
+        return cache_proxy.claves_categorias(item['id'] for item in items)
+
+class ProductoViewSet(EtiquetasCacheMixin, viewsets.ModelViewSet):
+    queryset = Producto.objects.order_by('id')
     permission_classes = [permissions.AllowAny]
     serializer_class = ProductoSerializer
 
+    def claves_cache(self, items):
+        claves = cache_proxy.claves_productos((item['id'], item['categoria']) for item in items)
+        if self.action == 'list':
+            # Un producto nuevo aparece en el listado aunque no cambie ninguno de los que ya muestra.
+            claves.add(cache_proxy.PRODUCTOS)
+        elif self.action == 'relacionados':
+            claves.add(cache_proxy.clave_producto(int(self.kwargs['pk'])))
+        return claves
+
+    @action(detail=True)
+    def relacionados(self, request, pk=None):
+        """Productos parecidos precalculados por `calcular_relacionados`, en una sola consulta."""
+        try:
+            producto_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        relacionados = (Producto.objects
+                        .filter(relacionado_en__producto_id=producto_id, en_venta=True)
+                        .order_by('relacionado_en__posicion'))
+        return Response(self.get_serializer(relacionados, many=True).data)
+
+class ApiRootView(routers.APIRootView):
+    # Solo enlaza los listados de productos y categorías, que ya son de lectura pública.
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
 class CrearPagoExternoView(APIView):
+    # Crea preferencias de pago en Mercado Pago a nombre de la tienda: solo usuarios con sesión.
+    permission_classes = [permissions.IsAuthenticated]
+
+    @con_plazo(PLAZO_PAGOS)
     def post(self, request):
         try:
             data = {
@@ -234,6 +333,8 @@ class CrearPagoExternoView(APIView):
             }
             resultado = crear_preferencia_pago(data)
             return Response(resultado)
+        except requests.Timeout:
+            return Response({"error": "Mercado Pago no respondió a tiempo"}, status=status.HTTP_504_GATEWAY_TIMEOUT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
@@ -0,0 +1,38 @@
+"""
+Utilidades para fijar un presupuesto de consultas SQL por endpoint.
+
+Si un endpoint supera su presupuesto, el error lista las sentencias repetidas
+(con los literales normalizados), que es la forma típica de un N+1.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from ferramas_comun.catalogo_sintetico import (
+    ConfiguracionCatalogo, asegurar_categorias, generar_categorias, generar_productos, insertar_productos,
+)
+from ferramas_comun.pruebas.consultas import describir_repetidas
+
+
+def poblar_catalogo(productos: int, categorias: int = 6, semilla: int = 7):
+    """Carga un catálogo sintético en la base de test usando la conexión de Django."""
+    config = ConfiguracionCatalogo(productos=productos, categorias=categorias, semilla=semilla,
+                                   prob_en_venta=1.0, sesgo_categorias=0.0)
+    with connection.cursor() as cursor:
+        ids = asegurar_categorias(cursor, generar_categorias(config))
+        ultimo = cursor.execute("SELECT COUNT(*) FROM app_producto").fetchone()[0]
+        insertar_productos(cursor, generar_productos(config, ids, inicio_sku=ultimo + 1))
+
+
+class PresupuestoConsultasMixin:
+    @contextmanager
+    def assertPresupuestoConsultas(self, maximo: int, etiqueta: str = ""):
+        with CaptureQueriesContext(connection) as contexto:
+            yield contexto
+        ejecutadas = len(contexto.captured_queries)
+        if ejecutadas > maximo:
+            sentencias = [consulta['sql'] for consulta in contexto.captured_queries]
+            self.fail(
+                f"{etiqueta or 'Bloque'} ejecutó {ejecutadas} consultas (presupuesto {maximo}). "
+                f"Sentencias repetidas:\n{describir_repetidas(sentencias)}"
+            )
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from app.application.use_cases.producto_use_cases import ActualizarProductosMasivoUseCase
+from app.domain.models import Categoria, Producto
+from app.domain.operaciones_masivas import CambiosProductos, FiltroProductos
+from app.domain.signals import catalogo_modificado
+from app.infrastructure.repositories.producto_repository import DjangoProductoRepository, actualizar_queryset
+from app.tests.presupuesto_consultas import PresupuestoConsultasMixin, poblar_catalogo
+
+
+class ActualizacionMasivaTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        poblar_catalogo(300, categorias=3)
+        Producto.objects.update(fecha_actualizacion=self._hace_un_dia())
+        self.caso = ActualizarProductosMasivoUseCase(DjangoProductoRepository())
+        self.categoria = Categoria.objects.order_by('id').first()
+        self.avisos = []
+        catalogo_modificado.connect(self._anotar_aviso)
+        self.addCleanup(catalogo_modificado.disconnect, self._anotar_aviso)
+
+    def _hace_un_dia(self):
+        from django.utils import timezone
+        return timezone.now() - timedelta(days=1)
+
+    def _anotar_aviso(self, sender, **kwargs):
+        self.avisos.append(sender)
+
+    def test_descuento_por_categoria_en_un_solo_update(self):
+        filtro = FiltroProductos(categoria_id=self.categoria.id)
+        esperados = Producto.objects.filter(categoria=self.categoria).count()
+
+        with self.assertPresupuestoConsultas(1, 'update masivo'):
+            afectados, error = self.caso.execute(filtro, CambiosProductos(descuento=Decimal('15')))
+
+        self.assertIsNone(error)
+        self.assertEqual(afectados, esperados)
+        self.assertEqual(set(Producto.objects.filter(categoria=self.categoria).values_list('descuento', flat=True)),
+                         {Decimal('15')})
+        self.assertFalse(Producto.objects.exclude(categoria=self.categoria).filter(descuento=15).exists())
+        recientes = Producto.objects.filter(fecha_actualizacion__gt=self._hace_un_dia() + timedelta(hours=1))
+        self.assertEqual(recientes.count(), esperados)
+        self.assertEqual(self.avisos, [Producto])
+
+    def test_dry_run_solo_cuenta(self):
+        antes = list(Producto.objects.order_by('id').values_list('precio', 'fecha_actualizacion'))
+
+        afectados, error = self.caso.execute(FiltroProductos(), CambiosProductos(precio_porcentaje=Decimal('5')),
+                                             dry_run=True)
+
+        self.assertEqual((afectados, error), (300, None))
+        self.assertEqual(list(Producto.objects.order_by('id').values_list('precio', 'fecha_actualizacion')), antes)
+        self.assertEqual(self.avisos, [])
+
+    def test_ajuste_de_precio_por_lotes(self):
+        antes = dict(Producto.objects.values_list('id', 'precio'))
+
+        afectados = actualizar_queryset(Producto.objects.all(), CambiosProductos(precio_porcentaje=Decimal('5')),
+                                        tamano_lote=70)
+
+        self.assertEqual(afectados, 300)
+        for pid, precio in Producto.objects.values_list('id', 'precio'):
+            self.assertEqual(precio, (antes[pid] * Decimal('1.05')).quantize(Decimal('0.01')))
+
+    def test_cambios_invalidos(self):
+        self.assertEqual(self.caso.execute(FiltroProductos(), CambiosProductos()), (0, 'No se indicó ningún cambio'))
+        afectados, error = self.caso.execute(FiltroProductos(), CambiosProductos(descuento=Decimal('120')))
+        self.assertEqual(afectados, 0)
+        self.assertIn('descuento', error)
+
+    def test_accion_de_admin_da_de_baja_los_sin_stock(self):
+        User.objects.create_superuser('admin', 'admin@test.cl', 'clave')
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.login(username='admin', password='clave')
+        Producto.objects.update(stock=5)
+        Producto.objects.filter(id__in=Producto.objects.order_by('id').values('id')[:10]).update(stock=0)
+        url = reverse('admin:app_producto_changelist')
+        datos = {'action': 'dar_de_baja_sin_stock', 'select_across': '1', ACTION_CHECKBOX_NAME: ['1']}
+
+        confirmacion = self.client.post(url, datos)
+        self.assertContains(confirmacion, 'Se modificarán <strong>10</strong> productos')
+        self.assertEqual(Producto.objects.filter(en_venta=False).count(), 0)
+
+        self.client.post(url, {**datos, 'aplicar': '1'})
+        self.assertEqual(set(Producto.objects.filter(en_venta=False).values_list('stock', flat=True)), {0})
+        self.assertEqual(Producto.objects.filter(en_venta=False).count(), 10)
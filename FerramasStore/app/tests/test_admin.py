@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from app.domain.models import Categoria, Producto
+from app.tests.presupuesto_consultas import PresupuestoConsultasMixin, poblar_catalogo
+
+# sesión + categorías del filtro + estimación (sqlite_stat1) + conteo acotado + página; el
+# usuario sale de la caché de sesiones desde el primer request (ver setUp). Con REDIS_URL
+# la sesión también sale de la caché y queda una consulta menos.
+PRESUPUESTO_CHANGELIST = 5
+
+CHANGELISTS = {
+    'sin filtros': {},
+    'búsqueda': {'q': 'Martillo'},
+    'búsqueda por sku': {'q': 'FER-00000007'},
+    'filtros': {'en_venta__exact': '1', 'stock': 'bajo'},
+    'categoría': {'categoria__id__exact': 'CATEGORIA'},
+    'página 3': {'p': '3'},
+}
+
+
+class AdminCatalogoTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@test.cl', 'clave')
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.client.login(username='admin', password='clave')
+        self.client.get(reverse('admin:index'))
+
+    def _medir(self):
+        categoria_id = str(Categoria.objects.order_by('id').values_list('id', flat=True)[0])
+        conteos = {}
+        for nombre, parametros in CHANGELISTS.items():
+            parametros = {k: (categoria_id if v == 'CATEGORIA' else v) for k, v in parametros.items()}
+            with self.assertPresupuestoConsultas(PRESUPUESTO_CHANGELIST, f'changelist ({nombre})') as contexto:
+                response = self.client.get(reverse('admin:app_producto_changelist'), parametros)
+            self.assertEqual(response.status_code, 200, nombre)
+            self.assertNotIn('?e=1', response.get('Location', ''))
+            conteos[nombre] = len(contexto.captured_queries)
+        return conteos
+
+    def test_changelist_con_consultas_constantes(self):
+        poblar_catalogo(10)
+        pequeno = self._medir()
+
+        poblar_catalogo(10_000 - 10, semilla=8)
+        grande = self._medir()
+
+        self.assertEqual(pequeno, grande)
+
+    def test_changelist_no_cuenta_toda_la_tabla(self):
+        poblar_catalogo(200)
+        with self.assertPresupuestoConsultas(PRESUPUESTO_CHANGELIST) as contexto:
+            self.client.get(reverse('admin:app_producto_changelist'), {'en_venta__exact': '1'})
+        conteos = [c['sql'] for c in contexto.captured_queries if 'COUNT(' in c['sql'].upper()]
+        self.assertEqual(len(conteos), 1)
+        self.assertIn('LIMIT', conteos[0].upper())
+
+    def test_formulario_no_carga_todas_las_categorias(self):
+        poblar_catalogo(50, categorias=30)
+        producto = Producto.objects.order_by('id').first()
+        # sesión + producto + content type + solo la categoría elegida
+        with self.assertPresupuestoConsultas(4, 'formulario de producto'):
+            response = self.client.get(reverse('admin:app_producto_change', args=[producto.id]))
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_busqueda_usa_los_indices(self):
+        poblar_catalogo(100)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            plan = ' '.join(str(fila) for fila in cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM app_producto "
+                "WHERE nombre LIKE 'martillo%' ESCAPE '\\' OR sku LIKE 'fer-00000001' ESCAPE '\\'"
+            ).fetchall())
+        self.assertIn('producto_nombre_nocase', plan)
+        self.assertIn('producto_sku_nocase', plan)
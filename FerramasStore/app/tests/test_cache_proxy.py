@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ferramas_comun.pruebas.proxy_cache import ProxyCache
+
+from app.domain.models import Categoria, Producto
+from app.domain.operaciones_masivas import CambiosProductos, FiltroProductos
+from app.infrastructure import cache_proxy
+from app.infrastructure.repositories.producto_repository import DjangoProductoRepository
+from app.tests.presupuesto_consultas import poblar_catalogo
+
+HERRAMIENTAS = 'Herramientas Manuales'
+FIJACIONES = 'Fijaciones'
+
+
+class CacheProxyTests(TestCase):
+    def setUp(self):
+        self.herramientas = Categoria.objects.create(nombre=HERRAMIENTAS)
+        self.fijaciones = Categoria.objects.create(nombre=FIJACIONES)
+        self.martillo = Producto.objects.create(nombre='Martillo', precio=Decimal('9990'), stock=5,
+                                                categoria=self.herramientas, sku='MAR-1')
+        self.tarugo = Producto.objects.create(nombre='Tarugo', precio=Decimal('190'), stock=500,
+                                              categoria=self.fijaciones, sku='TAR-1')
+        self.proxy = ProxyCache(self.client.get)
+        self.addCleanup(self.proxy.cerrar)
+        ajustes = override_settings(PURGA_CACHE_URL=self.proxy.url)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _purgas_enviadas(self):
+        self.assertTrue(cache_proxy.despachador().esperar(5), 'las purgas no terminaron de enviarse')
+
+    def test_paginas_con_politica_y_claves(self):
+        response = self.client.get(reverse('herra_manuales'))
+
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60, s-maxage=600')
+        self.assertEqual(set(response['Surrogate-Key'].split()), {
+            'catalogo', f'categoria-{self.herramientas.id}', f'producto-{self.martillo.id}',
+        })
+        listado = self.client.get('/api/productos/')
+        self.assertIn('productos', listado['Surrogate-Key'].split())
+        self.assertIn(f'producto-{self.tarugo.id}', listado['Surrogate-Key'].split())
+        # Rutas sin política y escrituras no se marcan para el proxy.
+        self.assertNotIn('public', self.client.get(reverse('checkout')).get('Cache-Control', ''))
+
+    def test_muchos_productos_usan_la_clave_del_listado(self):
+        poblar_catalogo(150, categorias=1)
+        pares = Producto.objects.values_list('id', 'categoria_id')
+        claves = cache_proxy.claves_productos(pares)
+
+        self.assertIn('productos', claves)
+        self.assertFalse(any(clave.startswith('producto-') for clave in claves))
+        self.assertEqual({clave for clave in claves if clave.startswith('categoria-')},
+                         {f'categoria-{categoria_id}' for _, categoria_id in pares})
+
+    def test_escritura_de_un_producto_purga_solo_lo_que_lo_muestra(self):
+        for ruta in ('/herra-manuales/', '/fijaciones/', '/api/productos/', f'/api/productos/{self.tarugo.id}/'):
+            self.proxy.get(ruta)
+            self.proxy.get(ruta)
+        self.assertEqual(self.proxy.aciertos, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DjangoProductoRepository().update(self.martillo.id, {'precio': Decimal('8990')})
+        self._purgas_enviadas()
+
+        self.assertEqual(self.proxy.purgas, [{'productos', f'producto-{self.martillo.id}',
+                                              f'categoria-{self.herramientas.id}'}])
+        self.assertFalse(self.proxy.en_cache('/herra-manuales/'))
+        self.assertFalse(self.proxy.en_cache('/api/productos/'))
+        self.assertTrue(self.proxy.en_cache('/fijaciones/'))
+        self.assertTrue(self.proxy.en_cache(f'/api/productos/{self.tarugo.id}/'))
+        self.assertIn(b'8990', self.proxy.get('/herra-manuales/'))
+
+    def test_cambio_masivo_purga_todo_el_catalogo(self):
+        for ruta in ('/herra-manuales/', '/fijaciones/', '/api/categorias/'):
+            self.proxy.get(ruta)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DjangoProductoRepository().update_masivo(FiltroProductos(), CambiosProductos(descuento=Decimal('5')))
+        self._purgas_enviadas()
+
+        self.assertEqual(self.proxy.purgas, [{'catalogo'}])
+        self.assertEqual(self.proxy.entradas, {})
+
+    def test_sin_commit_no_se_purga(self):
+        self.proxy.get('/fijaciones/')
+        with self.captureOnCommitCallbacks(execute=False):
+            self.tarugo.save()
+        self._purgas_enviadas()
+
+        self.assertEqual(self.proxy.purgas, [])
+        self.assertTrue(self.proxy.en_cache('/fijaciones/'))
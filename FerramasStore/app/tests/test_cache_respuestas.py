@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from app.infrastructure.external_services.cache_respuestas import CacheRespuestas
+
+URL = 'http://api.prueba/banco-central/valor-dolar'
+TTL_FRESCO, STALE_IF_ERROR = 60, 3600
+
+
+def _respuesta(status_code, cuerpo=None, etag=None):
+    response = mock.Mock(status_code=status_code, headers={'ETag': etag} if etag else {})
+    response.json.return_value = cuerpo
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f'{status_code}')
+    return response
+
+
+class CacheRespuestasTests(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(prefix='cache-respuestas-')
+        self.addCleanup(shutil.rmtree, self.directorio)
+        self.cache = CacheRespuestas(self.directorio)
+        self.addCleanup(self.cache.esperar_revalidaciones)
+
+    def _obtener(self, pedir, cache=None):
+        return (cache or self.cache).obtener(URL, TTL_FRESCO, STALE_IF_ERROR, pedir)
+
+    def _envejecer(self, segundos):
+        self.cache.entrada(URL).obtenido_en = time.time() - segundos
+
+    def test_fresca_sin_tocar_la_red(self):
+        pedir = mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"'))
+        self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        pedir.assert_called_once_with({})
+
+    def test_vencida_se_revalida_en_segundo_plano_con_304(self):
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"')))
+        self._envejecer(TTL_FRESCO + 5)
+
+        pedir = mock.Mock(return_value=_respuesta(304))
+        self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        self.cache.esperar_revalidaciones()
+
+        pedir.assert_called_once_with({'If-None-Match': '"v1"'})
+        self.assertLess(self.cache.entrada(URL).edad(), 1)
+        self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        pedir.assert_called_once()
+
+    def test_la_copia_sobrevive_a_un_reinicio(self):
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"')))
+
+        reiniciada = CacheRespuestas(self.directorio)
+        pedir = mock.Mock()
+        self.assertEqual(self._obtener(pedir, reiniciada), {'valor': 950.0})
+        pedir.assert_not_called()
+        self.assertEqual(reiniciada.entrada(URL).etag, '"v1"')
+
+    def test_stale_if_error_no_espera_a_la_api_caida(self):
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"')))
+        self._envejecer(TTL_FRESCO + 5)
+        liberar = threading.Event()
+
+        def caida(headers):
+            liberar.wait(5)  # como una API que no responde hasta el timeout
+            raise requests.ReadTimeout()
+
+        pedir = mock.Mock(side_effect=caida)
+        inicio = time.monotonic()
+        for _ in range(5):
+            self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        self.assertLess(time.monotonic() - inicio, 1)
+        liberar.set()
+        self.cache.esperar_revalidaciones()
+
+        # Una sola revalidación, y después del error se espera antes de reintentar.
+        self.assertEqual(self._obtener(pedir), {'valor': 950.0})
+        pedir.assert_called_once()
+        self.assertGreater(self.cache.entrada(URL).edad(), TTL_FRESCO)
+
+    def test_reintenta_pasada_la_espera(self):
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"')))
+        self._envejecer(TTL_FRESCO + 5)
+        self.cache.espera_tras_error = 0
+        self._obtener(mock.Mock(return_value=_respuesta(503)))
+        self.cache.esperar_revalidaciones()
+
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 951.0}, '"v2"')))
+        self.cache.esperar_revalidaciones()
+        self.assertEqual(self._obtener(mock.Mock()), {'valor': 951.0})
+
+    def test_fuera_de_la_ventana_el_error_llega_al_llamador(self):
+        self._obtener(mock.Mock(return_value=_respuesta(200, {'valor': 950.0}, '"v1"')))
+        self._envejecer(TTL_FRESCO + STALE_IF_ERROR + 5)
+
+        with self.assertRaises(requests.ConnectionError):
+            self._obtener(mock.Mock(side_effect=requests.ConnectionError()))
+        with self.assertRaises(requests.HTTPError):
+            self._obtener(mock.Mock(return_value=_respuesta(500)))
@@ -0,0 +1,112 @@
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from app.domain.models import Categoria, Producto
+from app.infrastructure.carga import informe, trafico
+from app.infrastructure.carga.upstreams import Comportamiento, MercadoPagoFalso, MindicadorFalso
+
+
+class InformeTests(SimpleTestCase):
+    def test_percentiles_y_slos(self):
+        registro = informe.Registro()
+        registro.anotar('portada', 9.0)  # antes de abrir: calentamiento, no cuenta
+        registro.abrir()
+        for milisegundos in range(1, 101):
+            registro.anotar('portada', milisegundos / 1000)
+        for numero in range(10):
+            registro.anotar('pagar', 2.0, 'HTTP 500' if numero < 3 else None)
+        registro.cerrar()
+
+        resumenes = {r.paso: r for r in registro.resumen()}
+        self.assertEqual(resumenes['portada'].requests, 100)
+        self.assertEqual((resumenes['portada'].p50, resumenes['portada'].p95), (0.05, 0.095))
+        self.assertEqual(resumenes['total'].requests, 110)
+        self.assertAlmostEqual(resumenes['pagar'].tasa_errores, 0.3)
+        self.assertEqual(registro.causas(), {'pagar: HTTP 500': 3})
+
+        slos = informe.leer_slos(['portada=100', 'pagar=2500:50'])
+        self.assertEqual(slos['pagar'], informe.Slo(2.5, 0.5))
+        self.assertEqual(informe.evaluar(registro.resumen(), slos), ['total: errores 2.7% > 1.0%'])
+        with self.assertRaises(ValueError):
+            informe.leer_slos(['portada=rapido'])
+
+    def test_mezcla(self):
+        self.assertEqual(trafico.leer_mezcla('navegar=3, cotizar'), {'navegar': 3.0, 'cotizar': 1.0})
+        with self.assertRaises(ValueError):
+            trafico.leer_mezcla('navegar=1,comprar_todo=2')
+
+
+class UpstreamsFalsosTests(SimpleTestCase):
+    def test_responden_como_los_reales(self):
+        mindicador = MindicadorFalso(Comportamiento(latencia=0))
+        mercado_pago = MercadoPagoFalso(Comportamiento(latencia=0))
+        self.addCleanup(mindicador.cerrar)
+        self.addCleanup(mercado_pago.cerrar)
+
+        serie = requests.get(f'{mindicador.url}/dolar', timeout=5).json()['serie']
+        self.assertEqual(serie[0]['valor'], MindicadorFalso.VALOR)
+        preferencia = requests.post(f'{mercado_pago.url}/checkout/preferences', timeout=5,
+                                    json={'items': [{'title': 'Martillo', 'quantity': 1, 'unit_price': 9990}]})
+        self.assertEqual(preferencia.status_code, 201)
+        self.assertIn('init_point', preferencia.json())
+
+    def test_errores_y_latencia_configurables(self):
+        upstream = MindicadorFalso(Comportamiento(latencia=0.02, dispersion=0, errores=0.5), semilla=3)
+        self.addCleanup(upstream.cerrar)
+        respuestas = [requests.get(f'{upstream.url}/dolar', timeout=5) for _ in range(40)]
+
+        fallidas = sum(r.status_code == 500 for r in respuestas)
+        self.assertEqual(fallidas, upstream.fallados)
+        self.assertTrue(10 <= fallidas <= 30, fallidas)
+        self.assertTrue(all(r.elapsed.total_seconds() >= 0.02 for r in respuestas))
+
+    def test_colgado_corta_por_timeout_del_cliente(self):
+        upstream = MindicadorFalso(Comportamiento(latencia=0, colgar=1.0))
+        self.addCleanup(upstream.cerrar)
+        with self.assertRaises(requests.Timeout):
+            requests.get(f'{upstream.url}/dolar', timeout=0.2)
+
+
+class LazoCerradoTests(LiveServerTestCase):
+    def test_usuarios_recorren_la_mezcla_sin_errores(self):
+        categoria = Categoria.objects.create(nombre='Fijaciones')
+        for numero in range(30):
+            Producto.objects.create(nombre=f'Tarugo {numero}', precio=Decimal('190'), stock=100,
+                                    categoria=categoria, sku=f'TAR-{numero}')
+        # La API no está levantada: solo escenarios que terminan en Django.
+        destinos = trafico.Destinos(django=self.live_server_url, api='http://127.0.0.1:9')
+        catalogo = trafico.descubrir_catalogo(destinos)
+        self.assertEqual(len(catalogo.productos), 30)
+        self.assertEqual(catalogo.paginas, 2)
+
+        registro = trafico.ejecutar(destinos, catalogo, usuarios=3, duracion=1.5, pensar=0.01,
+                                    mezcla={'navegar': 2, 'cotizar': 1}, semilla=1)
+
+        resumenes = {r.paso: r for r in registro.resumen()}
+        self.assertTrue({'portada', 'categoria', 'sugerir', 'cotizar'} <= set(resumenes), resumenes)
+        self.assertEqual(resumenes['total'].errores, 0, registro.causas())
+        self.assertGreater(resumenes['total'].rps, 0)
+
+    def test_comprar_paga_con_sesion(self):
+        categoria = Categoria.objects.create(nombre='Fijaciones')
+        for numero in range(5):
+            Producto.objects.create(nombre=f'Tarugo {numero}', precio=Decimal('190'), stock=100,
+                                    categoria=categoria, sku=f'TAR-{numero}')
+        User.objects.create_user('carga', password='secreta')
+        destinos = trafico.Destinos(django=self.live_server_url, api='http://127.0.0.1:9')
+        catalogo = trafico.descubrir_catalogo(destinos)
+
+        with self.assertRaisesMessage(RuntimeError, "No se pudo iniciar sesión como 'carga'"):
+            trafico.ejecutar(destinos, catalogo, usuarios=1, duracion=0.1, mezcla={'comprar': 1},
+                             credenciales=('carga', 'otra'))
+        with mock.patch('app.presentation.views.crear_preferencia_pago', return_value={'id': 'pref-1'}):
+            registro = trafico.ejecutar(destinos, catalogo, usuarios=2, duracion=1.0, pensar=0.01,
+                                        mezcla={'comprar': 1}, semilla=1, credenciales=('carga', 'secreta'))
+
+        resumenes = {r.paso: r for r in registro.resumen()}
+        self.assertIn('pagar', resumenes)
+        self.assertEqual(resumenes['total'].errores, 0, registro.causas())
@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from app.domain.models import Categoria, Producto
+from app.domain.signals import catalogo_modificado
+from app.infrastructure import cargadores
+from app.infrastructure.repositories.producto_repository import DjangoCategoriaRepository, DjangoProductoRepository
+from app.tests.presupuesto_consultas import PresupuestoConsultasMixin, poblar_catalogo
+
+
+class OperacionesPorLoteTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        poblar_catalogo(200, categorias=3)
+        self.productos = DjangoProductoRepository()
+        self.categorias = DjangoCategoriaRepository()
+        self.ids = list(Producto.objects.order_by('id').values_list('id', flat=True))
+
+    def test_get_many_una_consulta_sin_importar_cuantos_ids(self):
+        for cantidad in (1, 10, 150):
+            with self.assertPresupuestoConsultas(1, f'get_many de {cantidad}'):
+                encontrados = self.productos.get_many(self.ids[:cantidad] + [0])
+                nombres = [producto.categoria.nombre for producto in encontrados.values()]
+            self.assertEqual(sorted(encontrados), self.ids[:cantidad])
+            self.assertEqual(len(nombres), cantidad)
+
+    def test_bulk_create_y_bulk_update(self):
+        categoria = Categoria.objects.order_by('id').first()
+        avisos = []
+        catalogo_modificado.connect(lambda sender, **kwargs: avisos.append(sender), weak=False, dispatch_uid='prueba')
+        self.addCleanup(catalogo_modificado.disconnect, dispatch_uid='prueba')
+
+        # Dentro del TestCase cada transaction.atomic() suma un SAVEPOINT y un RELEASE.
+        with self.assertPresupuestoConsultas(3, 'bulk_create'):
+            creados = self.productos.bulk_create([
+                {'nombre': f'Lote {n}', 'precio': Decimal('1000'), 'stock': n, 'categoria': categoria}
+                for n in range(50)
+            ])
+        self.assertTrue(all(producto.id for producto in creados))
+
+        with self.assertPresupuestoConsultas(4, 'bulk_update'):
+            afectados = self.productos.bulk_update({p.id: {'stock': 999, 'descuento': Decimal('10')} for p in creados}
+                                                   | {0: {'stock': 1}})
+        self.assertEqual(afectados, 50)
+        self.assertEqual(Producto.objects.filter(stock=999, descuento=10).count(), 50)
+        self.assertEqual(avisos, [Producto, Producto])
+
+        with self.assertPresupuestoConsultas(7, 'bulk de categorías'):
+            nuevas = self.categorias.bulk_create([{'nombre': f'Nueva {n}'} for n in range(5)])
+            self.categorias.bulk_update({c.id: {'descripcion': 'Por lote'} for c in nuevas})
+        self.assertEqual(Categoria.objects.filter(descripcion='Por lote').count(), 5)
+
+
+class CargadoresTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        poblar_catalogo(100, categorias=3)
+        self.ids = list(Producto.objects.order_by('id').values_list('id', flat=True))
+
+    def test_pedidos_del_request_se_resuelven_juntos_y_quedan_en_cache(self):
+        with cargadores.alcance():
+            with self.assertPresupuestoConsultas(1, 'primera resolución'):
+                pendientes = [cargadores.productos().pedir(producto_id) for producto_id in self.ids[:40]]
+                faltante = cargadores.productos().pedir(0)
+                self.assertEqual([p.valor().id for p in pendientes], self.ids[:40])
+                self.assertIsNone(faltante.valor())
+            with self.assertPresupuestoConsultas(0, 'ya cargados'):
+                self.assertEqual(cargadores.productos().cargar(self.ids[5]).id, self.ids[5])
+                cargadores.productos().cargar_muchos(self.ids[:40])
+            with self.assertPresupuestoConsultas(1, 'solo los nuevos'):
+                self.assertEqual(len(cargadores.productos().cargar_muchos(self.ids)), 100)
+
+    def test_una_escritura_vacia_la_cache(self):
+        with cargadores.alcance():
+            producto = cargadores.productos().cargar(self.ids[0])
+            Producto.objects.filter(id=producto.id).update(stock=123)
+            DjangoProductoRepository().update(self.ids[1], {'stock': 7})
+            self.assertEqual(cargadores.productos().cargar(self.ids[0]).stock, 123)
+
+    def test_pendiente_resuelto_antes_de_una_escritura(self):
+        with cargadores.alcance():
+            pendiente = cargadores.productos().pedir(self.ids[0])
+            self.assertEqual(pendiente.valor().id, self.ids[0])
+            DjangoProductoRepository().update(self.ids[0], {'stock': 42})
+            with self.assertPresupuestoConsultas(1, 'releer después de olvidar'):
+                self.assertEqual(pendiente.valor().stock, 42)
+
+    def test_get_by_id_usa_el_cargador_del_request(self):
+        repositorio = DjangoProductoRepository()
+        with cargadores.alcance():
+            with self.assertPresupuestoConsultas(2, 'pendientes, get_by_id y una categoría'):
+                pendientes = [cargadores.productos().pedir(producto_id) for producto_id in self.ids[:10]]
+                # Se resuelve junto con los pendientes, no con una consulta propia.
+                self.assertEqual(repositorio.get_by_id(self.ids[3]).id, self.ids[3])
+                self.assertTrue(all(p.valor() is not None for p in pendientes))
+                categoria = DjangoCategoriaRepository().get_by_id(pendientes[0].valor().categoria_id)
+            with self.assertPresupuestoConsultas(0, 'ya cargados'):
+                self.assertEqual(repositorio.get_by_id(self.ids[7]).id, self.ids[7])
+                self.assertIs(DjangoCategoriaRepository().get_by_id(categoria.id), categoria)
+        self.assertIsNone(repositorio.get_by_id(0))
+
+    def test_sin_alcance_no_comparte_cache(self):
+        cargadores.productos().cargar(self.ids[0])
+        with self.assertPresupuestoConsultas(1, 'otro cargador'):
+            cargadores.productos().cargar(self.ids[0])
+
+    def test_cotizar_carrito_trae_los_productos_en_una_consulta(self):
+        items = [{'id': producto_id, 'cantidad': 1} for producto_id in self.ids[:30]]
+        # Una consulta para las reglas de promociones y otra para los 30 productos.
+        with self.assertPresupuestoConsultas(2, 'cotizar carrito'):
+            respuesta = self.client.post('/api/carrito/cotizar/', {'items': items}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()['lineas']), 30)
@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from ferramas_comun import cola_trabajos
+
+from app.domain.models import Categoria, Producto, Trabajo
+from app.infrastructure.cola.servicio import RETRASO_RELACIONADOS, encolar
+
+
+
+def _fallar(mensaje):
+    raise RuntimeError(mensaje)
+
+
+def _anotar(ruta, texto):
+    with open(ruta, 'a') as archivo:
+        archivo.write(f'{texto}\n')
+
+
+def _colgarse(ruta):
+    _anotar(ruta, 'empezó')
+    time.sleep(60)
+
+
+class ColaTrabajosTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(directorio, 'cola.sqlite3')
+        self.anotaciones = os.path.join(directorio, 'anotaciones.txt')
+        with sqlite3.connect(self.ruta) as conexion:
+            for sql in cola_trabajos.CREAR:
+                conexion.execute(sql)
+        self.cola = cola_trabajos.Cola(self.ruta)
+        self.addCleanup(self.cola.cerrar)
+        tareas = mock.patch.dict(cola_trabajos.TAREAS, {
+            'prueba.fallar': _fallar, 'prueba.anotar': _anotar, 'prueba.colgarse': _colgarse,
+        })
+        tareas.start()
+        self.addCleanup(tareas.stop)
+
+    def _filas(self):
+        with sqlite3.connect(self.ruta) as conexion:
+            return conexion.execute('SELECT tarea, estado, intentos, disponible_en, error FROM app_trabajo').fetchall()
+
+    def _anotado(self):
+        if not os.path.exists(self.anotaciones):
+            return []
+        with open(self.anotaciones) as archivo:
+            return archivo.read().split()
+
+    def _trabajador(self, **opciones):
+        return cola_trabajos.Trabajador(self.ruta, espera=0.01, **opciones)
+
+    def test_prioridad_y_programados(self):
+        self.cola.encolar('prueba.anotar', {'texto': 'normal'})
+        self.cola.encolar('prueba.anotar', {'texto': 'urgente'}, prioridad=10)
+        self.cola.encolar('prueba.anotar', {'texto': 'mañana'}, prioridad=99, en=24 * 3600)
+        self.cola.encolar('prueba.anotar', {'texto': 'otra cola'}, cola='otra')
+        reservados = self.cola.reservar([cola_trabajos.COLA], 10)
+        self.assertEqual([t.argumentos['texto'] for t in reservados], ['urgente', 'normal'])
+        self.assertEqual({t.intentos for t in reservados}, {1})
+
+    def test_una_sola_pendiente_por_clave(self):
+        self.cola.encolar('prueba.anotar', clave='x', en=60)
+        self.cola.encolar('prueba.anotar', clave='x', en=3600)
+        [(_, _, _, disponible_en, _)] = self._filas()
+        self.assertLess(disponible_en, time.time() + 61)
+        # Otro aviso puede adelantarla y hacerla recurrente, nunca atrasarla.
+        self.cola.encolar('prueba.anotar', clave='x', periodo=600)
+        [reservado] = self.cola.reservar([cola_trabajos.COLA], 10)
+        self.assertEqual(reservado.periodo, 600)
+        # Una vez tomada, un aviso nuevo sí encola otra (los cambios posteriores no se pierden)...
+        self.cola.encolar('prueba.anotar', clave='x', en=30)
+        self.assertEqual(len(self._filas()), 2)
+        # ...y al terminar la tomada, su recurrencia se fusiona con la pendiente.
+        self.cola.registrar(terminados=[reservado])
+        [(_, estado, _, disponible_en, _)] = self._filas()
+        self.assertEqual(estado, cola_trabajos.PENDIENTE)
+        self.assertLess(disponible_en, time.time() + 31)
+        with sqlite3.connect(self.ruta) as conexion:
+            self.assertEqual(conexion.execute('SELECT periodo FROM app_trabajo').fetchone(), (600,))
+
+    def test_reintenta_con_espera_y_queda_fallido(self):
+        self.cola.encolar('prueba.fallar', {'mensaje': 'sin conexión'}, max_intentos=3)
+        antes = time.time()
+        trabajador = self._trabajador()
+        trabajador.ejecutar(hasta_vaciar=True)
+        [(_, estado, intentos, disponible_en, error)] = self._filas()
+        self.assertEqual((estado, intentos), (cola_trabajos.PENDIENTE, 1))
+        self.assertGreaterEqual(disponible_en, antes + cola_trabajos.REINTENTO_BASE * 0.8)
+        self.assertIn('sin conexión', error)
+
+        with sqlite3.connect(self.ruta) as conexion:
+            conexion.execute('UPDATE app_trabajo SET disponible_en = 0')  # se adelanta el reintento
+        with mock.patch.object(cola_trabajos, 'REINTENTO_BASE', 0):
+            trabajador.ejecutar(hasta_vaciar=True)
+        [(_, estado, intentos, _, error)] = self._filas()
+        self.assertEqual((estado, intentos), (cola_trabajos.FALLIDO, 3))
+        self.assertIn('RuntimeError: sin conexión', error)
+        self.assertEqual((trabajador.terminados, trabajador.errores), (0, 3))
+
+    def test_terminado_se_borra_y_recurrente_se_reprograma(self):
+        self.cola.encolar('prueba.anotar', {'ruta': self.anotaciones, 'texto': 'una'})
+        self.cola.encolar('prueba.anotar', {'ruta': self.anotaciones, 'texto': 'cada-hora'}, periodo=3600)
+        self._trabajador(hilos=2).ejecutar(hasta_vaciar=True)
+        self.assertCountEqual(self._anotado(), ['una', 'cada-hora'])
+        [(_, estado, intentos, disponible_en, _)] = self._filas()
+        self.assertEqual((estado, intentos), (cola_trabajos.PENDIENTE, 0))
+        self.assertGreater(disponible_en, time.time() + 3500)
+
+    def test_pool_de_procesos(self):
+        for numero in range(6):
+            self.cola.encolar('prueba.anotar', {'ruta': self.anotaciones, 'texto': str(numero)})
+        self._trabajador(procesos=2).ejecutar(hasta_vaciar=True)
+        self.assertCountEqual(self._anotado(), [str(numero) for numero in range(6)])
+        self.assertEqual(self._filas(), [])
+
+    def test_un_trabajador_que_muere_libera_el_trabajo_al_vencer_la_visibilidad(self):
+        self.cola.encolar('prueba.colgarse', {'ruta': self.anotaciones})
+        hijo = multiprocessing.get_context('fork').Process(
+            target=lambda: cola_trabajos.Trabajador(self.ruta, visibilidad=0.5, espera=0.01).ejecutar(),
+        )
+        hijo.start()
+        self.addCleanup(hijo.join)
+        limite = time.monotonic() + 10
+        while self._anotado() != ['empezó'] and time.monotonic() < limite:
+            time.sleep(0.01)
+        os.kill(hijo.pid, signal.SIGKILL)
+        hijo.join()
+        [(_, estado, intentos, _, _)] = self._filas()
+        self.assertEqual((estado, intentos), (cola_trabajos.EN_CURSO, 1))
+
+        # Antes de que venza nadie más lo toma; después sí, y cuenta como un intento más.
+        with mock.patch.dict(cola_trabajos.TAREAS, {'prueba.colgarse': lambda ruta: _anotar(ruta, 'terminó')}):
+            trabajador = self._trabajador()
+            trabajador.ejecutar(hasta_vaciar=True)
+            self.assertEqual(trabajador.terminados, 0)
+            time.sleep(0.6)
+            trabajador.ejecutar(hasta_vaciar=True)
+        self.assertEqual(trabajador.terminados, 1)
+        self.assertEqual(self._anotado(), ['empezó', 'terminó'])
+        self.assertEqual(self._filas(), [])
+
+    def test_sin_intentos_tras_una_caida_queda_fallido(self):
+        self.cola.encolar('prueba.anotar', {'ruta': self.anotaciones, 'texto': 'nunca'}, max_intentos=1)
+        self.cola.reservar([cola_trabajos.COLA], 1, visibilidad=0)  # el trabajador muere sin registrar nada
+        trabajador = self._trabajador()
+        trabajador.ejecutar(hasta_vaciar=True)
+        [(_, estado, intentos, _, error)] = self._filas()
+        self.assertEqual((estado, intentos), (cola_trabajos.FALLIDO, 2))
+        self.assertIn('dejó de responder', error)
+        self.assertEqual(self._anotado(), [])
+
+    def test_una_reserva_vencida_no_la_cierra_el_trabajador_anterior(self):
+        self.cola.encolar('prueba.anotar')
+        [vieja] = self.cola.reservar([cola_trabajos.COLA], 1, visibilidad=0)
+        [nueva] = self.cola.reservar([cola_trabajos.COLA], 1)
+        self.cola.registrar(terminados=[vieja])
+        self.assertEqual(len(self._filas()), 1)
+        self.cola.registrar(terminados=[nueva])
+        self.assertEqual(self._filas(), [])
+
+
+class EncolarDesdeDjangoTests(TestCase):
+    def test_encola_en_la_transaccion_en_curso(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            encolar('estadisticas.recalcular')
+            raise RuntimeError('se revierte')
+        self.assertFalse(Trabajo.objects.exists())
+        with self.assertNumQueries(1):
+            encolar('estadisticas.recalcular', prioridad=5)
+        trabajo = Trabajo.objects.get()
+        self.assertEqual((trabajo.cola, trabajo.estado, trabajo.prioridad, trabajo.argumentos),
+                         (cola_trabajos.COLA, Trabajo.PENDIENTE, 5, {}))
+
+    def test_los_cambios_del_catalogo_adelantan_el_calculo_de_relacionados(self):
+        encolar('relacionados.incremental', clave='relacionados.incremental', periodo=900, en=900)
+        categoria = Categoria.objects.create(nombre='Cola')
+        with self.captureOnCommitCallbacks(execute=True):
+            for numero in range(3):
+                Producto.objects.create(nombre=f'Producto {numero}', categoria=categoria, precio=1, stock=1)
+        trabajo = Trabajo.objects.get()
+        self.assertEqual((trabajo.tarea, trabajo.periodo), ('relacionados.incremental', 900))
+        self.assertLess(trabajo.disponible_en, time.time() + RETRASO_RELACIONADOS + 1)
+        self.assertGreater(trabajo.disponible_en, time.time() + RETRASO_RELACIONADOS - 10)
+
+
+class ArranqueSinNumpyTests(SimpleTestCase):
+    def test_django_arranca_sin_numpy_ni_scipy(self):
+        # El trabajador los necesita para los relacionados; el resto de Django no.
+        codigo = (
+            "import sys; sys.modules['numpy'] = sys.modules['scipy'] = None\n"
+            "import django; django.setup()\n"
+            "from app.infrastructure.cola import servicio\n"
+            "assert 'relacionados.incremental' in servicio.cola_trabajos.TAREAS\n"
+        )
+        resultado = subprocess.run([sys.executable, '-c', codigo], cwd=settings.BASE_DIR, capture_output=True,
+                                   text=True, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'ferramas.settings'})
+        self.assertEqual(resultado.returncode, 0, resultado.stderr)
@@ -0,0 +1,76 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Count, F, Q, Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from app.domain.models import Categoria, EstadisticaCategoria, Producto
+
+
+def _agregacion():
+    # Lo mismo que mantienen los triggers, agregando todo app_producto.
+    return {
+        fila['categoria_id']: (fila['productos'], fila['en_venta'], fila['unidades'],
+                               Decimal(fila['valor']).quantize(Decimal('0.01')), round(Decimal(fila['descuento']), 2),
+                               fila['destacados'])
+        for fila in Producto.objects.values('categoria_id').annotate(
+            productos=Count('id'), en_venta=Count('id', filter=Q(en_venta=True)), unidades=Sum('stock'),
+            valor=Sum(F('precio') * F('stock')), descuento=Avg('descuento'),
+            destacados=Count('id', filter=Q(destacado=True)),
+        )
+    }
+
+
+def _estadisticas():
+    return {
+        e.categoria_id: (e.productos, e.en_venta, e.unidades, e.valor_stock, e.descuento_promedio, e.destacados)
+        for e in EstadisticaCategoria.objects.filter(productos__gt=0)
+    }
+
+
+class EstadisticasCategoriaTests(TestCase):
+    def setUp(self):
+        self.herramientas = Categoria.objects.create(nombre='Herramientas')
+        self.seguridad = Categoria.objects.create(nombre='Seguridad')
+        self.productos = [
+            Producto.objects.create(
+                nombre=f'Producto {n}', categoria=self.herramientas if n % 2 else self.seguridad,
+                precio=Decimal('1990.90') + n, stock=n, descuento=n % 3 * 5, destacado=n % 4 == 0, sku=f'EST-{n}',
+            )
+            for n in range(10)
+        ]
+
+    def test_los_triggers_siguen_las_escrituras_de_django(self):
+        self.assertEqual(_estadisticas(), _agregacion())
+
+        producto = self.productos[1]
+        producto.stock = 40
+        producto.precio = Decimal('12.34')
+        producto.categoria = self.seguridad
+        producto.save()
+        self.productos[2].delete()
+        Producto.objects.filter(categoria=self.herramientas).update(descuento=20, en_venta=False)
+        Producto.objects.filter(pk=self.productos[4].pk).update(nombre='Sin efecto')
+        self.assertEqual(_estadisticas(), _agregacion())
+
+    def test_endpoint_una_consulta_con_categorias_vacias(self):
+        vacia = Categoria.objects.create(nombre='Vacía')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('estadisticas_categorias'))
+        datos = {fila['categoria_id']: fila for fila in response.json()}
+        self.assertEqual(datos[vacia.id]['productos'], 0)
+        herramientas = datos[self.herramientas.id]
+        self.assertEqual(herramientas['productos'], 5)
+        self.assertEqual(herramientas['unidades'], 1 + 3 + 5 + 7 + 9)
+        self.assertEqual(Decimal(herramientas['valor_stock']), _agregacion()[self.herramientas.id][3])
+
+    def test_recalcular_repara_la_tabla(self):
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE app_estadisticacategoria SET productos = 999, unidades = -1')
+        salida = StringIO()
+        call_command('recalcular_estadisticas', stdout=salida)
+        self.assertIn('2 categorías', salida.getvalue())
+        self.assertEqual(_estadisticas(), _agregacion())
@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.test.client import RequestFactory
+from django.http import HttpResponse
+
+from app.infrastructure import estaticos
+from app.presentation.middleware import EstaticosPrecomprimidosMiddleware
+
+
+class ComprimirTests(SimpleTestCase):
+    def test_gzip_determinista(self):
+        contenido = b'body{color:red}' * 100
+        self.assertEqual(estaticos.comprimir(contenido)['.gz'], estaticos.comprimir(contenido)['.gz'])
+        self.assertEqual(gzip.decompress(estaticos.comprimir(contenido)['.gz']), contenido)
+
+
+class CollectstaticTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.raiz = Path(tempfile.mkdtemp())
+        cls.ajustes = override_settings(STATIC_ROOT=cls.raiz)
+        cls.ajustes.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(cls.raiz / 'staticfiles.json', encoding='utf-8') as archivo:
+            cls.manifest = json.load(archivo)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ajustes.disable()
+        shutil.rmtree(cls.raiz, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_nombres_con_hash_minificados_y_precomprimidos(self):
+        nombre = self.manifest['js/cart.js']
+        self.assertRegex(nombre, r'^js/cart\.[0-9a-f]{12}\.js$')
+        minificado = (self.raiz / nombre).read_bytes()
+        self.assertTrue(minificado)
+        fuente = (Path(__file__).resolve().parents[1] / 'static' / 'js' / 'cart.js').read_bytes()
+        if estaticos.jsmin is not None:
+            self.assertLess(len(minificado), len(fuente))
+        else:
+            self.assertEqual(minificado, fuente)
+        self.assertEqual(gzip.decompress((self.raiz / (nombre + '.gz')).read_bytes()), minificado)
+
+    def test_middleware_sirve_variante_gzip_inmutable(self):
+        nombre = self.manifest['js/cart.js']
+        middleware = EstaticosPrecomprimidosMiddleware(lambda request: HttpResponse(status=404))
+        request = RequestFactory().get('/static/' + nombre, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = middleware(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        response.close()
+
+        sin_hash = middleware(RequestFactory().get('/static/js/cart.js'))
+        self.assertNotIn('Content-Encoding', sin_hash)
+        self.assertIn('no-cache', sin_hash['Cache-Control'])
+        sin_hash.close()
+
+        self.assertEqual(middleware(RequestFactory().get('/static/../settings.py')).status_code, 404)
+
+    def test_middleware_relee_el_manifest_cuando_cambia(self):
+        middleware = EstaticosPrecomprimidosMiddleware(lambda request: HttpResponse(status=404))
+        manifest = self.raiz / 'staticfiles.json'
+        original = manifest.read_bytes()
+        self.addCleanup(manifest.write_bytes, original)
+        nuevo = 'js/cart.0123456789ab.js'
+        shutil.copy(self.raiz / self.manifest['js/cart.js'], self.raiz / nuevo)
+        self.addCleanup((self.raiz / nuevo).unlink)
+
+        antes = middleware(RequestFactory().get('/static/' + nuevo))
+        self.assertIn('no-cache', antes['Cache-Control'])
+        antes.close()
+
+        # Como un collectstatic nuevo con el servidor andando.
+        contenido = json.loads(original)
+        contenido['paths']['js/cart.js'] = nuevo
+        manifest.write_text(json.dumps(contenido), encoding='utf-8')
+        mtime = manifest.stat().st_mtime_ns + 10 ** 9
+        os.utime(manifest, ns=(mtime, mtime))
+        despues = middleware(RequestFactory().get('/static/' + nuevo))
+        self.assertIn('immutable', despues['Cache-Control'])
+        despues.close()
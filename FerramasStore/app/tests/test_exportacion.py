@@ -0,0 +1,44 @@
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.test import TestCase
+from ferramas_comun import exportacion_arrow
+
+from app.domain.models import Categoria, Producto
+
+
+@skipUnless(exportacion_arrow.disponible, "pyarrow no está instalado")
+class ExportarCatalogoTests(TestCase):
+    def setUp(self):
+        herramientas = Categoria.objects.create(nombre='Herramientas')
+        pinturas = Categoria.objects.create(nombre='Pinturas')
+        for numero in range(5):
+            Producto.objects.create(nombre=f'Martillo {numero}', sku=f'FER-{numero}', categoria=herramientas,
+                                    precio=Decimal('9990.50'), stock=numero, destacado=numero == 0)
+        Producto.objects.create(nombre='Látex blanco', sku='PIN-1', categoria=pinturas, precio=Decimal('15990'),
+                                stock=0, en_venta=False, descuento=Decimal('10'))
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.salida = os.path.join(directorio.name, 'catalogo.parquet')
+
+    def test_exporta_parquet_con_una_fila_por_producto(self):
+        salida = StringIO()
+        call_command('exportar_catalogo', salida=self.salida, lote=4, stdout=salida)
+        self.assertIn('6 productos exportados', salida.getvalue())
+
+        archivo = exportacion_arrow.pq.ParquetFile(self.salida)
+        self.assertEqual(archivo.metadata.num_row_groups, 2)
+        tabla = archivo.read()
+        self.assertEqual(tabla.schema, exportacion_arrow.esquema())
+        filas = {fila['sku']: fila for fila in tabla.to_pylist()}
+        latex = filas['PIN-1']
+        self.assertEqual((latex['nombre'], latex['categoria'], latex['precio'], latex['descuento']),
+                         ('Látex blanco', 'Pinturas', 15990.0, 10.0))
+        self.assertIs(latex['en_venta'], False)
+        self.assertIs(filas['FER-0']['destacado'], True)
+        producto = Producto.objects.get(sku='PIN-1')
+        self.assertEqual(latex['fecha_creacion'], producto.fecha_creacion)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from ferramas_comun.catalogo_sintetico import ConfiguracionCatalogo, generar_productos
+
+
+class GenerarCatalogoTests(TestCase):
+    """La base de los tests está en memoria: el comando carga sobre una copia en archivo de su esquema."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp(prefix='ferramas-catalogo-')
+        self.addCleanup(shutil.rmtree, directorio)
+        self.ruta = os.path.join(directorio, 'catalogo.sqlite3')
+        connection.ensure_connection()
+        destino = sqlite3.connect(self.ruta)
+        connection.connection.backup(destino)
+        destino.close()
+
+    def _generar(self, *opciones):
+        with mock.patch.dict(settings.DATABASES['default'], NAME=self.ruta), override_settings(CATALOGO_SNAPSHOT=''):
+            call_command('generar_catalogo', '--productos', '200', '--categorias', '5', '--limpiar', *opciones,
+                         stdout=StringIO())
+        conexion = sqlite3.connect(self.ruta)
+        try:
+            return conexion.execute(
+                'SELECT p.nombre, p.descripcion, p.precio, p.stock, p.en_venta, p.sku, p.fecha_creacion, '
+                'p.fecha_actualizacion, p.destacado, p.descuento, c.nombre '
+                'FROM app_producto p JOIN app_categoria c ON c.id = p.categoria_id ORDER BY p.sku'
+            ).fetchall()
+        finally:
+            conexion.close()
+
+    def test_misma_semilla_mismo_catalogo(self):
+        primera = self._generar('--semilla', '7')
+        segunda = self._generar('--semilla', '7')
+
+        self.assertEqual(len(primera), 200)
+        self.assertEqual(primera, segunda)
+        self.assertNotEqual(self._generar('--semilla', '8'), primera)
+
+    def test_categorias_en_cero(self):
+        with self.assertRaisesMessage(CommandError, '--categorias debe ser al menos 1.'):
+            self._generar('--categorias', '0')
+        with self.assertRaises(ValueError):
+            next(generar_productos(ConfiguracionCatalogo(productos=1), []))
+
+    def test_feed_y_estadisticas_sin_triggers_durante_la_carga(self):
+        conexion = sqlite3.connect(self.ruta)
+        self.addCleanup(conexion.close)
+        triggers = "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+        antes = conexion.execute(triggers).fetchall()
+        self._generar('--semilla', '1')
+        primera = {fila[0] for fila in conexion.execute('SELECT id FROM app_producto')}
+
+        self._generar('--semilla', '2')
+        # Los triggers vuelven tal cual y siguen funcionando después de la carga.
+        self.assertEqual(conexion.execute(triggers).fetchall(), antes)
+        ids = {fila[0] for fila in conexion.execute('SELECT id FROM app_producto')}
+        feed = dict(conexion.execute('SELECT producto_id, operacion FROM app_productocambio'))
+        self.assertEqual({i for i, op in feed.items() if op == 'upsert'}, ids)
+        self.assertEqual({i for i, op in feed.items() if op == 'delete'}, primera - ids)
+
+        agregacion = ('SELECT categoria_id, COUNT(*), SUM(stock), SUM(destacado) FROM app_producto '
+                      'GROUP BY categoria_id ORDER BY categoria_id')
+        estadisticas = ('SELECT categoria_id, productos, unidades, destacados FROM app_estadisticacategoria '
+                        'WHERE productos > 0 ORDER BY categoria_id')
+        self.assertEqual(conexion.execute(estadisticas).fetchall(), conexion.execute(agregacion).fetchall())
+        conexion.execute('UPDATE app_producto SET stock = stock + 5 WHERE id = ?', (min(ids),))
+        conexion.commit()
+        self.assertEqual(conexion.execute(estadisticas).fetchall(), conexion.execute(agregacion).fetchall())
+        self.assertEqual(conexion.execute('SELECT operacion FROM app_productocambio ORDER BY secuencia DESC').fetchone(),
+                         ('upsert',))
@@ -0,0 +1,49 @@
+from django.test import TestCase
+from ferramas_comun.lecturas import ProductoLectura
+
+from app.application.use_cases.producto_use_cases import GetAllProductosUseCase, GetProductosPorCategoriaUseCase
+from app.domain.models import Categoria, Producto
+from app.infrastructure.repositories.producto_repository import DjangoCategoriaRepository, DjangoProductoRepository
+from app.tests.presupuesto_consultas import PresupuestoConsultasMixin, poblar_catalogo
+
+
+class LecturasProductosTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        poblar_catalogo(60, categorias=3)
+        self.repositorio = DjangoProductoRepository()
+
+    def test_listar_devuelve_tuplas_iguales_a_los_modelos(self):
+        with self.assertPresupuestoConsultas(1, 'listar'):
+            productos = GetAllProductosUseCase(self.repositorio).execute()
+
+        modelos = list(Producto.objects.select_related('categoria').order_by('id'))
+        self.assertEqual(len(productos), len(modelos))
+        for lectura, modelo in zip(productos, modelos):
+            self.assertIs(type(lectura), ProductoLectura)
+            self.assertEqual((lectura.id, lectura.nombre, lectura.precio, lectura.precio_final, lectura.stock),
+                             (modelo.id, modelo.nombre, modelo.precio, modelo.precio_final, modelo.stock))
+            self.assertEqual(lectura.categoria.nombre, modelo.categoria.nombre)
+
+    def test_una_categoria_por_id_compartida(self):
+        productos = self.repositorio.listar()
+        por_id = {}
+        for producto in productos:
+            self.assertIs(por_id.setdefault(producto.categoria_id, producto.categoria), producto.categoria)
+        self.assertEqual(len(por_id), 3)
+
+    def test_iterar_en_tandas_recorre_lo_mismo(self):
+        with self.assertPresupuestoConsultas(1, 'iterar'):
+            recorridos = list(GetAllProductosUseCase(self.repositorio).iterar(tamano=7))
+        self.assertEqual(recorridos, self.repositorio.listar())
+
+    def test_por_categoria_solo_en_venta(self):
+        categoria = Categoria.objects.order_by('id').first()
+        Producto.objects.filter(categoria=categoria, id__in=Producto.objects.filter(categoria=categoria)
+                                .values('id')[:2]).update(en_venta=False)
+        caso = GetProductosPorCategoriaUseCase(self.repositorio, DjangoCategoriaRepository())
+
+        productos, error = caso.execute(categoria.nombre)
+
+        self.assertIsNone(error)
+        esperados = Producto.objects.filter(categoria=categoria, en_venta=True).order_by('id')
+        self.assertEqual([p.id for p in productos], list(esperados.values_list('id', flat=True)))
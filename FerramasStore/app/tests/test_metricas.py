@@ -0,0 +1,91 @@
+import re
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app.infrastructure.external_services import api_externa
+from app.infrastructure.metricas import Medicion, RegistroMetricas
+from app.tests.presupuesto_consultas import poblar_catalogo
+
+_SERVER_TIMING = re.compile(
+    r'app;dur=(?P<app>[\d.]+), db;dur=(?P<db>[\d.]+);desc="(?P<consultas>\d+) consultas", '
+    r'http;dur=(?P<http>[\d.]+);desc="(?P<llamadas>\d+) llamadas"'
+)
+
+
+def _server_timing(response) -> dict:
+    coincidencia = _SERVER_TIMING.fullmatch(response['Server-Timing'])
+    assert coincidencia, response['Server-Timing']
+    return {clave: float(valor) for clave, valor in coincidencia.groupdict().items()}
+
+
+class ServerTimingTests(TestCase):
+    def test_cuenta_las_consultas_del_request(self):
+        poblar_catalogo(30, categorias=2)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('producto-list'))
+
+        timing = _server_timing(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(timing['consultas'], len(consultas.captured_queries))
+        self.assertGreater(timing['consultas'], 0)
+        self.assertEqual(timing['llamadas'], 0)
+        self.assertGreaterEqual(timing['app'], timing['db'])
+
+    def test_cuenta_las_llamadas_http_salientes(self):
+        self.client.force_login(User.objects.create_user('cliente', password='secreta'))
+
+        def post(url, **opciones):
+            time.sleep(0.02)
+            return mock.Mock(status_code=200, json=lambda: {'id': 'pref-1'}, raise_for_status=lambda: None)
+
+        with mock.patch.object(api_externa.requests, 'post', side_effect=post):
+            response = self.client.post(reverse('crear_pago_externo'), {'title': 'Martillo'},
+                                        content_type='application/json')
+
+        timing = _server_timing(response)
+        self.assertEqual(response.json(), {'id': 'pref-1'})
+        self.assertEqual(timing['llamadas'], 1)
+        self.assertGreaterEqual(timing['http'], 20)
+        self.assertGreaterEqual(timing['app'], timing['http'])
+
+    def test_metrics_expone_la_ruta_y_el_status(self):
+        self.client.get(reverse('producto-list'))
+        response = self.client.get(reverse('metricas'))
+
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4')
+        texto = response.content.decode()
+        self.assertIn('# TYPE ferramas_django_request_duration_seconds histogram', texto)
+        self.assertRegex(texto, r'ferramas_django_requests_total\{method="GET",route="producto-list",status="200"\} \d+')
+        self.assertRegex(texto, r'ferramas_django_request_db_queries_count\{method="GET",route="producto-list"\} \d+')
+
+
+class RegistroMetricasTests(SimpleTestCase):
+    def test_formato_prometheus(self):
+        metricas = RegistroMetricas('prueba')
+        for total, consultas in ((0.003, 2), (0.2, 2), (30.0, 400)):
+            medicion = Medicion()
+            medicion.consultas = consultas
+            metricas.registrar('GET', 'index', 200, total, medicion)
+        metricas.registrar('GET', 'index', 404, 0.001, Medicion())
+
+        lineas = metricas.exportar().splitlines()
+        self.assertIn('# TYPE prueba_requests_total counter', lineas)
+        self.assertIn('prueba_requests_total{method="GET",route="index",status="200"} 3', lineas)
+        self.assertIn('prueba_requests_total{method="GET",route="index",status="404"} 1', lineas)
+        # Buckets acumulados: 0.001 cae en le=0.001, 0.003 en le=0.005, 0.2 en le=0.25 y 30 solo en +Inf.
+        self.assertIn('prueba_request_duration_seconds_bucket{method="GET",route="index",le="0.0025"} 1', lineas)
+        self.assertIn('prueba_request_duration_seconds_bucket{method="GET",route="index",le="0.005"} 2', lineas)
+        self.assertIn('prueba_request_duration_seconds_bucket{method="GET",route="index",le="0.25"} 3', lineas)
+        self.assertIn('prueba_request_duration_seconds_bucket{method="GET",route="index",le="10.0"} 3', lineas)
+        self.assertIn('prueba_request_duration_seconds_bucket{method="GET",route="index",le="+Inf"} 4', lineas)
+        self.assertIn('prueba_request_duration_seconds_count{method="GET",route="index"} 4', lineas)
+        self.assertIn('prueba_request_db_queries_bucket{method="GET",route="index",le="2"} 3', lineas)
+        suma = next(l for l in lineas if l.startswith('prueba_request_duration_seconds_sum'))
+        self.assertAlmostEqual(float(suma.split()[-1]), 30.204)
+        self.assertEqual(lineas.count('# TYPE prueba_request_db_queries histogram'), 1)
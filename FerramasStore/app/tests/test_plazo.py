@@ -0,0 +1,95 @@
+import time
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app.infrastructure import plazo
+from app.infrastructure.external_services import api_externa
+from app.infrastructure.external_services.cache_respuestas import Entrada
+
+
+def _respuesta(cuerpo):
+    response = mock.Mock(status_code=200, headers={})
+    response.json.return_value = cuerpo
+    return response
+
+
+class PlazoTests(SimpleTestCase):
+    def test_sin_plazo_usa_el_timeout_de_siempre(self):
+        with mock.patch.object(api_externa.requests, 'post', return_value=_respuesta({'id': '1'})) as post:
+            api_externa.crear_preferencia_pago({'title': 'Martillo'})
+        url = post.call_args.args[0]
+        self.assertTrue(url.endswith('/mercado-pago/crear-pago'))
+        self.assertEqual(post.call_args.kwargs['timeout'], api_externa.TIMEOUT_PAGOS)
+        self.assertEqual(post.call_args.kwargs['headers'], {'X-Deadline-Ms': str(api_externa.TIMEOUT_PAGOS * 1000)})
+
+    def test_cada_llamada_recibe_lo_que_queda_del_plazo(self):
+        llamadas = []
+
+        def pedir(url, **opciones):
+            llamadas.append((opciones['timeout'], int(opciones['headers']['X-Deadline-Ms'])))
+            time.sleep(0.2)
+            return _respuesta({'cambios': [], 'cursor': 0, 'hay_mas': False})
+
+        @plazo.con_plazo(1.0)
+        def vista():
+            with mock.patch.object(api_externa.requests, 'get', side_effect=pedir):
+                api_externa._pagina_cambios(0)
+                api_externa._pagina_cambios(0)
+
+        vista()
+        (primer_timeout, primer_header), (segundo_timeout, segundo_header) = llamadas
+        self.assertLessEqual(primer_timeout, 1.0)
+        self.assertLess(segundo_timeout, primer_timeout - 0.15)
+        self.assertEqual(segundo_header, int(segundo_timeout * 1000))
+        self.assertIsNone(plazo.restante())
+
+    def test_sin_tiempo_no_se_llama_a_la_api(self):
+        @plazo.con_plazo(0.01)
+        def vista():
+            time.sleep(0.02)
+            with mock.patch.object(api_externa.requests, 'post') as post:
+                with self.assertRaises(plazo.PlazoVencido):
+                    api_externa.crear_preferencia_pago({})
+            post.assert_not_called()
+
+        vista()
+
+
+class VistasDegradadasTests(SimpleTestCase):
+    def test_dolar_con_copia_anterior_muestra_aviso(self):
+        url = f"{api_externa.API_BASE}/banco-central/valor-dolar"
+        vieja = Entrada({'valor': 940.0, 'fecha': '2025-06-29'}, None, time.time() - api_externa.TTL_VALOR_DOLAR[0] - 5)
+        with mock.patch.dict(api_externa.cache._entradas, {url: vieja}), \
+                mock.patch.object(api_externa.cache, '_escribir_disco'), \
+                mock.patch.object(api_externa.requests, 'get', side_effect=requests.ReadTimeout()):
+            response = self.client.get(reverse('valor_dolar_page'))
+            api_externa.cache.esperar_revalidaciones()
+        self.assertContains(response, '940,0')
+        self.assertContains(response, 'aviso-degradado')
+
+    def test_dolar_sin_copia_ni_respuesta_muestra_error_claro(self):
+        url = f"{api_externa.API_BASE}/banco-central/valor-dolar"
+        with mock.patch.object(api_externa.cache, 'entrada', return_value=None), \
+                mock.patch.object(api_externa.requests, 'get', side_effect=requests.ReadTimeout()) as get:
+            response = self.client.get(reverse('valor_dolar_page'))
+        self.assertContains(response, 'no respondió a tiempo')
+        self.assertLessEqual(get.call_args.kwargs['timeout'], 2.0)
+        self.assertEqual(get.call_args.args[0], url)
+
+    def test_pago_que_no_alcanza_responde_504(self):
+        cliente = APIClient()
+        cliente.force_authenticate(User(username='cliente'))
+        with mock.patch.object(api_externa.requests, 'post', side_effect=requests.ReadTimeout()):
+            response = cliente.post(reverse('crear_pago_externo'), {'title': 'Martillo'})
+        self.assertEqual(response.status_code, 504)
+
+    def test_pago_sin_sesion_no_llega_a_mercado_pago(self):
+        with mock.patch.object(api_externa.requests, 'post') as post:
+            response = self.client.post(reverse('crear_pago_externo'), {'title': 'Martillo'})
+        self.assertEqual(response.status_code, 403)
+        post.assert_not_called()
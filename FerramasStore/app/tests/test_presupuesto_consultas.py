@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import URLPattern, URLResolver, reverse
+
+from app import urls as app_urls
+from app.domain.models import Categoria, Producto
+from app.tests.presupuesto_consultas import PresupuestoConsultasMixin, poblar_catalogo
+
+
+def _nombres_de_rutas(patrones):
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            yield from _nombres_de_rutas(patron.url_patterns)
+        elif isinstance(patron, URLPattern) and patron.name:
+            yield patron.name
+
+
+# nombre de ruta -> (método, kwargs de reverse, máximo de consultas)
+PRESUPUESTOS = {
+    'index': ('get', None, 0),
+    'herra_manuales': ('get', None, 3),
+    'materiales_basicos': ('get', None, 3),
+    'equipos_seguridad': ('get', None, 3),
+    'tornillos_anclaje': ('get', None, 3),
+    'fijaciones': ('get', None, 3),
+    'equipos_medicion': ('get', None, 3),
+    'login': ('get', None, 0),
+    'register': ('get', None, 0),
+    'checkout': ('get', None, 0),
+    'cotizar_carrito': ('post', None, 2),
+    'logout': ('get', None, 0),
+    'api-root': ('get', None, 0),
+    'sugerir_productos': ('get', None, 0),
+    'estadisticas_categorias': ('get', None, 1),
+    'producto-list': ('get', None, 2),
+    'producto-detail': ('get', 'producto', 1),
+    'producto-relacionados': ('get', 'producto', 1),
+    'categoria-list': ('get', None, 2),
+    'categoria-detail': ('get', 'categoria', 1),
+    'crear_pago_externo': ('post', None, 2),  # sesión y usuario
+    'productos_externos_page': ('get', None, 0),
+    'valor_dolar_page': ('get', None, 0),
+    'crear_pago_page': ('get', None, 0),
+    'metricas': ('get', None, 0),
+}
+
+# Rutas que exigen sesión: se miden con un usuario logueado, consultas de la sesión incluidas.
+CON_SESION = {'crear_pago_externo'}
+
+API_EXTERNA_FALSA = {
+    'obtener_productos': mock.Mock(return_value=[]),
+    'obtener_valor_dolar': mock.Mock(return_value={'valor': 950.0, 'fecha': '2025-06-30'}),
+    'crear_preferencia_pago': mock.Mock(return_value={'init_point': 'https://mp.test/init', 'id': '1'}),
+}
+
+
+class PresupuestoConsultasTests(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        self.cliente_con_sesion = Client(HTTP_HOST='localhost')
+        self.cliente_con_sesion.force_login(User.objects.create_user('cliente', password='secreta'))
+        for nombre, falso in API_EXTERNA_FALSA.items():
+            parche = mock.patch(f'app.presentation.views.{nombre}', falso)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _url(self, nombre, objeto):
+        if objeto == 'producto':
+            return reverse(nombre, kwargs={'pk': Producto.objects.order_by('id').values_list('id', flat=True)[0]})
+        if objeto == 'categoria':
+            return reverse(nombre, kwargs={'pk': Categoria.objects.order_by('id').values_list('id', flat=True)[0]})
+        return reverse(nombre)
+
+    def _medir_rutas(self):
+        conteos = {}
+        for nombre, (metodo, objeto, maximo) in PRESUPUESTOS.items():
+            url = self._url(nombre, objeto)
+            with self.assertPresupuestoConsultas(maximo, f"{metodo.upper()} {url}") as contexto:
+                cliente = self.client
+                if nombre in CON_SESION:
+                    # En frío: el usuario todavía no está en la caché de sesiones.
+                    caches['sesiones'].clear()
+                    cliente = self.cliente_con_sesion
+                response = getattr(cliente, metodo)(url)
+            self.assertLess(response.status_code, 500, url)
+            conteos[nombre] = len(contexto.captured_queries)
+        return conteos
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        sin_presupuesto = set(_nombres_de_rutas(app_urls.urlpatterns)) - set(PRESUPUESTOS)
+        self.assertFalse(sin_presupuesto, f"Rutas sin presupuesto de consultas: {sorted(sin_presupuesto)}")
+
+    def test_consultas_constantes_al_crecer_el_catalogo(self):
+        poblar_catalogo(10)
+        pequeno = self._medir_rutas()
+
+        poblar_catalogo(10_000 - 10, semilla=8)
+        self.assertEqual(Producto.objects.count(), 10_000)
+        grande = self._medir_rutas()
+
+        self.assertEqual(pequeno, grande)
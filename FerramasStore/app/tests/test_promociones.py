@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from ferramas_comun.promociones import CLIENTES, INVITADOS, MotorPromociones, Regla
+
+from app.domain.models import Categoria, Producto, Promocion
+
+AHORA = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+
+def _motor(*reglas, momento=AHORA):
+    return MotorPromociones([Regla(id=n, **regla) for n, regla in enumerate(reglas)], momento)
+
+
+class MotorPromocionesTests(SimpleTestCase):
+    def test_gana_el_mayor_descuento_no_acumulable(self):
+        motor = _motor(
+            dict(nombre='Categoría', porcentaje=Decimal(10), categoria_id=1),
+            dict(nombre='SKU', porcentaje=Decimal(25), sku='FER-1'),
+            dict(nombre='Todo', porcentaje=Decimal(5)),
+        )
+        self.assertEqual(motor.precio(Decimal(1000), Decimal(0), 1, 'FER-1').final, Decimal('750.00'))
+        self.assertEqual(motor.precio(Decimal(1000), Decimal(0), 1, 'FER-2').promociones, ('Categoría',))
+        self.assertEqual(motor.precio(Decimal(1000), Decimal(0), 2, None).final, Decimal('950.00'))
+        # El descuento propio del producto compite como una regla más.
+        precio = motor.precio(Decimal(1000), Decimal(30), 1, 'FER-1')
+        self.assertEqual((precio.final, precio.promociones), (Decimal('700.00'), ()))
+
+    def test_escalones_por_cantidad(self):
+        motor = _motor(
+            dict(nombre='3+', porcentaje=Decimal(5), categoria_id=1, cantidad_minima=3),
+            dict(nombre='10+', porcentaje=Decimal(15), categoria_id=1, cantidad_minima=10),
+        )
+        self.assertEqual(motor.precio(Decimal(100), Decimal(0), 1, None, 2).final, Decimal(100))
+        self.assertEqual(motor.precio(Decimal(100), Decimal(0), 1, None, 3).final, Decimal('95.00'))
+        self.assertEqual(motor.precio(Decimal(100), Decimal(0), 1, None, 50).final, Decimal('85.00'))
+
+    def test_acumulables_en_cascada_y_por_segmento(self):
+        motor = _motor(
+            dict(nombre='Clientes', porcentaje=Decimal(10), segmento=CLIENTES, acumulable=True),
+            dict(nombre='Cyber', porcentaje=Decimal(20), categoria_id=1),
+        )
+        cliente = motor.precio(Decimal(1000), Decimal(0), 1, None, segmento=CLIENTES)
+        self.assertEqual((cliente.final, cliente.descuento), (Decimal('720.00'), Decimal('28.00')))
+        self.assertEqual(cliente.promociones, ('Cyber', 'Clientes'))
+        self.assertEqual(motor.precio(Decimal(1000), Decimal(0), 1, None, segmento=INVITADOS).final, Decimal('800.00'))
+
+    def test_ventana_de_fechas(self):
+        reglas = (
+            dict(nombre='Pasada', porcentaje=Decimal(50), hasta=AHORA),
+            dict(nombre='Vigente', porcentaje=Decimal(10), desde=AHORA - timedelta(days=1)),
+            dict(nombre='Futura', porcentaje=Decimal(30), desde=AHORA + timedelta(hours=2)),
+        )
+        motor = _motor(*reglas)
+        self.assertEqual(motor.precio(Decimal(100), Decimal(0), 1, None).promociones, ('Vigente',))
+        self.assertEqual(motor.valido_hasta, AHORA + timedelta(hours=2))
+        self.assertFalse(motor.vigente(AHORA + timedelta(hours=3)))
+        despues = _motor(*reglas, momento=AHORA + timedelta(hours=3))
+        self.assertEqual(despues.precio(Decimal(100), Decimal(0), 1, None).promociones, ('Futura',))
+
+    def test_precios_memorizados(self):
+        motor = _motor(dict(nombre='Todo', porcentaje=Decimal(5)))
+        self.assertIs(motor.precio(Decimal(100), Decimal(0), 1, None), motor.precio(Decimal(100), Decimal(0), 1, None))
+
+
+class CotizarCarritoTests(TestCase):
+    def setUp(self):
+        self.categoria, _ = Categoria.objects.get_or_create(nombre='Herramientas Manuales')
+        self.martillo = Producto.objects.create(nombre='Martillo', categoria=self.categoria, precio=1000, stock=5,
+                                                descuento=10, sku='PRO-1')
+        self.taladro = Producto.objects.create(nombre='Taladro', categoria=self.categoria, precio=50000, stock=5,
+                                               sku='PRO-2')
+        self.url = reverse('cotizar_carrito')
+
+    def _cotizar(self, *items):
+        response = self.client.post(self.url, {'items': [{'id': i, 'cantidad': c} for i, c in items]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_invitado_y_cliente_registrado(self):
+        invitado = self._cotizar((self.martillo.id, 2), (self.taladro.id, 1))
+        self.assertEqual(Decimal(invitado['total']), Decimal('51800.00'))
+        self.assertEqual(Decimal(invitado['total_sin_descuento']), Decimal('52000'))
+
+        # La migración 0010 reemplaza el 10 % fijo de checkout por una promoción acumulable.
+        User.objects.create_user('cliente', password='secreta')
+        self.client.login(username='cliente', password='secreta')
+        cliente = self._cotizar((self.martillo.id, 2), (self.taladro.id, 1))
+        self.assertEqual(Decimal(cliente['lineas'][0]['precio_final']), Decimal('810.00'))
+        self.assertEqual(Decimal(cliente['total']), Decimal('46620.00'))
+
+    def test_una_promocion_nueva_cambia_la_version(self):
+        self._cotizar((self.taladro.id, 5))
+        Promocion.objects.create(nombre='Taladros x5', porcentaje=20, sku='PRO-2', cantidad_minima=5)
+        with self.assertNumQueries(2):
+            cotizacion = self._cotizar((self.taladro.id, 5), (self.martillo.id, 1), (999_999, 1))
+        self.assertEqual(cotizacion['lineas'][0]['promociones'], ['Taladros x5'])
+        self.assertEqual(Decimal(cotizacion['lineas'][0]['subtotal']), Decimal('200000.00'))
+        self.assertEqual(len(cotizacion['lineas']), 2)
+
+    def test_carrito_invalido(self):
+        response = self.client.post(self.url, {'items': [{'id': self.martillo.id, 'cantidad': 0}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_listado_con_precios_del_motor(self):
+        Promocion.objects.create(nombre='Herramientas', porcentaje=25, categoria=self.categoria)
+        response = self.client.get(reverse('herra_manuales'))
+        precios = {p.nombre: (p.precio_final, p.descuento) for p in response.context['productos']}
+        self.assertEqual(precios['Martillo'], (Decimal('750.00'), Decimal('25.00')))
+        self.assertEqual(precios['Taladro'], (Decimal('37500.00'), Decimal('25.00')))
@@ -0,0 +1,120 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from app.domain.models import CalculoRelacionados, Categoria, Producto, ProductoRelacionado
+from app.infrastructure.relacionados import tfidf
+from app.infrastructure.relacionados.tfidf import Vocabulario, bloques, clave_bloque, palabras, vecinos, ventana_de
+
+TEXTOS = [
+    ('Martillo de Acero', 'Martillo de carpintero con mango de madera'),
+    ('Martillo de Goma', 'Martillo para cerámica con cabeza de goma'),
+    ('Martillo Carpintero Acero', 'Mango de fibra de vidrio'),
+    ('Taladro Percutor', 'Taladro eléctrico de 750 W'),
+    ('Taladro Inalámbrico', 'Taladro eléctrico con batería'),
+]
+
+
+def _vecinos(textos, k=2, ventana=100):
+    vocabulario = Vocabulario.contar(textos)
+    return vecinos(vocabulario.vectorizar(textos), k, ventana)
+
+
+@skipUnless(tfidf.disponible, "numpy/scipy no están instalados")
+class TfidfTests(SimpleTestCase):
+    def test_palabras_y_clave_de_bloque(self):
+        self.assertEqual(palabras('Martillo de Acero 1/2"'), ['martillo', 'acero'])
+        self.assertEqual(clave_bloque('El Taladro Percutor'), 'taladro')
+        self.assertEqual(clave_bloque(None), '')
+
+    def test_los_mas_parecidos_primero_y_sin_el_mismo(self):
+        posiciones, puntajes = _vecinos(TEXTOS)
+        self.assertEqual(posiciones[0].tolist(), [2, 1])
+        self.assertEqual(posiciones[3].tolist(), [4, -1])
+        self.assertTrue((puntajes[:, 0] >= puntajes[:, 1]).all())
+        for fila, relacionados in enumerate(posiciones):
+            self.assertNotIn(fila, relacionados.tolist())
+
+    def test_ventana_acota_las_comparaciones(self):
+        self.assertEqual(ventana_de(0, 10, 4), (0, 4))
+        self.assertEqual(ventana_de(5, 10, 4), (3, 7))
+        self.assertEqual(ventana_de(9, 10, 4), (6, 10))
+        self.assertEqual(ventana_de(5, 3, 4), (0, 3))
+        textos = [(f'Tornillo {n}', 'Tornillo de acero') for n in range(20)]
+        posiciones, _ = _vecinos(textos, k=3, ventana=4)
+        for fila, relacionados in enumerate(posiciones):
+            self.assertTrue(all(abs(p - fila) < 4 for p in relacionados.tolist() if p >= 0), fila)
+
+    def test_bloques_chicos_van_juntos(self):
+        claves = ['martillo', 'taladro', 'martillo', 'llave', 'martillo', 'sierra']
+        self.assertEqual(bloques(claves, 2), [[0, 2, 4], [1, 3, 5]])
+        self.assertEqual(bloques(['martillo', 'taladro'], 2), [[0, 1]])
+        self.assertEqual(bloques(['martillo'], 2), [])
+
+
+@skipUnless(tfidf.disponible, "numpy/scipy no están instalados")
+class CalcularRelacionadosTests(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre='Herramientas Manuales')
+        otra = Categoria.objects.create(nombre='Equipos de Seguridad')
+        self.productos = [
+            Producto.objects.create(nombre=nombre, descripcion=descripcion, categoria=self.categoria,
+                                    precio=1000, stock=5, sku=f'REL-{n}')
+            for n, (nombre, descripcion) in enumerate(TEXTOS)
+        ]
+        # Mismo texto en otra categoría: no se relaciona.
+        Producto.objects.create(nombre='Martillo de Acero', categoria=otra, precio=1000, stock=5, sku='REL-X')
+
+    def _calcular(self, *argumentos):
+        salida = StringIO()
+        call_command('calcular_relacionados', *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def _relacionados(self, producto):
+        return list(ProductoRelacionado.objects.filter(producto=producto)
+                    .order_by('posicion').values_list('relacionado__nombre', flat=True))
+
+    def test_calculo_completo_y_endpoint(self):
+        self.assertIn('Cálculo completo', self._calcular('--completo'))
+        martillo = self.productos[0]
+        self.assertEqual(self._relacionados(martillo)[:2], ['Martillo Carpintero Acero', 'Martillo de Goma'])
+        url = reverse('producto-relacionados', kwargs={'pk': martillo.pk})
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['nombre'] for p in response.json()][:2], ['Martillo Carpintero Acero', 'Martillo de Goma'])
+        self.assertEqual(self.client.get('/api/productos/abc/relacionados/').status_code, 404)
+
+    def test_incremental_recalcula_lo_que_cambio(self):
+        self._calcular()  # sin cálculo previo hace uno completo
+        self.assertTrue(CalculoRelacionados.objects.get().completo)
+        self.assertIn('sin cambios', self._calcular())
+
+        # Precio y stock no cambian el texto: no hay nada que recalcular.
+        Producto.objects.filter(pk=self.productos[3].pk).update(precio=2000, stock=0)
+        self.assertIn('sin cambios', self._calcular())
+
+        goma, acero = self.productos[1], self.productos[0]
+        goma.nombre = 'Taladro Percutor Compacto'
+        goma.descripcion = 'Taladro eléctrico'
+        goma.save()
+        # Con seis productos cualquier cambio supera el umbral por defecto.
+        self.assertIn('Cálculo incremental', self._calcular('--umbral', '1'))
+        self.assertNotIn('Taladro Percutor Compacto', self._relacionados(acero))
+        self.assertIn('Taladro Percutor Compacto', self._relacionados(self.productos[3]))
+
+        eliminado = self.productos[2].pk
+        self.productos[2].delete()
+        self._calcular('--umbral', '1')
+        self.assertNotIn('Martillo Carpintero Acero', self._relacionados(acero))
+        self.assertFalse(ProductoRelacionado.objects.filter(producto_id=eliminado).exists())
+
+
+class SinNumpyTests(SimpleTestCase):
+    def test_el_comando_explica_la_dependencia(self):
+        with mock.patch.object(tfidf, 'disponible', False):
+            with self.assertRaisesMessage(CommandError, 'pip install numpy scipy'):
+                call_command('calcular_relacionados', stdout=StringIO())
@@ -0,0 +1,83 @@
+import tempfile
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from app.infrastructure.external_services.replica_productos import ReplicaProductos
+
+
+def _respuesta(status, cuerpo=None):
+    response = mock.Mock(status_code=status)
+    response.json.return_value = cuerpo
+    response.raise_for_status.side_effect = requests.HTTPError(str(status)) if status >= 400 else None
+    return response
+
+
+def _upsert(secuencia, producto_id, **campos):
+    return {'secuencia': secuencia, 'operacion': 'upsert', 'producto_id': producto_id,
+            'producto': {'id': producto_id, **campos}}
+
+
+class FeedFalso:
+    """Sirve páginas de cambios y anota los cursores pedidos."""
+
+    def __init__(self, paginas):
+        self.paginas = paginas
+        self.pedidos = []
+
+    def __call__(self, since):
+        self.pedidos.append(since)
+        return self.paginas.pop(0)
+
+
+class ReplicaProductosTests(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def test_aplica_solo_el_delta_desde_el_cursor(self):
+        replica = ReplicaProductos(self.directorio)
+        feed = FeedFalso([
+            _respuesta(200, {'cambios': [_upsert(1, 1, stock=5), _upsert(2, 2, stock=1)], 'cursor': 2, 'hay_mas': True}),
+            _respuesta(200, {'cambios': [_upsert(3, 3, stock=0)], 'cursor': 3, 'hay_mas': False}),
+            _respuesta(200, {'cambios': [
+                _upsert(4, 1, stock=9),
+                {'secuencia': 5, 'operacion': 'delete', 'producto_id': 2, 'producto': None},
+            ], 'cursor': 5, 'hay_mas': False}),
+        ])
+
+        self.assertEqual([p['id'] for p in replica.obtener(0, 60, feed)], [1, 2, 3])
+        productos = replica.obtener(0, 60, feed)
+
+        self.assertEqual(feed.pedidos, [0, 2, 3])
+        self.assertEqual(productos, [{'id': 1, 'stock': 9}, {'id': 3, 'stock': 0}])
+        # Un proceso nuevo retoma desde el cursor guardado en disco.
+        otra = ReplicaProductos(self.directorio)
+        self.assertEqual(otra.obtener(3600, 60, FeedFalso([])), productos)
+        self.assertEqual(otra.cursor, 5)
+
+    def test_cursor_desconocido_resincroniza_desde_cero(self):
+        replica = ReplicaProductos(self.directorio)
+        replica.obtener(0, 60, FeedFalso([
+            _respuesta(200, {'cambios': [_upsert(7, 1), _upsert(8, 2)], 'cursor': 8, 'hay_mas': False}),
+        ]))
+        feed = FeedFalso([
+            _respuesta(410),
+            _respuesta(200, {'cambios': [_upsert(1, 2)], 'cursor': 1, 'hay_mas': False}),
+        ])
+
+        self.assertEqual(replica.obtener(0, 60, feed), [{'id': 2}])
+        self.assertEqual(feed.pedidos, [8, 0])
+
+    def test_sirve_la_replica_si_la_api_falla(self):
+        replica = ReplicaProductos(self.directorio)
+        replica.obtener(0, 60, FeedFalso([
+            _respuesta(200, {'cambios': [_upsert(1, 1)], 'cursor': 1, 'hay_mas': False}),
+        ]))
+
+        def caida(since):
+            raise requests.ConnectionError('sin conexión')
+
+        self.assertEqual(replica.obtener(0, 60, caida), [{'id': 1}])
+        with self.assertRaises(requests.ConnectionError):
+            ReplicaProductos(tempfile.mkdtemp()).obtener(0, 60, caida)
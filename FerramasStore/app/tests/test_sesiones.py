@@ -0,0 +1,105 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from app.domain.models import Usuario
+from app.infrastructure import autenticacion
+
+
+def _sentencias(contexto):
+    # Los SAVEPOINT son del TestCase; fuera de los tests transaction.atomic() no agrega consultas.
+    return [consulta['sql'].split('"')[0] + consulta['sql'].split('"')[1]
+            for consulta in contexto.captured_queries
+            if not consulta['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+
+
+# Como con REDIS_URL: sesión cached_db y usuario en la caché compartida (aquí en memoria, sin servidor).
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sesiones': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sesiones-compartida'},
+}, SESSION_ENGINE='django.contrib.sessions.backends.cached_db', USUARIO_CACHE_TTL=15 * 60)
+class SesionCacheadaTests(TestCase):
+    def setUp(self):
+        self.addCleanup(caches['sesiones'].clear)
+        self.user = User.objects.create_user('cliente', password='secreta')
+        self.client.login(username='cliente', password='secreta')
+
+    def test_request_con_sesion_sin_consultar_sesion_ni_usuario(self):
+        # Antes: SELECT de django_session y de auth_user en cada request.
+        self.client.get(reverse('checkout'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('checkout'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        with self.assertNumQueries(0):
+            self.assertEqual(response.wsgi_request.user.usuario.user_id, self.user.id)
+
+    def test_cambio_de_contrasena_cierra_la_sesion_enseguida(self):
+        self.client.get(reverse('checkout'))
+        self.user.set_password('otra')
+        self.user.save()
+        response = self.client.get(reverse('checkout'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_perfil_actualizado(self):
+        self.client.get(reverse('checkout'))
+        Usuario.objects.filter(user=self.user).update(telefono='911111111')
+        Usuario.objects.get(user=self.user).save()  # update() no dispara señales; save() sí
+        response = self.client.get(reverse('checkout'))
+        self.assertEqual(response.wsgi_request.user.usuario.telefono, '911111111')
+
+    def test_usuario_dado_de_baja(self):
+        self.client.get(reverse('checkout'))
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.client.get(reverse('checkout')).context['user'].is_authenticated)
+
+
+class SesionSinRedisTests(TestCase):
+    """La configuración sin REDIS_URL: la sesión se lee de la base y el usuario de la memoria del worker."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('cliente', password='secreta')
+        self.client.login(username='cliente', password='secreta')
+
+    def test_solo_consulta_la_sesion(self):
+        self.client.get(reverse('checkout'))
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse('checkout'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(_sentencias(contexto), ['SELECT django_session'])
+
+    def test_clave_con_el_nombre_de_la_base(self):
+        self.assertIn(str(connection.settings_dict['NAME']), autenticacion._clave(self.user.pk))
+
+
+class RegistroTests(TestCase):
+    def _registrar(self, usuario='nuevo', correo='nuevo@ferramas.cl'):
+        return self.client.post(reverse('register'), {
+            'nombre': 'Nueva', 'usuario': usuario, 'correo': correo, 'password': 'clave-segura',
+            'password2': 'clave-segura', 'telefono': '987654321',
+        })
+
+    def test_una_consulta_y_usuario_con_perfil_en_una_transaccion(self):
+        # Antes: dos exists(), INSERT del usuario, INSERT del perfil y UPDATE del perfil.
+        with CaptureQueriesContext(connection) as contexto:
+            response = self._registrar()
+        self.assertRedirects(response, '/login/?next=/checkout/', fetch_redirect_response=False)
+        self.assertEqual(_sentencias(contexto), ['SELECT auth_user', 'INSERT INTO auth_user', 'INSERT INTO app_usuario'])
+        usuario = Usuario.objects.select_related('user').get(user__username='nuevo')
+        self.assertEqual((usuario.telefono, usuario.user.first_name), ('987654321', 'Nueva'))
+        self.assertTrue(usuario.user.check_password('clave-segura'))
+
+    def test_usuario_o_correo_repetidos(self):
+        User.objects.create_user('existente', email='existente@ferramas.cl')
+        for usuario, correo, mensaje in [
+            ('existente', 'otro@ferramas.cl', 'El usuario ya existe.'),
+            ('otro', 'existente@ferramas.cl', 'El correo ya está registrado.'),
+            ('existente', 'existente@ferramas.cl', 'El usuario ya existe.'),
+        ]:
+            with self.assertNumQueries(1):
+                response = self._registrar(usuario, correo)
+            self.assertEqual([str(m) for m in response.context['messages']], [mensaje])
+        self.assertEqual(User.objects.count(), 1)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ferramas_comun.catalogo_snapshot import escribir_snapshot
+
+from app.domain.models import Categoria, Producto
+from app.infrastructure.snapshot import servicio
+
+
+class PaginasDesdeSnapshotTests(TestCase):
+    """La base de los tests está en memoria: el snapshot se escribe con su misma conexión y se fija la ruta."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp(prefix='ferramas-snapshot-')
+        self.addCleanup(shutil.rmtree, directorio)
+        self.ruta = os.path.join(directorio, 'catalogo.snap')
+
+        self.manuales = Categoria.objects.create(nombre='Herramientas Manuales')
+        otra = Categoria.objects.create(nombre='Fijaciones')
+        self.martillo = Producto.objects.create(nombre='Martillo carpintero', precio=Decimal('12990'), stock=4,
+                                                descuento=10, categoria=self.manuales, sku='MART-1')
+        Producto.objects.create(nombre='Alicate descontinuado', precio=Decimal('5990'), stock=0, en_venta=False,
+                                categoria=self.manuales, sku='ALIC-1')
+        Producto.objects.create(nombre='Tarugo 8 mm', precio=Decimal('190'), stock=500, categoria=otra, sku='TAR-8')
+        escribir_snapshot(connection.connection, self.ruta)
+
+        for parche in (mock.patch.object(servicio, '_ruta_snapshot', return_value=self.ruta),
+                       mock.patch.object(servicio, '_lector', None)):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_pagina_de_categoria_se_arma_desde_el_snapshot(self):
+        # Cambio sin señales: la base y el snapshot quedan distintos, y la página muestra el snapshot.
+        Producto.objects.filter(pk=self.martillo.pk).update(nombre='Martillo renombrado')
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('herra_manuales'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Martillo carpintero')
+        self.assertNotContains(response, 'Martillo renombrado')
+        self.assertNotContains(response, 'Alicate descontinuado')
+        self.assertNotContains(response, 'Tarugo')
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'app_producto' in c['sql']])
+
+    def test_montos_decimales_como_el_orm(self):
+        snapshot = servicio.snapshot_actual()
+        producto = snapshot.producto(self.martillo.pk)
+
+        self.assertEqual((producto.precio, producto.precio_final), (Decimal('12990.00'), Decimal('11691.00')))
+        self.assertEqual(producto.categoria.nombre, 'Herramientas Manuales')
+        self.assertEqual([p.sku for p in snapshot.productos_por_id()], ['MART-1', 'ALIC-1', 'TAR-8'])
+        self.assertEqual([p.sku for p in snapshot.productos_de_categoria(self.manuales.pk, en_venta=True)],
+                         ['MART-1'])
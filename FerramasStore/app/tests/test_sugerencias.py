@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from ferramas_comun.indice_prefijos import IndicePrefijos, calcular_peso
+
+from app.domain.models import Categoria, Producto
+from app.infrastructure.sugerencias.servicio import servicio
+
+
+def _indice():
+    return IndicePrefijos([
+        (1, 'Martillo de Acero', 'FER-0001', calcular_peso(False, 0, 10)),
+        (2, 'Martillo Eléctrico Bosch', 'FER-0002', calcular_peso(True, 0, 10)),
+        (3, 'Taladro Percutor', 'FER-0003', calcular_peso(False, 20, 5)),
+        (4, 'Llave de Paso', 'FER-0104', calcular_peso(False, 0, 0)),
+        (5, 'Destornillador Paleta', None, calcular_peso(False, 0, 3)),
+    ])
+
+
+def _ids(sugerencias):
+    return [sugerencia.id for sugerencia in sugerencias]
+
+
+class IndicePrefijosTests(SimpleTestCase):
+    def test_prefijo_sin_tildes_ni_mayusculas_ordenado_por_peso(self):
+        indice = _indice()
+        self.assertEqual(_ids(indice.sugerir('MART')), [2, 1])
+        self.assertEqual(_ids(indice.sugerir('electri')), [2])
+        self.assertEqual(_ids(indice.sugerir('Eléc')), [2])
+        self.assertEqual(indice.sugerir('xyz'), [])
+
+    def test_varias_palabras_en_cualquier_orden(self):
+        indice = _indice()
+        self.assertEqual(_ids(indice.sugerir('bosch mart')), [2])
+        self.assertEqual(_ids(indice.sugerir('llave de pa')), [4])
+        # La última palabra puede estar a medio escribir aunque sea una palabra vacía.
+        self.assertEqual(_ids(indice.sugerir('de')), [5])
+
+    def test_sku_con_o_sin_guion(self):
+        indice = _indice()
+        self.assertEqual(_ids(indice.sugerir('fer-000')), [1, 2, 3])
+        self.assertEqual(_ids(indice.sugerir('FER01')), [4])
+        self.assertEqual(indice.sugerir('fer-0002')[0].nombre, 'Martillo Eléctrico Bosch')
+
+    def test_limite(self):
+        self.assertEqual(len(_indice().sugerir('mart', limite=1)), 1)
+
+    def test_agregar_actualizar_y_quitar_invalidan_el_cache(self):
+        indice = _indice()
+        self.assertEqual(_ids(indice.sugerir('mart')), [2, 1])
+        indice.agregar(6, 'Martillo Carpintero', 'FER-0006', calcular_peso(True, 50, 1))
+        self.assertEqual(_ids(indice.sugerir('mart')), [6, 2, 1])
+        indice.agregar(1, 'Combo Acero', 'FER-0001', calcular_peso(False, 0, 10))
+        self.assertEqual(_ids(indice.sugerir('mart')), [6, 2])
+        self.assertEqual(_ids(indice.sugerir('comb')), [1])
+        indice.quitar(2)
+        self.assertEqual(_ids(indice.sugerir('mart')), [6])
+        self.assertEqual(_ids(indice.sugerir('fer-0002')), [])
+        self.assertEqual(len(indice), 5)
+
+
+class SugerirProductosViewTests(TestCase):
+    def setUp(self):
+        self.client.defaults['HTTP_HOST'] = 'localhost'
+        # El índice sobrevive entre tests pero la base no: se parte de cero.
+        servicio().descartar()
+        self.categoria = Categoria.objects.create(nombre='Herramientas')
+        self.martillo = self._producto('Martillo Eléctrico', 'FER-1', destacado=True)
+        self._producto('Martillo de Goma', 'FER-2')
+
+    def _producto(self, nombre, sku, **extra):
+        return Producto.objects.create(nombre=nombre, sku=sku, categoria=self.categoria, precio=Decimal('9990'),
+                                       stock=5, **extra)
+
+    def _sugerir(self, q):
+        response = self.client.get(reverse('sugerir_productos'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_sugiere_y_sigue_las_escrituras(self):
+        self.assertEqual(self._sugerir('electrico'), [{'id': self.martillo.id, 'nombre': 'Martillo Eléctrico', 'sku': 'FER-1'}])
+        self.assertEqual([s['sku'] for s in self._sugerir('mar')], ['FER-1', 'FER-2'])
+
+        self.martillo.nombre = 'Combo Eléctrico'
+        self.martillo.save()
+        self.assertEqual([s['sku'] for s in self._sugerir('mar')], ['FER-2'])
+        self.assertEqual([s['sku'] for s in self._sugerir('combo')], ['FER-1'])
+
+        Producto.objects.filter(sku='FER-2').update(en_venta=False)
+        self.martillo.delete()
+        servicio().marcar_pendiente()  # los update() masivos del ORM no mandan señales
+        self.assertEqual(self._sugerir('mar'), [])
+
+    def test_sin_escrituras_no_consulta_la_base(self):
+        self._sugerir('mar')
+        with self.assertNumQueries(0):
+            self._sugerir('mart')
+            self._sugerir('')
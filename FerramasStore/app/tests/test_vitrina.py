@@ -0,0 +1,27 @@
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app.infrastructure.external_services import api_externa
+from app.infrastructure.external_services.cache_respuestas import CacheRespuestas
+
+VITRINA = {
+    'productos': [{'id': 1, 'nombre': 'Martillo', 'precio': 9500.0, 'precio_usd': 10.0}],
+    'categorias': [{'id': 1, 'nombre': 'Herramientas manuales', 'descripcion': None}],
+    'dolar': {'valor': 950.0, 'fecha': '2025-06-30T00:00:00'},
+    'errores': {},
+}
+
+
+class ObtenerVitrinaTests(SimpleTestCase):
+    def test_un_solo_request_y_luego_desde_la_cache(self):
+        respuesta = mock.Mock(status_code=200, headers={'ETag': '"v1"'})
+        respuesta.json.return_value = VITRINA
+        with mock.patch.object(api_externa, 'cache', CacheRespuestas(tempfile.mkdtemp())), \
+                mock.patch.object(api_externa.requests, 'get', return_value=respuesta) as get:
+            self.assertEqual(api_externa.obtener_vitrina(categoria_id=3, limite=12), VITRINA)
+            self.assertEqual(api_externa.obtener_vitrina(categoria_id=3, limite=12), VITRINA)
+        get.assert_called_once()
+        self.assertEqual(get.call_args.args[0], f'{api_externa.API_BASE}/vitrina/?limite=12&offset=0&categoria_id=3')
+        self.assertIn('X-Deadline-Ms', get.call_args.kwargs['headers'])
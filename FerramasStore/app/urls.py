@@ -5,6 +5,7 @@ from app.presentation.views import CrearPagoExternoView
 from app.presentation.views import productos_externos_page, valor_dolar_page, crear_pago_page
 
 router = routers.DefaultRouter()
+router.APIRootView = views.ApiRootView
 router.register(r'productos', views.ProductoViewSet)
 router.register(r'categorias', views.CategoriaViewSet)
 
@@ -21,11 +22,16 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('checkout/', views.checkout, name='checkout'),
     path('logout/', views.logout_view, name='logout'),
-    # Rutas de la API
+    # Rutas de la API (sugerir va antes del router: 'sugerir' calzaría como pk de producto-detail)
+    path('api/productos/sugerir/', views.sugerir_productos, name='sugerir_productos'),
+    path('api/carrito/cotizar/', views.cotizar_carrito, name='cotizar_carrito'),
+    path('api/estadisticas/categorias/', views.estadisticas_categorias, name='estadisticas_categorias'),
     path('api/', include(router.urls)),
     path('crear-pago-externo/', CrearPagoExternoView.as_view(), name='crear_pago_externo'),
     # Rutas para las páginas de productos externos y valor del dólar
     path('productos-externos/', productos_externos_page, name='productos_externos_page'),
     path('valor-dolar/', valor_dolar_page, name='valor_dolar_page'),
     path('crear-pago/', crear_pago_page, name='crear_pago_page'),
+    # Métricas en formato Prometheus
+    path('metrics', views.metricas, name='metricas'),
 ]
\ No newline at end of file
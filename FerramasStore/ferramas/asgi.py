@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ferramas.settings')
 
 application = get_asgi_application()
+
+# El índice de autocompletado se arma en segundo plano al arrancar, no en el primer request.
+from app.infrastructure.sugerencias.servicio import servicio  # noqa: E402
+
+servicio().precargar()
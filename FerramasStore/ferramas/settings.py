@@ -43,7 +43,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.presentation.middleware.MetricasMiddleware',
+    'app.presentation.middleware.CargadoresMiddleware',
+    # Por fuera de sesiones y CSRF: tiene que ver las cookies que dejan en la respuesta.
+    'app.presentation.middleware.PoliticasCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'app.presentation.middleware.EstaticosPrecomprimidosMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,10 +81,14 @@ WSGI_APPLICATION = 'ferramas.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# La misma variable que la API (sqlite:///ruta), para apuntar los dos servicios a otra base (p. ej. en probar_carga)
+_DATABASE_URL = os.getenv('DATABASE_URL', '')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR.parent / 'api' / 'db.sqlite3',
+        'NAME': (_DATABASE_URL.removeprefix('sqlite:///') if _DATABASE_URL.startswith('sqlite:///')
+                 else BASE_DIR.parent / 'api' / 'db.sqlite3'),
     }
 }
 
@@ -104,6 +113,36 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Sesiones y usuario autenticado sin consultar SQLite en cada request (ver
+# app/infrastructure/autenticacion.py). Con REDIS_URL (redis://host:6379/0) la
+# sesión se guarda en la base (cached_db) y se lee de Redis junto con el usuario:
+# lo comparten todos los workers y máquinas, así que un logout o un cambio de
+# contraseña se ve en todos enseguida. Sin Redis la sesión se lee de la base y
+# solo el usuario queda en la memoria de cada worker, por poco tiempo: la
+# invalidación de un worker no llega a los demás.
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    _CACHE_SESIONES = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': 2 * 7 * 24 * 3600,  # como SESSION_COOKIE_AGE
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    USUARIO_CACHE_TTL = 15 * 60  # por si un cambio no pasó por el ORM (p. ej. SQL directo)
+else:
+    _CACHE_SESIONES = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sesiones'}
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    USUARIO_CACHE_TTL = 30
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'sesiones': _CACHE_SESIONES,
+}
+SESSION_CACHE_ALIAS = 'sesiones'
+AUTHENTICATION_BACKENDS = ['app.infrastructure.autenticacion.BackendUsuariosCacheados']
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -120,6 +159,13 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# `python manage.py collectstatic` minifica, agrega hash al nombre y precomprime (gzip/brotli)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'app.infrastructure.estaticos.AlmacenamientoPrecomprimido'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -151,6 +197,35 @@ CORS_ALLOWED_ORIGINS = [
     "https://lonelystar16.github.io",
 ]
 
+# Cliente de la API externa (FastAPI)
+API_EXTERNA_BASE = os.getenv('API_EXTERNA_BASE', 'http://127.0.0.1:8001')
+API_EXTERNA_TIMEOUT = 3
+# Última respuesta buena de cada lectura, para servirla si la API no responde.
+API_EXTERNA_CACHE_DIR = BASE_DIR / 'app' / 'db' / 'snapshots'
+
+# Snapshot mmap del catálogo, compartido con la API FastAPI (vacío = desactivado)
+CATALOGO_SNAPSHOT = os.getenv('CATALOGO_SNAPSHOT', str(BASE_DIR.parent / 'api' / 'catalogo.snap'))
+
+# Proxy inverso con caché delante del sitio: Cache-Control por nombre de ruta (las que no están no se
+# marcan) y purga por surrogate key después de cada escritura del catálogo (vacío = no se purga).
+POLITICAS_CACHE = {
+    'herra_manuales': 'public, max-age=60, s-maxage=600',
+    'materiales_basicos': 'public, max-age=60, s-maxage=600',
+    'equipos_seguridad': 'public, max-age=60, s-maxage=600',
+    'tornillos_anclaje': 'public, max-age=60, s-maxage=600',
+    'fijaciones': 'public, max-age=60, s-maxage=600',
+    'equipos_medicion': 'public, max-age=60, s-maxage=600',
+    'producto-list': 'public, max-age=30, s-maxage=600',
+    'producto-detail': 'public, max-age=30, s-maxage=600',
+    'producto-relacionados': 'public, max-age=300, s-maxage=3600',
+    'categoria-list': 'public, max-age=300, s-maxage=3600',
+    'categoria-detail': 'public, max-age=300, s-maxage=3600',
+    'sugerir_productos': 'public, max-age=60, s-maxage=300',
+    'estadisticas_categorias': 'public, max-age=10, s-maxage=60',
+}
+PURGA_CACHE_URL = os.getenv('PURGA_CACHE_URL', '')
+PURGA_CACHE_METODO = os.getenv('PURGA_CACHE_METODO', 'POST')  # p. ej. PURGE para Varnish
+
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'Authorization',
 ]
\ No newline at end of file
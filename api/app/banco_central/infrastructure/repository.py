@@ -1,8 +1,21 @@
+import os
+
 import httpx
+from app.core import plazo
+from app.core.metricas import medir_http
+
+TIMEOUT = 5.0
+# Otra URL (p. ej. un servidor local con latencia simulada) para pruebas de carga.
+MINDICADOR_URL = os.getenv("MINDICADOR_URL", "https://mindicador.cl/api")
 
 def obtener_dolar_actual():
-    url = "https://mindicador.cl/api/dolar"
-    response = httpx.get(url)
+    url = f"{MINDICADOR_URL}/dolar"
+    tiempo = plazo.timeout(TIMEOUT)
+    try:
+        with medir_http():
+            response = httpx.get(url, timeout=tiempo)
+    except httpx.TimeoutException as e:
+        raise plazo.PlazoVencido("mindicador.cl no respondió a tiempo") from e
     if response.status_code == 200:
         data = response.json()
         serie = data["serie"][0]
@@ -1,9 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from app.core.http_cache import respuesta_json_condicional
 from ..application.service import consultar_valor_dolar
 from ..domain.schemas import Indicador
 
 router = APIRouter()
 
 @router.get("/valor-dolar", response_model=Indicador)
-def get_valor_dolar():
-    return consultar_valor_dolar()
+def get_valor_dolar(request: Request):
+    return respuesta_json_condicional(request, consultar_valor_dolar().model_dump_json().encode())
@@ -0,0 +1,166 @@
+"""
+Control de admisión: límites de concurrencia adaptativos por grupo de rutas.
+
+Casi todos los handlers son síncronos y comparten el threadpool y la conexión SQLite; sin
+control, un pico en una ruta hace esperar a todas por igual hasta que los
+clientes cortan. Cada grupo (lecturas del catálogo, escrituras, pagos, Banco
+Central) tiene un límite de requests en curso que se ajusta solo (AIMD): sube
+de a poco mientras la latencia está bajo el objetivo del grupo y, cada vez que
+un request lo supera, baja en proporción al exceso (entre 10 % y 50 %). Lo que
+excede el límite recibe un 503 inmediato con `Retry-After` en vez de esperar
+en la cola. Los grupos no prioritarios (todo menos las lecturas) tampoco
+pueden ocupar más de `CUPO_NO_PRIORITARIO` de la capacidad total: el resto
+queda para las lecturas.
+
+El estado solo se toca desde el event loop (antes y después de `await`), así
+que no necesita locks.
+"""
+import json
+import math
+import os
+import time
+from typing import Dict, Optional
+
+# Hilos del threadpool de anyio, donde corren los handlers síncronos.
+CAPACIDAD_TOTAL = int(os.environ.get("ADMISION_CAPACIDAD", "40"))
+CUPO_NO_PRIORITARIO = 0.6
+REDUCCION_MINIMA = 0.9
+REDUCCION_MAXIMA = 0.5
+SUAVIZADO_LATENCIA = 0.2
+
+
+class LimiteAdaptativo:
+    __slots__ = ("nombre", "objetivo", "minimo", "maximo", "prioritario", "limite", "en_curso", "latencia",
+                 "admitidos", "rechazados")
+
+    def __init__(self, nombre: str, objetivo: float, inicial: int, minimo: int, maximo: int,
+                 prioritario: bool = False):
+        self.nombre = nombre
+        self.objetivo = objetivo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.prioritario = prioritario
+        self.limite = float(inicial)
+        self.en_curso = 0
+        self.latencia = 0.0  # promedio móvil exponencial, para Retry-After
+        self.admitidos = 0
+        self.rechazados = 0
+
+    def disponible(self) -> bool:
+        return self.en_curso < int(self.limite)
+
+    def registrar(self, latencia: float):
+        """Ajusta el límite con la latencia de un request que terminó (y ya no cuenta en `en_curso`)."""
+        self.latencia += SUAVIZADO_LATENCIA * (latencia - self.latencia)
+        if latencia > self.objetivo:
+            factor = max(REDUCCION_MAXIMA, min(REDUCCION_MINIMA, self.objetivo / latencia))
+            self.limite = max(self.minimo, self.limite * factor)
+        elif self.en_curso + 1 >= self.limite / 2:
+            # Solo crece si el límite se está usando: +1 por cada "ventana" de `limite` requests.
+            self.limite = min(self.maximo, self.limite + 1 / self.limite)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.latencia))
+
+
+def crear_grupos() -> Dict[str, LimiteAdaptativo]:
+    return {
+        "lecturas": LimiteAdaptativo("lecturas", objetivo=0.25, inicial=8, minimo=4, maximo=CAPACIDAD_TOTAL,
+                                     prioritario=True),
+        "escrituras": LimiteAdaptativo("escrituras", objetivo=1.0, inicial=8, minimo=1, maximo=16),
+        "pagos": LimiteAdaptativo("pagos", objetivo=5.0, inicial=8, minimo=1, maximo=16),
+        "banco_central": LimiteAdaptativo("banco_central", objetivo=5.0, inicial=4, minimo=1, maximo=8),
+        # Incluye la llamada a mindicador: su latencia no debe achicar el límite de las lecturas.
+        "vitrina": LimiteAdaptativo("vitrina", objetivo=5.0, inicial=8, minimo=1, maximo=16),
+        # Exportaciones completas del catálogo: pocas a la vez y fuera del grupo de lecturas.
+        "exportaciones": LimiteAdaptativo("exportaciones", objetivo=120.0, inicial=2, minimo=1, maximo=2),
+    }
+
+
+def clasificar(scope) -> Optional[str]:
+    """Grupo de la ruta (prefijos de `app.main`); None para lo que no se limita (`/`, `/metrics`)."""
+    ruta = scope["path"]
+    if ruta.startswith("/productos/exportar"):
+        return "exportaciones"
+    if ruta.startswith("/productos"):
+        return "lecturas" if scope["method"] in ("GET", "HEAD") else "escrituras"
+    if ruta.startswith("/mercado-pago"):
+        return "pagos"
+    if ruta.startswith("/banco-central"):
+        return "banco_central"
+    if ruta.startswith("/vitrina"):
+        return "vitrina"
+    return None
+
+
+grupos = crear_grupos()
+
+_CUERPO_RECHAZO = json.dumps({"detail": "Servicio sobrecargado; reintentar más tarde"}).encode()
+
+
+class AdmisionMiddleware:
+    """Middleware ASGI: admite o rechaza con 503 según el límite del grupo y la capacidad total."""
+
+    def __init__(self, app, grupos_limites: Optional[Dict[str, LimiteAdaptativo]] = None,
+                 capacidad: int = CAPACIDAD_TOTAL):
+        self.app = app
+        self.grupos = grupos if grupos_limites is None else grupos_limites
+        self.capacidad = capacidad
+        self.en_curso = 0
+        self.no_prioritarios = 0
+
+    def _admitir(self, grupo: LimiteAdaptativo) -> bool:
+        if not grupo.disponible() or self.en_curso >= self.capacidad:
+            return False
+        return grupo.prioritario or self.no_prioritarios < self.capacidad * CUPO_NO_PRIORITARIO
+
+    async def __call__(self, scope, receive, send):
+        grupo = self.grupos.get(clasificar(scope)) if scope["type"] == "http" else None
+        if grupo is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._admitir(grupo):
+            grupo.rechazados += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_CUERPO_RECHAZO)).encode()),
+                    (b"retry-after", str(grupo.retry_after()).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _CUERPO_RECHAZO})
+            return
+
+        grupo.admitidos += 1
+        grupo.en_curso += 1
+        self.en_curso += 1
+        if not grupo.prioritario:
+            self.no_prioritarios += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            grupo.en_curso -= 1
+            self.en_curso -= 1
+            if not grupo.prioritario:
+                self.no_prioritarios -= 1
+            grupo.registrar(time.perf_counter() - inicio)
+
+
+def exportar(prefijo: str = "ferramas_api") -> str:
+    """Estado de los grupos en el formato de texto de Prometheus, para agregar a `/metrics`."""
+    series = (
+        ("admision_limite", "gauge", "Límite de concurrencia actual del grupo.", lambda g: round(g.limite, 2)),
+        ("admision_en_curso", "gauge", "Requests en curso del grupo.", lambda g: g.en_curso),
+        ("admision_admitidos_total", "counter", "Requests admitidos.", lambda g: g.admitidos),
+        ("admision_rechazados_total", "counter", "Requests rechazados con 503.", lambda g: g.rechazados),
+    )
+    lineas = []
+    for nombre, tipo, ayuda, valor in series:
+        metrica = f"{prefijo}_{nombre}"
+        lineas.append(f"# HELP {metrica} {ayuda}")
+        lineas.append(f"# TYPE {metrica} {tipo}")
+        lineas.extend(f'{metrica}{{group="{grupo.nombre}"}} {valor(grupo)}' for grupo in grupos.values())
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,266 @@
+"""
+Integración con un proxy inverso con caché (Varnish, Fastly, nginx).
+
+- `PoliticasCacheMiddleware` agrega a las lecturas el `Cache-Control` de su
+  ruta (`POLITICAS_CACHE`, que la variable de entorno del mismo nombre amplía
+  con un JSON `{"/ruta/": "public, max-age=..."}`). Los routers marcan cada
+  respuesta con `etiquetar()`: header `Surrogate-Key` con `producto-<id>`,
+  `categoria-<id>`, `productos` (listados de todo el catálogo), `categorias` y
+  `catalogo` (todas).
+- Cada escritura de una `Session` anota las claves que invalida (`after_flush`
+  para objetos del ORM, `do_orm_execute` para INSERT/UPDATE/DELETE por lote) y
+  al hacer commit se mandan en un hilo de fondo a `PURGA_CACHE_URL` (vacío = no
+  se purga). Un UPDATE con WHERE arbitrario purga todo el catálogo.
+
+Misma idea que `FerramasStore/app/infrastructure/cache_proxy.py`, con las mismas
+claves: un proxy delante de los dos servicios purga ambos con cualquier escritura.
+"""
+import json
+import os
+import threading
+import time
+from typing import Iterable, Optional, Set, Tuple
+
+import httpx
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.metricas import plantilla_ruta
+
+HEADER = "Surrogate-Key"
+CATALOGO = "catalogo"
+PRODUCTOS = "productos"
+CATEGORIAS = "categorias"
+# Con más productos en una respuesta se usa `productos` en vez de una clave por producto (el header tiene límite).
+MAXIMO_CLAVES_PRODUCTO = 100
+# Claves por purga: Fastly acepta hasta 256 en un mismo request.
+LOTE_PURGA = 256
+
+# Tablas compartidas con Django: se identifican por nombre para no depender de los modelos.
+TABLA_PRODUCTOS = "app_producto"
+TABLA_CATEGORIAS = "app_categoria"
+
+POLITICAS_CACHE = {
+    "/productos/": "public, max-age=30, s-maxage=600",
+    "/productos/categorias/": "public, max-age=300, s-maxage=3600",
+    "/productos/categorias/estadisticas": "public, max-age=10, s-maxage=60",
+    "/productos/sugerir": "public, max-age=60, s-maxage=300",
+    "/productos/{producto_id}/relacionados": "public, max-age=300, s-maxage=3600",
+    # Incluye el dólar, que no tiene clave: vence solo.
+    "/vitrina/": "public, max-age=30, s-maxage=300",
+}
+POLITICAS_CACHE.update(json.loads(os.getenv("POLITICAS_CACHE", "") or "{}"))
+
+
+def clave_producto(producto_id: int) -> str:
+    return f"producto-{producto_id}"
+
+
+def clave_categoria(categoria_id: int) -> str:
+    return f"categoria-{categoria_id}"
+
+
+def claves_productos(pares: Iterable[Tuple[int, int]]) -> Set[str]:
+    """Claves de una respuesta con los productos (id, categoria_id) de `pares`."""
+    pares = list(pares)
+    claves = {CATALOGO}
+    claves.update(clave_categoria(categoria_id) for _, categoria_id in pares if categoria_id is not None)
+    if len(pares) > MAXIMO_CLAVES_PRODUCTO:
+        claves.add(PRODUCTOS)
+    else:
+        claves.update(clave_producto(producto_id) for producto_id, _ in pares)
+    return claves
+
+
+def claves_categorias(categoria_ids: Iterable[int]) -> Set[str]:
+    return {CATALOGO, CATEGORIAS, *(clave_categoria(categoria_id) for categoria_id in categoria_ids)}
+
+
+def etiquetar(response, claves: Iterable[str]):
+    response.headers[HEADER] = " ".join(sorted(claves))
+    return response
+
+
+class PoliticasCacheMiddleware:
+    """
+    Middleware ASGI: `Cache-Control` de `POLITICAS_CACHE` para las respuestas
+    200 a GET/HEAD que no traen uno propio. Con cookies la respuesta es de un
+    usuario y queda `private`.
+    """
+
+    def __init__(self, app, politicas: Optional[dict] = None):
+        self.app = app
+        self.politicas = POLITICAS_CACHE if politicas is None else politicas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_con_politica(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                nombres = {nombre.lower() for nombre, _ in message.get("headers", [])}
+                politica = self.politicas.get(plantilla_ruta(scope))
+                if b"cache-control" not in nombres:
+                    if b"set-cookie" in nombres:
+                        politica = "private"
+                    if politica:
+                        message = {**message, "headers": [*message.get("headers", []),
+                                                          (b"cache-control", politica.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, send_con_politica)
+
+
+class DespachadorPurgas:
+    """
+    Manda las purgas en un hilo de fondo. Las claves de escrituras seguidas
+    (`espera` segundos) se juntan en un solo request. Si el proxy no responde se
+    reintenta `reintentos` veces; después se descartan y lo guardado dura, como
+    mucho, el `s-maxage` de su ruta.
+    """
+
+    def __init__(self, url: str, metodo: str = "POST", espera: float = 0.05, timeout: float = 2.0,
+                 reintentos: int = 3, espera_reintento: float = 1.0):
+        self.url = url
+        self.metodo = metodo
+        self.espera = espera
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_reintento = espera_reintento
+        self._claves: Set[str] = set()
+        self._cambio = threading.Condition()
+        self._hilo = None
+
+    def purgar(self, claves: Iterable[str]):
+        with self._cambio:
+            self._claves.update(claves)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="purgas-cache", daemon=True)
+                self._hilo.start()
+
+    def esperar(self, timeout: float = 5.0) -> bool:
+        """True cuando no quedan purgas por mandar (para los tests y al apagar)."""
+        limite = time.monotonic() + timeout
+        with self._cambio:
+            while self._hilo is not None:
+                queda = limite - time.monotonic()
+                if queda <= 0:
+                    return False
+                self._cambio.wait(queda)
+        return True
+
+    def _bucle(self):
+        fallas = 0
+        while True:
+            time.sleep(self.espera_reintento * fallas if fallas else self.espera)
+            with self._cambio:
+                claves, self._claves = sorted(self._claves), set()
+            if self._enviar(claves):
+                fallas = 0
+            elif fallas < self.reintentos:
+                fallas += 1
+                with self._cambio:
+                    self._claves.update(claves)
+            else:
+                fallas = 0
+            with self._cambio:
+                if not self._claves:
+                    self._hilo = None
+                    self._cambio.notify_all()
+                    return
+
+    def _enviar(self, claves) -> bool:
+        try:
+            for inicio in range(0, len(claves), LOTE_PURGA):
+                respuesta = httpx.request(self.metodo, self.url, timeout=self.timeout,
+                                          headers={HEADER: " ".join(claves[inicio:inicio + LOTE_PURGA])})
+                respuesta.raise_for_status()
+        except httpx.HTTPError:
+            return False
+        return True
+
+
+_despachador: Optional[DespachadorPurgas] = None
+
+
+def despachador() -> Optional[DespachadorPurgas]:
+    global _despachador
+    url = os.getenv("PURGA_CACHE_URL", "")
+    if not url:
+        return None
+    if _despachador is None or _despachador.url != url:
+        _despachador = DespachadorPurgas(url, os.getenv("PURGA_CACHE_METODO", "POST"))
+    return _despachador
+
+
+# Claves de cada escritura, anotadas en la sesión hasta el commit.
+def _anotar(db: Session, claves: Iterable[str]):
+    db.info.setdefault("purgas_cache", set()).update(claves)
+
+
+def _claves_objeto(objeto) -> Set[str]:
+    tabla = getattr(type(objeto), "__tablename__", None)
+    if tabla == TABLA_PRODUCTOS:
+        claves = {PRODUCTOS, clave_categoria(objeto.categoria_id)} if objeto.categoria_id is not None else {PRODUCTOS}
+        if objeto.id is not None:
+            claves.add(clave_producto(objeto.id))
+        # Si cambió de categoría, la página de la categoría anterior también lo mostraba.
+        anteriores = inspect(objeto).attrs.categoria_id.history.deleted
+        claves.update(clave_categoria(categoria_id) for categoria_id in anteriores if categoria_id is not None)
+        return claves
+    if tabla == TABLA_CATEGORIAS:
+        return {CATEGORIAS, clave_categoria(objeto.id)}
+    return set()
+
+
+def _claves_sentencia(tabla: str, parametros) -> Optional[Set[str]]:
+    filas = parametros if isinstance(parametros, list) else [parametros] if parametros else []
+    if not filas or any("id" not in fila for fila in filas):
+        # INSERT sin ids todavía: solo lo nuevo. UPDATE/DELETE con WHERE: no se sabe qué tocó.
+        return None
+    claves = set()
+    for fila in filas:
+        if tabla == TABLA_PRODUCTOS:
+            claves.update((PRODUCTOS, clave_producto(fila["id"])))
+            if fila.get("categoria_id") is not None:
+                claves.add(clave_categoria(fila["categoria_id"]))
+        else:
+            claves.update((CATEGORIAS, clave_categoria(fila["id"])))
+    return claves
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_flush(db: Session, contexto):
+    for objeto in (*db.new, *db.dirty, *db.deleted):
+        _anotar(db, _claves_objeto(objeto))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _anotar_sentencia(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabla = estado.statement.table.name
+    if tabla not in (TABLA_PRODUCTOS, TABLA_CATEGORIAS):
+        return
+    claves = _claves_sentencia(tabla, estado.parameters)
+    if claves is None and estado.is_insert:
+        # Lo nuevo solo aparece en los listados y en las páginas de su categoría.
+        filas = estado.parameters if isinstance(estado.parameters, list) else [estado.parameters or {}]
+        claves = {PRODUCTOS if tabla == TABLA_PRODUCTOS else CATEGORIAS}
+        claves.update(clave_categoria(fila["categoria_id"]) for fila in filas if fila.get("categoria_id") is not None)
+    _anotar(estado.session, claves if claves is not None else {CATALOGO})
+
+
+@event.listens_for(Session, "after_commit")
+def _purgar(db: Session):
+    claves = db.info.pop("purgas_cache", None)
+    destino = despachador()
+    # Se purga lo ya confirmado: si se purgara antes, el proxy podría volver a guardar la versión vieja.
+    if claves and destino is not None:
+        destino.purgar(claves)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(db: Session):
+    db.info.pop("purgas_cache", None)
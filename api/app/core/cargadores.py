@@ -0,0 +1,30 @@
+"""
+Cargadores por id con alcance de request (`ferramas_comun.cargadores`).
+
+Lo cargado queda en caché mientras viva la sesión, que es la del request
+(`get_db`), así que volver a pedir un id no consulta. Cada sesión guarda sus
+cargadores en `Session.info`. Un commit o rollback los vacía: los objetos
+quedan expirados y leerlos de la caché haría una consulta por objeto.
+"""
+from typing import Callable, Dict, List, TypeVar
+
+from ferramas_comun.cargadores import Cargador
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+
+def cargador(db: Session, nombre: str, buscar_muchos: Callable[[Session, List[int]], Dict[int, T]]) -> Cargador[T]:
+    """El cargador `nombre` de la sesión; se crea la primera vez que se pide."""
+    cargadores = db.info.setdefault("cargadores", {})
+    if nombre not in cargadores:
+        cargadores[nombre] = Cargador(lambda ids: buscar_muchos(db, ids))
+    return cargadores[nombre]
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _olvidar_cargadores(db: Session):
+    for cargador_sesion in db.info.get("cargadores", {}).values():
+        cargador_sesion.olvidar()
@@ -0,0 +1,18 @@
+"""
+Avisos de escritura del catálogo. Los repositorios llaman a `notificar()` después
+de confirmar la transacción; los caches derivados se registran con `suscribir()`.
+"""
+from typing import Callable, List
+
+_suscriptores: List[Callable[[], None]] = []
+
+
+def suscribir(funcion: Callable[[], None]):
+    if funcion not in _suscriptores:
+        _suscriptores.append(funcion)
+    return funcion
+
+
+def notificar():
+    for funcion in list(_suscriptores):
+        funcion()
@@ -0,0 +1,35 @@
+"""
+Snapshot mmap del catálogo (`ferramas_comun.catalogo_snapshot`) en la API:
+la ruta sale de la base del engine y se regenera después de cada escritura.
+"""
+import os
+from typing import Optional
+
+from ferramas_comun.catalogo_snapshot import CatalogoSnapshot, LectorSnapshot, ReconstructorSnapshot
+
+from app.core.database import engine
+
+
+def _ruta_por_defecto() -> str:
+    if engine.url.get_backend_name() != "sqlite" or not engine.url.database:
+        return ""
+    return os.path.join(os.path.dirname(os.path.abspath(engine.url.database)), "catalogo.snap")
+
+
+# Vacío = desactivado (así corren los tests, para que los presupuestos de consultas sean deterministas).
+RUTA_SNAPSHOT = os.getenv("CATALOGO_SNAPSHOT", _ruta_por_defecto())
+lector = LectorSnapshot(RUTA_SNAPSHOT)
+reconstructor = ReconstructorSnapshot(engine.url.database, RUTA_SNAPSHOT) if RUTA_SNAPSHOT else None
+
+
+def snapshot_actual() -> Optional[CatalogoSnapshot]:
+    """Snapshot vigente, o None si no existe todavía (en ese caso se pide generarlo)."""
+    actual = lector.actual()
+    if actual is None and reconstructor is not None:
+        reconstructor.solicitar()
+    return actual
+
+
+def solicitar_reconstruccion():
+    if reconstructor is not None:
+        reconstructor.solicitar()
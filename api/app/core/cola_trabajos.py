@@ -0,0 +1,47 @@
+"""
+Encolar trabajos en la cola persistente compartida con Django (`app_trabajo`).
+
+Los ejecuta el trabajador de Django (`python manage.py procesar_trabajos`,
+ver `ferramas_comun.cola_trabajos`): esta API solo inserta filas, con el mismo
+DDL y el mismo formato de fila. Los nombres de tarea son los que registra Django.
+
+Cada escritura del catálogo de esta API (`catalogo_eventos.notificar`) adelanta
+el cálculo de relacionados, igual que las de Django; las estadísticas por
+categoría las mantienen los triggers y solo se rearman con el recurrente diario.
+"""
+from datetime import datetime
+from typing import Optional, Union
+
+from ferramas_comun.cola_trabajos import COLA, CREAR, INSERTAR, MAX_INTENTOS, fila
+
+from app.core.database import engine
+
+# Segundos que espera el cálculo de relacionados, como en Django: los cambios de ese lapso se juntan en uno.
+RETRASO_RELACIONADOS = 60
+
+
+def crear_tabla():
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for sql in CREAR:
+            conn.exec_driver_sql(sql)
+
+
+def encolar(tarea: str, argumentos: Optional[dict] = None, *, cola: str = COLA, prioridad: int = 0,
+            en: Union[float, datetime, None] = None, max_intentos: int = MAX_INTENTOS, clave: Optional[str] = None,
+            periodo: Optional[float] = None):
+    """
+    Encola `tarea` con `argumentos` (kwargs de la tarea, en JSON). `en`:
+    segundos desde ahora o un datetime; `periodo`: segundos entre ejecuciones
+    de un trabajo recurrente; `clave`: a lo más un pendiente por clave.
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql(INSERTAR, fila(tarea, argumentos, cola=cola, prioridad=prioridad, en=en,
+                                            max_intentos=max_intentos, clave=clave, periodo=periodo))
+
+
+def encolar_relacionados():
+    # Suscriptor de `catalogo_eventos`: la escritura ya se confirmó. Con la clave queda un solo
+    # pendiente; si el aviso se perdiera, el recurrente de Django lee el feed de cambios igual.
+    encolar("relacionados.incremental", clave="relacionados.incremental", en=RETRASO_RELACIONADOS)
@@ -4,7 +4,9 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Ruta a la base de datos (asegurándonos que sea relativa desde la raíz del proyecto)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Obtiene la ubicación de database.py
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, '../../db.sqlite3')}"  # Ruta correcta al archivo db.sqlite3
+DATABASE_URL = os.getenv(
+    "DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, '../../db.sqlite3')}"  # Ruta correcta al archivo db.sqlite3
+)
 
 # DATABASE_URL = "sqlite:///api/db.sqlite3"  # Ruta correcta a db.sqlite3 en la carpeta 'api'
 
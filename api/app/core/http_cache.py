@@ -0,0 +1,24 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def etag_de(contenido: bytes) -> str:
+    return '"' + hashlib.blake2b(contenido, digest_size=16).hexdigest() + '"'
+
+
+def coincide_etag(request: Request, etag: str) -> bool:
+    enviados = request.headers.get("if-none-match", "")
+    return etag in (valor.strip() for valor in enviados.split(","))
+
+
+def respuesta_json_condicional(request: Request, contenido: bytes, etag: Optional[str] = None) -> Response:
+    """
+    Responde `contenido` (JSON ya serializado) con su ETag, o 304 sin cuerpo si
+    el cliente envió ese mismo ETag en `If-None-Match`.
+    """
+    etag = etag or etag_de(contenido)
+    if coincide_etag(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=contenido, media_type="application/json", headers={"ETag": etag})
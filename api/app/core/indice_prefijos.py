@@ -0,0 +1,16 @@
+"""
+Servicio de sugerencias de la API: el índice de prefijos compartido
+(`ferramas_comun.indice_prefijos`) con las consultas ejecutadas por el engine
+de SQLAlchemy.
+"""
+from ferramas_comun.indice_prefijos import ServicioSugerencias, Sugerencia  # noqa: F401
+
+from app.core.database import engine
+
+
+def _consultar(sql: str, parametros: tuple):
+    with engine.connect() as conexion:
+        yield from conexion.exec_driver_sql(sql, parametros)
+
+
+servicio = ServicioSugerencias(_consultar)
@@ -0,0 +1,78 @@
+"""
+Métricas por request de la API (`ferramas_comun.metricas`): los eventos de
+SQLAlchemy y `medir_http()` suman sobre la `Medicion` del request, y
+`MetricasMiddleware` agrega el header `Server-Timing` y alimenta los
+histogramas de `/metrics`.
+"""
+import time
+
+from ferramas_comun.metricas import Medicion, RegistroMetricas, medicion_actual, medir_http  # noqa: F401
+from sqlalchemy import event
+
+registro = RegistroMetricas("ferramas_api")
+
+
+def instrumentar_engine(engine):
+    """Registra los eventos de cursor de SQLAlchemy que alimentan la medición."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["metricas_inicio"].pop()
+        medicion = medicion_actual.get()
+        if medicion is not None:
+            medicion.db_segundos += time.perf_counter() - inicio
+            medicion.consultas += 1
+
+
+def plantilla_ruta(scope) -> str:
+    """
+    Ruta con los parámetros sin resolver (`/productos/{producto_id}`), para no
+    crear una serie por cada id. Las rutas inexistentes se agrupan en `sin_ruta`.
+    """
+    if "endpoint" not in scope:
+        return "sin_ruta"
+    parametros = {str(valor): nombre for nombre, valor in scope.get("path_params", {}).items()}
+    if not parametros:
+        return scope["path"]
+    return "/".join(
+        f"{{{parametros[segmento]}}}" if segmento in parametros else segmento
+        for segmento in scope["path"].split("/")
+    )
+
+
+class MetricasMiddleware:
+    """Middleware ASGI: abre la medición, agrega `Server-Timing` y registra los histogramas."""
+
+    def __init__(self, app, registro_metricas: RegistroMetricas = registro):
+        self.app = app
+        self.registro = registro_metricas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+        status = 500
+
+        async def send_con_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter() - medicion.inicio
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", medicion.server_timing(total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_timing)
+        finally:
+            medicion_actual.reset(token)
+            total = time.perf_counter() - medicion.inicio
+            self.registro.registrar(scope["method"], plantilla_ruta(scope), status, total, medicion)
@@ -0,0 +1,98 @@
+"""
+Caché en memoria de respuestas ya serializadas para las lecturas del catálogo.
+
+Guarda el cuerpo JSON (bytes) y su ETag por ruta y parámetros, con tres reglas:
+
+- Generación: cada escritura del catálogo en este proceso llama a `invalidar()`
+  (vía `catalogo_eventos`), que sube la generación y descarta todo. Una
+  respuesta calculada antes de una escritura no se guarda.
+- TTL corto (`MICRO_CACHE_TTL`, 1 s): las escrituras de Django o de otros
+  workers no avisan a este proceso; como mucho se ven con ese retraso. El
+  listado de productos con snapshot incluye además la generación del snapshot
+  en la clave, que cambia con cualquier escritura.
+- Single-flight: si llegan muchos requests juntos con la caché vacía, uno
+  calcula y el resto espera su resultado en vez de ir todos a la base.
+
+El tamaño está acotado (LRU) porque cada combinación de parámetros es una
+entrada distinta.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+Respuesta = Tuple[bytes, str]  # (cuerpo, etag)
+
+
+class _Vuelo:
+    __slots__ = ("listo", "resultado", "error")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado: Optional[Respuesta] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroCache:
+    def __init__(self, maximo: int = 64, ttl: float = 1.0):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.coalescidos = 0
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._en_vuelo = {}
+
+    def invalidar(self):
+        with self._lock:
+            self.generacion += 1
+            self._entradas.clear()
+
+    def obtener(self, clave: Hashable, calcular: Callable[[], Respuesta]) -> Respuesta:
+        """Respuesta guardada para `clave`, o la que devuelve `calcular()` (una sola vez aunque haya concurrencia)."""
+        if self.ttl <= 0:
+            return calcular()
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            generacion = self.generacion
+            # La generación va en la clave: quien llega después de una escritura no espera un cálculo viejo.
+            vuelo = self._en_vuelo.get((clave, generacion))
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_vuelo[(clave, generacion)] = _Vuelo()
+                self.fallos += 1
+            else:
+                self.coalescidos += 1
+
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = calcular()
+            return vuelo.resultado
+        except BaseException as error:
+            vuelo.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._en_vuelo[(clave, generacion)]
+                if vuelo.error is None and generacion == self.generacion:
+                    self._entradas[clave] = (time.monotonic() + self.ttl, vuelo.resultado)
+                    self._entradas.move_to_end(clave)
+                    while len(self._entradas) > self.maximo:
+                        self._entradas.popitem(last=False)
+            vuelo.listo.set()
+
+
+cache_lecturas = MicroCache(ttl=float(os.environ.get("MICRO_CACHE_TTL", "1.0")))
@@ -0,0 +1,110 @@
+"""
+Plazo (deadline) por request, propagado entre servicios con `X-Deadline-Ms`.
+
+Quien llama manda en el header los milisegundos que le quedan; al llegar se
+convierte en un instante absoluto (`time.monotonic()`), así el tiempo que se
+gaste en esta API se descuenta solo. Con el plazo vigente:
+
+- Un request que llega sin tiempo se rechaza con 504 antes de hacer nada.
+- Las consultas SQLite se interrumpen al vencer (progress handler).
+- Las llamadas salientes usan como timeout lo que queda (`timeout()`), y no se
+  empiezan si queda menos de `MINIMO_UTIL`.
+
+`PlazoVencido` se responde como 504 (ver `app.main`). Sin header se usa
+`PLAZO_POR_DEFECTO`: ningún request espera indefinidamente a un servicio externo.
+"""
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+HEADER = "x-deadline-ms"
+PLAZO_POR_DEFECTO = 30.0
+PLAZO_MAXIMO = 60.0
+# Por debajo de esto no vale la pena llamar a un servicio externo: se falla de inmediato.
+MINIMO_UTIL = 0.05
+# Cada cuántas instrucciones de la VM de SQLite se revisa el plazo.
+INSTRUCCIONES_ENTRE_REVISIONES = 10_000
+
+_limite: ContextVar[Optional[float]] = ContextVar("plazo_limite", default=None)
+
+
+class PlazoVencido(Exception):
+    pass
+
+
+def restante() -> Optional[float]:
+    """Segundos que le quedan al request en curso, o None fuera de un request."""
+    limite = _limite.get()
+    return None if limite is None else limite - time.monotonic()
+
+
+def vencido() -> bool:
+    limite = _limite.get()
+    return limite is not None and time.monotonic() >= limite
+
+
+def timeout(maximo: float) -> float:
+    """Timeout para una llamada saliente: lo que queda del plazo, sin pasar de `maximo`."""
+    queda = restante()
+    if queda is None:
+        return maximo
+    if queda < MINIMO_UTIL:
+        raise PlazoVencido("No queda tiempo para llamar al servicio externo")
+    return min(maximo, queda)
+
+
+def instrumentar_engine(engine):
+    """Interrumpe las consultas SQLite cuando vence el plazo del request que las ejecuta."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    # En cada checkout y no solo al conectar: el pool ya tiene conexiones abiertas al arrancar.
+    @event.listens_for(engine, "checkout")
+    def _al_usar(conexion_dbapi, registro, proxy):
+        # Un valor distinto de cero aborta la sentencia con "interrupted".
+        conexion_dbapi.set_progress_handler(vencido, INSTRUCCIONES_ENTRE_REVISIONES)
+
+
+def _plazo_del_header(scope) -> Optional[float]:
+    for nombre, valor in scope.get("headers", []):
+        if nombre == HEADER.encode():
+            try:
+                return int(valor) / 1000
+            except ValueError:
+                return None
+    return None
+
+
+_CUERPO_VENCIDO = json.dumps({"detail": "Plazo del request vencido"}).encode()
+
+
+class PlazoMiddleware:
+    """Middleware ASGI: fija el plazo del request y rechaza con 504 los que llegan vencidos."""
+
+    def __init__(self, app, por_defecto: float = PLAZO_POR_DEFECTO):
+        self.app = app
+        self.por_defecto = por_defecto
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        segundos = _plazo_del_header(scope)
+        if segundos is not None and segundos <= 0:
+            await send({
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(_CUERPO_VENCIDO)).encode())],
+            })
+            await send({"type": "http.response.body", "body": _CUERPO_VENCIDO})
+            return
+        segundos = min(segundos if segundos is not None else self.por_defecto, PLAZO_MAXIMO)
+        token = _limite.set(time.monotonic() + segundos)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _limite.reset(token)
@@ -0,0 +1,37 @@
+"""
+Precios con el mismo motor de promociones que Django (`ferramas_comun.promociones`).
+
+Las reglas se leen de `app_promocion`, que administra Django. La API no tiene
+sesiones: cotiza como invitado, igual que Django a un visitante sin sesión, así
+que un producto tiene el mismo precio final en los dos servicios.
+"""
+import os
+from decimal import Decimal
+from typing import Optional
+
+from ferramas_comun.promociones import CONSULTA, INTERVALO, INVITADOS, FuenteReglas, MotorPromociones, Precio
+
+from app.core.database import engine
+
+# 0 revisa la versión de las reglas en cada request (los tests: el conteo de consultas no depende del reloj).
+_fuente = FuenteReglas(float(os.getenv("PROMOCIONES_INTERVALO", INTERVALO)))
+
+
+def _consultar(version: str):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(CONSULTA, (version,)).fetchall()
+
+
+def motor() -> MotorPromociones:
+    return _fuente.motor(_consultar)
+
+
+def invalidar():
+    _fuente.invalidar()
+
+
+def precio(motor_actual: MotorPromociones, precio_lista: float, descuento: Optional[float],
+           categoria_id: Optional[int], sku: Optional[str]) -> Precio:
+    """Precio de una unidad para un invitado; los montos de la API son float."""
+    return motor_actual.precio(Decimal(str(precio_lista)), Decimal(str(descuento or 0)), categoria_id, sku,
+                               1, INVITADOS)
@@ -1,12 +1,19 @@
 from app.productos.interfaces.router import router as productos_router
 from app.banco_central.interfaces.router import router as banco_central_router
 from app.mercado_pago.interfaces.router import router as mercado_pago_router
+from app.vitrina.interfaces.router import router as vitrina_router
 
 from app.core.database import engine, Base
+from app.core.metricas import MetricasMiddleware, instrumentar_engine, registro
+from app.core import admision, cache_proxy, catalogo_eventos, cola_trabajos, plazo
+from app.core.catalogo_snapshot import solicitar_reconstruccion
+from app.core.indice_prefijos import servicio as sugerencias
+from app.core.micro_cache import cache_lecturas
 
 from fastapi import FastAPI, Request
+from sqlalchemy.exc import OperationalError
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 import os
 
 
@@ -17,12 +24,58 @@ templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "t
 app = FastAPI(title="API Externa en Capas")
 # Configuración de CORS
 Base.metadata.create_all(bind=engine)
+cola_trabajos.crear_tabla()
+
+# Límites de concurrencia por grupo de rutas: lo que no entra recibe 503 en vez de esperar
+app.add_middleware(admision.AdmisionMiddleware)
+
+# Plazo del request (X-Deadline-Ms): corta las consultas y las llamadas salientes al vencer
+plazo.instrumentar_engine(engine)
+app.add_middleware(plazo.PlazoMiddleware)
+
+
+@app.exception_handler(plazo.PlazoVencido)
+def plazo_vencido(request: Request, exc: plazo.PlazoVencido):
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+@app.exception_handler(OperationalError)
+def consulta_interrumpida(request: Request, exc: OperationalError):
+    # El progress handler de SQLite interrumpe la consulta cuando vence el plazo.
+    if plazo.vencido():
+        return JSONResponse({"detail": "Plazo del request vencido durante una consulta"}, status_code=504)
+    raise exc
+
+# Métricas por request (Server-Timing + /metrics); va por fuera para contar también los 503
+instrumentar_engine(engine)
+app.add_middleware(MetricasMiddleware)
+
+# Snapshot mmap del catálogo: se regenera después de cada escritura
+catalogo_eventos.suscribir(solicitar_reconstruccion)
+
+# Cache-Control por ruta para el proxy inverso; las escrituras de cada sesión le mandan sus purgas al hacer commit
+app.add_middleware(cache_proxy.PoliticasCacheMiddleware)
+
+# Respuestas serializadas de los listados: cada escritura de este proceso sube la generación
+catalogo_eventos.suscribir(cache_lecturas.invalidar)
+
+# Relacionados: cada escritura adelanta el cálculo incremental del trabajador de Django
+catalogo_eventos.suscribir(cola_trabajos.encolar_relacionados)
+
+# Índice de autocompletado: se arma en segundo plano al arrancar y sigue el feed de cambios
+catalogo_eventos.suscribir(sugerencias.marcar_pendiente)
+sugerencias.precargar()
 
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse(request, "index.html")
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registro.exportar() + admision.exportar(), media_type="text/plain; version=0.0.4")
 
 
 app.include_router(productos_router, prefix="/productos", tags=["Productos"])
 app.include_router(banco_central_router, prefix="/banco-central", tags=["Banco Central"])
-app.include_router(mercado_pago_router, prefix="/mercado-pago", tags=["Mercado Pago"])
\ No newline at end of file
+app.include_router(mercado_pago_router, prefix="/mercado-pago", tags=["Mercado Pago"])
+app.include_router(vitrina_router, prefix="/vitrina", tags=["Vitrina"])
\ No newline at end of file
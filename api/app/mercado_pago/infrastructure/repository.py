@@ -1,13 +1,41 @@
 import mercadopago
 import os
+import requests
+from mercadopago.config import RequestOptions
+from mercadopago.http import HttpClient
+from app.core import plazo
+from app.core.metricas import medir_http
 
 ACCESS_TOKEN = os.getenv("MP_ACCESS_TOKEN", "TEST-1088321424798390-052622-b2d5fdbf8c9512ea8edd080fafe66d38-794550145")
+TIMEOUT = 10.0
+# Otra URL (p. ej. un servidor local con latencia simulada) para pruebas de carga.
+MERCADOPAGO_URL = os.getenv("MERCADOPAGO_URL", "")
 
-sdk = mercadopago.SDK(ACCESS_TOKEN)
+
+class ClienteHttpRedirigido(HttpClient):
+    """El SDK no permite cambiar su URL base: se reemplaza en cada request."""
+
+    BASE_SDK = "https://api.mercadopago.com"
+
+    def __init__(self, base: str):
+        self.base = base.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(self.BASE_SDK):
+            url = self.base + url[len(self.BASE_SDK):]
+        return super().request(method, url, *args, **kwargs)
+
+
+sdk = mercadopago.SDK(ACCESS_TOKEN, http_client=ClienteHttpRedirigido(MERCADOPAGO_URL) if MERCADOPAGO_URL else None)
 
 def crear_preferencia(preferencia_data: dict) -> dict:
+    # Sin reintentos del SDK: con el plazo del request no hay tiempo para esperas entre intentos.
+    opciones = RequestOptions(access_token=ACCESS_TOKEN, connection_timeout=plazo.timeout(TIMEOUT), max_retries=0)
     try:
-        resultado = sdk.preference().create(preferencia_data)
+        with medir_http():
+            resultado = sdk.preference().create(preferencia_data, opciones)
         return resultado["response"]
+    except requests.Timeout as e:
+        raise plazo.PlazoVencido("Mercado Pago no respondió a tiempo") from e
     except Exception as e:
         raise Exception(f"Error al crear preferencia: {str(e)}")
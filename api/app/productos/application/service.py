@@ -1,23 +1,55 @@
-from app.productos.domain.schemas import ProductoOut
-from app.productos.infrastructure import repository
 from datetime import datetime
-from app.productos.domain.schemas import ProductoCreate, Producto
-def obtener_productos():
-    return repository.cargar_productos()
+from typing import List, Optional
+
+from ferramas_comun.promociones import MotorPromociones
+
+from app.core import promociones
+from app.productos.domain.schemas import Producto, ProductoCreate
+from app.productos.infrastructure.almacen_archivo import almacen
+
+
+def _datos(producto: ProductoCreate, fecha_creacion: datetime, fecha_actualizacion: datetime) -> dict:
+    return {
+        **producto.model_dump(), "categoria": None,
+        "fecha_creacion": fecha_creacion.isoformat(), "fecha_actualizacion": fecha_actualizacion.isoformat(),
+    }
+
+
+def _producto(datos: dict, motor: Optional[MotorPromociones] = None) -> Producto:
+    # El precio final no se guarda: se cotiza al leer, con las promociones vigentes (los registros
+    # antiguos del almacén todavía lo traen calculado solo con el descuento).
+    precio = promociones.precio(motor or promociones.motor(), datos["precio"], datos["descuento"],
+                                datos.get("categoria_id"), datos.get("sku"))
+    return Producto(**{**datos, "precio_final": float(precio.final)})
+
+
+def obtener_productos() -> List[Producto]:
+    motor = promociones.motor()
+    return [_producto(datos, motor) for datos in almacen.listar()]
+
+
+def obtener_producto(producto_id: int) -> Optional[Producto]:
+    datos = almacen.obtener(producto_id)
+    return _producto(datos) if datos else None
+
+
+def obtener_producto_por_sku(sku: str) -> Optional[Producto]:
+    datos = almacen.por_sku(sku)
+    return _producto(datos) if datos else None
 
-contador_id = 1
 
 def crear_producto(producto: ProductoCreate) -> Producto:
-    global contador_id
+    # El id lo asigna el almacén, bajo su lock: es único aunque haya varios workers.
     ahora = datetime.now()
-    nuevo = Producto(
-        id=contador_id,
-        categoria=None,
-        fecha_creacion=ahora,
-        fecha_actualizacion=ahora,
-        precio_final=producto.precio * (1 - producto.descuento / 100),
-        **producto.dict()
-    )
-    contador_id += 1
-    repository.guardar_producto(nuevo)
-    return nuevo
+    return _producto(almacen.crear(_datos(producto, ahora, ahora)))
+
+
+def actualizar_producto(producto_id: int, producto: ProductoCreate) -> Optional[Producto]:
+    # Leer y escribir bajo el mismo lock: una baja concurrente no se deshace.
+    datos = almacen.actualizar(producto_id, lambda actual: _datos(
+        producto, datetime.fromisoformat(actual["fecha_creacion"]), datetime.now()))
+    return _producto(datos) if datos else None
+
+
+def eliminar_producto(producto_id: int) -> bool:
+    return almacen.eliminar(producto_id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Index, Numeric, SmallInteger, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -9,7 +9,8 @@ class CategoriaDB(Base):
     id = Column(Integer, primary_key=True)
     nombre = Column(String, unique=True, nullable=False)
     descripcion = Column(String, nullable=True)
-    productos = relationship("ProductoDB", back_populates="categoria")
+    # Igual que on_delete=CASCADE en Django: eliminar la categoría elimina sus productos.
+    productos = relationship("ProductoDB", back_populates="categoria", cascade="all, delete-orphan")
 
 class ProductoDB(Base):
     __tablename__ = "app_producto"
@@ -27,3 +28,206 @@ class ProductoDB(Base):
     fecha_actualizacion = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     categoria_id = Column(Integer, ForeignKey("app_categoria.id"))
     categoria = relationship("CategoriaDB", back_populates="productos")
+
+
+class ProductoCambioDB(Base):
+    """
+    Feed de cambios del catálogo (una fila por producto con su último cambio).
+    La llenan triggers de SQLite; el DDL es el mismo de la migración
+    0006_productocambio de Django.
+    """
+    __tablename__ = "app_productocambio"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    secuencia = Column(Integer, primary_key=True)
+    producto_id = Column(Integer, unique=True, nullable=False)
+    operacion = Column(String(6), nullable=False)  # "upsert" | "delete"
+    fecha = Column(DateTime, nullable=False)
+    producto = relationship(
+        ProductoDB, primaryjoin=producto_id == ProductoDB.id, foreign_keys=[producto_id], viewonly=True
+    )
+
+
+class ProductoRelacionadoDB(Base):
+    """
+    Productos relacionados que precalcula el comando `calcular_relacionados` de
+    Django. Misma tabla de la migración 0008_productorelacionado: WITHOUT ROWID
+    y clave (producto_id, posicion), así la lista de un producto es contigua.
+    """
+    __tablename__ = "app_productorelacionado"
+    __table_args__ = (
+        Index("app_productorelacionado_relacionado_id_cd0b4e97", "relacionado_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    producto_id = Column(Integer, primary_key=True)
+    posicion = Column(SmallInteger, primary_key=True)
+    relacionado_id = Column(Integer, nullable=False)
+    puntaje = Column(Float, nullable=False)
+
+
+class EstadisticaCategoriaDB(Base):
+    """
+    Totales del catálogo por categoría, mantenidos por triggers sobre
+    `app_producto`. Mismo DDL de la migración 0009_estadisticacategoria de
+    Django; los montos van en centavos.
+    """
+    __tablename__ = "app_estadisticacategoria"
+
+    categoria_id = Column(Integer, primary_key=True)
+    productos = Column(Integer, nullable=False)
+    en_venta = Column(Integer, nullable=False)
+    unidades = Column(Integer, nullable=False)
+    valor_stock_centavos = Column(Integer, nullable=False)
+    descuento_centesimas = Column(Integer, nullable=False)
+    destacados = Column(Integer, nullable=False)
+
+
+class PromocionDB(Base):
+    """
+    Reglas del motor de promociones (`ferramas_comun.promociones`). Las
+    administra Django (modelo `Promocion`, migración 0010_promocion); la API
+    solo las lee, con la consulta del motor.
+    """
+    __tablename__ = "app_promocion"
+
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    porcentaje = Column(Numeric(5, 2), nullable=False)
+    sku = Column(String(50), nullable=True)
+    cantidad_minima = Column(Integer, nullable=False, default=1)
+    segmento = Column(String(10), nullable=False, default="todos")
+    desde = Column(DateTime, nullable=True)
+    hasta = Column(DateTime, nullable=True)
+    acumulable = Column(Boolean, nullable=False, default=False)
+    activa = Column(Boolean, nullable=False, default=True)
+    actualizada = Column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
+    categoria_id = Column(Integer, ForeignKey("app_categoria.id"), nullable=True)
+
+
+# INSERT OR REPLACE borra la fila anterior del producto y asigna una secuencia nueva:
+# la tabla queda compactada y la secuencia nunca retrocede.
+TRIGGERS_CAMBIOS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_insert AFTER INSERT ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_update AFTER UPDATE ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_cambio_delete AFTER DELETE ON app_producto BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        VALUES (OLD.id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_categoria_cambio_update AFTER UPDATE ON app_categoria
+    WHEN OLD.nombre IS NOT NEW.nombre OR OLD.descripcion IS NOT NEW.descripcion BEGIN
+        INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+        SELECT id, 'upsert', CURRENT_TIMESTAMP FROM app_producto WHERE categoria_id = NEW.id;
+    END
+    """,
+]
+
+
+# Cada producto suma sus valores a la fila de su categoría al entrar y los resta al salir;
+# una modificación es salida de OLD más entrada de NEW. Iguales a los de la migración 0009.
+TRIGGERS_ESTADISTICAS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_insert AFTER INSERT ON app_producto BEGIN
+        INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                              valor_stock_centavos, descuento_centesimas, destacados)
+        VALUES (NEW.categoria_id, 1, COALESCE(NEW.en_venta, 0), COALESCE(NEW.stock, 0),
+                CAST(ROUND(COALESCE(NEW.precio, 0) * COALESCE(NEW.stock, 0) * 100) AS INTEGER),
+                CAST(ROUND(COALESCE(NEW.descuento, 0) * 100) AS INTEGER), COALESCE(NEW.destacado, 0))
+        ON CONFLICT (categoria_id) DO UPDATE SET
+            productos = productos + excluded.productos,
+            en_venta = en_venta + excluded.en_venta,
+            unidades = unidades + excluded.unidades,
+            valor_stock_centavos = valor_stock_centavos + excluded.valor_stock_centavos,
+            descuento_centesimas = descuento_centesimas + excluded.descuento_centesimas,
+            destacados = destacados + excluded.destacados;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_delete AFTER DELETE ON app_producto BEGIN
+        UPDATE app_estadisticacategoria SET
+            productos = productos - 1,
+            en_venta = en_venta - COALESCE(OLD.en_venta, 0),
+            unidades = unidades - COALESCE(OLD.stock, 0),
+            valor_stock_centavos = valor_stock_centavos
+                - CAST(ROUND(COALESCE(OLD.precio, 0) * COALESCE(OLD.stock, 0) * 100) AS INTEGER),
+            descuento_centesimas = descuento_centesimas - CAST(ROUND(COALESCE(OLD.descuento, 0) * 100) AS INTEGER),
+            destacados = destacados - COALESCE(OLD.destacado, 0)
+        WHERE categoria_id = OLD.categoria_id;
+    END
+    """,
+    # Solo si cambia alguna columna que entra en las estadísticas (nombre o sku no).
+    """
+    CREATE TRIGGER IF NOT EXISTS app_producto_estadistica_update
+    AFTER UPDATE OF categoria_id, precio, stock, descuento, destacado, en_venta ON app_producto BEGIN
+        UPDATE app_estadisticacategoria SET
+            productos = productos - 1,
+            en_venta = en_venta - COALESCE(OLD.en_venta, 0),
+            unidades = unidades - COALESCE(OLD.stock, 0),
+            valor_stock_centavos = valor_stock_centavos
+                - CAST(ROUND(COALESCE(OLD.precio, 0) * COALESCE(OLD.stock, 0) * 100) AS INTEGER),
+            descuento_centesimas = descuento_centesimas - CAST(ROUND(COALESCE(OLD.descuento, 0) * 100) AS INTEGER),
+            destacados = destacados - COALESCE(OLD.destacado, 0)
+        WHERE categoria_id = OLD.categoria_id;
+        INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                              valor_stock_centavos, descuento_centesimas, destacados)
+        VALUES (NEW.categoria_id, 1, COALESCE(NEW.en_venta, 0), COALESCE(NEW.stock, 0),
+                CAST(ROUND(COALESCE(NEW.precio, 0) * COALESCE(NEW.stock, 0) * 100) AS INTEGER),
+                CAST(ROUND(COALESCE(NEW.descuento, 0) * 100) AS INTEGER), COALESCE(NEW.destacado, 0))
+        ON CONFLICT (categoria_id) DO UPDATE SET
+            productos = productos + excluded.productos,
+            en_venta = en_venta + excluded.en_venta,
+            unidades = unidades + excluded.unidades,
+            valor_stock_centavos = valor_stock_centavos + excluded.valor_stock_centavos,
+            descuento_centesimas = descuento_centesimas + excluded.descuento_centesimas,
+            destacados = destacados + excluded.destacados;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS app_categoria_estadistica_delete AFTER DELETE ON app_categoria BEGIN
+        DELETE FROM app_estadisticacategoria WHERE categoria_id = OLD.id;
+    END
+    """,
+]
+
+RECALCULAR_ESTADISTICAS = """
+INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                      valor_stock_centavos, descuento_centesimas, destacados)
+SELECT categoria_id, COUNT(*), SUM(COALESCE(en_venta, 0)), SUM(COALESCE(stock, 0)),
+       SUM(CAST(ROUND(COALESCE(precio, 0) * COALESCE(stock, 0) * 100) AS INTEGER)),
+       SUM(CAST(ROUND(COALESCE(descuento, 0) * 100) AS INTEGER)), SUM(COALESCE(destacado, 0))
+FROM app_producto
+WHERE NOT EXISTS (SELECT 1 FROM app_estadisticacategoria)
+GROUP BY categoria_id
+"""
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _crear_triggers_cambios(target, connection, **kw):
+    # Después de crear todas las tablas, porque los triggers referencian app_producto.
+    if connection.dialect.name != "sqlite":
+        return
+    for sql in TRIGGERS_CAMBIOS:
+        connection.exec_driver_sql(sql)
+    # Solo la primera vez: los productos existentes entran al feed como altas.
+    connection.exec_driver_sql(
+        "INSERT INTO app_productocambio (producto_id, operacion, fecha) "
+        "SELECT id, 'upsert', fecha_actualizacion FROM app_producto "
+        "WHERE NOT EXISTS (SELECT 1 FROM app_productocambio) ORDER BY id"
+    )
+    for sql in TRIGGERS_ESTADISTICAS:
+        connection.exec_driver_sql(sql)
+    # También solo la primera vez: después los triggers la mantienen.
+    connection.exec_driver_sql(RECALCULAR_ESTADISTICAS)
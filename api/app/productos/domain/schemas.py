@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 
 class CategoriaIn(BaseModel):
     nombre: str
@@ -13,6 +14,16 @@ class CategoriaOut(BaseModel):
     class Config:
         from_attributes = True
 
+class EstadisticaCategoriaOut(BaseModel):
+    categoria_id: int
+    nombre: str
+    productos: int
+    en_venta: int
+    unidades: int  # suma del stock
+    valor_stock: float  # suma de precio * stock
+    descuento_promedio: float
+    destacados: int
+
 class ProductoCreate(BaseModel):
     nombre: str
     descripcion: str
@@ -30,4 +41,61 @@ class ProductoOut(ProductoCreate):
     categoria_id: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductoConPrecioOut(ProductoOut):
+    """Con el precio final del motor de promociones (`app.core.promociones`), como lo ve un invitado en Django."""
+    precio_final: float
+    promociones: List[str] = []
+
+class Producto(ProductoOut):
+    """Producto del almacén en archivo (`productos/application/service.py`)."""
+    fecha_creacion: datetime
+    fecha_actualizacion: datetime
+    precio_final: float
+
+class SugerenciaOut(BaseModel):
+    id: int
+    nombre: str
+    sku: Optional[str] = None
+
+class CambioProducto(BaseModel):
+    secuencia: int
+    operacion: Literal["upsert", "delete"]
+    producto_id: int
+    producto: Optional[ProductoOut] = None  # None en los tombstones
+
+class FeedCambios(BaseModel):
+    cambios: List[CambioProducto]
+    cursor: int  # se envía como `since` en la próxima consulta
+    hay_mas: bool
+
+
+class FiltroMasivo(BaseModel):
+    """Criterios combinados con AND; vacío = todo el catálogo."""
+    categoria_id: Optional[int] = None
+    ids: Optional[List[int]] = None
+    stock_max: Optional[int] = None  # stock <= stock_max (0 = sin stock)
+    en_venta: Optional[bool] = None
+
+class CambiosMasivos(BaseModel):
+    descuento: Optional[int] = Field(None, ge=0, le=100)
+    precio_porcentaje: Optional[float] = Field(None, gt=-100, description="5 = +5 %, -10 = -10 %")
+    en_venta: Optional[bool] = None
+    stock: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def _al_menos_un_cambio(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("No se indicó ningún cambio")
+        return self
+
+class ActualizacionMasivaIn(BaseModel):
+    filtro: FiltroMasivo = FiltroMasivo()
+    cambios: CambiosMasivos
+    dry_run: bool = False
+    tamano_lote: Optional[int] = Field(None, ge=1, description="Filas por UPDATE; vacío = un solo UPDATE")
+
+class ActualizacionMasivaOut(BaseModel):
+    afectados: int
+    dry_run: bool
@@ -0,0 +1,343 @@
+"""
+Almacén de productos en archivo, sin base de datos (lo usa
+`productos/application/service.py`): un log NDJSON de solo agregado con un
+índice en memoria.
+
+Cada escritura agrega líneas al final de `productos.ndjson` con `os.write`
+sobre un descriptor `O_APPEND` (y `fsync`), en vez de reescribir el arreglo
+JSON completo como antes:
+
+    {"op": "put", "producto": {"id": 7, ...}}   alta o reemplazo
+    {"op": "del", "id": 7}                      tombstone
+    {"op": "meta", "ultimo_id": 41}             cabecera que deja la compactación
+
+El índice guarda, por id, el offset y el largo de su última línea (y el id de
+cada SKU), así que leer un producto es un `os.pread`. Al abrir se recorre el
+log una vez; después cada proceso lee solo lo que se agregó desde la última
+vez que miró (entre su offset y el final del archivo).
+
+Varios hilos y procesos (workers de uvicorn) pueden escribir a la vez: las
+escrituras ocurren bajo un `flock` exclusivo sobre `productos.lock`, después
+de ponerse al día con el log, así que un id nuevo es siempre el mayor
+asignado + 1 aunque otro proceso acabe de escribir. Solo POSIX: usa
+`os.pread` y `fcntl.flock`, que no existen en Windows.
+
+Caídas: una línea sin salto de línea al final es una escritura que no
+terminó; los lectores la ignoran y el próximo escritor la trunca antes de
+agregar. La compactación escribe solo las últimas versiones en un archivo
+temporal, hace `fsync` y lo cambia por el log con `os.replace`; los demás
+procesos notan el cambio de inodo y vuelven a indexar. Se hace sola cuando
+más de `PROPORCION_COMPACTACION` del log son versiones viejas o tombstones.
+
+Si el log no existe y hay un `productos.json` (el formato anterior), se
+importa en la primera apertura; el archivo viejo ya no se modifica.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DIRECTORIO_DATOS = Path(__file__).resolve().parent.parent / "data"
+PROPORCION_COMPACTACION = 0.5
+MINIMO_COMPACTACION = 1 << 20  # bytes de log; con menos no vale la pena reescribir
+
+
+def _linea(registro: dict) -> bytes:
+    return json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class AlmacenProductos:
+    """
+    Productos (dicts con `id` y `sku`) en `<directorio>/<nombre>.ndjson`. El
+    archivo se abre en el primer uso; una instancia se comparte entre hilos.
+    """
+
+    def __init__(self, directorio, nombre: str = "productos", sincronizar: bool = True,
+                 proporcion_compactacion: float = PROPORCION_COMPACTACION,
+                 minimo_compactacion: int = MINIMO_COMPACTACION):
+        directorio = Path(directorio)
+        self.ruta = directorio / f"{nombre}.ndjson"
+        self.ruta_lock = directorio / f"{nombre}.lock"
+        self.ruta_legado = directorio / f"{nombre}.json"
+        self.sincronizar = sincronizar  # False: más throughput, pero una caída puede perder las últimas altas
+        self.proporcion_compactacion = proporcion_compactacion
+        self.minimo_compactacion = minimo_compactacion
+        self.lineas_invalidas = 0
+        self._lock = threading.RLock()
+        self._profundidad = 0  # anidamiento de `_bloqueo` en este proceso
+        self._pid = None
+        self._fd = None  # log vigente, O_RDWR | O_APPEND
+        self._fd_lock = None
+        self._inodo = None
+        self._leido = 0  # bytes del log ya indexados; siempre termina en un salto de línea
+        self._indice: Dict[int, Tuple[int, int, Optional[str]]] = {}  # id -> (offset, largo, sku)
+        self._por_sku: Dict[str, int] = {}
+        self._ultimo_id = 0
+        self._bytes_vivos = 0
+
+    # ------------------------------------------------------------------
+    # Lectura
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._al_dia()
+            return len(self._indice)
+
+    def obtener(self, producto_id: int) -> Optional[dict]:
+        with self._lock:
+            self._al_dia()
+            entrada = self._indice.get(producto_id)
+            if entrada is None:
+                return None
+            return json.loads(os.pread(self._fd, entrada[1], entrada[0]))["producto"]
+
+    def por_sku(self, sku: str) -> Optional[dict]:
+        with self._lock:
+            self._al_dia()
+            producto_id = self._por_sku.get(sku)
+            return None if producto_id is None else self.obtener(producto_id)
+
+    def listar(self) -> List[dict]:
+        """Todos los productos vigentes, por id (una sola lectura del log)."""
+        with self._lock:
+            self._al_dia()
+            datos = os.pread(self._fd, self._leido, 0)
+            return [json.loads(datos[offset:offset + largo])["producto"]
+                    for _, (offset, largo, _) in sorted(self._indice.items())]
+
+    # ------------------------------------------------------------------
+    # Escritura
+
+    def crear(self, producto: dict) -> dict:
+        """Asigna el próximo id y agrega el producto; devuelve el producto con su id."""
+        return self.crear_muchos([producto])[0]
+
+    def crear_muchos(self, productos: Iterable[dict]) -> List[dict]:
+        """Como `crear`, pero con una sola escritura (y un solo `fsync`) para todos."""
+        with self._exclusivo():
+            creados, skus = [], set()
+            for producto in productos:
+                sku = producto.get("sku")
+                if sku is not None and (sku in skus or sku in self._por_sku):
+                    raise ValueError(f"Ya existe un producto con el SKU {sku}.")
+                skus.add(sku)
+                creados.append({**producto, "id": self._ultimo_id + len(creados) + 1})
+            self._agregar([{"op": "put", "producto": producto} for producto in creados])
+            return creados
+
+    def guardar(self, producto: dict) -> dict:
+        """Reemplaza el producto con el `id` de `producto` (o lo agrega con ese id)."""
+        with self._exclusivo():
+            sku = producto.get("sku")
+            if sku is not None and self._por_sku.get(sku, producto["id"]) != producto["id"]:
+                raise ValueError(f"Ya existe un producto con el SKU {sku}.")
+            self._agregar([{"op": "put", "producto": producto}])
+            return producto
+
+    def actualizar(self, producto_id: int, cambio: Callable[[dict], dict]) -> Optional[dict]:
+        """
+        Reemplaza el producto por `cambio(actual)` sin soltar el lock entre la
+        lectura y la escritura; devuelve None (sin escribir) si el id no existe.
+        """
+        with self._exclusivo():
+            actual = self.obtener(producto_id)
+            if actual is None:
+                return None
+            return self.guardar({**cambio(actual), "id": producto_id})
+
+    def eliminar(self, producto_id: int) -> bool:
+        with self._exclusivo():
+            if producto_id not in self._indice:
+                return False
+            self._agregar([{"op": "del", "id": producto_id}])
+            return True
+
+    def compactar(self):
+        """Reescribe el log con solo la última versión de cada producto vigente."""
+        with self._exclusivo():
+            datos = os.pread(self._fd, self._leido, 0)
+            lineas = [_linea({"op": "meta", "ultimo_id": self._ultimo_id})]
+            lineas.extend(datos[offset:offset + largo] for _, (offset, largo, _) in sorted(self._indice.items()))
+            self._reescribir(lineas)
+            self._reabrir()
+
+    def cerrar(self):
+        with self._lock:
+            for fd in (self._fd, self._fd_lock):
+                if fd is not None and self._pid == os.getpid():
+                    os.close(fd)
+            self._fd = self._fd_lock = self._pid = None
+
+    # ------------------------------------------------------------------
+    # Archivo e índice
+
+    @contextmanager
+    def _bloqueo(self):
+        """Lock entre hilos y, con `flock`, entre procesos (reentrante)."""
+        with self._lock:
+            self._revisar_proceso()
+            if self._profundidad == 0:
+                if self._fd_lock is None:
+                    self.ruta.parent.mkdir(parents=True, exist_ok=True)
+                    self._fd_lock = os.open(self.ruta_lock, os.O_RDWR | os.O_CREAT, 0o644)
+                    self._pid = os.getpid()
+                fcntl.flock(self._fd_lock, fcntl.LOCK_EX)
+            self._profundidad += 1
+            try:
+                yield
+            finally:
+                self._profundidad -= 1
+                if self._profundidad == 0:
+                    fcntl.flock(self._fd_lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusivo(self):
+        """`_bloqueo` con el índice al día: lo que se escriba va después de todo lo que ya hay."""
+        with self._bloqueo():
+            self._al_dia()
+            yield
+
+    def _revisar_proceso(self):
+        # Después de un fork los descriptores son compartidos, y con ellos el `flock`: se abren de nuevo.
+        if self._pid is not None and self._pid != os.getpid():
+            self._fd = self._fd_lock = self._pid = None
+            self._profundidad = 0
+
+    def _al_dia(self):
+        self._revisar_proceso()
+        if self._fd is None:
+            self._abrir()
+            return
+        try:
+            inodo = os.stat(self.ruta).st_ino
+        except FileNotFoundError:
+            inodo = None
+        if inodo != self._inodo:
+            self._reabrir()  # otro proceso compactó
+        elif os.fstat(self._fd).st_size > self._leido:
+            self._indexar()
+
+    def _abrir(self):
+        if not self.ruta.exists():
+            with self._bloqueo():
+                if not self.ruta.exists():
+                    self._reescribir(self._lineas_legado())
+        self._fd = os.open(self.ruta, os.O_RDWR | os.O_APPEND)
+        self._pid = self._pid or os.getpid()
+        self._inodo = os.fstat(self._fd).st_ino
+        self._leido, self._ultimo_id, self._bytes_vivos = 0, 0, 0
+        self._indice.clear()
+        self._por_sku.clear()
+        self._indexar()
+
+    def _reabrir(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._abrir()
+
+    def _lineas_legado(self) -> List[bytes]:
+        productos = []
+        if self.ruta_legado.exists():
+            with open(self.ruta_legado, encoding="utf-8") as archivo:
+                productos = json.load(archivo)
+        ultimo_id = max((producto["id"] for producto in productos), default=0)
+        return [_linea({"op": "meta", "ultimo_id": ultimo_id})] + [
+            _linea({"op": "put", "producto": producto}) for producto in productos
+        ]
+
+    def _indexar(self):
+        """Indexa las líneas completas desde `_leido` hasta el final del log."""
+        offset = self._leido
+        with os.fdopen(os.dup(self._fd), "rb") as archivo:
+            archivo.seek(offset)
+            for linea in archivo:
+                if not linea.endswith(b"\n"):
+                    break  # escritura en curso, o que no terminó
+                self._aplicar(linea, offset)
+                offset += len(linea)
+        self._leido = offset
+
+    def _aplicar(self, linea: bytes, offset: int):
+        try:
+            registro = json.loads(linea)
+            operacion = registro["op"]
+        except (ValueError, KeyError, TypeError):
+            self.lineas_invalidas += 1
+            return
+        if operacion == "meta":
+            self._ultimo_id = max(self._ultimo_id, registro["ultimo_id"])
+            return
+        producto = registro.get("producto") or {}
+        producto_id = registro.get("id", producto.get("id"))
+        if not isinstance(producto_id, int):
+            self.lineas_invalidas += 1
+            return
+        self._ultimo_id = max(self._ultimo_id, producto_id)
+        anterior = self._indice.pop(producto_id, None)
+        if anterior is not None:
+            self._bytes_vivos -= anterior[1]
+            if self._por_sku.get(anterior[2]) == producto_id:
+                del self._por_sku[anterior[2]]
+        if operacion == "put":
+            sku = producto.get("sku")
+            self._indice[producto_id] = (offset, len(linea), sku)
+            self._bytes_vivos += len(linea)
+            if sku is not None:
+                self._por_sku[sku] = producto_id
+
+    def _agregar(self, registros: List[dict]):
+        """Agrega `registros` al log; se llama dentro de `_exclusivo`, con el índice al día."""
+        if not registros:
+            return
+        # Lo que haya después de la última línea indexada es una escritura que no terminó.
+        if os.fstat(self._fd).st_size > self._leido:
+            os.ftruncate(self._fd, self._leido)
+        lineas = [_linea(registro) for registro in registros]
+        pendiente = memoryview(b"".join(lineas))
+        while pendiente:
+            pendiente = pendiente[os.write(self._fd, pendiente):]
+        if self.sincronizar:
+            os.fsync(self._fd)
+        for linea in lineas:
+            self._aplicar(linea, self._leido)
+            self._leido += len(linea)
+        muertos = self._leido - self._bytes_vivos
+        if self._leido >= self.minimo_compactacion and muertos > self.proporcion_compactacion * self._leido:
+            self.compactar()
+
+    def _reescribir(self, lineas: List[bytes]):
+        directorio = self.ruta.parent
+        directorio.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.writelines(lineas)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            os.chmod(temporal, 0o644)
+            os.replace(temporal, self.ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+            raise
+        try:
+            # Para que el cambio de nombre también sobreviva a una caída.
+            fd_directorio = os.open(directorio, os.O_RDONLY)
+        except OSError:
+            return  # sistemas de archivos que no dejan abrir un directorio
+        try:
+            os.fsync(fd_directorio)
+        finally:
+            os.close(fd_directorio)
+
+
+# ----------------------------------------------------------------------
+# Instancia del servicio
+
+
+almacen = AlmacenProductos(os.getenv("PRODUCTOS_DATOS_DIR", str(DIRECTORIO_DATOS)))
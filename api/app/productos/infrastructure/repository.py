@@ -1,12 +1,19 @@
 # Importar las dependencias necesarias
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session, joinedload
-from app.productos.domain.models_sql import ProductoDB,CategoriaDB
+from app.core import catalogo_eventos
+from app.core.cargadores import cargador
+from ferramas_comun.lecturas import TAMANO_TANDA, CategoriaLectura, ProductoLectura, precio_con_descuento
+from app.productos.domain.models_sql import (
+    ProductoDB, CategoriaDB, ProductoCambioDB, ProductoRelacionadoDB, EstadisticaCategoriaDB,
+)
 
 # Funciones para manejar categorías
 def crear_categoria(db: Session, categoria_data: dict):
     nueva_categoria = CategoriaDB(**categoria_data)
     db.add(nueva_categoria)
     db.commit()
+    catalogo_eventos.notificar()
     db.refresh(nueva_categoria)
     return nueva_categoria
 
@@ -17,19 +24,74 @@ def obtener_categorias(db: Session):
     return db.query(CategoriaDB).all()
 
 
+def obtener_estadisticas_categorias(db: Session):
+    """ (categoría, estadística o None) por categoría: una fila por categoría que mantienen los triggers. """
+    return (
+        db.query(CategoriaDB, EstadisticaCategoriaDB)
+        .outerjoin(EstadisticaCategoriaDB, EstadisticaCategoriaDB.categoria_id == CategoriaDB.id)
+        .order_by(CategoriaDB.id)
+        .all()
+    )
+
 def obtener_categoria_por_id(db: Session, categoria_id: int):
-    return db.query(CategoriaDB).filter(CategoriaDB.id == categoria_id).first()
+    """ Por el cargador de la sesión: se junta con los demás pedidos del request y no repite la consulta. """
+    return cargador_categorias(db).cargar(categoria_id)
+
+def obtener_categorias_por_ids(db: Session, categoria_ids):
+    """ Categorías de `categoria_ids` en una consulta, por id; las que no existen no aparecen. """
+    return _por_ids(db.query(CategoriaDB), CategoriaDB, categoria_ids)
+
+def cargador_categorias(db: Session):
+    """ Cargador de la sesión: los `pedir(id)` pendientes se resuelven juntos con `obtener_categorias_por_ids`. """
+    return cargador(db, "categorias", obtener_categorias_por_ids)
+
+def crear_categorias(db: Session, categorias_data: list):
+    return _crear_muchos(db, CategoriaDB, categorias_data, obtener_categorias_por_ids)
+
+def actualizar_categorias(db: Session, cambios: dict):
+    """ `cambios`: categoria_id -> campos nuevos. Devuelve cuántas categorías existían y se actualizaron. """
+    return _actualizar_por_id(db, CategoriaDB, cambios)
 
 def eliminar_categoria(db: Session, categoria_id: int):
     """
     Encuentra y elimina una categoría de la base de datos por su ID.
     """
-    categoria_a_eliminar = db.query(CategoriaDB).filter(CategoriaDB.id == categoria_id).first()
+    categoria_a_eliminar = obtener_categoria_por_id(db, categoria_id)
     if categoria_a_eliminar:
         db.delete(categoria_a_eliminar)
         db.commit()
+        catalogo_eventos.notificar()
     return categoria_a_eliminar
 
+# * Operaciones por lote (una consulta para muchos ids)
+def _por_ids(consulta, modelo, ids):
+    ids = set(ids)
+    if not ids:
+        return {}
+    return {objeto.id: objeto for objeto in consulta.filter(modelo.id.in_(ids))}
+
+def _crear_muchos(db: Session, modelo, datos: list, releer):
+    # Un INSERT con varias filas (RETURNING id) y un SELECT para devolverlos cargados, en vez
+    # de un INSERT y un refresh por objeto. SQLite no garantiza el orden del RETURNING de un
+    # INSERT de varias filas: se devuelven por id, que es el orden en que se insertaron.
+    if not datos:
+        return []
+    ids = sorted(db.scalars(insert(modelo).returning(modelo.id), datos))
+    db.commit()
+    catalogo_eventos.notificar()
+    encontrados = releer(db, ids)
+    return [encontrados[objeto_id] for objeto_id in ids]
+
+def _actualizar_por_id(db: Session, modelo, cambios: dict):
+    existentes = [objeto_id for (objeto_id,) in db.execute(select(modelo.id).where(modelo.id.in_(set(cambios))))]
+    if not existentes:
+        return 0
+    # UPDATE por clave primaria con executemany (una sentencia por cada combinación de campos).
+    db.execute(update(modelo), [{"id": objeto_id, **cambios[objeto_id]} for objeto_id in existentes])
+    db.commit()
+    catalogo_eventos.notificar()
+    return len(existentes)
+
 # ----------------------------------------------------------------------
 
 
@@ -38,18 +100,76 @@ def eliminar_categoria(db: Session, categoria_id: int):
 def obtener_productos(db: Session):
     """ Obtiene todos los productos y carga su información de categoróa de forma eficiente. """
     return db.query(ProductoDB).options(joinedload(ProductoDB.categoria)).all()
+
+def obtener_productos_pagina(db: Session, categoria_id: int = None, limite: int = 50, offset: int = 0):
+    """ Una página de productos (opcionalmente de una categoría) ordenados por id, con su categoría. """
+    return listar_productos(db, categoria_id, limite, offset)
+
+# * Lecturas de solo lectura (tuplas, sin entidades del ORM)
+def _consulta_lectura(categoria_id: int = None):
+    consulta = (
+        select(
+            ProductoDB.id, ProductoDB.nombre, ProductoDB.descripcion, ProductoDB.precio, ProductoDB.descuento,
+            ProductoDB.stock, ProductoDB.en_venta, ProductoDB.destacado, ProductoDB.sku, ProductoDB.categoria_id,
+            CategoriaDB.nombre, CategoriaDB.descripcion,
+        )
+        .outerjoin(CategoriaDB, CategoriaDB.id == ProductoDB.categoria_id)
+        .order_by(ProductoDB.id)
+    )
+    if categoria_id is not None:
+        consulta = consulta.where(ProductoDB.categoria_id == categoria_id)
+    return consulta
+
+def _lecturas(filas):
+    # Una sola CategoriaLectura por categoría, compartida por todos sus productos.
+    categorias = {None: None}
+    for (pid, nombre, descripcion, precio, descuento, stock, en_venta, destacado, sku,
+         categoria_id, categoria_nombre, categoria_descripcion) in filas:
+        categoria = categorias.get(categoria_id)
+        if categoria is None and categoria_id is not None:
+            categoria = categorias[categoria_id] = CategoriaLectura(categoria_id, categoria_nombre, categoria_descripcion)
+        yield ProductoLectura(pid, nombre, descripcion, precio, precio_con_descuento(precio, descuento), descuento,
+                              stock, en_venta, destacado, sku, categoria_id, categoria)
+
+def listar_productos(db: Session, categoria_id: int = None, limite: int = None, offset: int = 0):
+    """ Productos (opcionalmente de una categoría y paginados) como ProductoLectura, ordenados por id. """
+    consulta = _consulta_lectura(categoria_id)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    if offset:
+        consulta = consulta.offset(offset)
+    return list(_lecturas(db.execute(consulta)))
+
+def iterar_productos(db: Session, categoria_id: int = None, tamano: int = TAMANO_TANDA):
+    """
+    Como `listar_productos`, pero trae las filas de a `tamano` desde el cursor:
+    la memoria no depende del tamaño del catálogo. La sesión debe seguir
+    abierta mientras se recorre.
+    """
+    filas = db.execute(_consulta_lectura(categoria_id).execution_options(yield_per=tamano))
+    return _lecturas(filas)
 def guardar_producto(db: Session, producto: ProductoDB):
     db.add(producto)
     db.commit()
+    catalogo_eventos.notificar()
     db.refresh(producto)
     return producto
 # * Metodo GET por ID
 def obtener_producto_por_id(db: Session, producto_id: int):
-    return db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+    """ Por el cargador de la sesión, con su categoría: se junta con los demás pedidos del request. """
+    return cargador_productos(db).cargar(producto_id)
+# * GET de muchos ids
+def obtener_productos_por_ids(db: Session, producto_ids):
+    """ Productos de `producto_ids` (con su categoría) en una consulta, por id; los que no existen no aparecen. """
+    return _por_ids(db.query(ProductoDB).options(joinedload(ProductoDB.categoria)), ProductoDB, producto_ids)
+
+def cargador_productos(db: Session):
+    """ Cargador de la sesión: los `pedir(id)` pendientes se resuelven juntos con `obtener_productos_por_ids`. """
+    return cargador(db, "productos", obtener_productos_por_ids)
 # * Metodo POST
 def crear_producto(db: Session, producto_data: dict):
     # Verificar si la categoría existe
-    categoria = db.query(CategoriaDB).filter(CategoriaDB.id == producto_data["categoria_id"]).first()
+    categoria = obtener_categoria_por_id(db, producto_data["categoria_id"])
 
     if not categoria:
         raise ValueError("La categoría no existe.")
@@ -59,13 +179,22 @@ def crear_producto(db: Session, producto_data: dict):
     nuevo_producto.categoria_id = categoria.id
     db.add(nuevo_producto)
     db.commit()
+    catalogo_eventos.notificar()
     db.refresh(nuevo_producto)
 
     # Devolver el producto creado con la categoría asociada
     return nuevo_producto
+# * POST de muchos productos
+def crear_productos(db: Session, productos_data: list):
+    """ Crea todos los productos; las categorías se validan juntas con una sola consulta. """
+    categorias = obtener_categorias_por_ids(db, {datos["categoria_id"] for datos in productos_data})
+    faltantes = {datos["categoria_id"] for datos in productos_data} - set(categorias)
+    if faltantes:
+        raise ValueError(f"Las categorías {sorted(faltantes)} no existen.")
+    return _crear_muchos(db, ProductoDB, productos_data, obtener_productos_por_ids)
 # * Metodo PUT
 def actualizar_producto(db: Session, producto_id: int, producto_data: dict):
-    producto = db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+    producto = obtener_producto_por_id(db, producto_id)
     if not producto:
         return None
 
@@ -74,12 +203,104 @@ def actualizar_producto(db: Session, producto_id: int, producto_data: dict):
         setattr(producto, key, value)
 
     db.commit()
+    catalogo_eventos.notificar()
     db.refresh(producto)
     return producto
+# * PUT de muchos productos
+def actualizar_productos(db: Session, cambios: dict):
+    """ `cambios`: producto_id -> campos nuevos. Devuelve cuántos productos existían y se actualizaron. """
+    return _actualizar_por_id(db, ProductoDB, cambios)
 # * Metodo DELETE
 def eliminar_producto(db: Session, producto_id: int):
-    producto_a_eliminar = db.query(ProductoDB).filter(ProductoDB.id == producto_id).first()
+    producto_a_eliminar = obtener_producto_por_id(db, producto_id)
     if producto_a_eliminar:
         db.delete(producto_a_eliminar)
         db.commit()
-    return producto_a_eliminar
\ No newline at end of file
+        catalogo_eventos.notificar()
+    return producto_a_eliminar
+
+# * Actualización masiva
+def _condiciones(filtro: dict):
+    condiciones = []
+    if filtro.get("categoria_id") is not None:
+        condiciones.append(ProductoDB.categoria_id == filtro["categoria_id"])
+    if filtro.get("ids") is not None:
+        condiciones.append(ProductoDB.id.in_(filtro["ids"]))
+    if filtro.get("stock_max") is not None:
+        condiciones.append(ProductoDB.stock <= filtro["stock_max"])
+    if filtro.get("en_venta") is not None:
+        condiciones.append(ProductoDB.en_venta == filtro["en_venta"])
+    return condiciones
+
+def _valores(cambios: dict):
+    valores = {ProductoDB.fecha_actualizacion: func.now()}
+    if cambios.get("descuento") is not None:
+        valores[ProductoDB.descuento] = cambios["descuento"]
+    if cambios.get("precio_porcentaje") is not None:
+        valores[ProductoDB.precio] = func.round(ProductoDB.precio * (1 + cambios["precio_porcentaje"] / 100), 2)
+    if cambios.get("en_venta") is not None:
+        valores[ProductoDB.en_venta] = cambios["en_venta"]
+    if cambios.get("stock") is not None:
+        valores[ProductoDB.stock] = cambios["stock"]
+    return valores
+
+def actualizar_productos_masivo(db: Session, filtro: dict, cambios: dict, dry_run: bool = False, tamano_lote: int = None):
+    """
+    Aplica `cambios` a los productos de `filtro` con un solo UPDATE ... WHERE, o con
+    un UPDATE por lote de `tamano_lote` ids. Con `dry_run` solo cuenta los afectados.
+    """
+    condiciones = _condiciones(filtro)
+    if dry_run:
+        return db.query(func.count(ProductoDB.id)).filter(*condiciones).scalar()
+    valores = _valores(cambios)
+    if not tamano_lote:
+        afectados = db.execute(
+            update(ProductoDB).where(*condiciones).values(valores).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    else:
+        afectados, ultimo = 0, 0
+        while True:
+            ids = db.scalars(
+                select(ProductoDB.id).where(*condiciones, ProductoDB.id > ultimo).order_by(ProductoDB.id).limit(tamano_lote)
+            ).all()
+            if not ids:
+                break
+            afectados += db.execute(
+                update(ProductoDB).where(ProductoDB.id.in_(ids)).values(valores).execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            ultimo = ids[-1]
+    catalogo_eventos.notificar()
+    return afectados
+
+# ----------------------------------------------------------------------
+
+
+# Feed de cambios
+def obtener_cambios(db: Session, desde: int, limite: int):
+    """ Cambios con secuencia mayor a `desde`, en orden, con el producto y su categoría en el mismo JOIN. """
+    return (
+        db.query(ProductoCambioDB)
+        .options(joinedload(ProductoCambioDB.producto).joinedload(ProductoDB.categoria))
+        .filter(ProductoCambioDB.secuencia > desde)
+        .order_by(ProductoCambioDB.secuencia)
+        .limit(limite)
+        .all()
+    )
+
+def ultima_secuencia_cambios(db: Session) -> int:
+    return db.query(func.max(ProductoCambioDB.secuencia)).scalar() or 0
+
+
+# Productos relacionados
+def obtener_relacionados(db: Session, producto_id: int):
+    """ Relacionados en venta de un producto, en el orden precalculado, con su categoría en el mismo JOIN. """
+    return (
+        db.query(ProductoDB)
+        .join(ProductoRelacionadoDB, ProductoRelacionadoDB.relacionado_id == ProductoDB.id)
+        .options(joinedload(ProductoDB.categoria))
+        .filter(ProductoRelacionadoDB.producto_id == producto_id, ProductoDB.en_venta.is_(True))
+        .order_by(ProductoRelacionadoDB.posicion)
+        .all()
+    )
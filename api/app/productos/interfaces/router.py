@@ -1,23 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import zlib
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Literal, Optional
+from ferramas_comun import exportacion_arrow
+from app.core import cache_proxy, promociones
+from app.core.database import engine, get_db
+from app.core.catalogo_snapshot import snapshot_actual
+from app.core.http_cache import coincide_etag, etag_de, respuesta_json_condicional
+from app.core.micro_cache import cache_lecturas
+from app.core.indice_prefijos import servicio as sugerencias
 from app.productos.infrastructure import repository
-from app.productos.domain.schemas import ProductoCreate, ProductoOut, CategoriaIn, CategoriaOut
+from app.productos.domain.schemas import (
+    ProductoCreate, ProductoOut, ProductoConPrecioOut, CategoriaIn, CategoriaOut, CambioProducto, FeedCambios,
+    ActualizacionMasivaIn, ActualizacionMasivaOut, SugerenciaOut, EstadisticaCategoriaOut,
+)
 
 router = APIRouter()
+_lista_categorias = TypeAdapter(List[CategoriaOut])
+
+
+def _variante(request: Request) -> tuple:
+    # Clave de la micro-caché: los parámetros en orden, para que ?a=1&b=2 y ?b=2&a=1 compartan entrada.
+    return tuple(sorted(request.query_params.multi_items()))
+
+
+def _con_etag(contenido: bytes):
+    return contenido, etag_de(contenido)
+
+
+def _productos_json(productos, motor) -> bytes:
+    # ProductoSnapshot o ProductoLectura: mismo orden y forma que ProductoConPrecioOut, sin pasar por la validación de pydantic.
+    filas = []
+    for p in productos:
+        precio = promociones.precio(motor, p.precio, p.descuento, p.categoria_id, p.sku)
+        filas.append({
+            "nombre": p.nombre, "descripcion": p.descripcion, "precio": p.precio, "stock": p.stock,
+            "en_venta": p.en_venta, "sku": p.sku, "destacado": p.destacado, "descuento": round(p.descuento),
+            "categoria_id": p.categoria_id, "id": p.id,
+            "categoria": p.categoria._asdict() if p.categoria else None,
+            "precio_final": float(precio.final), "promociones": list(precio.promociones),
+        })
+    return json.dumps(filas, ensure_ascii=False, separators=(",", ":")).encode()
 # Rutas de Categorías
 
 
 # * Metodo GET para obtener todas las categorías
 @router.get("/categorias/", response_model=List[CategoriaOut])
-def listar_categorias(db: Session = Depends(get_db)):
+def listar_categorias(request: Request, db: Session = Depends(get_db)):
     """Obtiene todas las categorías."""
-    categorias = repository.obtener_categorias(db)
-    return categorias
+    cuerpo, etag = cache_lecturas.obtener(
+        ("categorias", _variante(request)),
+        lambda: _con_etag(_lista_categorias.dump_json(repository.obtener_categorias(db))),
+    )
+    return cache_proxy.etiquetar(respuesta_json_condicional(request, cuerpo, etag), cache_proxy.claves_categorias(()))
+
 
 
 
+# * Metodo GET para las estadísticas por categoría
+@router.get("/categorias/estadisticas", response_model=List[EstadisticaCategoriaOut])
+def estadisticas_categorias(response: Response, db: Session = Depends(get_db)):
+    """
+    Productos, productos en venta, unidades en stock, valor del stock, descuento
+    promedio y destacados de cada categoría. Se leen de una tabla de totales que
+    mantienen triggers: el costo no depende del tamaño del catálogo.
+    """
+    filas = repository.obtener_estadisticas_categorias(db)
+    cache_proxy.etiquetar(response, cache_proxy.claves_categorias(categoria.id for categoria, _ in filas))
+    return [
+        EstadisticaCategoriaOut(
+            categoria_id=categoria.id,
+            nombre=categoria.nombre,
+            productos=estadistica.productos if estadistica else 0,
+            en_venta=estadistica.en_venta if estadistica else 0,
+            unidades=estadistica.unidades if estadistica else 0,
+            valor_stock=estadistica.valor_stock_centavos / 100 if estadistica else 0,
+            descuento_promedio=(
+                round(estadistica.descuento_centesimas / 100 / estadistica.productos, 2)
+                if estadistica and estadistica.productos else 0
+            ),
+            destacados=estadistica.destacados if estadistica else 0,
+        )
+        for categoria, estadistica in filas
+    ]
 
 #* Metodo POST para crear una categoría
 @router.post("/categorias/", response_model=CategoriaOut)
@@ -41,16 +109,128 @@ def crear_producto(producto: ProductoCreate, db: Session = Depends(get_db)):
     return repository.crear_producto(db, producto.model_dump())
 
 # * Metodo GET para obtener todos los productos
-@router.get("/", response_model=List[ProductoOut])
-def listar_productos(db: Session = Depends(get_db)):
-    productos = repository.obtener_productos(db)
-    return productos
+@router.get("/", response_model=List[ProductoConPrecioOut])
+def listar_productos(request: Request, db: Session = Depends(get_db)):
+    # Todo el catálogo, con la categoría de cada producto: lo invalida cualquier escritura de productos o categorías.
+    return cache_proxy.etiquetar(_listar_productos(request, db), {cache_proxy.CATALOGO, cache_proxy.PRODUCTOS, cache_proxy.CATEGORIAS})
+
+
+def _listar_productos(request: Request, db: Session):
+    # Los precios finales dependen de las promociones: su versión es parte de la clave y del ETag.
+    motor = promociones.motor()
+    snapshot = snapshot_actual()
+    if snapshot is not None:
+        # Sin tocar el catálogo: el ETag es la generación, así que un 304 ni siquiera recorre el snapshot.
+        etag = f'"snap-{snapshot.generacion}-{zlib.crc32(motor.clave.encode()):08x}"'
+        if coincide_etag(request, etag):
+            return respuesta_json_condicional(request, b"", etag)
+        cuerpo, etag = cache_lecturas.obtener(
+            ("productos", snapshot.generacion, motor.clave, _variante(request)),
+            lambda: (_productos_json(snapshot.productos(), motor), etag),
+        )
+        return respuesta_json_condicional(request, cuerpo, etag)
+    # ETag para que los clientes revaliden con If-None-Match y reciban 304 sin cuerpo.
+    cuerpo, etag = cache_lecturas.obtener(
+        ("productos", None, motor.clave, _variante(request)),
+        lambda: _con_etag(_productos_json(repository.iterar_productos(db), motor)),
+    )
+    return respuesta_json_condicional(request, cuerpo, etag)
+
+# * Metodo GET para el autocompletado
+@router.get("/sugerir", response_model=List[SugerenciaOut])
+def sugerir_productos(response: Response, q: str = Query("", max_length=100), limite: int = Query(10, ge=1, le=50)):
+    """
+    Productos cuyo nombre tiene palabras que empiezan con las de `q` (sin
+    distinguir tildes ni mayúsculas) o cuyo SKU empieza con `q`. Responde desde
+    un índice en memoria: no consulta la base en cada tecla.
+    """
+    encontradas = sugerencias.sugerir(q, limite)
+    cuerpo = json.dumps([s._asdict() for s in encontradas], ensure_ascii=False)
+    return cache_proxy.etiquetar(
+        Response(cuerpo.encode(), media_type="application/json"),
+        {cache_proxy.PRODUCTOS, *cache_proxy.claves_productos((s.id, None) for s in encontradas)},
+    )
+
+# * Metodo POST para cambiar muchos productos con una sola sentencia
+@router.post("/actualizacion-masiva", response_model=ActualizacionMasivaOut)
+def actualizacion_masiva(datos: ActualizacionMasivaIn, db: Session = Depends(get_db)):
+    """
+    Por ejemplo `descuento=15` para una categoría, `precio_porcentaje=5` para todo
+    el catálogo o `en_venta=false` con `stock_max=0`. Con `dry_run` solo informa
+    cuántos productos se modificarían.
+    """
+    afectados = repository.actualizar_productos_masivo(
+        db, datos.filtro.model_dump(), datos.cambios.model_dump(), datos.dry_run, datos.tamano_lote
+    )
+    return ActualizacionMasivaOut(afectados=afectados, dry_run=datos.dry_run)
+
+# * Metodo GET para el feed de cambios incremental
+@router.get("/cambios", response_model=FeedCambios)
+def listar_cambios(
+    since: int = Query(0, ge=0, description="Cursor devuelto por la consulta anterior (0 = desde el inicio)."),
+    limite: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    Productos creados, modificados o eliminados después de `since`. Cada producto
+    aparece una sola vez, con su último estado; las eliminaciones llegan como
+    tombstones (`operacion="delete"`, sin `producto`).
+    """
+    cambios = repository.obtener_cambios(db, since, limite + 1)
+    hay_mas = len(cambios) > limite
+    cambios = cambios[:limite]
+    if not cambios and since > repository.ultima_secuencia_cambios(db):
+        # Cursor de otra base (p. ej. recreada): el cliente debe resincronizar completo.
+        raise HTTPException(status_code=410, detail="Cursor desconocido; volver a sincronizar desde since=0")
+    return FeedCambios(
+        cambios=[
+            CambioProducto(
+                secuencia=cambio.secuencia,
+                operacion="upsert" if cambio.producto is not None else "delete",
+                producto_id=cambio.producto_id,
+                producto=ProductoOut.model_validate(cambio.producto) if cambio.producto is not None else None,
+            )
+            for cambio in cambios
+        ],
+        cursor=cambios[-1].secuencia if cambios else since,
+        hay_mas=hay_mas,
+    )
+
+# * Metodo GET para la exportación columnar (solo si está instalado pyarrow)
+if exportacion_arrow.disponible:
+    @router.get("/exportar", response_class=StreamingResponse)
+    def exportar_catalogo(
+        compresion: Optional[Literal["zstd", "lz4"]] = None,
+        lote: int = Query(exportacion_arrow.TAMANO_LOTE, ge=1024, le=1_000_000),
+    ):
+        """
+        Todos los productos con su categoría en formato Arrow IPC streaming
+        (`pyarrow.ipc.open_stream`, `pandas`, `polars`, DuckDB), en lotes de
+        `lote` filas que se envían a medida que se leen.
+        """
+        return StreamingResponse(
+            exportacion_arrow.stream_ipc_de_archivo(engine.url.database, lote, compresion),
+            media_type=exportacion_arrow.MEDIA_TYPE_STREAM,
+            headers={"Content-Disposition": 'attachment; filename="catalogo.arrows"'},
+        )
+
+# * Metodo GET para los productos relacionados
+@router.get("/{producto_id}/relacionados", response_model=List[ProductoOut])
+def listar_relacionados(producto_id: int, response: Response, db: Session = Depends(get_db)):
+    """
+    Productos parecidos de la misma categoría, del más al menos parecido. Los
+    precalcula `python manage.py calcular_relacionados`; un producto sin
+    calcular devuelve una lista vacía.
+    """
+    relacionados = repository.obtener_relacionados(db, producto_id)
+    claves = cache_proxy.claves_productos((p.id, p.categoria_id) for p in relacionados)
+    cache_proxy.etiquetar(response, claves | {cache_proxy.clave_producto(producto_id)})
+    return relacionados
 
 # * Metodo DELETE para eliminar un producto por ID
 @router.delete("/{producto_id}", status_code=204)
 def eliminar_producto_endpoint(producto_id: int, db: Session = Depends(get_db)):
     """Elimina un producto por su ID."""
-    # Verificar si el producto existe
-    producto = repository.obtener_producto_por_id(db, producto_id)
-    if not producto:
+    # eliminar_producto devuelve None si el producto no existe
+    if not repository.eliminar_producto(db, producto_id):
         raise HTTPException(status_code=404, detail="Producto no encontrado")
\ No newline at end of file
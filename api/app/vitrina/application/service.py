@@ -0,0 +1,56 @@
+"""
+Vitrina: catálogo, categorías y dólar en una sola respuesta.
+
+Los tres componentes se piden a la vez (cada uno en el threadpool, con su
+propia sesión de base), así la respuesta tarda lo que el más lento y no la
+suma. Si un componente falla la vitrina llega igual, sin él y con el motivo
+en `errores`.
+"""
+import asyncio
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.banco_central.application.service import consultar_valor_dolar
+from app.core import promociones
+from app.core.database import SessionLocal
+from app.productos.domain.schemas import CategoriaOut, ProductoOut
+from app.productos.infrastructure import repository
+from ..domain.schemas import ProductoVitrina, VitrinaOut
+
+
+def _productos(categoria_id: Optional[int], limite: int, offset: int):
+    motor = promociones.motor()
+    with SessionLocal() as db:
+        productos = []
+        for p in repository.obtener_productos_pagina(db, categoria_id, limite, offset):
+            precio = promociones.precio(motor, p.precio, p.descuento, p.categoria_id, p.sku)
+            productos.append(ProductoVitrina(**ProductoOut.model_validate(p).model_dump(),
+                                             precio_final=float(precio.final), promociones=precio.promociones))
+        return productos
+
+
+def _categorias():
+    with SessionLocal() as db:
+        return [CategoriaOut.model_validate(c) for c in repository.obtener_categorias(db)]
+
+
+async def armar_vitrina(categoria_id: Optional[int], limite: int, offset: int) -> VitrinaOut:
+    componentes = {
+        "productos": run_in_threadpool(_productos, categoria_id, limite, offset),
+        "categorias": run_in_threadpool(_categorias),
+        "dolar": run_in_threadpool(consultar_valor_dolar),
+    }
+    resultados = await asyncio.gather(*componentes.values(), return_exceptions=True)
+    datos, errores = {}, {}
+    for nombre, resultado in zip(componentes, resultados):
+        if isinstance(resultado, Exception):
+            errores[nombre] = str(resultado) or type(resultado).__name__
+        else:
+            datos[nombre] = resultado
+
+    productos, dolar = datos.get("productos", []), datos.get("dolar")
+    if dolar is not None and dolar.valor:
+        for producto in productos:
+            producto.precio_usd = round(producto.precio_final / dolar.valor, 2)
+    return VitrinaOut(productos=productos, categorias=datos.get("categorias", []), dolar=dolar, errores=errores)
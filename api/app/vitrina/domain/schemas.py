@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from app.banco_central.domain.schemas import Indicador
+from app.productos.domain.schemas import CategoriaOut, ProductoConPrecioOut
+
+class ProductoVitrina(ProductoConPrecioOut):
+    precio_usd: Optional[float] = None  # None si no se pudo obtener el dólar
+
+class VitrinaOut(BaseModel):
+    productos: List[ProductoVitrina]
+    categorias: List[CategoriaOut]
+    dolar: Optional[Indicador] = None
+    # Componente -> motivo, para los que no llegaron (p. ej. mindicador sin responder a tiempo)
+    errores: Dict[str, str] = {}
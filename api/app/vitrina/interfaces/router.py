@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Response
+
+from app.core import cache_proxy
+from ..application.service import armar_vitrina
+from ..domain.schemas import VitrinaOut
+
+router = APIRouter()
+
+@router.get("/", response_model=VitrinaOut)
+async def vitrina(
+    response: Response,
+    categoria_id: Optional[int] = None,
+    limite: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Página de productos (opcionalmente de una categoría) con su precio en
+    dólares, todas las categorías y el valor del dólar: lo que necesita una
+    página de la tienda, en un solo request.
+    """
+    resultado = await armar_vitrina(categoria_id, limite, offset)
+    claves = cache_proxy.claves_productos((p.id, p.categoria_id) for p in resultado.productos)
+    # De las categorías solo lleva la lista: la invalida `categorias`, no cada escritura de sus productos.
+    cache_proxy.etiquetar(response, claves | {cache_proxy.CATEGORIAS})
+    if resultado.errores:
+        # Incompleta: que el proxy no la guarde en lugar de una completa.
+        response.headers["Cache-Control"] = "no-store"
+    return resultado
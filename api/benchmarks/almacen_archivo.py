@@ -0,0 +1,98 @@
+"""
+Benchmark del almacén de productos en archivo: python -m benchmarks.almacen_archivo [productos]
+(desde `api/`).
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from app.productos.infrastructure.almacen_archivo import AlmacenProductos
+
+
+def _producto_de_prueba(numero: int) -> dict:
+    return {
+        "nombre": f"Taladro percutor {numero}", "descripcion": "Taladro de prueba con batería de 20V",
+        "precio": 39990.0, "stock": 15, "en_venta": True, "sku": f"BENCH-{numero}", "destacado": False,
+        "descuento": 10, "categoria": None, "fecha_creacion": "2025-06-23T03:04:47",
+        "fecha_actualizacion": "2025-06-23T03:04:47", "precio_final": 35991.0,
+    }
+
+
+def medir(directorio, productos: int = 100_000) -> Dict[str, float]:
+    """Throughput de escritura y tiempo de carga en `directorio` (debe estar vacío)."""
+    resultados = {}
+
+    def cronometrar(nombre: str, funcion):
+        inicio = time.perf_counter()
+        funcion()
+        resultados[nombre] = time.perf_counter() - inicio
+
+    con_fsync = min(productos, 2_000)
+    almacen_sync = AlmacenProductos(Path(directorio) / "sync")
+    cronometrar("crear_fsync", lambda: [almacen_sync.crear(_producto_de_prueba(n)) for n in range(con_fsync)])
+    resultados["crear_fsync"] = con_fsync / resultados["crear_fsync"]
+
+    # El formato anterior: el arreglo completo se reescribe en cada alta.
+    arreglo, ruta_arreglo = [], Path(directorio) / "arreglo.json"
+
+    def reescribir_arreglo():
+        for numero in range(con_fsync):
+            arreglo.append({**_producto_de_prueba(numero), "id": numero + 1})
+            with open(ruta_arreglo, "w", encoding="utf-8") as archivo:
+                json.dump(arreglo, archivo, ensure_ascii=False)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+
+    cronometrar("arreglo_json_fsync", reescribir_arreglo)
+    resultados["arreglo_json_fsync"] = con_fsync / resultados["arreglo_json_fsync"]
+
+    grande = AlmacenProductos(Path(directorio) / "log", sincronizar=False, minimo_compactacion=1 << 62)
+    cronometrar("crear_sin_fsync", lambda: [grande.crear(_producto_de_prueba(n)) for n in range(productos)])
+    resultados["crear_sin_fsync"] = productos / resultados["crear_sin_fsync"]
+    lotes = AlmacenProductos(Path(directorio) / "lotes")
+    cronometrar("crear_muchos_1000", lambda: [
+        lotes.crear_muchos(_producto_de_prueba(n) for n in range(inicio, min(inicio + 1_000, productos)))
+        for inicio in range(0, productos, 1_000)
+    ])
+    resultados["crear_muchos_1000"] = productos / resultados["crear_muchos_1000"]
+
+    # Una versión vieja por producto: la mitad del log es basura hasta compactar.
+    cronometrar("actualizar", lambda: [grande.guardar({**grande.obtener(n), "stock": 3}) for n in range(1, productos + 1)])
+    resultados["actualizar"] = productos / resultados["actualizar"]
+    resultados["log_mb"] = grande.ruta.stat().st_size / 1e6
+    cronometrar("carga_log", lambda: len(AlmacenProductos(grande.ruta.parent)))
+    cronometrar("compactar", grande.compactar)
+    resultados["compactado_mb"] = grande.ruta.stat().st_size / 1e6
+    cronometrar("carga_compactado", lambda: len(AlmacenProductos(grande.ruta.parent)))
+
+    azar = random.Random(1)
+    ids = [azar.randint(1, productos) for _ in range(10_000)]
+    cronometrar("obtener", lambda: [grande.obtener(producto_id) for producto_id in ids])
+    resultados["obtener"] = resultados["obtener"] / len(ids) * 1e6
+    cronometrar("listar", grande.listar)
+    for almacen_medido in (almacen_sync, grande, lotes):
+        almacen_medido.cerrar()
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as temporal:
+        medidos = medir(temporal, cantidad)
+    print(f"{cantidad} productos")
+    print(f"  crear con fsync:           {medidos['crear_fsync']:>10.0f} productos/s")
+    print(f"  arreglo JSON con fsync:    {medidos['arreglo_json_fsync']:>10.0f} productos/s (formato anterior)")
+    print(f"  crear sin fsync:           {medidos['crear_sin_fsync']:>10.0f} productos/s")
+    print(f"  crear_muchos (lotes 1000): {medidos['crear_muchos_1000']:>10.0f} productos/s")
+    print(f"  actualizar (sin fsync):    {medidos['actualizar']:>10.0f} productos/s")
+    print(f"  cargar log de {medidos['log_mb']:.0f} MB:     {medidos['carga_log']:>10.2f} s")
+    print(f"  compactar:                 {medidos['compactar']:>10.2f} s ({medidos['compactado_mb']:.0f} MB)")
+    print(f"  cargar log compactado:     {medidos['carga_compactado']:>10.2f} s")
+    print(f"  obtener por id:            {medidos['obtener']:>10.1f} µs")
+    print(f"  listar:                    {medidos['listar']:>10.2f} s")
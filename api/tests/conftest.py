@@ -0,0 +1,102 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# La API crea sus tablas al importarse: se apunta a una base temporal antes de eso.
+_DIRECTORIO_TEMPORAL = tempfile.mkdtemp(prefix="ferramas-api-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DIRECTORIO_TEMPORAL, 'test.sqlite3')}")
+# Sin snapshot mmap: los listados van siempre a la base y los presupuestos son deterministas.
+os.environ.setdefault("CATALOGO_SNAPSHOT", "")
+# Las promociones se revisan en cada request: los presupuestos de consultas no dependen del reloj.
+os.environ.setdefault("PROMOCIONES_INTERVALO", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from ferramas_comun.pruebas.consultas import describir_repetidas  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.database import engine  # noqa: E402
+from app.core.indice_prefijos import servicio as sugerencias  # noqa: E402
+from app.core.micro_cache import cache_lecturas  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+class RegistroConsultas:
+    def __init__(self):
+        self.sentencias = []
+
+    def __len__(self):
+        return len(self.sentencias)
+
+    def repetidas(self, minimo: int = 2) -> str:
+        return describir_repetidas(self.sentencias, minimo)
+
+
+@contextmanager
+def capturar_consultas():
+    registro = RegistroConsultas()
+
+    def _anotar(conn, cursor, statement, parameters, context, executemany):
+        registro.sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _anotar)
+    try:
+        yield registro
+    finally:
+        event.remove(engine, "before_cursor_execute", _anotar)
+
+
+@contextmanager
+def presupuesto_consultas(maximo: int, etiqueta: str = "Bloque"):
+    """Falla si el bloque ejecuta más de `maximo` consultas, listando las repetidas."""
+    with capturar_consultas() as registro:
+        yield registro
+    if len(registro) > maximo:
+        pytest.fail(
+            f"{etiqueta} ejecutó {len(registro)} consultas (presupuesto {maximo}). "
+            f"Sentencias repetidas:\n{registro.repetidas()}"
+        )
+
+
+def poblar_catalogo(productos: int, categorias: int = 6):
+    """Agrega `productos` filas repartidas en `categorias` categorías."""
+    with engine.begin() as conn:
+        for numero in range(1, categorias + 1):
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO app_categoria (nombre, descripcion) VALUES (?, ?)",
+                (f"Categoría {numero}", None),
+            )
+        ids = [fila[0] for fila in conn.exec_driver_sql("SELECT id FROM app_categoria ORDER BY id")]
+        inicio = conn.exec_driver_sql("SELECT COUNT(*) FROM app_producto").scalar()
+        conn.exec_driver_sql(
+            "INSERT INTO app_producto (nombre, descripcion, precio, stock, en_venta, sku, destacado, "
+            "descuento, fecha_creacion, fecha_actualizacion, categoria_id) "
+            "VALUES (?, ?, ?, ?, 1, ?, 0, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, ?)",
+            [
+                (f"Producto {n}", f"Descripción {n}", 1000.0 + n, n % 50, f"SKU-{n:08d}", n % 3 * 5, ids[n % len(ids)])
+                for n in range(inicio + 1, inicio + productos + 1)
+            ],
+        )
+    # SQL directo, sin pasar por el repositorio: se invalida a mano como lo haría una escritura.
+    cache_lecturas.invalidar()
+
+
+@pytest.fixture
+def cliente():
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def base_limpia():
+    yield
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM app_producto")
+        conn.exec_driver_sql("DELETE FROM app_categoria")
+        conn.exec_driver_sql("DELETE FROM app_productocambio")
+        conn.exec_driver_sql("DELETE FROM app_productorelacionado")
+        conn.exec_driver_sql("DELETE FROM app_promocion")
+        conn.exec_driver_sql("DELETE FROM app_trabajo")
+    cache_lecturas.invalidar()
+    # Al vaciar el feed el índice ya no puede seguir los cambios: el próximo test lo rearma.
+    sugerencias.descartar()
@@ -0,0 +1,72 @@
+from app.core.database import engine
+from conftest import poblar_catalogo, presupuesto_consultas
+
+
+def _productos():
+    with engine.connect() as conn:
+        return {
+            fila[0]: fila[1:]
+            for fila in conn.exec_driver_sql(
+                "SELECT id, categoria_id, precio, descuento, stock, en_venta, fecha_actualizacion FROM app_producto"
+            )
+        }
+
+
+def _envejecer():
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE app_producto SET fecha_actualizacion = '2000-01-01 00:00:00'")
+
+
+def test_descuento_por_categoria_en_un_solo_update(cliente):
+    poblar_catalogo(200, categorias=4)
+    _envejecer()
+    antes = _productos()
+    categoria_id = next(iter(antes.values()))[0]
+
+    # El UPDATE y el aviso a la cola de relacionados.
+    with presupuesto_consultas(2, "actualización masiva"):
+        response = cliente.post("/productos/actualizacion-masiva", json={
+            "filtro": {"categoria_id": categoria_id}, "cambios": {"descuento": 15},
+        })
+
+    despues = _productos()
+    de_la_categoria = {pid for pid, fila in antes.items() if fila[0] == categoria_id}
+    assert response.json() == {"afectados": len(de_la_categoria), "dry_run": False}
+    for pid, fila in despues.items():
+        if pid in de_la_categoria:
+            assert fila[2] == 15 and fila[5] > "2000-01-01 00:00:00"
+        else:
+            assert fila == antes[pid]
+
+
+def test_dry_run_solo_cuenta(cliente):
+    poblar_catalogo(50)
+    antes = _productos()
+
+    response = cliente.post("/productos/actualizacion-masiva", json={
+        "filtro": {"stock_max": 0}, "cambios": {"en_venta": False}, "dry_run": True,
+    })
+
+    assert response.json() == {"afectados": sum(1 for fila in antes.values() if fila[3] == 0), "dry_run": True}
+    assert _productos() == antes
+
+
+def test_ajuste_de_precio_por_lotes_y_feed(cliente):
+    poblar_catalogo(120)
+    antes = _productos()
+    cursor = cliente.get("/productos/cambios", params={"limite": 5000}).json()["cursor"]
+
+    response = cliente.post("/productos/actualizacion-masiva", json={
+        "cambios": {"precio_porcentaje": 5}, "tamano_lote": 50,
+    })
+
+    assert response.json()["afectados"] == 120
+    for pid, fila in _productos().items():
+        assert fila[1] == round(antes[pid][1] * 1.05, 2)
+    cambios = cliente.get("/productos/cambios", params={"since": cursor, "limite": 5000}).json()["cambios"]
+    assert len(cambios) == 120
+
+
+def test_sin_cambios_es_un_error(cliente):
+    assert cliente.post("/productos/actualizacion-masiva", json={"cambios": {}}).status_code == 422
+    assert cliente.post("/productos/actualizacion-masiva", json={"cambios": {"descuento": 120}}).status_code == 422
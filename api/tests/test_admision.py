@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.admision import AdmisionMiddleware, LimiteAdaptativo, clasificar, crear_grupos
+
+# El recurso compartido (la conexión SQLite) atiende de a dos y cada request lo ocupa 20 ms.
+OCUPACION = 0.02
+
+
+def _app_con_recurso(con_admision: bool, **opciones):
+    recurso = threading.Semaphore(2)
+    app = FastAPI()
+
+    @app.get("/productos/")
+    def listar():
+        with recurso:
+            time.sleep(OCUPACION)
+        return {"ok": True}
+
+    @app.post("/productos/")
+    def crear():
+        time.sleep(0.2)
+        return {"ok": True}
+
+    if con_admision:
+        app.add_middleware(AdmisionMiddleware, **opciones)
+    return app
+
+
+def _p99(latencias):
+    return sorted(latencias)[int(len(latencias) * 0.99) - 1]
+
+
+async def _carga(app, clientes: int, duracion: float, metodo: str = "GET"):
+    """`clientes` en paralelo pidiendo sin pausa durante `duracion` s; latencias de los admitidos y rechazos."""
+    admitidos, rechazados = [], []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+        async def un_cliente():
+            limite = time.perf_counter() + duracion
+            while time.perf_counter() < limite:
+                inicio = time.perf_counter()
+                respuesta = await cliente.request(metodo, "/productos/")
+                latencia = time.perf_counter() - inicio
+                if respuesta.status_code == 503:
+                    rechazados.append(respuesta)
+                    await asyncio.sleep(0.005)
+                else:
+                    admitidos.append(latencia)
+
+        await asyncio.gather(*(un_cliente() for _ in range(clientes)))
+    return admitidos, rechazados
+
+
+def test_limite_baja_con_latencia_alta_y_sube_de_a_poco():
+    limite = LimiteAdaptativo("prueba", objetivo=0.1, inicial=10, minimo=2, maximo=12)
+    for _ in range(100):
+        limite.registrar(0.5)
+    assert limite.limite == 2
+    limite.en_curso = 5
+    for _ in range(10):
+        limite.registrar(0.01)
+    assert 2 < limite.limite < 6
+    for _ in range(1000):
+        limite.registrar(0.01)
+    assert limite.limite == 12
+    # Sin uso no crece: un límite ocioso no dice nada de la capacidad real.
+    ocioso = LimiteAdaptativo("prueba", objetivo=0.1, inicial=10, minimo=2, maximo=50)
+    for _ in range(100):
+        ocioso.registrar(0.01)
+    assert ocioso.limite == 10
+
+
+def test_clasificacion_por_grupo():
+    casos = {
+        ("GET", "/productos/sugerir"): "lecturas",
+        ("POST", "/productos/actualizacion-masiva"): "escrituras",
+        ("DELETE", "/productos/categorias/3"): "escrituras",
+        ("POST", "/mercado-pago/crear-pago"): "pagos",
+        ("GET", "/banco-central/valor-dolar"): "banco_central",
+        ("GET", "/vitrina/"): "vitrina",
+        ("GET", "/productos/exportar"): "exportaciones",
+        ("GET", "/metrics"): None,
+    }
+    for (metodo, ruta), grupo in casos.items():
+        assert clasificar({"method": metodo, "path": ruta}) == grupo
+
+
+def test_excedente_recibe_503_inmediato_con_retry_after():
+    grupos = crear_grupos()
+    grupos["escrituras"].limite = 1
+    grupos["escrituras"].latencia = 1.5
+    app = _app_con_recurso(True, grupos_limites=grupos)
+
+    async def dos_a_la_vez():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+            lenta = asyncio.ensure_future(cliente.post("/productos/"))
+            await asyncio.sleep(0.01)
+            inicio = time.perf_counter()
+            rechazada = await cliente.post("/productos/")
+            espera = time.perf_counter() - inicio
+            return await lenta, rechazada, espera
+
+    admitida, rechazada, espera = asyncio.run(dos_a_la_vez())
+    assert admitida.status_code == 200
+    assert rechazada.status_code == 503
+    assert rechazada.headers["retry-after"] == "2"
+    assert "sobrecargado" in rechazada.json()["detail"]
+    assert espera < 0.02
+    assert (grupos["escrituras"].admitidos, grupos["escrituras"].rechazados) == (1, 1)
+
+
+def test_las_escrituras_no_ocupan_la_capacidad_de_las_lecturas():
+    grupos = crear_grupos()
+    app = _app_con_recurso(True, grupos_limites=grupos, capacidad=10)
+    # Con capacidad 10, las escrituras usan a lo más 6 (su límite inicial es 8)...
+    _, rechazadas = asyncio.run(_carga(app, clientes=12, duracion=0.3, metodo="POST"))
+    assert rechazadas and grupos["escrituras"].en_curso == 0
+
+    async def mezcla():
+        escrituras = asyncio.ensure_future(_carga(app, clientes=12, duracion=0.3, metodo="POST"))
+        await asyncio.sleep(0.05)
+        lecturas = await _carga(app, clientes=4, duracion=0.2)
+        return await escrituras, lecturas
+
+    # ...y las lecturas siguen entrando mientras las escrituras están saturadas.
+    (_, escrituras_rechazadas), (lecturas, lecturas_rechazadas) = asyncio.run(mezcla())
+    assert escrituras_rechazadas
+    assert lecturas and not lecturas_rechazadas
+
+
+def test_bajo_sobrecarga_el_p99_de_los_admitidos_queda_acotado():
+    # Sin admisión los 40 clientes esperan turno: ~40 / 2 * 20 ms = 400 ms cada uno.
+    sin_control, _ = asyncio.run(_carga(_app_con_recurso(False), clientes=40, duracion=1.5))
+    grupos = crear_grupos()
+    grupos["lecturas"].objetivo = 0.06
+    con_control, rechazados = asyncio.run(
+        _carga(_app_con_recurso(True, grupos_limites=grupos), clientes=40, duracion=1.5)
+    )
+    assert _p99(sin_control) > 0.3
+    assert rechazados
+    # El límite converge cerca del objetivo; el p99 incluye los primeros requests, antes de converger.
+    assert _p99(con_control) < 0.2
+    assert _p99(con_control) < _p99(sin_control) / 2
+    assert grupos["lecturas"].limite < 8
@@ -0,0 +1,147 @@
+import json
+import multiprocessing
+import shutil
+import threading
+
+import pytest
+
+from app.productos.application import service
+from app.productos.domain.schemas import ProductoCreate
+from app.productos.infrastructure.almacen_archivo import DIRECTORIO_DATOS, AlmacenProductos
+from benchmarks.almacen_archivo import medir
+
+
+def _producto(sku: str, **campos) -> dict:
+    return {"nombre": f"Producto {sku}", "precio": 1000.0, "stock": 5, "sku": sku, **campos}
+
+
+def _crear_en_proceso(directorio: str, prefijo: str, cantidad: int):
+    almacen = AlmacenProductos(directorio)
+    for numero in range(cantidad):
+        almacen.crear(_producto(f"{prefijo}-{numero}"))
+
+
+def test_altas_cambios_y_bajas_sobreviven_a_reabrir(tmp_path):
+    almacen = AlmacenProductos(tmp_path)
+    martillo, taladro, sierra = (almacen.crear(_producto(sku)) for sku in ("MART", "TLDR", "SIER"))
+    almacen.guardar({**taladro, "sku": "TLDR-2", "stock": 0})
+    assert almacen.eliminar(sierra["id"])
+    assert not almacen.eliminar(sierra["id"])
+
+    reabierto = AlmacenProductos(tmp_path)
+    assert [p["id"] for p in reabierto.listar()] == [martillo["id"], taladro["id"]]
+    assert reabierto.obtener(taladro["id"])["stock"] == 0
+    assert reabierto.por_sku("TLDR") is None
+    assert reabierto.por_sku("TLDR-2")["id"] == taladro["id"]
+    # El id del último producto no se reutiliza aunque se haya borrado, ni después de compactar.
+    reabierto.compactar()
+    assert AlmacenProductos(tmp_path).crear(_producto("CLAV"))["id"] == sierra["id"] + 1
+
+
+def test_sku_duplicado(tmp_path):
+    almacen = AlmacenProductos(tmp_path)
+    almacen.crear(_producto("MART"))
+    with pytest.raises(ValueError):
+        almacen.crear(_producto("MART"))
+    with pytest.raises(ValueError):
+        almacen.crear_muchos([_producto("TLDR"), _producto("TLDR")])
+    assert len(almacen) == 1
+
+
+def test_escritura_cortada_por_una_caida(tmp_path):
+    almacen = AlmacenProductos(tmp_path)
+    almacen.crear(_producto("MART"))
+    with open(almacen.ruta, "ab") as archivo:
+        archivo.write(b'{"op":"put","producto":{"id":2,"nom')
+
+    reabierto = AlmacenProductos(tmp_path)
+    assert len(reabierto) == 1
+    assert reabierto.crear(_producto("TLDR"))["id"] == 2
+    lineas = almacen.ruta.read_bytes().splitlines()
+    assert [json.loads(linea)["op"] for linea in lineas] == ["meta", "put", "put"]
+    assert AlmacenProductos(tmp_path).lineas_invalidas == 0
+
+
+def test_compactacion_automatica_vista_desde_otra_instancia(tmp_path):
+    escritor = AlmacenProductos(tmp_path, minimo_compactacion=10_000)
+    lector = AlmacenProductos(tmp_path)
+    creados = escritor.crear_muchos(_producto(f"SKU-{numero}") for numero in range(20))
+    assert len(lector) == 20
+    inodo = escritor.ruta.stat().st_ino
+
+    for vuelta in range(20):
+        for producto in creados:
+            escritor.guardar({**producto, "stock": vuelta})
+
+    assert escritor.ruta.stat().st_ino != inodo
+    assert escritor.ruta.stat().st_size < 2 * 10_000
+    assert [p["stock"] for p in lector.listar()] == [19] * 20
+    assert lector.por_sku("SKU-7")["id"] == creados[7]["id"]
+
+
+def test_ids_unicos_entre_hilos_y_procesos(tmp_path):
+    contexto = multiprocessing.get_context("spawn")
+    procesos = [contexto.Process(target=_crear_en_proceso, args=(str(tmp_path), f"P{numero}", 40))
+                for numero in range(3)]
+    for proceso in procesos:
+        proceso.start()
+    almacen = AlmacenProductos(tmp_path)
+    hilos = [threading.Thread(target=lambda prefijo=f"H{numero}": [
+        almacen.crear(_producto(f"{prefijo}-{n}")) for n in range(40)]) for numero in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    for proceso in procesos:
+        proceso.join(60)
+        assert proceso.exitcode == 0
+
+    ids = [p["id"] for p in AlmacenProductos(tmp_path).listar()]
+    assert ids == list(range(1, 7 * 40 + 1))
+
+
+def test_actualizar_no_revive_un_producto_eliminado(tmp_path):
+    almacen = AlmacenProductos(tmp_path)
+    martillo = almacen.crear(_producto("MART"))
+    otro_worker = AlmacenProductos(tmp_path)
+
+    def eliminar_mientras_tanto(actual: dict) -> dict:
+        # Otro hilo que borra mientras se arma el cambio: espera al lock y borra después.
+        hilo = threading.Thread(target=otro_worker.eliminar, args=(martillo["id"],))
+        hilo.start()
+        hilo.join(0.2)
+        assert hilo.is_alive()
+        eliminar_mientras_tanto.hilo = hilo
+        return {**actual, "stock": 0}
+
+    assert almacen.actualizar(martillo["id"], eliminar_mientras_tanto)["stock"] == 0
+    eliminar_mientras_tanto.hilo.join()
+    assert almacen.actualizar(martillo["id"], lambda actual: {**actual, "stock": 9}) is None
+    assert AlmacenProductos(tmp_path).obtener(martillo["id"]) is None
+    taladro, _ = almacen.crear_muchos([_producto("TLDR"), _producto("CLAV")])
+    with pytest.raises(ValueError):
+        almacen.actualizar(taladro["id"], lambda actual: {**actual, "sku": "CLAV"})
+
+
+def test_servicio_importa_el_json_anterior(tmp_path, monkeypatch):
+    shutil.copy(DIRECTORIO_DATOS / "productos.json", tmp_path / "productos.json")
+    monkeypatch.setattr(service, "almacen", AlmacenProductos(tmp_path))
+
+    (taladro,) = service.obtener_productos()
+    nuevo = service.crear_producto(ProductoCreate(
+        nombre="Martillo", descripcion="Martillo de carpintero", precio=10000, stock=3, en_venta=True,
+        sku="MART-1", destacado=False, descuento=20, categoria_id=1,
+    ))
+    assert (taladro.id, taladro.sku, nuevo.id, nuevo.precio_final) == (1, "TLDR-2025", 2, 8000)
+    assert service.obtener_producto_por_sku("MART-1") == nuevo
+    actualizado = service.actualizar_producto(nuevo.id, ProductoCreate(**{**nuevo.model_dump(), "stock": 0}))
+    assert (actualizado.stock, actualizado.fecha_creacion) == (0, nuevo.fecha_creacion)
+    assert service.eliminar_producto(taladro.id)
+    assert service.actualizar_producto(taladro.id, ProductoCreate(**nuevo.model_dump())) is None
+    assert [p.id for p in service.obtener_productos()] == [nuevo.id]
+
+
+def test_benchmark(tmp_path):
+    resultados = medir(tmp_path, productos=500)
+    assert resultados["compactado_mb"] < resultados["log_mb"]
+    assert resultados["crear_muchos_1000"] > 0
@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pytest
+from ferramas_comun.pruebas.proxy_cache import ProxyCache
+
+from app.core import cache_proxy
+from app.core.database import SessionLocal
+from app.productos.infrastructure import repository
+
+DOLAR = {"valor": 950.0, "fecha": "2025-06-30T00:00:00"}
+
+
+def _producto(nombre, precio, categoria_id, **campos):
+    return {"nombre": nombre, "descripcion": f"{nombre} de prueba", "precio": precio, "stock": 10, "en_venta": True,
+            "sku": nombre[:3].upper(), "destacado": False, "descuento": 0, "categoria_id": categoria_id, **campos}
+
+
+@pytest.fixture
+def catalogo():
+    with SessionLocal() as db:
+        herramientas = repository.crear_categoria(db, {"nombre": "Herramientas"}).id
+        fijaciones = repository.crear_categoria(db, {"nombre": "Fijaciones"}).id
+        martillo, tarugo = (p.id for p in repository.crear_productos(db, [
+            _producto("Martillo", 9990, herramientas),
+            _producto("Tarugo", 190, fijaciones, stock=500),
+        ]))
+    return {"herramientas": herramientas, "fijaciones": fijaciones, "martillo": martillo, "tarugo": tarugo}
+
+
+@pytest.fixture
+def proxy(cliente, catalogo, monkeypatch):
+    # Después de `catalogo`: lo que se purga en cada test es solo lo de ese test.
+    proxy = ProxyCache(lambda ruta: cliente.get(ruta))
+    monkeypatch.setenv("PURGA_CACHE_URL", proxy.url)
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", return_value=DOLAR):
+        yield proxy
+    proxy.cerrar()
+
+
+def _purgas(proxy):
+    assert cache_proxy.despachador().esperar(5), "las purgas no terminaron de enviarse"
+    return proxy.purgas
+
+
+def test_politicas_y_claves_por_ruta(cliente, catalogo):
+    listado = cliente.get("/productos/")
+    assert listado.headers["Cache-Control"] == "public, max-age=30, s-maxage=600"
+    assert set(listado.headers["Surrogate-Key"].split()) == {"catalogo", "productos", "categorias"}
+
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", return_value=DOLAR):
+        vitrina = cliente.get("/vitrina/", params={"categoria_id": catalogo["fijaciones"]})
+    assert vitrina.json()["errores"] == {}
+    assert vitrina.headers["Cache-Control"] == "public, max-age=30, s-maxage=300"
+    assert set(vitrina.headers["Surrogate-Key"].split()) == {
+        "catalogo", "categorias", f"categoria-{catalogo['fijaciones']}", f"producto-{catalogo['tarugo']}",
+    }
+
+    relacionados = cliente.get(f"/productos/{catalogo['martillo']}/relacionados")
+    assert f"producto-{catalogo['martillo']}" in relacionados.headers["Surrogate-Key"].split()
+    # Las escrituras no se marcan para el proxy.
+    assert "cache-control" not in cliente.post("/productos/categorias/", json={"nombre": "Pinturas"}).headers
+
+
+def test_vitrina_incompleta_no_se_guarda(cliente, catalogo):
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", side_effect=RuntimeError("caído")):
+        assert cliente.get("/vitrina/").headers["Cache-Control"] == "no-store"
+
+
+def test_escritura_de_un_producto_purga_solo_lo_que_lo_muestra(proxy, catalogo):
+    rutas = [
+        "/productos/",
+        f"/vitrina/?categoria_id={catalogo['herramientas']}",
+        f"/vitrina/?categoria_id={catalogo['fijaciones']}",
+        "/productos/categorias/",
+    ]
+    for ruta in rutas:
+        proxy.get(ruta)
+    proxy.purgas.clear()
+
+    with SessionLocal() as db:
+        repository.actualizar_producto(db, catalogo["martillo"], {"precio": 8990})
+
+    assert _purgas(proxy) == [{"productos", f"producto-{catalogo['martillo']}", f"categoria-{catalogo['herramientas']}"}]
+    assert [proxy.en_cache(ruta) for ruta in rutas] == [False, False, True, True]
+    assert b"8990" in proxy.get(rutas[1])
+
+
+def test_cambio_de_categoria_purga_tambien_la_anterior(proxy, catalogo):
+    with SessionLocal() as db:
+        repository.actualizar_producto(db, catalogo["tarugo"], {"categoria_id": catalogo["herramientas"]})
+
+    assert _purgas(proxy) == [{
+        "productos", f"producto-{catalogo['tarugo']}",
+        f"categoria-{catalogo['herramientas']}", f"categoria-{catalogo['fijaciones']}",
+    }]
+
+
+def test_escrituras_por_lote_purgan_por_id(proxy, catalogo):
+    with SessionLocal() as db:
+        repository.actualizar_productos(db, {catalogo["martillo"]: {"stock": 1}, catalogo["tarugo"]: {"stock": 2}})
+        _purgas(proxy)
+        repository.actualizar_categorias(db, {catalogo["fijaciones"]: {"descripcion": "Tarugos y tornillos"}})
+        _purgas(proxy)
+        repository.crear_productos(db, [_producto("Serrucho", 12990, catalogo["herramientas"])])
+
+    assert _purgas(proxy) == [
+        {"productos", f"producto-{catalogo['martillo']}", f"producto-{catalogo['tarugo']}"},
+        {"categorias", f"categoria-{catalogo['fijaciones']}"},
+        {"productos", f"categoria-{catalogo['herramientas']}"},
+    ]
+
+
+def test_actualizacion_masiva_purga_todo_el_catalogo(proxy, catalogo):
+    proxy.get("/productos/categorias/")
+    with SessionLocal() as db:
+        repository.actualizar_productos_masivo(db, {"categoria_id": catalogo["fijaciones"]}, {"descuento": 10})
+
+    assert _purgas(proxy) == [{"catalogo"}]
+    assert proxy.entradas == {}
+
+
+def test_rollback_no_purga(proxy, catalogo):
+    with SessionLocal() as db:
+        repository.obtener_producto_por_id(db, catalogo["martillo"]).stock = 0
+        db.flush()
+        db.rollback()
+
+    assert _purgas(proxy) == []
@@ -0,0 +1,82 @@
+from app.core.database import engine
+from conftest import poblar_catalogo
+
+
+def _feed(cliente, since=0, limite=500):
+    response = cliente.get("/productos/cambios", params={"since": since, "limite": limite})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _todo(cliente, since=0, limite=500):
+    cambios = []
+    while True:
+        pagina = _feed(cliente, since, limite)
+        cambios += pagina["cambios"]
+        since = pagina["cursor"]
+        if not pagina["hay_mas"]:
+            return cambios, since
+
+
+def test_feed_inicial_trae_el_catalogo_completo_paginado(cliente):
+    poblar_catalogo(25)
+    cambios, cursor = _todo(cliente, limite=7)
+
+    assert [c["operacion"] for c in cambios] == ["upsert"] * 25
+    assert sorted(c["producto_id"] for c in cambios) == sorted(p["id"] for p in cliente.get("/productos/").json())
+    secuencias = [c["secuencia"] for c in cambios]
+    assert secuencias == sorted(secuencias) and cursor == secuencias[-1]
+    assert _feed(cliente, cursor) == {"cambios": [], "cursor": cursor, "hay_mas": False}
+
+
+def test_solo_viaja_lo_modificado_desde_el_cursor(cliente):
+    poblar_catalogo(10)
+    productos = cliente.get("/productos/").json()
+    _, cursor = _todo(cliente)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE app_producto SET stock = 99 WHERE id = ?", (productos[0]["id"],))
+        conn.exec_driver_sql("UPDATE app_producto SET precio = 1 WHERE id = ?", (productos[0]["id"],))
+    assert cliente.delete(f"/productos/{productos[1]['id']}").status_code == 204
+
+    cambios, _ = _todo(cliente, cursor)
+    assert [(c["operacion"], c["producto_id"]) for c in cambios] == [
+        ("upsert", productos[0]["id"]),  # dos updates, una sola entrada con el último estado
+        ("delete", productos[1]["id"]),
+    ]
+    assert cambios[0]["producto"]["stock"] == 99 and cambios[0]["producto"]["precio"] == 1
+    assert cambios[1]["producto"] is None
+
+
+def test_eliminar_categoria_deja_tombstones_de_sus_productos(cliente):
+    poblar_catalogo(12, categorias=3)
+    productos = cliente.get("/productos/").json()
+    _, cursor = _todo(cliente)
+
+    categoria_id = productos[0]["categoria_id"]
+    assert cliente.delete(f"/productos/categorias/{categoria_id}").status_code == 204
+
+    cambios, _ = _todo(cliente, cursor)
+    esperados = {p["id"] for p in productos if p["categoria_id"] == categoria_id}
+    assert {c["producto_id"] for c in cambios} == esperados
+    assert {c["operacion"] for c in cambios} == {"delete"}
+
+
+def test_renombrar_categoria_reenvia_sus_productos(cliente):
+    poblar_catalogo(6, categorias=2)
+    productos = cliente.get("/productos/").json()
+    _, cursor = _todo(cliente)
+
+    categoria_id = productos[0]["categoria_id"]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE app_categoria SET nombre = 'Renombrada' WHERE id = ?", (categoria_id,))
+
+    cambios, _ = _todo(cliente, cursor)
+    assert {c["producto_id"] for c in cambios} == {p["id"] for p in productos if p["categoria_id"] == categoria_id}
+    assert {c["producto"]["categoria"]["nombre"] for c in cambios} == {"Renombrada"}
+
+
+def test_cursor_desconocido_pide_resincronizar(cliente):
+    poblar_catalogo(3)
+    _, cursor = _todo(cliente)
+    assert cliente.get("/productos/cambios", params={"since": cursor + 1000}).status_code == 410
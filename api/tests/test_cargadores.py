@@ -0,0 +1,127 @@
+import pytest
+from ferramas_comun.cargadores import Cargador
+
+from app.core.database import SessionLocal
+from app.productos.infrastructure import repository
+from conftest import poblar_catalogo, presupuesto_consultas
+
+
+def _ids(db):
+    return [p.id for p in repository.listar_productos(db)]
+
+
+@pytest.mark.parametrize("cantidad", [1, 10, 150])
+def test_por_ids_una_consulta_sin_importar_cuantos(cantidad):
+    poblar_catalogo(200, categorias=3)
+    with SessionLocal() as db:
+        ids = _ids(db)[:cantidad]
+        with presupuesto_consultas(2, f"productos y categorías de {cantidad}"):
+            encontrados = repository.obtener_productos_por_ids(db, ids + [0])
+            nombres = [producto.categoria.nombre for producto in encontrados.values()]
+            categorias = repository.obtener_categorias_por_ids(db, {p.categoria_id for p in encontrados.values()})
+
+    assert sorted(encontrados) == ids
+    assert len(nombres) == cantidad
+    assert set(categorias) == {p.categoria_id for p in encontrados.values()}
+
+
+def test_cargador_resuelve_los_pedidos_juntos_y_los_guarda():
+    poblar_catalogo(100, categorias=3)
+    with SessionLocal() as db:
+        ids = _ids(db)
+        with presupuesto_consultas(1, "primera resolución"):
+            pendientes = [repository.cargador_productos(db).pedir(producto_id) for producto_id in ids[:40]]
+            faltante = repository.cargador_productos(db).pedir(0)
+            assert [p.valor().id for p in pendientes] == ids[:40]
+            assert faltante.valor() is None
+        with presupuesto_consultas(0, "ya cargados"):
+            assert repository.cargador_productos(db).cargar(ids[5]).id == ids[5]
+            repository.cargador_productos(db).cargar_muchos(ids[:40])
+        with presupuesto_consultas(1, "solo los nuevos"):
+            assert len(repository.cargador_productos(db).cargar_muchos(ids)) == 100
+
+
+def test_por_id_pasa_por_el_cargador_de_la_sesion():
+    poblar_catalogo(30, categorias=3)
+    with SessionLocal() as db:
+        ids = _ids(db)
+        with presupuesto_consultas(2, "pendientes del request y una categoría"):
+            pendientes = [repository.cargador_productos(db).pedir(producto_id) for producto_id in ids[:10]]
+            # El pedido suelto se resuelve junto con los pendientes: no hay una consulta por id.
+            assert repository.obtener_producto_por_id(db, ids[3]).id == ids[3]
+            assert all(p.valor() is not None for p in pendientes)
+            categoria = repository.obtener_categoria_por_id(db, pendientes[0].valor().categoria_id)
+        with presupuesto_consultas(0, "ya cargados"):
+            assert repository.obtener_producto_por_id(db, ids[7]).id == ids[7]
+            assert repository.obtener_categoria_por_id(db, categoria.id) is categoria
+        assert repository.obtener_producto_por_id(db, 0) is None
+
+
+def test_commit_vacia_el_cargador():
+    poblar_catalogo(10)
+    with SessionLocal() as db:
+        producto_id = _ids(db)[0]
+        repository.cargador_productos(db).cargar(producto_id)
+        repository.actualizar_productos(db, {producto_id: {"stock": 321}})
+        with presupuesto_consultas(1, "después del commit"):
+            assert repository.cargador_productos(db).cargar(producto_id).stock == 321
+
+
+def test_pendiente_resuelto_vuelve_a_cargar_despues_de_olvidar():
+    llamadas = []
+
+    def buscar_muchos(ids):
+        llamadas.append(ids)
+        return {objeto_id: f"objeto {objeto_id}" for objeto_id in ids}
+
+    cargador = Cargador(buscar_muchos)
+    pendiente = cargador.pedir(5)
+    assert pendiente.valor() == "objeto 5"
+    cargador.olvidar()
+    otro = cargador.pedir(6)
+    assert pendiente.valor() == "objeto 5"
+    assert otro.valor() == "objeto 6"
+    assert llamadas == [[5], [6, 5]]
+
+
+def test_pendiente_de_antes_del_commit():
+    poblar_catalogo(5)
+    with SessionLocal() as db:
+        producto_id = _ids(db)[0]
+        pendiente = repository.cargador_productos(db).pedir(producto_id)
+        assert pendiente.valor().id == producto_id
+        repository.actualizar_productos(db, {producto_id: {"stock": 42}})
+        with presupuesto_consultas(1, "releer después del commit"):
+            assert pendiente.valor().stock == 42
+
+
+def test_crear_y_actualizar_por_lote_con_consultas_constantes():
+    poblar_catalogo(1, categorias=2)
+    with SessionLocal() as db:
+        categoria_ids = sorted(repository.obtener_categorias_por_ids(db, [c.id for c in repository.obtener_categorias(db)]))
+        for cantidad in (5, 60):
+            datos = [
+                {"nombre": f"Lote {cantidad}-{n}", "descripcion": "", "precio": 990.0, "stock": n, "en_venta": True,
+                 "sku": f"LOTE-{cantidad}-{n}", "destacado": False, "descuento": 0,
+                 "categoria_id": categoria_ids[n % 2]}
+                for n in range(cantidad)
+            ]
+            # Validar categorías, INSERT, avisar a la cola de relacionados y releer.
+            with presupuesto_consultas(4, f"crear_productos de {cantidad}"):
+                creados = repository.crear_productos(db, datos)
+                assert [p.nombre for p in creados] == [d["nombre"] for d in datos]
+                assert all(p.categoria.id == p.categoria_id for p in creados)
+            # Buscar existentes, un UPDATE por combinación de campos y el aviso a la cola.
+            with presupuesto_consultas(4, f"actualizar_productos de {cantidad}"):
+                afectados = repository.actualizar_productos(
+                    db, {p.id: {"stock": 0} for p in creados} | {creados[0].id: {"stock": 0, "descuento": 50}, 0: {"stock": 1}}
+                )
+            assert afectados == cantidad
+            assert {p.stock for p in repository.obtener_productos_por_ids(db, [p.id for p in creados]).values()} == {0}
+
+        with pytest.raises(ValueError):
+            repository.crear_productos(db, [dict(datos[0], sku="OTRO", categoria_id=0)])
+
+        nuevas = repository.crear_categorias(db, [{"nombre": f"Nueva {n}"} for n in range(5)])
+        assert repository.actualizar_categorias(db, {c.id: {"descripcion": "Por lote"} for c in nuevas}) == 5
+        assert {c.descripcion for c in repository.obtener_categorias_por_ids(db, [c.id for c in nuevas]).values()} == {"Por lote"}
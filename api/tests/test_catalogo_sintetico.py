@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from ferramas_comun.catalogo_sintetico import ConfiguracionCatalogo, cargar_catalogo, generar_categorias
+from sqlalchemy import select
+
+from app.core.database import SessionLocal, engine
+from app.core.micro_cache import cache_lecturas
+from app.productos.domain.models_sql import CategoriaDB, ProductoDB
+
+
+def test_modelos_sqlalchemy_leen_el_catalogo_generado(cliente):
+    config = ConfiguracionCatalogo(productos=300, categorias=4, semilla=3, prob_en_venta=1.0)
+    resultado = cargar_catalogo(engine.url.database, config)
+    cache_lecturas.invalidar()
+    assert (resultado["categorias"], resultado["productos"]) == (4, 300)
+    # Los triggers del feed y de las estadísticas no corren fila por fila: se recrean al final.
+    assert {"app_producto_cambio_insert", "app_producto_estadistica_insert", "app_categoria_cambio_update"} <= set(
+        resultado["triggers_recreados"])
+
+    with SessionLocal() as db:
+        productos = db.scalars(select(ProductoDB).order_by(ProductoDB.id)).all()
+        categorias = db.scalars(select(CategoriaDB)).all()
+        primero = productos[0]
+        assert primero.sku == "FER-00000001"
+        assert isinstance(primero.precio, float) and primero.precio >= config.precio_minimo
+        assert primero.en_venta is True and isinstance(primero.destacado, bool)
+        assert isinstance(primero.fecha_creacion, datetime)
+        assert primero.fecha_actualizacion >= primero.fecha_creacion >= config.fecha_inicial
+        assert primero.categoria.nombre in [nombre for nombre, _ in generar_categorias(config)]
+        assert sorted(c.nombre for c in categorias) == sorted(nombre for nombre, _ in generar_categorias(config))
+        assert len(productos) == 300
+
+    estadisticas = {e["categoria_id"]: e["productos"] for e in cliente.get("/productos/categorias/estadisticas").json()}
+    assert sum(estadisticas.values()) == 300
+    cambios = cliente.get("/productos/cambios", params={"limite": 5000}).json()["cambios"]
+    assert len({c["producto_id"] for c in cambios if c["operacion"] == "upsert"}) == 300
+
+    response = cliente.get("/productos/")
+    assert response.status_code == 200
+    assert "FER-00000001" in [producto["sku"] for producto in response.json()]
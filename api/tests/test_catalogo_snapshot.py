@@ -0,0 +1,56 @@
+import os
+from unittest import mock
+
+from ferramas_comun.catalogo_snapshot import CatalogoSnapshot, LectorSnapshot, generar_snapshot
+
+from app.core.database import engine
+from conftest import _DIRECTORIO_TEMPORAL, poblar_catalogo
+
+RUTA = os.path.join(_DIRECTORIO_TEMPORAL, "catalogo.snap")
+
+
+def test_snapshot_reproduce_el_catalogo(cliente):
+    poblar_catalogo(250)
+    generar_snapshot(engine.url.database, RUTA)
+    snapshot = CatalogoSnapshot(RUTA)
+
+    desde_base = cliente.get("/productos/").json()
+    assert snapshot.n_productos == len(desde_base)
+    for esperado in desde_base:
+        producto = snapshot.producto(esperado["id"])
+        assert producto.nombre == esperado["nombre"]
+        assert producto.precio == esperado["precio"]
+        assert producto.categoria.nombre == esperado["categoria"]["nombre"]
+    for categoria in snapshot.categorias():
+        ids = [p["id"] for p in desde_base if p["categoria_id"] == categoria.id]
+        assert sorted(p.id for p in snapshot.productos_de_categoria(categoria.id)) == sorted(ids)
+    assert snapshot.producto(10**9) is None
+
+
+def test_listado_desde_snapshot_igual_al_de_la_base(cliente):
+    poblar_catalogo(40)
+    desde_base = cliente.get("/productos/").json()
+    generar_snapshot(engine.url.database, RUTA)
+
+    with mock.patch("app.productos.interfaces.router.snapshot_actual", return_value=CatalogoSnapshot(RUTA)):
+        response = cliente.get("/productos/")
+        revalidacion = cliente.get("/productos/", headers={"If-None-Match": response.headers["etag"]})
+
+    assert sorted(response.json(), key=lambda p: p["id"]) == sorted(desde_base, key=lambda p: p["id"])
+    assert revalidacion.status_code == 304
+
+
+def test_lector_cambia_de_snapshot_sin_reiniciar():
+    poblar_catalogo(5)
+    generar_snapshot(engine.url.database, RUTA)
+    lector = LectorSnapshot(RUTA, intervalo=0)
+    anterior = lector.actual()
+
+    poblar_catalogo(5)
+    generar_snapshot(engine.url.database, RUTA)
+    nuevo = lector.actual()
+
+    assert nuevo.generacion != anterior.generacion
+    assert (anterior.n_productos, nuevo.n_productos) == (5, 10)
+    # El mapa anterior sigue siendo legible mientras alguien lo use.
+    assert len(list(anterior.productos())) == 5
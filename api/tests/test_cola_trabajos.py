@@ -0,0 +1,40 @@
+import json
+import time
+
+from app.core import cola_trabajos
+from app.core.database import engine
+
+
+def _trabajos():
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT tarea, argumentos, prioridad, estado, disponible_en, periodo FROM app_trabajo ORDER BY id"
+        ).fetchall()
+
+
+def test_encola_para_el_trabajador_de_django():
+    cola_trabajos.encolar("estadisticas.recalcular", {"motivo": "carga"}, prioridad=3, en=60)
+    [(tarea, argumentos, prioridad, estado, disponible_en, periodo)] = _trabajos()
+    assert (tarea, json.loads(argumentos), prioridad, estado, periodo) == (
+        "estadisticas.recalcular", {"motivo": "carga"}, 3, "pendiente", None,
+    )
+    assert time.time() + 50 < disponible_en <= time.time() + 60
+
+    # Con la misma clave queda un solo pendiente: se adelanta y toma la recurrencia.
+    cola_trabajos.encolar("relacionados.incremental", clave="relacionados.incremental", en=3600)
+    cola_trabajos.encolar("relacionados.incremental", clave="relacionados.incremental", en=5, periodo=900)
+    [_, (tarea, _, _, _, disponible_en, periodo)] = _trabajos()
+    assert (tarea, periodo) == ("relacionados.incremental", 900)
+    assert disponible_en <= time.time() + 5
+
+
+def test_las_escrituras_de_la_api_adelantan_los_relacionados(cliente):
+    categoria = cliente.post("/productos/categorias/", json={"nombre": "Jardín"}).json()
+    cliente.post("/productos/", json={
+        "nombre": "Pala", "descripcion": "", "precio": 5990, "stock": 4, "en_venta": True,
+        "sku": "PALA-1", "destacado": False, "descuento": 0, "categoria_id": categoria["id"],
+    })
+    # Dos escrituras, un solo pendiente: el cálculo junta los cambios del lapso.
+    [(tarea, argumentos, _, estado, disponible_en, periodo)] = _trabajos()
+    assert (tarea, json.loads(argumentos), estado, periodo) == ("relacionados.incremental", {}, "pendiente", None)
+    assert disponible_en <= time.time() + cola_trabajos.RETRASO_RELACIONADOS
@@ -0,0 +1,62 @@
+from app.core.database import engine
+from conftest import poblar_catalogo
+
+# La misma agregación que mantienen los triggers, calculada recorriendo todo app_producto.
+AGREGACION = """
+SELECT c.id, COUNT(p.id), COALESCE(SUM(p.en_venta), 0), COALESCE(SUM(p.stock), 0),
+       COALESCE(SUM(p.precio * p.stock), 0), COALESCE(ROUND(AVG(p.descuento), 2), 0),
+       COALESCE(SUM(p.destacado), 0)
+FROM app_categoria c LEFT JOIN app_producto p ON p.categoria_id = c.id
+GROUP BY c.id ORDER BY c.id
+"""
+
+
+def _estadisticas(cliente):
+    response = cliente.get("/productos/categorias/estadisticas")
+    assert response.status_code == 200, response.text
+    return [
+        (e["categoria_id"], e["productos"], e["en_venta"], e["unidades"], e["valor_stock"],
+         e["descuento_promedio"], e["destacados"])
+        for e in response.json()
+    ]
+
+
+def _agregacion():
+    with engine.connect() as conn:
+        return [
+            (categoria, productos, en_venta, unidades, round(valor, 2), descuento, destacados)
+            for categoria, productos, en_venta, unidades, valor, descuento, destacados
+            in conn.exec_driver_sql(AGREGACION)
+        ]
+
+
+def test_coinciden_con_la_agregacion_completa_despues_de_cada_escritura(cliente):
+    poblar_catalogo(60, categorias=4)
+    assert _estadisticas(cliente) == _agregacion()
+
+    productos = cliente.get("/productos/").json()
+    categorias = [c["id"] for c in cliente.get("/productos/categorias/").json()]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE app_producto SET stock = stock + 7, destacado = 1 WHERE id = ?",
+                             (productos[0]["id"],))
+        conn.exec_driver_sql("UPDATE app_producto SET categoria_id = ? WHERE id = ?",
+                             (categorias[-1], productos[1]["id"]))
+        conn.exec_driver_sql("UPDATE app_producto SET nombre = 'Sin efecto' WHERE id = ?", (productos[2]["id"],))
+    assert cliente.delete(f"/productos/{productos[3]['id']}").status_code == 204
+    cliente.post("/productos/actualizacion-masiva", json={
+        "filtro": {"categoria_id": categorias[0]}, "cambios": {"descuento": 15, "precio_porcentaje": 10},
+    })
+    assert _estadisticas(cliente) == _agregacion()
+
+
+def test_categoria_vacia_en_cero_y_eliminada_sin_fila(cliente):
+    categoria_id = cliente.post("/productos/categorias/", json={"nombre": "Vacía"}).json()["id"]
+    assert _estadisticas(cliente) == [(categoria_id, 0, 0, 0, 0, 0, 0)]
+
+    poblar_catalogo(5, categorias=1)
+    cliente.delete(f"/productos/categorias/{categoria_id}")
+    with engine.connect() as conn:
+        filas = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM app_estadisticacategoria WHERE categoria_id = ?", (categoria_id,)
+        ).scalar()
+    assert filas == 0
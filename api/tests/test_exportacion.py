@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import timedelta
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from ferramas_comun import exportacion_arrow  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from conftest import poblar_catalogo  # noqa: E402
+
+
+def _leer(contenido: bytes):
+    return pa.ipc.open_stream(contenido).read_all()
+
+
+def test_exporta_el_catalogo_completo_con_sus_tipos(cliente):
+    poblar_catalogo(25, categorias=3)
+    respuesta = cliente.get("/productos/exportar")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == exportacion_arrow.MEDIA_TYPE_STREAM
+
+    tabla = _leer(respuesta.content)
+    assert tabla.schema == exportacion_arrow.esquema()
+    filas = tabla.to_pylist()
+    json = {p["id"]: p for p in cliente.get("/productos/").json()}
+    assert [f["id"] for f in filas] == sorted(json)
+    for fila in filas:
+        producto = json[fila["id"]]
+        assert (fila["sku"], fila["nombre"], fila["precio"], fila["stock"]) == \
+            (producto["sku"], producto["nombre"], producto["precio"], producto["stock"])
+        assert fila["en_venta"] is producto["en_venta"]
+        assert fila["categoria"] == producto["categoria"]["nombre"]
+        assert fila["fecha_creacion"].utcoffset() == timedelta(0)
+
+
+def test_lotes_del_tamano_pedido_y_compresion(cliente):
+    poblar_catalogo(2500)
+    lotes = list(pa.ipc.open_stream(cliente.get("/productos/exportar", params={"lote": 1024}).content))
+    assert [lote.num_rows for lote in lotes] == [1024, 1024, 452]
+
+    comprimido = cliente.get("/productos/exportar", params={"lote": 1024, "compresion": "zstd"})
+    assert _leer(comprimido.content).equals(pa.Table.from_batches(lotes))
+    assert cliente.get("/productos/exportar", params={"lote": 10}).status_code == 422
+
+
+def test_catalogo_vacio_es_un_stream_valido_sin_filas(cliente):
+    tabla = _leer(cliente.get("/productos/exportar").content)
+    assert tabla.num_rows == 0 and tabla.schema == exportacion_arrow.esquema()
+
+
+def test_no_usa_conexiones_del_pool():
+    poblar_catalogo(3)
+    conexion = sqlite3.connect(engine.url.database)
+    try:
+        assert sum(lote.num_rows for lote in exportacion_arrow.lotes(conexion, 2)) == 3
+    finally:
+        conexion.close()
+    # La exportación por archivo abre la base en solo lectura.
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        conexion = sqlite3.connect(f"file:{engine.url.database}?mode=ro", uri=True)
+        conexion.execute("DELETE FROM app_producto")
@@ -0,0 +1,54 @@
+from ferramas_comun.lecturas import ProductoLectura
+
+from app.core import promociones
+from app.core.database import SessionLocal
+from app.productos.domain.schemas import ProductoConPrecioOut, ProductoOut
+from app.productos.infrastructure import repository
+from conftest import poblar_catalogo
+
+
+def test_listar_devuelve_tuplas_con_la_categoria_compartida():
+    poblar_catalogo(30, categorias=3)
+    with SessionLocal() as db:
+        productos = repository.listar_productos(db)
+        assert len(db.identity_map) == 0  # ninguna entidad del ORM
+
+    assert all(type(p) is ProductoLectura for p in productos)
+    assert [p.id for p in productos] == sorted(p.id for p in productos)
+    por_categoria = {}
+    for producto in productos:
+        assert producto.categoria.id == producto.categoria_id
+        assert por_categoria.setdefault(producto.categoria_id, producto.categoria) is producto.categoria
+    con_descuento = next(p for p in productos if p.descuento)
+    assert con_descuento.precio_final == round(con_descuento.precio * (1 - con_descuento.descuento / 100), 2)
+
+
+def test_listar_filtra_y_pagina():
+    poblar_catalogo(30, categorias=3)
+    with SessionLocal() as db:
+        categoria_id = repository.obtener_categorias(db)[1].id
+        todos = [p.id for p in repository.listar_productos(db) if p.categoria_id == categoria_id]
+        pagina = repository.listar_productos(db, categoria_id, limite=4, offset=2)
+
+    assert [p.id for p in pagina] == todos[2:6]
+
+
+def test_iterar_recorre_en_tandas_lo_mismo_que_listar():
+    poblar_catalogo(25)
+    with SessionLocal() as db:
+        assert list(repository.iterar_productos(db, tamano=7)) == repository.listar_productos(db)
+
+
+def test_listado_json_igual_al_de_los_modelos(cliente):
+    poblar_catalogo(12)
+    motor = promociones.motor()
+    with SessionLocal() as db:
+        esperados = []
+        for p in repository.obtener_productos(db):
+            precio = promociones.precio(motor, p.precio, p.descuento, p.categoria_id, p.sku)
+            esperados.append(ProductoConPrecioOut(
+                **ProductoOut.model_validate(p).model_dump(), precio_final=float(precio.final),
+                promociones=precio.promociones,
+            ).model_dump(mode="json"))
+
+    assert cliente.get("/productos/").json() == sorted(esperados, key=lambda p: p["id"])
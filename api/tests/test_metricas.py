@@ -0,0 +1,85 @@
+import re
+import time
+from unittest import mock
+
+from app.core.metricas import Medicion, RegistroMetricas
+from conftest import capturar_consultas, poblar_catalogo
+
+_SERVER_TIMING = re.compile(
+    r'app;dur=(?P<app>[\d.]+), db;dur=(?P<db>[\d.]+);desc="(?P<consultas>\d+) consultas", '
+    r'http;dur=(?P<http>[\d.]+);desc="(?P<llamadas>\d+) llamadas"'
+)
+
+
+def _server_timing(response) -> dict:
+    coincidencia = _SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert coincidencia, response.headers["server-timing"]
+    return {clave: float(valor) for clave, valor in coincidencia.groupdict().items()}
+
+
+def test_server_timing_cuenta_las_consultas(cliente):
+    poblar_catalogo(20, categorias=2)
+    with capturar_consultas() as consultas:
+        response = cliente.get("/productos/")
+
+    timing = _server_timing(response)
+    assert response.status_code == 200
+    assert timing["consultas"] == len(consultas) > 0
+    assert timing["llamadas"] == 0
+    assert timing["app"] >= timing["db"]
+
+
+def test_server_timing_cuenta_las_llamadas_http(cliente):
+    def get(url, **opciones):
+        time.sleep(0.02)
+        return mock.Mock(status_code=200, json=lambda: {"serie": [{"valor": 950.5, "fecha": "2025-06-23T04:00:00"}]})
+
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get", side_effect=get):
+        response = cliente.get("/banco-central/valor-dolar")
+
+    timing = _server_timing(response)
+    assert response.json()["valor"] == 950.5
+    assert timing["llamadas"] == 1
+    assert timing["http"] >= 20
+    assert timing["app"] >= timing["http"]
+
+
+def test_metrics_agrupa_por_plantilla_de_ruta(cliente):
+    cliente.get("/productos/123/relacionados")
+    cliente.get("/productos/456/relacionados")
+    cliente.get("/no-existe")
+    response = cliente.get("/metrics")
+
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    texto = response.text
+    assert "# TYPE ferramas_api_request_duration_seconds histogram" in texto
+    conteo = re.search(r'ferramas_api_requests_total\{method="GET",route="/productos/\{producto_id\}/relacionados",'
+                       r'status="200"\} (\d+)', texto)
+    assert conteo and int(conteo.group(1)) >= 2
+    assert 'route="/productos/123/relacionados"' not in texto
+    assert re.search(r'ferramas_api_requests_total\{method="GET",route="sin_ruta",status="404"\} \d+', texto)
+
+
+def test_formato_prometheus():
+    metricas = RegistroMetricas("prueba")
+    for total, consultas in ((0.003, 2), (0.2, 2), (30.0, 400)):
+        medicion = Medicion()
+        medicion.consultas = consultas
+        metricas.registrar("GET", "/productos/", 200, total, medicion)
+    metricas.registrar("POST", "/productos/", 422, 0.001, Medicion())
+
+    lineas = metricas.exportar().splitlines()
+    etiquetas = 'method="GET",route="/productos/"'
+    assert 'prueba_requests_total{method="GET",route="/productos/",status="200"} 3' in lineas
+    assert 'prueba_requests_total{method="POST",route="/productos/",status="422"} 1' in lineas
+    # Buckets acumulados: 0.003 cae en le=0.005, 0.2 en le=0.25 y 30 solo en +Inf.
+    assert f'prueba_request_duration_seconds_bucket{{{etiquetas},le="0.0025"}} 0' in lineas
+    assert f'prueba_request_duration_seconds_bucket{{{etiquetas},le="0.005"}} 1' in lineas
+    assert f'prueba_request_duration_seconds_bucket{{{etiquetas},le="0.25"}} 2' in lineas
+    assert f'prueba_request_duration_seconds_bucket{{{etiquetas},le="10.0"}} 2' in lineas
+    assert f'prueba_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} 3' in lineas
+    assert f'prueba_request_duration_seconds_count{{{etiquetas}}} 3' in lineas
+    assert f'prueba_request_db_queries_bucket{{{etiquetas},le="250"}} 2' in lineas
+    assert lineas.count("# TYPE prueba_request_db_queries histogram") == 1
+    assert lineas.index("# TYPE prueba_requests_total counter") < lineas.index(
+        'prueba_requests_total{method="GET",route="/productos/",status="200"} 3')
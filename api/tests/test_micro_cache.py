@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import promociones
+from app.core.micro_cache import MicroCache, cache_lecturas
+from conftest import capturar_consultas, poblar_catalogo
+
+
+def test_muchos_fallos_juntos_calculan_una_vez():
+    cache = MicroCache()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.1)
+        return b"[]", '"x"'
+
+    with ThreadPoolExecutor(50) as hilos:
+        resultados = list(hilos.map(lambda _: cache.obtener("productos", calcular), range(50)))
+    assert resultados == [(b"[]", '"x"')] * 50
+    assert len(llamadas) == 1
+    assert (cache.fallos, cache.coalescidos + cache.aciertos) == (1, 49)
+
+
+def test_el_error_llega_a_todos_y_no_se_guarda():
+    cache = MicroCache()
+    empezo = threading.Event()
+
+    def fallar():
+        empezo.set()
+        time.sleep(0.05)
+        raise RuntimeError("base caída")
+
+    with ThreadPoolExecutor(2) as hilos:
+        lider = hilos.submit(cache.obtener, "productos", fallar)
+        empezo.wait()
+        seguidor = hilos.submit(cache.obtener, "productos", lambda: (b"no", "no"))
+        for futuro in (lider, seguidor):
+            with pytest.raises(RuntimeError):
+                futuro.result()
+    assert cache.obtener("productos", lambda: (b"[1]", "e")) == (b"[1]", "e")
+
+
+def test_lo_calculado_antes_de_una_escritura_no_se_guarda():
+    cache = MicroCache()
+    empezo, seguir = threading.Event(), threading.Event()
+
+    def lento():
+        empezo.set()
+        seguir.wait()
+        return b"viejo", "v"
+
+    with ThreadPoolExecutor(2) as hilos:
+        viejo = hilos.submit(cache.obtener, "productos", lento)
+        empezo.wait()
+        cache.invalidar()
+        # Quien llega después de la escritura no se suma al cálculo viejo.
+        assert cache.obtener("productos", lambda: (b"nuevo", "n")) == (b"nuevo", "n")
+        seguir.set()
+        assert viejo.result() == (b"viejo", "v")
+    assert cache.obtener("productos", lambda: (b"otro", "o")) == (b"nuevo", "n")
+
+
+def test_vence_y_descarta_la_variante_menos_usada():
+    cache = MicroCache(maximo=2, ttl=0.05)
+    cache.obtener("a", lambda: (b"a", "a"))
+    cache.obtener("b", lambda: (b"b", "b"))
+    cache.obtener("a", lambda: (b"?", "?"))
+    cache.obtener("c", lambda: (b"c", "c"))
+    assert cache.obtener("a", lambda: (b"?", "?")) == (b"a", "a")
+    assert cache.obtener("b", lambda: (b"b2", "b2")) == (b"b2", "b2")
+    time.sleep(0.06)
+    assert cache.obtener("a", lambda: (b"a2", "a2")) == (b"a2", "a2")
+
+
+def test_listados_sin_consultas_hasta_la_proxima_escritura(cliente, monkeypatch):
+    # Como en producción, la versión de las promociones no se revisa en cada request.
+    monkeypatch.setattr(promociones._fuente, "intervalo", 3600)
+    poblar_catalogo(20)
+    for ruta in ("/productos/", "/productos/categorias/"):
+        primera = cliente.get(ruta)
+        with capturar_consultas() as consultas:
+            segunda = cliente.get(ruta, params={})
+        assert len(consultas) == 0, ruta
+        assert (segunda.content, segunda.headers["etag"]) == (primera.content, primera.headers["etag"])
+        assert cliente.get(ruta, headers={"If-None-Match": primera.headers["etag"]}).status_code == 304
+
+    # Las escrituras del repositorio suben la generación: el listado siguiente ya las incluye.
+    categoria = cliente.post("/productos/categorias/", json={"nombre": "Recién creada"}).json()
+    assert categoria in cliente.get("/productos/categorias/").json()
+    cliente.post("/productos/", json={
+        "nombre": "Recién creado", "descripcion": "", "precio": 990, "stock": 1, "en_venta": True,
+        "sku": "NUEVO-1", "destacado": False, "descuento": 0, "categoria_id": categoria["id"],
+    })
+    assert "Recién creado" in {p["nombre"] for p in cliente.get("/productos/").json()}
+    cliente.delete(f"/productos/categorias/{categoria['id']}")
+    assert categoria not in cliente.get("/productos/categorias/").json()
+
+
+def test_parametros_en_otro_orden_comparten_entrada(cliente):
+    cliente.get("/productos/categorias/?a=1&b=2")
+    aciertos = cache_lecturas.aciertos
+    cliente.get("/productos/categorias/?b=2&a=1")
+    assert cache_lecturas.aciertos == aciertos + 1
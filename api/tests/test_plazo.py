@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import httpx
+import pytest
+import requests
+from sqlalchemy.exc import OperationalError
+
+from app.core import plazo
+from app.core.database import engine
+
+
+@contextmanager
+def _con_plazo(segundos):
+    token = plazo._limite.set(time.monotonic() + segundos)
+    try:
+        yield
+    finally:
+        plazo._limite.reset(token)
+
+
+def _respuesta_mindicador():
+    return httpx.Response(200, json={"serie": [{"valor": 950.0, "fecha": "2025-06-30T00:00:00"}]})
+
+
+def test_llega_vencido_se_rechaza_sin_ejecutar(cliente):
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get") as get:
+        respuesta = cliente.get("/banco-central/valor-dolar", headers={"X-Deadline-Ms": "0"})
+    assert respuesta.status_code == 504
+    get.assert_not_called()
+
+
+def test_el_timeout_saliente_es_lo_que_queda_del_plazo(cliente):
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get",
+                    return_value=_respuesta_mindicador()) as get:
+        assert cliente.get("/banco-central/valor-dolar", headers={"X-Deadline-Ms": "800"}).status_code == 200
+        assert get.call_args.kwargs["timeout"] <= 0.8
+        # Sin header igual hay timeout: nunca se espera indefinidamente a mindicador.
+        assert cliente.get("/banco-central/valor-dolar").status_code == 200
+        assert get.call_args.kwargs["timeout"] == 5.0
+
+
+def test_sin_tiempo_util_no_se_llama_al_servicio_externo(cliente):
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get") as get:
+        respuesta = cliente.get("/banco-central/valor-dolar", headers={"X-Deadline-Ms": "20"})
+    assert respuesta.status_code == 504
+    get.assert_not_called()
+
+
+def test_servicio_externo_que_no_responde_a_tiempo_da_504(cliente):
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get", side_effect=httpx.ReadTimeout("lento")):
+        respuesta = cliente.get("/banco-central/valor-dolar", headers={"X-Deadline-Ms": "500"})
+    assert respuesta.status_code == 504
+    assert "mindicador" in respuesta.json()["detail"]
+
+    with mock.patch("app.mercado_pago.infrastructure.repository.sdk") as sdk:
+        sdk.preference.return_value.create.side_effect = requests.ReadTimeout()
+        respuesta = cliente.post("/mercado-pago/crear-pago", json={"title": "Martillo", "quantity": 1, "unit_price": 1},
+                                 headers={"X-Deadline-Ms": "1500"})
+    assert respuesta.status_code == 504
+    opciones = sdk.preference.return_value.create.call_args.args[1]
+    assert opciones.connection_timeout <= 1.5 and opciones.max_retries == 0
+
+
+def test_la_consulta_se_interrumpe_al_vencer_el_plazo():
+    lenta = ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+             "SELECT COUNT(*) FROM n")
+    inicio = time.perf_counter()
+    with _con_plazo(0.1), pytest.raises(OperationalError, match="interrupted"), engine.connect() as conn:
+        conn.exec_driver_sql(lenta)
+    assert time.perf_counter() - inicio < 1
+    # Sin plazo (fuera de un request) la conexión sigue funcionando normalmente.
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT 1").scalar() == 1
@@ -0,0 +1,103 @@
+from itertools import count
+from unittest import mock
+
+import pytest
+from ferramas_comun import exportacion_arrow
+
+from app.main import app
+from conftest import poblar_catalogo, presupuesto_consultas
+
+_secuencia = count(1)
+
+
+def _categoria_vacia(cliente):
+    return cliente.post("/productos/categorias/", json={"nombre": f"Temporal {next(_secuencia)}"}).json()["id"]
+
+
+def _producto(cliente):
+    n = next(_secuencia)
+    categoria_id = _categoria_vacia(cliente)
+    return cliente.post("/productos/", json={
+        "nombre": f"Temporal {n}", "descripcion": "", "precio": 990, "stock": 1, "en_venta": True,
+        "sku": f"TMP-{n}", "destacado": False, "descuento": 0, "categoria_id": categoria_id,
+    }).json()["id"]
+
+
+def _nuevo_producto(cliente):
+    n = next(_secuencia)
+    return {
+        "nombre": f"Nuevo {n}", "descripcion": "", "precio": 1990, "stock": 3, "en_venta": True,
+        "sku": f"NEW-{n}", "destacado": False, "descuento": 0, "categoria_id": _categoria_vacia(cliente),
+    }
+
+
+# (método, ruta) -> (máximo de consultas, función que arma la petición). Cada escritura cuenta
+# además el aviso a la cola de relacionados (`cola_trabajos.encolar_relacionados`).
+PRESUPUESTOS = {
+    ("GET", "/"): (0, lambda c: ("/", None)),
+    ("GET", "/productos/categorias/"): (1, lambda c: ("/productos/categorias/", None)),
+    ("GET", "/productos/categorias/estadisticas"): (1, lambda c: ("/productos/categorias/estadisticas", None)),
+    ("POST", "/productos/categorias/"): (3, lambda c: ("/productos/categorias/", {"nombre": f"Nueva {next(_secuencia)}"})),
+    # La ruta y el repositorio buscan la categoría con el mismo cargador: un solo SELECT.
+    ("DELETE", "/productos/categorias/{categoria_id}"): (4, lambda c: (f"/productos/categorias/{_categoria_vacia(c)}", None)),
+    # El catálogo y, a lo más una vez por intervalo, la versión de las promociones.
+    ("GET", "/productos/"): (2, lambda c: ("/productos/", None)),
+    ("POST", "/productos/"): (5, lambda c: ("/productos/", _nuevo_producto(c))),
+    ("POST", "/productos/actualizacion-masiva"): (2, lambda c: ("/productos/actualizacion-masiva", {
+        "filtro": {"stock_max": 0}, "cambios": {"en_venta": False},
+    })),
+    ("GET", "/productos/cambios"): (1, lambda c: ("/productos/cambios?since=0&limite=100", None)),
+    ("GET", "/productos/{producto_id}/relacionados"): (1, lambda c: (f"/productos/{_producto(c)}/relacionados", None)),
+    ("DELETE", "/productos/{producto_id}"): (3, lambda c: (f"/productos/{_producto(c)}", None)),
+    # Después de las escrituras de arriba: aplica los cambios pendientes del feed en una consulta.
+    ("GET", "/productos/sugerir"): (1, lambda c: ("/productos/sugerir?q=prod", None)),
+    # Productos y categorías en paralelo, cada uno con su consulta, más la versión de las promociones.
+    ("GET", "/vitrina/"): (3, lambda c: ("/vitrina/?limite=20", None)),
+    ("GET", "/banco-central/valor-dolar"): (0, lambda c: ("/banco-central/valor-dolar", None)),
+    ("POST", "/mercado-pago/crear-pago"): (0, lambda c: ("/mercado-pago/crear-pago", {
+        "title": "Martillo", "quantity": 1, "unit_price": 15000,
+    })),
+}
+if exportacion_arrow.disponible:
+    # Conexión sqlite3 propia de solo lectura: no pasa por el engine.
+    PRESUPUESTOS[("GET", "/productos/exportar")] = (0, lambda c: ("/productos/exportar", None))
+
+
+@pytest.fixture(autouse=True)
+def upstreams_falsos():
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual",
+                    return_value={"valor": 950.0, "fecha": "2025-06-30T00:00:00"}), \
+         mock.patch("app.mercado_pago.application.service.crear_preferencia",
+                    return_value={"init_point": "https://mp.test/init", "id": "pref-1"}):
+        yield
+
+
+def _medir_rutas(cliente):
+    conteos = {}
+    for (metodo, ruta), (maximo, peticion) in PRESUPUESTOS.items():
+        url, cuerpo = peticion(cliente)
+        with presupuesto_consultas(maximo, f"{metodo} {url}") as registro:
+            response = cliente.request(metodo, url, json=cuerpo)
+        assert response.status_code < 400, (metodo, url, response.text)
+        conteos[(metodo, ruta)] = len(registro)
+    return conteos
+
+
+def test_todas_las_rutas_tienen_presupuesto():
+    rutas = {
+        (metodo.upper(), ruta)
+        for ruta, operaciones in app.openapi()["paths"].items()
+        for metodo in operaciones
+    }
+    assert rutas - set(PRESUPUESTOS) == set()
+
+
+def test_consultas_constantes_al_crecer_el_catalogo(cliente):
+    poblar_catalogo(10)
+    pequeno = _medir_rutas(cliente)
+
+    poblar_catalogo(10_000 - 10)
+    assert len(cliente.get("/productos/").json()) >= 10_000
+    grande = _medir_rutas(cliente)
+
+    assert pequeno == grande
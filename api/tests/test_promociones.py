@@ -0,0 +1,45 @@
+from unittest import mock
+
+from app.core.database import engine
+from conftest import poblar_catalogo
+
+DOLAR = {"valor": 950.0, "fecha": "2025-06-30T00:00:00"}
+
+
+def _promocion(nombre, porcentaje, categoria_id=None, segmento="todos", acumulable=False):
+    # Como la guardaría el admin de Django: la API solo lee `app_promocion`.
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO app_promocion (nombre, porcentaje, categoria_id, sku, cantidad_minima, segmento, "
+            "desde, hasta, acumulable, activa, actualizada) "
+            "VALUES (?, ?, ?, NULL, 1, ?, NULL, NULL, ?, 1, CURRENT_TIMESTAMP)",
+            (nombre, porcentaje, categoria_id, segmento, acumulable),
+        )
+
+
+def test_listado_y_vitrina_cotizan_con_las_promociones_de_invitado(cliente):
+    poblar_catalogo(12, categorias=2)
+    categoria_id = cliente.get("/productos/categorias/").json()[0]["id"]
+    antes = cliente.get("/productos/")
+    _promocion("Semana de la categoría", 30, categoria_id)
+    _promocion("Solo clientes", 50, segmento="clientes", acumulable=True)
+
+    despues = cliente.get("/productos/")
+    # Sin escrituras en el catálogo: la versión de las promociones cambia la respuesta y el ETag.
+    assert despues.headers["etag"] != antes.headers["etag"]
+    productos = {p["id"]: p for p in despues.json()}
+    for producto in productos.values():
+        if producto["categoria_id"] == categoria_id:
+            # Gana el mayor descuento no acumulable; la regla de clientes no aplica a un invitado.
+            assert producto["precio_final"] == round(producto["precio"] * 0.7, 2)
+            assert producto["promociones"] == ["Semana de la categoría"]
+        else:
+            assert producto["precio_final"] == round(producto["precio"] * (1 - producto["descuento"] / 100), 2)
+            assert producto["promociones"] == []
+
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", return_value=DOLAR):
+        vitrina = cliente.get("/vitrina/", params={"categoria_id": categoria_id}).json()
+    assert vitrina["productos"]
+    for producto in vitrina["productos"]:
+        assert (producto["precio_final"], producto["promociones"]) == (
+            productos[producto["id"]]["precio_final"], productos[producto["id"]]["promociones"])
@@ -0,0 +1,64 @@
+from app.core.indice_prefijos import servicio as sugerencias
+from conftest import capturar_consultas, poblar_catalogo
+
+
+def _producto(cliente, nombre, sku, **extra):
+    categoria_id = cliente.post("/productos/categorias/", json={"nombre": f"Cat {sku}"}).json()["id"]
+    datos = {
+        "nombre": nombre, "descripcion": "", "precio": 990, "stock": 4, "en_venta": True,
+        "sku": sku, "destacado": False, "descuento": 0, "categoria_id": categoria_id,
+    }
+    datos.update(extra)
+    return cliente.post("/productos/", json=datos).json()["id"]
+
+
+def _sugerir(cliente, q, **parametros):
+    response = cliente.get("/productos/sugerir", params={"q": q, **parametros})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_sugiere_por_prefijo_y_sku_ordenado_por_peso(cliente):
+    normal = _producto(cliente, "Taladro Percutor", "TAL-001")
+    destacado = _producto(cliente, "Taladro Inalámbrico", "TAL-002", destacado=True)
+    _producto(cliente, "Martillo", "MAR-001")
+
+    assert [s["id"] for s in _sugerir(cliente, "tala")] == [destacado, normal]
+    assert _sugerir(cliente, "INALAMB") == [{"id": destacado, "nombre": "Taladro Inalámbrico", "sku": "TAL-002"}]
+    assert [s["sku"] for s in _sugerir(cliente, "tal-00")] == ["TAL-001", "TAL-002"]
+    assert len(_sugerir(cliente, "tala", limite=1)) == 1
+    assert _sugerir(cliente, "") == []
+
+
+def test_sigue_las_escrituras_de_la_api_y_las_externas(cliente):
+    producto_id = _producto(cliente, "Serrucho Carpintero", "SER-1")
+    assert len(_sugerir(cliente, "serr")) == 1
+
+    cliente.delete(f"/productos/{producto_id}")
+    assert _sugerir(cliente, "serr") == []
+
+    # Escritura directa sobre la base (como las de Django): llega por el feed de cambios.
+    poblar_catalogo(3)
+    sugerencias.marcar_pendiente()
+    assert len(_sugerir(cliente, "producto")) == 3
+
+    cliente.post("/productos/actualizacion-masiva", json={"cambios": {"en_venta": False}})
+    assert _sugerir(cliente, "producto") == []
+
+
+def test_sin_cambios_no_consulta_la_base(cliente):
+    poblar_catalogo(20)
+    _sugerir(cliente, "prod")
+    with capturar_consultas() as registro:
+        for q in ("p", "pr", "pro", "producto 1", "sku-0000001"):
+            _sugerir(cliente, q)
+    assert len(registro) == 0
+
+
+def test_muchos_cambios_reconstruyen_el_indice(cliente, monkeypatch):
+    _sugerir(cliente, "x")
+    monkeypatch.setattr(sugerencias, "umbral_reconstruccion", 5)
+    monkeypatch.setattr(sugerencias, "en_segundo_plano", False)
+    poblar_catalogo(10)
+    sugerencias.marcar_pendiente()
+    assert len(_sugerir(cliente, "producto", limite=50)) == 10
@@ -0,0 +1,60 @@
+import time
+from unittest import mock
+
+import httpx
+
+from app.productos.infrastructure import repository
+from conftest import poblar_catalogo
+
+DOLAR = {"valor": 950.0, "fecha": "2025-06-30T00:00:00"}
+
+
+def _lento(segundos, resultado):
+    def funcion(*args, **kwargs):
+        time.sleep(segundos)
+        return resultado(*args, **kwargs) if callable(resultado) else resultado
+    return funcion
+
+
+def test_combina_catalogo_categorias_y_dolar(cliente):
+    poblar_catalogo(30, categorias=3)
+    categoria_id = cliente.get("/productos/categorias/").json()[1]["id"]
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", return_value=DOLAR):
+        vitrina = cliente.get("/vitrina/", params={"categoria_id": categoria_id, "limite": 5, "offset": 2}).json()
+
+    assert vitrina["errores"] == {}
+    assert vitrina["dolar"]["valor"] == 950.0
+    assert len(vitrina["categorias"]) == 3
+    todos = {p["id"]: p for p in cliente.get("/productos/").json() if p["categoria_id"] == categoria_id}
+    assert [p["id"] for p in vitrina["productos"]] == list(todos)[2:7]
+    for producto in vitrina["productos"]:
+        assert producto["categoria"]["id"] == categoria_id
+        # Mismo precio final que el listado; el precio en dólares es el del precio final.
+        assert producto["precio_final"] == todos[producto["id"]]["precio_final"]
+        assert producto["precio_usd"] == round(producto["precio_final"] / 950.0, 2)
+
+
+def test_tarda_lo_que_el_componente_mas_lento(cliente):
+    poblar_catalogo(10)
+    with mock.patch("app.banco_central.application.service.obtener_dolar_actual", _lento(0.3, DOLAR)), \
+            mock.patch.object(repository, "obtener_categorias", _lento(0.3, repository.obtener_categorias)), \
+            mock.patch.object(repository, "obtener_productos_pagina", _lento(0.3, repository.obtener_productos_pagina)):
+        inicio = time.perf_counter()
+        vitrina = cliente.get("/vitrina/").json()
+        duracion = time.perf_counter() - inicio
+    assert len(vitrina["productos"]) == 10 and vitrina["dolar"] is not None
+    # En serie serían 0,9 s.
+    assert duracion < 0.6
+
+
+def test_sin_dolar_la_vitrina_llega_igual(cliente):
+    poblar_catalogo(5)
+    with mock.patch("app.banco_central.infrastructure.repository.httpx.get",
+                    side_effect=httpx.ReadTimeout("lento")):
+        respuesta = cliente.get("/vitrina/", headers={"X-Deadline-Ms": "500"})
+    assert respuesta.status_code == 200
+    vitrina = respuesta.json()
+    assert vitrina["dolar"] is None
+    assert "mindicador" in vitrina["errores"]["dolar"]
+    assert len(vitrina["productos"]) == 5
+    assert {p["precio_usd"] for p in vitrina["productos"]} == {None}
@@ -0,0 +1,8 @@
+"""
+Código compartido por FerramasStore (Django) y la API (FastAPI).
+
+Los dos proyectos tienen un paquete `app` propio, así que lo que no depende
+del framework ni del ORM vive aquí y cada proyecto conserva solo el
+pegamento: cómo ejecuta las consultas, qué conexión usa y cómo se engancha a
+sus requests. Se instala con `pip install -e ./comun` desde la raíz del repo.
+"""
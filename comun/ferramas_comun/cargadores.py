@@ -0,0 +1,65 @@
+"""
+Cargadores por id (patrón DataLoader).
+
+`pedir(id)` solo anota el id y devuelve un `Pendiente`. Al leer el valor de
+cualquiera de ellos, todos los ids anotados hasta ese momento se resuelven con
+una sola llamada a `buscar_muchos` (un `WHERE id IN (...)`). Lo cargado queda
+en caché hasta `olvidar()`, así que volver a pedir un id no consulta.
+
+El alcance lo pone cada proyecto: la API guarda los cargadores en la sesión de
+SQLAlchemy del request (`app.core.cargadores`) y Django en un ContextVar que
+abre `CargadoresMiddleware` (`app.infrastructure.cargadores`).
+"""
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Pendiente(Generic[T]):
+    __slots__ = ("_cargador", "_id")
+
+    def __init__(self, cargador: "Cargador[T]", objeto_id: int):
+        self._cargador = cargador
+        self._id = objeto_id
+
+    def valor(self) -> Optional[T]:
+        return self._cargador._resolver(self._id)
+
+
+class Cargador(Generic[T]):
+    def __init__(self, buscar_muchos: Callable[[List[int]], Dict[int, T]]):
+        self._buscar_muchos = buscar_muchos
+        self._cache: Dict[int, Optional[T]] = {}
+        self._pendientes: Dict[int, None] = {}  # conjunto ordenado
+
+    def pedir(self, objeto_id: int) -> Pendiente[T]:
+        if objeto_id not in self._cache:
+            self._pendientes[objeto_id] = None
+        return Pendiente(self, objeto_id)
+
+    def cargar(self, objeto_id: int) -> Optional[T]:
+        return self.pedir(objeto_id).valor()
+
+    def cargar_muchos(self, objeto_ids: Iterable[int]) -> List[Optional[T]]:
+        """Uno por id, en el mismo orden (None si no existe), con a lo más una consulta."""
+        pendientes = [self.pedir(objeto_id) for objeto_id in objeto_ids]
+        return [pendiente.valor() for pendiente in pendientes]
+
+    def preparar(self, objeto_id: int, valor: Optional[T]):
+        """Deja en caché algo que ya se tiene (p. ej. de un listado) para no volver a buscarlo."""
+        self._pendientes.pop(objeto_id, None)
+        self._cache[objeto_id] = valor
+
+    def olvidar(self):
+        self._cache.clear()
+
+    def _resolver(self, objeto_id: int) -> Optional[T]:
+        if objeto_id not in self._cache:
+            # Un Pendiente ya resuelto cuyo valor se olvidó no está anotado: va en la misma tanda.
+            self._pendientes[objeto_id] = None
+            ids = list(self._pendientes)
+            self._pendientes.clear()
+            encontrados = self._buscar_muchos(ids)
+            for pendiente_id in ids:
+                self._cache[pendiente_id] = encontrados.get(pendiente_id)
+        return self._cache[objeto_id]
@@ -0,0 +1,338 @@
+"""
+Generador determinista de catálogos sintéticos y carga masiva en SQLite.
+
+La misma semilla produce siempre las mismas categorías y productos. Las filas
+se escriben directamente sobre las tablas `app_categoria` y `app_producto`
+con los tipos que esperan tanto el ORM de Django como los modelos SQLAlchemy
+de la API (enteros 0/1 para booleanos, fechas ISO en UTC sin zona).
+"""
+import math
+from bisect import bisect_right
+import random
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, List, Sequence, Tuple
+
+
+CATEGORIAS_BASE = [
+    "Herramientas Manuales",
+    "Materiales Básicos",
+    "Equipos de Seguridad",
+    "Tornillos y Anclajes",
+    "Fijaciones",
+    "Equipos de Medición",
+]
+
+_FAMILIAS_CATEGORIA = [
+    "Herramientas", "Accesorios", "Insumos", "Equipos", "Materiales", "Repuestos",
+]
+_AREAS_CATEGORIA = [
+    "Eléctricas", "de Jardín", "de Pintura", "de Gasfitería", "de Carpintería",
+    "de Soldadura", "de Construcción", "de Iluminación", "de Limpieza",
+    "de Ferretería", "Neumáticas", "de Climatización",
+]
+
+_TIPOS_PRODUCTO = [
+    "Martillo", "Taladro", "Destornillador", "Alicate", "Llave Inglesa", "Serrucho",
+    "Sierra Circular", "Esmeril Angular", "Lijadora", "Nivel", "Cinta Métrica",
+    "Huincha", "Escuadra", "Guantes", "Casco", "Lentes de Seguridad", "Mascarilla",
+    "Tornillo", "Perno", "Tarugo", "Clavo", "Anclaje Químico", "Abrazadera",
+    "Brocha", "Rodillo", "Cemento", "Yeso", "Pegamento", "Silicona", "Cable",
+    "Interruptor", "Enchufe", "Ampolleta", "Manguera", "Llave de Paso", "Candado",
+    "Bisagra", "Escalera", "Carretilla", "Pala", "Chuzo", "Formón", "Cepillo",
+]
+_MATERIALES = [
+    "de Acero", "de Acero Inoxidable", "de Fibra de Vidrio", "de Aluminio",
+    "de Madera", "de PVC", "de Bronce", "Galvanizado", "de Nylon", "de Goma",
+]
+_ATRIBUTOS = [
+    "Profesional", "Industrial", "Reforzado", "Compacto", "Inalámbrico", "Multiuso",
+    "Ergonómico", "Antideslizante", "Premium", "Económico", "Magnético", "Plegable",
+]
+_MEDIDAS = [
+    "1/4\"", "3/8\"", "1/2\"", "3/4\"", "5 m", "8 m", "20V", "12V", "500 g",
+    "1 kg", "25 kg", "6 mm", "8 mm", "10 mm", "Talla M", "Talla L",
+]
+_USOS = [
+    "trabajos de construcción", "uso doméstico", "carpintería fina", "obras civiles",
+    "instalaciones eléctricas", "gasfitería", "jardinería", "montajes en altura",
+    "fijación en concreto", "mantención industrial",
+]
+_CUALIDADES = [
+    "alta durabilidad", "mango ergonómico", "resistencia a la corrosión",
+    "bajo peso", "garantía de 12 meses", "certificación de seguridad",
+    "terminación anticorrosiva", "excelente relación precio-calidad",
+]
+
+_DESCUENTOS = (5, 10, 15, 20, 25, 30, 40, 50)
+
+COLUMNAS_PRODUCTO = (
+    "nombre", "descripcion", "precio", "stock", "en_venta", "sku",
+    "fecha_creacion", "fecha_actualizacion", "destacado", "descuento", "categoria_id",
+)
+
+INSERT_PRODUCTO = (
+    f"INSERT INTO app_producto ({', '.join(COLUMNAS_PRODUCTO)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNAS_PRODUCTO)})"
+)
+
+# Con los triggers del feed de cambios (migración 0006) y de las estadísticas (0009)
+# eliminados durante la carga, lo que habrían escrito fila por fila se escribe al final
+# en una pasada. Las bajas de `limpiar` quedan como tombstones antes del DELETE.
+TOMBSTONES = """
+INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+SELECT id, 'delete', CURRENT_TIMESTAMP FROM app_producto
+"""
+# Como POBLAR de la migración 0006, pero solo para los productos nuevos y con OR REPLACE:
+# en una tabla sin AUTOINCREMENT, después de `limpiar` se reutilizan ids con tombstone.
+POBLAR_CAMBIOS = """
+INSERT OR REPLACE INTO app_productocambio (producto_id, operacion, fecha)
+SELECT id, 'upsert', fecha_actualizacion FROM app_producto WHERE id > ? ORDER BY id
+"""
+# POBLAR de la migración 0009: la tabla completa desde una agregación.
+POBLAR_ESTADISTICAS = [
+    "DELETE FROM app_estadisticacategoria",
+    """
+    INSERT INTO app_estadisticacategoria (categoria_id, productos, en_venta, unidades,
+                                          valor_stock_centavos, descuento_centesimas, destacados)
+    SELECT categoria_id, COUNT(*), SUM(COALESCE(en_venta, 0)), SUM(COALESCE(stock, 0)),
+           SUM(CAST(ROUND(COALESCE(precio, 0) * COALESCE(stock, 0) * 100) AS INTEGER)),
+           SUM(CAST(ROUND(COALESCE(descuento, 0) * 100) AS INTEGER)), SUM(COALESCE(destacado, 0))
+    FROM app_producto GROUP BY categoria_id
+    """,
+]
+
+
+@dataclass(frozen=True)
+class ConfiguracionCatalogo:
+    """Parámetros del catálogo sintético. Todas las probabilidades van de 0 a 1."""
+    productos: int = 10_000
+    categorias: int = len(CATEGORIAS_BASE)
+    semilla: int = 42
+    # Sesgo de productos por categoría (Zipf); 0 reparte de forma uniforme.
+    sesgo_categorias: float = 1.0
+    # Precio log-normal en pesos chilenos, redondeado a la decena.
+    precio_mediana: float = 12_000
+    precio_dispersion: float = 1.0
+    precio_minimo: int = 490
+    precio_maximo: int = 2_500_000
+    stock_promedio: float = 80
+    prob_sin_stock: float = 0.05
+    prob_descuento: float = 0.2
+    prob_destacado: float = 0.03
+    prob_en_venta: float = 0.95
+    fecha_inicial: datetime = datetime(2024, 1, 1)
+    dias_historia: int = 540
+
+
+def generar_categorias(config: ConfiguracionCatalogo) -> List[Tuple[str, str]]:
+    """
+    Devuelve `config.categorias` pares (nombre, descripcion) únicos.
+    Las primeras corresponden a las categorías reales de la tienda.
+    """
+    nombres = list(CATEGORIAS_BASE[:config.categorias])
+    combinaciones = [f"{familia} {area}" for area in _AREAS_CATEGORIA for familia in _FAMILIAS_CATEGORIA]
+    vuelta = 1
+    while len(nombres) < config.categorias:
+        for nombre in combinaciones:
+            if len(nombres) >= config.categorias:
+                break
+            nombres.append(nombre if vuelta == 1 else f"{nombre} {vuelta}")
+        vuelta += 1
+    return [(nombre, f"Productos de la línea {nombre.lower()}.") for nombre in nombres]
+
+
+def _pesos_zipf(cantidad: int, sesgo: float) -> List[float]:
+    acumulado = []
+    total = 0.0
+    for rango in range(1, cantidad + 1):
+        total += 1.0 / (rango ** sesgo)
+        acumulado.append(total)
+    return acumulado
+
+
+def generar_productos(config: ConfiguracionCatalogo, categoria_ids: Sequence[int],
+                      inicio_sku: int = 1) -> Iterator[tuple]:
+    """
+    Genera filas de producto en el orden de `COLUMNAS_PRODUCTO`.
+    Los SKU son correlativos, así el índice único crece siempre por el final.
+    """
+    if not categoria_ids:
+        raise ValueError("Se necesita al menos una categoría para repartir los productos.")
+    rnd = random.Random(config.semilla)
+    aleatorio = rnd.random
+    pesos = _pesos_zipf(len(categoria_ids), config.sesgo_categorias)
+    peso_total = pesos[-1]
+    mu = math.log(config.precio_mediana)
+    tasa_stock = 1.0 / max(config.stock_promedio, 1.0)
+    segundos_historia = config.dias_historia * 86_400
+    # Formatear fechas con datetime es lo más caro del bucle: se precalcula cada día.
+    dias = [
+        (config.fecha_inicial + timedelta(days=dia)).date().isoformat()
+        for dia in range(config.dias_historia + 31)
+    ]
+
+    def elegir(opciones):
+        return opciones[int(aleatorio() * len(opciones))]
+
+    def fecha(segundos):
+        dia, resto = divmod(segundos, 86_400)
+        hora, resto = divmod(resto, 3_600)
+        return f"{dias[dia]} {hora:02d}:{resto // 60:02d}:{resto % 60:02d}.000000"
+
+    for numero in range(inicio_sku, inicio_sku + config.productos):
+        categoria_id = categoria_ids[bisect_right(pesos, aleatorio() * peso_total)]
+        tipo = elegir(_TIPOS_PRODUCTO)
+        nombre = f"{tipo} {elegir(_MATERIALES)} {elegir(_ATRIBUTOS)} {elegir(_MEDIDAS)}"
+        descripcion = (
+            f"{tipo} {elegir(_ATRIBUTOS).lower()} para {elegir(_USOS)}, "
+            f"con {elegir(_CUALIDADES)} y {elegir(_CUALIDADES)}."
+        )
+        precio = round(rnd.lognormvariate(mu, config.precio_dispersion), -1)
+        precio = int(min(max(precio, config.precio_minimo), config.precio_maximo))
+        if aleatorio() < config.prob_sin_stock:
+            stock = 0
+        else:
+            stock = 1 + int(rnd.expovariate(tasa_stock))
+        descuento = elegir(_DESCUENTOS) if aleatorio() < config.prob_descuento else 0
+        creado = int(aleatorio() * segundos_historia)
+        actualizado = creado + int(aleatorio() * 86_400 * 30)
+        yield (
+            nombre[:100],
+            descripcion,
+            precio,
+            stock,
+            int(aleatorio() < config.prob_en_venta),
+            f"FER-{numero:08d}",
+            fecha(creado),
+            fecha(actualizado),
+            int(aleatorio() < config.prob_destacado),
+            descuento,
+            categoria_id,
+        )
+
+
+def insertar_productos(cursor, filas: Iterator[tuple], tamano_lote: int = 50_000) -> int:
+    """Inserta las filas en lotes con `executemany`. Devuelve la cantidad insertada."""
+    total = 0
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            cursor.executemany(INSERT_PRODUCTO, lote)
+            total += len(lote)
+            lote.clear()
+    if lote:
+        cursor.executemany(INSERT_PRODUCTO, lote)
+        total += len(lote)
+    return total
+
+
+def asegurar_categorias(cursor, categorias: List[Tuple[str, str]]) -> List[int]:
+    """Crea las categorías que falten (por nombre) y devuelve sus ids en el mismo orden."""
+    cursor.executemany(
+        "INSERT OR IGNORE INTO app_categoria (nombre, descripcion) VALUES (?, ?)", categorias
+    )
+    ids = dict(cursor.execute("SELECT nombre, id FROM app_categoria").fetchall())
+    return [ids[nombre] for nombre, _ in categorias]
+
+
+def _indices_secundarios(cursor, tabla: str) -> List[Tuple[str, str]]:
+    # Los índices automáticos (PK, UNIQUE) no tienen SQL y no se pueden eliminar.
+    return cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (tabla,),
+    ).fetchall()
+
+
+def _triggers(cursor, tablas: Sequence[str]) -> List[Tuple[str, str]]:
+    marcadores = ", ".join("?" for _ in tablas)
+    return cursor.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({marcadores})", tuple(tablas)
+    ).fetchall()
+
+
+def _existe_tabla(cursor, tabla: str) -> bool:
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)).fetchone() is not None
+
+
+def cargar_catalogo(ruta_db: str, config: ConfiguracionCatalogo, limpiar: bool = False,
+                    tamano_lote: int = 50_000, progreso=None) -> dict:
+    """
+    Carga el catálogo sintético en la base SQLite compartida.
+
+    Durante la carga se relajan las garantías de durabilidad (journal en
+    memoria, `synchronous=OFF`) y se eliminan los índices secundarios de
+    `app_producto`, que se reconstruyen al final en una sola pasada. También
+    los triggers de `app_producto` y `app_categoria` (feed de cambios y
+    estadísticas por categoría): se recrean al final y el feed y las
+    estadísticas se completan con una sentencia cada uno, no una por fila.
+    """
+    conexion = sqlite3.connect(str(ruta_db), isolation_level=None)
+    cursor = conexion.cursor()
+    journal_anterior = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+    try:
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA cache_size = -262144")
+
+        cursor.execute("BEGIN")
+        triggers = _triggers(cursor, ("app_producto", "app_categoria"))
+        for nombre, _ in triggers:
+            cursor.execute(f'DROP TRIGGER "{nombre}"')
+        feed = _existe_tabla(cursor, "app_productocambio")
+        if limpiar:
+            if feed:
+                cursor.execute(TOMBSTONES)
+            cursor.execute("DELETE FROM app_producto")
+        indices = _indices_secundarios(cursor, "app_producto")
+        for nombre, _ in indices:
+            cursor.execute(f'DROP INDEX "{nombre}"')
+        ultimo_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM app_producto").fetchone()[0]
+
+        categoria_ids = asegurar_categorias(cursor, generar_categorias(config))
+        ultimo = cursor.execute(
+            "SELECT COALESCE(MAX(CAST(SUBSTR(sku, 5) AS INTEGER)), 0) FROM app_producto WHERE sku LIKE 'FER-%'"
+        ).fetchone()[0]
+
+        filas = generar_productos(config, categoria_ids, inicio_sku=ultimo + 1)
+        if progreso:
+            filas = progreso(filas)
+        insertados = insertar_productos(cursor, filas, tamano_lote)
+
+        for _, sql in indices:
+            cursor.execute(sql)
+        if feed:
+            cursor.execute(POBLAR_CAMBIOS, (ultimo_id,))
+        if _existe_tabla(cursor, "app_estadisticacategoria"):
+            for sql in POBLAR_ESTADISTICAS:
+                cursor.execute(sql)
+        for _, sql in triggers:
+            cursor.execute(sql)
+        cursor.execute("COMMIT")
+        cursor.execute("ANALYZE app_producto")
+    except Exception:
+        if conexion.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.execute("PRAGMA synchronous = FULL")
+        cursor.execute(f"PRAGMA journal_mode = {journal_anterior}")
+        conexion.close()
+
+    return {
+        "categorias": len(categoria_ids),
+        "productos": insertados,
+        "indices_reconstruidos": [nombre for nombre, _ in indices],
+        "triggers_recreados": [nombre for nombre, _ in triggers],
+    }
+
+
+def contar_filas(ruta_db: str, tabla: str = "app_producto") -> int:
+    conexion = sqlite3.connect(str(ruta_db))
+    try:
+        return conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+    finally:
+        conexion.close()
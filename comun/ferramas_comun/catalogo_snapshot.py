@@ -0,0 +1,324 @@
+"""
+Snapshot binario de solo lectura del catálogo, compartido entre workers.
+
+Se genera desde la base SQLite y se reemplaza de forma atómica (`os.replace`)
+en cada escritura del catálogo. Cada worker lo abre con `mmap`, así que todas
+las copias comparten las mismas páginas del page cache del sistema operativo.
+Los registros se leen directamente del mapa con `struct.unpack_from`; solo
+los textos se decodifican al acceder a ellos.
+
+Lo usan los dos proyectos: cada uno decide dónde está el archivo y cuándo
+pedir una reconstrucción (`app/infrastructure/snapshot/servicio.py` en
+Django, `app/core/catalogo_snapshot.py` en la API).
+
+Formato (little-endian):
+
+    cabecera    MAGIA, versión, generación, n_categorias, n_productos
+    categorías  id, nombre, descripcion, primer producto, cantidad de productos
+    productos   ordenados por (categoria_id, id): cada categoría es un rango contiguo
+    ids         ids de producto ordenados + posición, para búsqueda binaria
+    textos      UTF-8 concatenado; los registros guardan (offset, largo)
+
+Los montos se guardan en centavos para no arrastrar errores de punto
+flotante. El lector los convierte con `monto`: `monto_float` (por defecto,
+como los schemas de la API) o `monto_decimal` (como los modelos de Django).
+"""
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Union
+
+MAGIA = b"FCAT"
+VERSION_FORMATO = 1
+NULO = 0xFFFFFFFF
+
+CABECERA = struct.Struct("<4sIQII")
+CATEGORIA = struct.Struct("<qIIIIII")
+PRODUCTO = struct.Struct("<qqqqiiBB2xIIIIII")
+ID_PRODUCTO = struct.Struct("<qI")
+
+
+Monto = Union[float, Decimal]
+
+
+def monto_float(centavos: int) -> float:
+    return centavos / 100
+
+
+def monto_decimal(centavos: int) -> Decimal:
+    return Decimal(centavos).scaleb(-2)
+
+
+class CategoriaSnapshot(NamedTuple):
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+
+
+class ProductoSnapshot(NamedTuple):
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    precio: Monto
+    precio_final: Monto
+    descuento: Monto
+    stock: int
+    en_venta: bool
+    destacado: bool
+    sku: Optional[str]
+    categoria_id: int
+    categoria: CategoriaSnapshot
+
+
+# ----------------------------------------------------------------------
+# Escritura
+
+
+class _Textos:
+    def __init__(self):
+        self.datos = bytearray()
+
+    def agregar(self, texto: Optional[str]):
+        if texto is None:
+            return NULO, 0
+        codificado = texto.encode("utf-8")
+        offset = len(self.datos)
+        self.datos += codificado
+        return offset, len(codificado)
+
+
+def generar_snapshot(ruta_db: str, ruta_snapshot: str) -> int:
+    """
+    Lee el catálogo completo de `ruta_db` y reemplaza `ruta_snapshot` de forma
+    atómica. Devuelve la generación escrita.
+    """
+    conexion = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    try:
+        return escribir_snapshot(conexion, ruta_snapshot)
+    finally:
+        conexion.close()
+
+
+def escribir_snapshot(conexion: sqlite3.Connection, ruta_snapshot: str) -> int:
+    """Como `generar_snapshot`, con una conexión ya abierta (p. ej. la de un test, dentro de su transacción)."""
+    categorias = conexion.execute(
+        "SELECT id, nombre, descripcion FROM app_categoria ORDER BY id"
+    ).fetchall()
+    productos = conexion.execute(
+        "SELECT id, categoria_id, precio, descuento, stock, en_venta, destacado, nombre, descripcion, sku "
+        "FROM app_producto ORDER BY categoria_id, id"
+    )
+    textos = _Textos()
+    registros = bytearray()
+    rangos: Dict[int, list] = {}
+    ids = []
+    for posicion, (pid, cid, precio, descuento, stock, en_venta, destacado, nombre, descripcion, sku) \
+            in enumerate(productos):
+        precio_c = round((precio or 0) * 100)
+        descuento = descuento or 0
+        final_c = round(precio_c * (100 - descuento) / 100)
+        registros += PRODUCTO.pack(
+            pid, cid, precio_c, final_c, round(descuento * 100), stock or 0,
+            bool(en_venta), bool(destacado),
+            *textos.agregar(nombre), *textos.agregar(descripcion), *textos.agregar(sku),
+        )
+        rango = rangos.setdefault(cid, [posicion, 0])
+        rango[1] += 1
+        ids.append((pid, posicion))
+
+    tabla_categorias = bytearray()
+    for cid, nombre, descripcion in categorias:
+        inicio, cantidad = rangos.get(cid, (0, 0))
+        tabla_categorias += CATEGORIA.pack(cid, *textos.agregar(nombre), *textos.agregar(descripcion), inicio, cantidad)
+    ids.sort()
+    tabla_ids = b"".join(ID_PRODUCTO.pack(pid, posicion) for pid, posicion in ids)
+
+    generacion = time.time_ns()
+    directorio = os.path.dirname(os.path.abspath(ruta_snapshot))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(CABECERA.pack(MAGIA, VERSION_FORMATO, generacion, len(categorias), len(ids)))
+            archivo.write(tabla_categorias)
+            archivo.write(registros)
+            archivo.write(tabla_ids)
+            archivo.write(textos.datos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta_snapshot)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+        raise
+    return generacion
+
+
+# ----------------------------------------------------------------------
+# Lectura
+
+
+class CatalogoSnapshot:
+    """Vista de solo lectura sobre un archivo de snapshot mapeado en memoria."""
+
+    def __init__(self, ruta: str, monto: Callable[[int], Monto] = monto_float):
+        self._monto = monto
+        with open(ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, self.generacion, self.n_categorias, self.n_productos = CABECERA.unpack_from(self._mapa, 0)
+        if magia != MAGIA or version != VERSION_FORMATO:
+            raise ValueError(f"Snapshot de catálogo inválido: {ruta}")
+        self._inicio_categorias = CABECERA.size
+        self._inicio_productos = self._inicio_categorias + self.n_categorias * CATEGORIA.size
+        self._inicio_ids = self._inicio_productos + self.n_productos * PRODUCTO.size
+        self._inicio_textos = self._inicio_ids + self.n_productos * ID_PRODUCTO.size
+        # Las categorías son pocas: se decodifican una vez.
+        self._categorias = {}
+        self._rangos = {}
+        for indice in range(self.n_categorias):
+            cid, n_off, n_len, d_off, d_len, inicio, cantidad = CATEGORIA.unpack_from(
+                self._mapa, self._inicio_categorias + indice * CATEGORIA.size
+            )
+            self._categorias[cid] = CategoriaSnapshot(cid, self._texto(n_off, n_len), self._texto(d_off, d_len))
+            self._rangos[cid] = (inicio, cantidad)
+        self._por_nombre = {categoria.nombre: categoria for categoria in self._categorias.values()}
+
+    def _texto(self, offset: int, largo: int) -> Optional[str]:
+        if offset == NULO:
+            return None
+        inicio = self._inicio_textos + offset
+        return self._mapa[inicio:inicio + largo].decode("utf-8")
+
+    def _producto(self, posicion: int) -> ProductoSnapshot:
+        (pid, cid, precio_c, final_c, descuento_c, stock, en_venta, destacado,
+         n_off, n_len, d_off, d_len, s_off, s_len) = PRODUCTO.unpack_from(
+            self._mapa, self._inicio_productos + posicion * PRODUCTO.size
+        )
+        return ProductoSnapshot(
+            pid, self._texto(n_off, n_len), self._texto(d_off, d_len),
+            self._monto(precio_c), self._monto(final_c), self._monto(descuento_c), stock,
+            bool(en_venta), bool(destacado), self._texto(s_off, s_len), cid, self._categorias.get(cid),
+        )
+
+    def categorias(self):
+        return list(self._categorias.values())
+
+    def categoria(self, categoria_id: int) -> Optional[CategoriaSnapshot]:
+        return self._categorias.get(categoria_id)
+
+    def categoria_por_nombre(self, nombre: str) -> Optional[CategoriaSnapshot]:
+        return self._por_nombre.get(nombre)
+
+    def productos(self) -> Iterator[ProductoSnapshot]:
+        for posicion in range(self.n_productos):
+            yield self._producto(posicion)
+
+    def productos_por_id(self) -> Iterator[ProductoSnapshot]:
+        """Todos los productos en orden de id (el de la base), usando el índice de ids."""
+        for indice in range(self.n_productos):
+            _, posicion = ID_PRODUCTO.unpack_from(self._mapa, self._inicio_ids + indice * ID_PRODUCTO.size)
+            yield self._producto(posicion)
+
+    def productos_de_categoria(self, categoria_id: int, en_venta: Optional[bool] = None) -> Iterator[ProductoSnapshot]:
+        inicio, cantidad = self._rangos.get(categoria_id, (0, 0))
+        for posicion in range(inicio, inicio + cantidad):
+            producto = self._producto(posicion)
+            if en_venta is None or producto.en_venta == en_venta:
+                yield producto
+
+    def producto(self, producto_id: int) -> Optional[ProductoSnapshot]:
+        bajo, alto = 0, self.n_productos
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            pid, posicion = ID_PRODUCTO.unpack_from(self._mapa, self._inicio_ids + medio * ID_PRODUCTO.size)
+            if pid == producto_id:
+                return self._producto(posicion)
+            if pid < producto_id:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return None
+
+
+class LectorSnapshot:
+    """
+    Mantiene abierto el snapshot vigente. Como mucho cada `intervalo` segundos
+    revisa con `os.stat` si el archivo fue reemplazado y, si cambió, mapea el
+    nuevo sin reiniciar el worker. El mapa anterior se libera cuando ya nadie
+    lo usa.
+    """
+
+    def __init__(self, ruta: Optional[str], intervalo: float = 1.0, monto: Callable[[int], Monto] = monto_float):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.monto = monto
+        self._actual: Optional[CatalogoSnapshot] = None
+        self._firma = None
+        self._revisado_en = 0.0
+        self._lock = threading.Lock()
+
+    def actual(self) -> Optional[CatalogoSnapshot]:
+        if not self.ruta:
+            return None
+        ahora = time.monotonic()
+        if ahora - self._revisado_en < self.intervalo:
+            return self._actual
+        with self._lock:
+            self._revisado_en = ahora
+            try:
+                estado = os.stat(self.ruta)
+            except OSError:
+                self._actual, self._firma = None, None
+                return None
+            firma = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+            if firma != self._firma:
+                try:
+                    self._actual = CatalogoSnapshot(self.ruta, self.monto)
+                    self._firma = firma
+                except (OSError, ValueError, struct.error):
+                    self._actual, self._firma = None, None
+            return self._actual
+
+
+class ReconstructorSnapshot:
+    """
+    Regenera el snapshot en un hilo de fondo. Varias escrituras seguidas se
+    agrupan en una sola reconstrucción (`espera` segundos después de la última).
+    """
+
+    def __init__(self, ruta_db: str, ruta_snapshot: str, espera: float = 1.0):
+        self.ruta_db = ruta_db
+        self.ruta_snapshot = ruta_snapshot
+        self.espera = espera
+        self._pendiente = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def solicitar(self):
+        self._pendiente.set()
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="snapshot-catalogo", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            if not self._pendiente.wait(timeout=30):
+                with self._lock:
+                    if not self._pendiente.is_set():
+                        self._hilo = None
+                        return
+                continue
+            time.sleep(self.espera)
+            self._pendiente.clear()
+            try:
+                generar_snapshot(self.ruta_db, self.ruta_snapshot)
+            except (OSError, sqlite3.Error):
+                # Se reintenta en la próxima escritura; mientras tanto se sigue sirviendo el snapshot anterior.
+                pass
+
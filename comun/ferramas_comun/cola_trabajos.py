@@ -0,0 +1,326 @@
+"""
+Cola de trabajos persistente sobre la base SQLite compartida (`app_trabajo`).
+
+Django (`app.infrastructure.cola.servicio.encolar`) y la API FastAPI
+(`app.core.cola_trabajos.encolar`) encolan insertando una fila con `INSERTAR`
+y `fila()`; el comando `procesar_trabajos` de Django levanta un `Trabajador`
+que las ejecuta en un pool de hilos o de procesos.
+
+- Orden: mayor `prioridad` primero; a igual prioridad, el que está disponible
+  hace más tiempo. `disponible_en` programa un trabajo a futuro y espacia los
+  reintentos.
+- Reservar un lote es un solo UPDATE ... RETURNING: lo marca `en_curso` con el
+  token de la reserva y corre `disponible_en` hasta el fin de la visibilidad.
+  Mientras el trabajador vive la va extendiendo; si muere, al vencer el trabajo
+  vuelve a estar disponible para otro. La entrega es "al menos una vez": las
+  tareas tienen que tolerar repetirse.
+- Si falla se reintenta con espera exponencial hasta `max_intentos`; después
+  queda `fallido`, con el error, para revisarlo en el admin.
+- Terminado se borra; uno recurrente (`periodo`) se reprograma.
+- `clave` deduplica: hay a lo más un pendiente por clave, así una ráfaga de
+  avisos termina en un solo trabajo. Encolar sobre uno existente lo adelanta
+  si hace falta, nunca lo atrasa.
+"""
+import json
+import multiprocessing
+import random
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+COLA = "default"
+VISIBILIDAD = 60.0  # segundos que una reserva es exclusiva si el trabajador no la extiende
+ESPERA = 0.5  # segundos entre consultas con la cola vacía
+MAX_INTENTOS = 5
+REINTENTO_BASE = 5.0  # segundos antes del segundo intento; se duplica en cada uno
+REINTENTO_MAXIMO = 3600.0
+LARGO_ERROR = 4000
+RESERVA_POR_EJECUTOR = 2
+
+PENDIENTE, EN_CURSO, FALLIDO = "pendiente", "en_curso", "fallido"
+
+TAREAS: Dict[str, Callable[..., None]] = {}
+
+
+def tarea(nombre: str):
+    """Registra una función como tarea; se llama con los argumentos encolados como kwargs."""
+    def registrar(funcion):
+        TAREAS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+@tarea("cola.nada")
+def nada():
+    """Tarea vacía, para medir el costo de la cola (`procesar_trabajos --benchmark`)."""
+
+
+class Trabajo(NamedTuple):
+    id: int
+    tarea: str
+    argumentos: dict
+    prioridad: int
+    intentos: int  # contando el actual
+    max_intentos: int
+    periodo: Optional[float]
+    token: str
+
+
+# La migración 0011 de Django y la API (al arrancar) crean la tabla con este DDL; IF NOT EXISTS
+# porque la crea quien arranque primero. Un cambio de esquema va en una migración nueva.
+CREAR = [
+    """
+    CREATE TABLE IF NOT EXISTS "app_trabajo" (
+        "id" integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+        "cola" varchar(50) NOT NULL,
+        "tarea" varchar(100) NOT NULL,
+        "argumentos" text NOT NULL CHECK ((JSON_VALID("argumentos") OR "argumentos" IS NULL)),
+        "prioridad" integer NOT NULL,
+        "estado" varchar(10) NOT NULL,
+        "disponible_en" real NOT NULL,
+        "intentos" integer NOT NULL,
+        "max_intentos" integer NOT NULL,
+        "periodo" real NULL,
+        "clave" varchar(100) NULL,
+        "token" varchar(32) NULL,
+        "error" text NULL,
+        "creado_en" real NOT NULL
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS "app_trabajo_clave_pendiente"
+    ON "app_trabajo" ("clave") WHERE "estado" = 'pendiente'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS "app_trabajo_disponibles"
+    ON "app_trabajo" ("cola", "prioridad" DESC, "disponible_en") WHERE "estado" IN ('pendiente', 'en_curso')
+    """,
+]
+
+# Con un pendiente de la misma clave no se inserta otro: se adelanta el existente (nunca se
+# atrasa) y, si el nuevo es recurrente, el existente pasa a serlo.
+INSERTAR = (
+    "INSERT INTO app_trabajo (cola, tarea, argumentos, prioridad, estado, disponible_en, intentos, "
+    "max_intentos, periodo, clave, creado_en) VALUES (?, ?, ?, ?, 'pendiente', ?, 0, ?, ?, ?, ?) "
+    "ON CONFLICT (clave) WHERE estado = 'pendiente' DO UPDATE SET "
+    "disponible_en = MIN(disponible_en, excluded.disponible_en), periodo = COALESCE(periodo, excluded.periodo)"
+)
+
+RESERVAR = """
+UPDATE app_trabajo SET estado = 'en_curso', token = ?, intentos = intentos + 1, disponible_en = ?
+WHERE id IN (
+    SELECT id FROM app_trabajo
+    WHERE cola IN ({colas}) AND estado IN ('pendiente', 'en_curso') AND disponible_en <= ?
+    ORDER BY prioridad DESC, disponible_en
+    LIMIT ?
+)
+RETURNING id, tarea, argumentos, prioridad, intentos, max_intentos, periodo
+"""
+
+TERMINAR = "DELETE FROM app_trabajo WHERE id = ? AND token = ?"
+REPROGRAMAR = (
+    "UPDATE app_trabajo SET estado = 'pendiente', token = NULL, intentos = ?, disponible_en = ?, error = ? "
+    "WHERE id = ? AND token = ?"
+)
+FUSIONAR = (
+    "UPDATE app_trabajo SET disponible_en = MIN(disponible_en, ?), periodo = COALESCE(periodo, ?) "
+    "WHERE clave = (SELECT clave FROM app_trabajo WHERE id = ?) AND estado = 'pendiente'"
+)
+MARCAR_FALLIDO = "UPDATE app_trabajo SET estado = 'fallido', token = NULL, error = ? WHERE id = ? AND token = ?"
+EXTENDER = "UPDATE app_trabajo SET disponible_en = ? WHERE token = ? AND estado = 'en_curso'"
+
+
+def _disponible_en(en: Union[float, datetime, None], ahora: float) -> float:
+    if en is None:
+        return ahora
+    if isinstance(en, datetime):
+        return en.timestamp()
+    return ahora + en
+
+
+def fila(tarea: str, argumentos: Optional[dict] = None, *, cola: str = COLA, prioridad: int = 0,
+         en: Union[float, datetime, None] = None, max_intentos: int = MAX_INTENTOS, clave: Optional[str] = None,
+         periodo: Optional[float] = None) -> tuple:
+    """
+    Parámetros de `INSERTAR`. `en`: segundos desde ahora o un datetime;
+    `periodo`: segundos entre ejecuciones de un trabajo recurrente.
+    """
+    ahora = time.time()
+    return (cola, tarea, json.dumps(argumentos or {}), prioridad, _disponible_en(en, ahora), max_intentos,
+            periodo, clave, ahora)
+
+
+def espera_reintento(intentos: int) -> float:
+    """Segundos antes del próximo intento: exponencial con un ±20 % al azar para no sincronizar reintentos."""
+    return min(REINTENTO_BASE * 2 ** (intentos - 1), REINTENTO_MAXIMO) * random.uniform(0.8, 1.2)
+
+
+def _texto_error(error: BaseException) -> str:
+    return "".join(traceback.format_exception(type(error), error, error.__traceback__))[-LARGO_ERROR:]
+
+
+class Cola:
+    """Operaciones sobre `app_trabajo` con una conexión sqlite3 propia (en autocommit)."""
+
+    def __init__(self, ruta_db: str):
+        self.ruta_db = ruta_db
+        self._conexion = sqlite3.connect(ruta_db, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def encolar(self, tarea: str, argumentos: Optional[dict] = None, **opciones):
+        self._conexion.execute(INSERTAR, fila(tarea, argumentos, **opciones))
+
+    def encolar_lote(self, filas: Iterable[tuple]):
+        with self._transaccion():
+            self._conexion.executemany(INSERTAR, filas)
+
+    def reservar(self, colas: Sequence[str], cantidad: int, visibilidad: float = VISIBILIDAD) -> List[Trabajo]:
+        ahora = time.time()
+        token = uuid.uuid4().hex
+        sql = RESERVAR.format(colas=", ".join("?" * len(colas)))
+        with self._transaccion():
+            filas = self._conexion.execute(sql, (token, ahora + visibilidad, *colas, ahora, cantidad)).fetchall()
+        trabajos = [
+            Trabajo(id_, tarea, json.loads(argumentos), prioridad, intentos, max_intentos, periodo, token)
+            for id_, tarea, argumentos, prioridad, intentos, max_intentos, periodo in filas
+        ]
+        # RETURNING no garantiza orden: se respetan prioridad y llegada al despacharlos.
+        trabajos.sort(key=lambda trabajo: (-trabajo.prioridad, trabajo.id))
+        return trabajos
+
+    def registrar(self, terminados: Sequence[Trabajo] = (), fallidos: Sequence[Tuple[Trabajo, str]] = ()):
+        """Resultado de un lote de ejecuciones, en una transacción."""
+        ahora = time.time()
+        with self._transaccion():
+            for trabajo in terminados:
+                if trabajo.periodo:
+                    self._reprogramar(trabajo, 0, ahora + trabajo.periodo, None)
+                else:
+                    self._conexion.execute(TERMINAR, (trabajo.id, trabajo.token))
+            for trabajo, error in fallidos:
+                if trabajo.intentos < trabajo.max_intentos:
+                    self._reprogramar(trabajo, trabajo.intentos, ahora + espera_reintento(trabajo.intentos), error)
+                elif trabajo.periodo:
+                    # Un recurrente no se abandona: agotó sus intentos de este turno, vuelve en el siguiente.
+                    self._reprogramar(trabajo, 0, ahora + trabajo.periodo, error)
+                else:
+                    self._conexion.execute(MARCAR_FALLIDO, (error, trabajo.id, trabajo.token))
+
+    def _reprogramar(self, trabajo: Trabajo, intentos: int, disponible_en: float, error: Optional[str]):
+        try:
+            self._conexion.execute(REPROGRAMAR, (intentos, disponible_en, error, trabajo.id, trabajo.token))
+        except sqlite3.IntegrityError:
+            # Mientras corría se encoló otro pendiente con la misma clave: queda uno solo, como al encolar.
+            self._conexion.execute(FUSIONAR, (disponible_en, trabajo.periodo, trabajo.id))
+            self._conexion.execute(TERMINAR, (trabajo.id, trabajo.token))
+
+    def extender(self, tokens: Iterable[str], visibilidad: float = VISIBILIDAD):
+        """Corre el fin de la visibilidad de las reservas que siguen ejecutándose."""
+        hasta = time.time() + visibilidad
+        with self._transaccion():
+            self._conexion.executemany(EXTENDER, [(hasta, token) for token in tokens])
+
+    def resumen(self) -> Dict[str, int]:
+        filas = self._conexion.execute("SELECT estado, COUNT(*) FROM app_trabajo GROUP BY estado")
+        return dict(filas.fetchall())
+
+    def _transaccion(self):
+        return _Transaccion(self._conexion)
+
+
+class _Transaccion:
+    # BEGIN IMMEDIATE toma el lock de escritura al empezar: sin esperas a mitad de camino ni deadlocks.
+    def __init__(self, conexion: sqlite3.Connection):
+        self.conexion = conexion
+
+    def __enter__(self):
+        self.conexion.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, tipo, valor, rastro):
+        self.conexion.execute("COMMIT" if tipo is None else "ROLLBACK")
+
+
+def _ejecutar(nombre: str, argumentos: dict):
+    funcion = TAREAS.get(nombre)
+    if funcion is None:
+        raise LookupError(f"Tarea desconocida: {nombre}")
+    funcion(**argumentos)
+
+
+class Trabajador:
+    """
+    Reserva trabajos de `colas` y los ejecuta en `hilos` hilos o, con
+    `procesos`, en un pool de procesos (fork: heredan las tareas registradas).
+    El hilo principal es el único que escribe en la cola.
+    """
+
+    def __init__(self, ruta_db: str, colas: Sequence[str] = (COLA,), hilos: int = 4, procesos: int = 0,
+                 visibilidad: float = VISIBILIDAD, espera: float = ESPERA):
+        self.cola = Cola(ruta_db)
+        self.colas = tuple(colas)
+        self.hilos = hilos
+        self.procesos = procesos
+        self.visibilidad = visibilidad
+        self.espera = espera
+        self.terminados = 0
+        self.errores = 0  # ejecuciones con error, se reintenten o no
+        self._detener = threading.Event()
+
+    def detener(self):
+        """Deja de reservar; los trabajos en curso terminan y se registran."""
+        self._detener.set()
+
+    def _ejecutor(self):
+        if self.procesos:
+            return ProcessPoolExecutor(self.procesos, mp_context=multiprocessing.get_context("fork"))
+        return ThreadPoolExecutor(self.hilos, thread_name_prefix="trabajo")
+
+    def ejecutar(self, hasta_vaciar: bool = False):
+        """Procesa hasta `detener()` o, con `hasta_vaciar`, hasta que no quede nada disponible."""
+        # Se reserva el doble de lo que se ejecuta a la vez: cada lote cuesta dos transacciones
+        # (reservar y registrar) y así los hilos no quedan esperando la próxima reserva.
+        capacidad = (self.procesos or self.hilos) * RESERVA_POR_EJECUTOR
+        en_curso: Dict[Future, Trabajo] = {}
+        extendido_en = time.monotonic()
+        with self._ejecutor() as ejecutor:
+            while not self._detener.is_set():
+                if len(en_curso) < capacidad:
+                    for trabajo in self.cola.reservar(self.colas, capacidad - len(en_curso), self.visibilidad):
+                        if trabajo.intentos > trabajo.max_intentos:
+                            # Su último intento permitido lo tenía un trabajador que murió.
+                            self.cola.registrar(fallidos=[(trabajo, "El trabajador que lo ejecutaba dejó de responder.")])
+                            self.errores += 1
+                        else:
+                            en_curso[ejecutor.submit(_ejecutar, trabajo.tarea, trabajo.argumentos)] = trabajo
+                if not en_curso:
+                    if hasta_vaciar:
+                        break
+                    self._detener.wait(self.espera)
+                    continue
+                hechos, _ = wait(en_curso, timeout=self.espera, return_when=FIRST_COMPLETED)
+                self._registrar(hechos, en_curso)
+                if en_curso and time.monotonic() - extendido_en >= self.visibilidad / 3:
+                    self.cola.extender({trabajo.token for trabajo in en_curso.values()}, self.visibilidad)
+                    extendido_en = time.monotonic()
+            self._registrar(wait(en_curso).done, en_curso)
+
+    def _registrar(self, hechos: Iterable[Future], en_curso: Dict[Future, Trabajo]):
+        terminados, fallidos = [], []
+        for futuro in hechos:
+            trabajo = en_curso.pop(futuro)
+            error = futuro.exception()
+            if error is None:
+                terminados.append(trabajo)
+            else:
+                fallidos.append((trabajo, _texto_error(error)))
+        if terminados or fallidos:
+            self.cola.registrar(terminados, fallidos)
+            self.terminados += len(terminados)
+            self.errores += len(fallidos)
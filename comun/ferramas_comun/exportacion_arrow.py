@@ -0,0 +1,136 @@
+"""
+Exportación columnar del catálogo (productos con su categoría) en Arrow.
+
+Los lotes se arman columna por columna directamente desde el cursor de
+sqlite3 (`fetchmany` + `zip`): sin modelos del ORM, sin diccionarios ni
+validación por fila. Las conversiones de tipo (booleanos, fechas) las hace
+Arrow sobre la columna completa.
+
+La API sirve el catálogo como Arrow IPC streaming (`stream_ipc_de_archivo`) y
+Django lo escribe en Parquet (`escribir_parquet`, comando `exportar_catalogo`).
+
+pyarrow es opcional: sin él `disponible` es False y la exportación no se
+ofrece.
+"""
+import sqlite3
+from typing import Iterator, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opcional: sin pyarrow no hay exportación
+    pa = pq = None
+
+disponible = pa is not None
+
+TAMANO_LOTE = 64 * 1024
+MEDIA_TYPE_STREAM = "application/vnd.apache.arrow.stream"
+
+# Booleanos y fechas como expresiones (`+ 0`, `CAST`): sin tipo declarado, ningún conversor de
+# sqlite3 (los que registra Django, p. ej.) crea un objeto Python por valor.
+CONSULTA = (
+    "SELECT p.id, p.sku, p.nombre, p.descripcion, CAST(p.precio AS REAL), CAST(p.descuento AS REAL), p.stock, "
+    "p.en_venta + 0, p.destacado + 0, p.categoria_id, c.nombre, "
+    "CAST(p.fecha_creacion AS TEXT), CAST(p.fecha_actualizacion AS TEXT) "
+    "FROM app_producto p JOIN app_categoria c ON c.id = p.categoria_id ORDER BY p.id"
+)
+
+
+def esquema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("sku", pa.string()),
+        ("nombre", pa.string()),
+        ("descripcion", pa.string()),
+        ("precio", pa.float64()),
+        ("descuento", pa.float64()),
+        ("stock", pa.int64()),
+        ("en_venta", pa.bool_()),
+        ("destacado", pa.bool_()),
+        ("categoria_id", pa.int64()),
+        ("categoria", pa.string()),
+        ("fecha_creacion", pa.timestamp("us", tz="UTC")),
+        ("fecha_actualizacion", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _columna(valores, tipo):
+    if pa.types.is_boolean(tipo):
+        # SQLite guarda 0/1.
+        return pa.array(valores, pa.int8()).cast(tipo)
+    if pa.types.is_timestamp(tipo):
+        # Texto UTC sin zona ('2025-06-30 12:34:56.123456'), como lo guardan Django y CURRENT_TIMESTAMP.
+        return pa.array(valores, pa.string()).cast(pa.timestamp("us")).cast(tipo)
+    return pa.array(valores, tipo)
+
+
+def lotes(conexion, tamano: int = TAMANO_LOTE) -> Iterator["pa.RecordBatch"]:
+    """RecordBatches de hasta `tamano` filas leídos de `conexion` (sqlite3 o `django.db.connection`)."""
+    campos = esquema()
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(CONSULTA)
+        while True:
+            filas = cursor.fetchmany(tamano)
+            if not filas:
+                break
+            columnas = zip(*filas)
+            yield pa.RecordBatch.from_arrays(
+                [_columna(valores, campo.type) for valores, campo in zip(columnas, campos)], schema=campos,
+            )
+    finally:
+        cursor.close()
+
+
+def escribir_parquet(conexion, salida, tamano: int = TAMANO_LOTE, compresion: str = "zstd") -> int:
+    """Escribe el catálogo en `salida` como Parquet, un row group por lote. Devuelve las filas escritas."""
+    filas = 0
+    with pq.ParquetWriter(salida, esquema(), compression=compresion) as escritor:
+        for lote in lotes(conexion, tamano):
+            escritor.write_batch(lote)
+            filas += lote.num_rows
+    return filas
+
+
+class _Fragmentos:
+    """Destino de escritura que acumula lo escrito hasta que se lo retira con `tomar()`."""
+
+    closed = False
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def tomar(self) -> bytes:
+        datos, self._partes = b"".join(self._partes), []
+        return datos
+
+
+def stream_ipc(conexion, tamano: int = TAMANO_LOTE, compresion: Optional[str] = None) -> Iterator[bytes]:
+    """El catálogo en formato Arrow IPC streaming, un fragmento de bytes por lote."""
+    destino = _Fragmentos()
+    opciones = pa.ipc.IpcWriteOptions(compression=compresion)
+    with pa.ipc.new_stream(destino, esquema(), options=opciones) as escritor:
+        for lote in lotes(conexion, tamano):
+            escritor.write_batch(lote)
+            yield destino.tomar()
+    yield destino.tomar()  # marca de fin de stream
+
+
+def stream_ipc_de_archivo(ruta_db: str, tamano: int = TAMANO_LOTE, compresion: Optional[str] = None) -> Iterator[bytes]:
+    """
+    `stream_ipc` con una conexión propia de solo lectura: no ocupa una del pool
+    ni queda sujeta al plazo del request (un export grande dura más que eso).
+    Cada lote puede leerse desde otro hilo del threadpool.
+    """
+    conexion = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        yield from stream_ipc(conexion, tamano, compresion)
+    finally:
+        conexion.close()
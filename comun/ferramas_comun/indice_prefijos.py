@@ -0,0 +1,474 @@
+"""
+Índice de prefijos en memoria para el autocompletado de productos.
+
+Cada palabra del nombre (normalizado: minúsculas y sin tildes) tiene una lista
+de productos ordenada por peso; el vocabulario es una lista ordenada, así que
+un prefijo es un rango contiguo que se encuentra con `bisect`. Los SKU van en
+un arreglo aparte ordenado por SKU normalizado.
+
+Para acotar la memoria los textos no se guardan como un objeto `str` por
+producto sino en un solo bloque de bytes con los offsets en un `array`; las
+listas por palabra también son `array('I')`. Las mejores sugerencias de cada
+prefijo consultado se guardan en un LRU acotado y se invalidan solo para los
+prefijos de las palabras que cambian.
+
+`ServicioSugerencias` recibe una función que ejecuta las consultas: cada
+proyecto pasa la suya (`app/infrastructure/sugerencias/servicio.py` en Django,
+`app/core/indice_prefijos.py` en la API).
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+PALABRAS_VACIAS = frozenset({"a", "al", "con", "de", "del", "el", "en", "la", "las", "los", "o", "para", "por", "y"})
+TAMANO_CACHE = 32  # sugerencias guardadas por prefijo
+MAXIMO_PREFIJOS_CACHE = 20_000
+MAXIMO_CANDIDATOS = 1_000  # productos revisados, como mucho, en una consulta de varias palabras
+
+_PALABRA = re.compile(r"\w+")
+_NO_ALFANUMERICO = re.compile(r"[\W_]+")
+_SEPARADOR = b"\x00"
+_BORRADO = (b"", b"\x00\x00")
+
+
+class _Plegado(dict):
+    """Tabla para `str.translate` que quita tildes; cada carácter se calcula una sola vez."""
+
+    def __missing__(self, codigo: int) -> str:
+        plegado = "".join(c for c in unicodedata.normalize("NFKD", chr(codigo)) if not unicodedata.combining(c))
+        self[codigo] = plegado
+        return plegado
+
+
+_PLEGADO = _Plegado()
+
+
+def normalizar(texto: str) -> str:
+    """'Martillo Eléctrico' -> 'martillo electrico'."""
+    texto = texto.lower()
+    return texto if texto.isascii() else texto.translate(_PLEGADO)
+
+
+def clave_sku(sku: Optional[str]) -> str:
+    """'FER-0001' y 'fer 0001' tienen la misma clave: 'fer0001'."""
+    return _NO_ALFANUMERICO.sub("", normalizar(sku or ""))
+
+
+def calcular_peso(destacado, descuento, stock) -> float:
+    """
+    Orden de las sugerencias. El catálogo no registra ventas, así que se usan
+    `destacado`, el descuento y si hay stock como indicadores de popularidad.
+    """
+    return 2.0 * bool(destacado) + min(float(descuento or 0), 50.0) / 50 + (0.5 if stock else 0.0)
+
+
+def _palabras(normalizado: str) -> List[str]:
+    return list(dict.fromkeys(p for p in normalizado.split() if p not in PALABRAS_VACIAS))
+
+
+def _textos(nombre: str, sku: Optional[str]) -> Tuple[bytes, bytes]:
+    # El normalizado empieza con espacio para buscar inicios de palabra con `b' ' + prefijo in texto`.
+    normalizado = " " + " ".join(_PALABRA.findall(normalizar(nombre)))
+    registro = _SEPARADOR.join((nombre.encode("utf-8"), (sku or "").encode("utf-8"), clave_sku(sku).encode("utf-8")))
+    return normalizado.encode("utf-8"), registro
+
+
+def _bloque(partes: List[bytes]) -> Tuple[bytes, array]:
+    limites, total = array("Q", [0]), 0
+    for parte in partes:
+        total += len(parte)
+        limites.append(total)
+    return b"".join(partes), limites
+
+
+class Sugerencia(NamedTuple):
+    id: int
+    nombre: str
+    sku: Optional[str]
+
+
+class IndicePrefijos:
+    """
+    `filas`: (id, nombre, sku, peso) ordenadas por id. Las lecturas no toman
+    locks; las escrituras (`agregar`, `quitar`) deben venir de un solo hilo a
+    la vez (ver `ServicioSugerencias`).
+    """
+
+    def __init__(self, filas: Iterable[Tuple[int, str, Optional[str], float]], cursor: int = 0):
+        self.cursor = cursor
+        self._ids = array("q")
+        self._pesos = array("d")  # peso < 0: producto quitado
+        # Se arman directo en bytearray: una lista de un millón de `bytes` triplicaría el pico de memoria.
+        normalizados, registros = bytearray(), bytearray()
+        limites_normalizados, limites_registros = array("Q", [0]), array("Q", [0])
+        for producto_id, nombre, sku, peso in filas:
+            normalizado, registro = _textos(nombre, sku)
+            self._ids.append(producto_id)
+            self._pesos.append(peso)
+            normalizados += normalizado
+            limites_normalizados.append(len(normalizados))
+            registros += registro
+            limites_registros.append(len(registros))
+        self._construidos = len(self._ids)
+        self._nuevos = {}  # id -> slot de los productos agregados después de construir
+        # Nombres normalizados (para filtrar) y nombre \0 sku \0 clave_sku (para responder), más los
+        # slots modificados después de construir. Se reemplaza entero: un lector nunca mezcla versiones.
+        self._almacen = (bytes(normalizados), limites_normalizados, bytes(registros), limites_registros, {})
+        del normalizados, registros
+
+        self._postings = {}
+        # sort estable: a igual peso queda el slot menor primero, igual que `_orden`.
+        for slot in sorted(range(self._construidos), key=self._pesos.__getitem__, reverse=True):
+            for palabra in _palabras(self._normalizado(slot).decode("utf-8")):
+                lista = self._postings.get(palabra)
+                if lista is None:
+                    lista = self._postings[palabra] = array("I")
+                lista.append(slot)
+        self._vocabulario = sorted(self._postings)
+        self._por_sku = array("I", sorted(
+            (slot for slot in range(self._construidos) if self._clave_sku(slot)), key=self._clave_sku
+        ))
+
+        self._cache = OrderedDict()
+        self._lock_cache = threading.Lock()
+        self._version = 0
+
+    def __len__(self):
+        return sum(1 for peso in self._pesos if peso >= 0)
+
+    # Lectura
+
+    def _orden(self, slot: int):
+        return -self._pesos[slot], slot
+
+    def _normalizado(self, slot: int) -> bytes:
+        normalizados, limites, _, _, modificados = self._almacen
+        if slot in modificados:
+            return modificados[slot][0]
+        return normalizados[limites[slot]:limites[slot + 1]]
+
+    def _registro(self, slot: int) -> bytes:
+        _, _, registros, limites, modificados = self._almacen
+        if slot in modificados:
+            return modificados[slot][1]
+        return registros[limites[slot]:limites[slot + 1]]
+
+    def _clave_sku(self, slot: int) -> bytes:
+        return self._registro(slot).rsplit(_SEPARADOR, 1)[1]
+
+    def _sugerencia(self, slot: int) -> Sugerencia:
+        nombre, sku, _ = self._registro(slot).split(_SEPARADOR)
+        return Sugerencia(self._ids[slot], nombre.decode("utf-8"), sku.decode("utf-8") or None)
+
+    def _candidatos(self, prefijo: str) -> Iterator[int]:
+        """Productos con alguna palabra que empieza con `prefijo`, de mayor a menor peso (con repetidos)."""
+        inicio = bisect_left(self._vocabulario, prefijo)
+        fin = bisect_left(self._vocabulario, prefijo + "\uffff", inicio)
+        listas = [self._postings[palabra] for palabra in self._vocabulario[inicio:fin]]
+        if len(listas) == 1:
+            return iter(listas[0])
+        return heapq.merge(*listas, key=self._orden)
+
+    def _cantidad_estimada(self, prefijo: str) -> int:
+        if prefijo in PALABRAS_VACIAS:
+            # 'llave de': 'de' también coincide con la palabra vacía, que no está en las listas.
+            return len(self._ids) * 2
+        inicio = bisect_left(self._vocabulario, prefijo)
+        fin = bisect_left(self._vocabulario, prefijo + "\uffff", inicio)
+        if fin - inicio > 16:
+            # Prefijo corto con muchas palabras: seguro es de los menos selectivos, no vale la pena sumar.
+            return len(self._ids) + fin - inicio
+        return sum(len(self._postings[palabra]) for palabra in self._vocabulario[inicio:fin])
+
+    def _mejores(self, prefijo: str) -> Sequence[int]:
+        with self._lock_cache:
+            mejores = self._cache.get(prefijo)
+            if mejores is not None:
+                self._cache.move_to_end(prefijo)
+                return mejores
+            version = self._version
+        mejores = array("I")
+        for slot in self._candidatos(prefijo):
+            if slot not in mejores:
+                mejores.append(slot)
+                if len(mejores) == TAMANO_CACHE:
+                    break
+        with self._lock_cache:
+            # Si hubo una escritura mientras se calculaba, el resultado puede estar viejo: no se guarda.
+            if version == self._version:
+                self._cache[prefijo] = mejores
+                if len(self._cache) > MAXIMO_PREFIJOS_CACHE:
+                    self._cache.popitem(last=False)
+        return mejores
+
+    def _por_prefijo_sku(self, clave: str, limite: int) -> List[int]:
+        clave = clave.encode("utf-8")
+        lista = self._por_sku
+        posicion = bisect_left(lista, clave, key=self._clave_sku)
+        slots = []
+        for slot in lista[posicion:posicion + limite]:
+            if not self._clave_sku(slot).startswith(clave):
+                break
+            slots.append(slot)
+        return slots
+
+    def sugerir(self, consulta: str, limite: int = 10) -> List[Sugerencia]:
+        """
+        Productos cuyo nombre tiene palabras que empiezan con cada palabra de
+        `consulta` (en cualquier orden), de mayor a menor peso. Si la consulta
+        tiene dígitos, primero van los SKU que empiezan con ella.
+        """
+        normalizada = normalizar(consulta)
+        palabras = _PALABRA.findall(normalizada)
+        if not palabras or limite <= 0:
+            return []
+        # 'llave de paso' = 'llave paso'; la última palabra puede estar a medio escribir ('de' -> 'destornillador').
+        palabras = [p for p in palabras[:-1] if p not in PALABRAS_VACIAS] + palabras[-1:]
+
+        slots = []
+        if any(c.isdigit() for c in normalizada) and clave_sku(consulta):
+            slots = self._por_prefijo_sku(clave_sku(consulta), limite)
+        # Se recorren los productos de la palabra más selectiva y se filtran por las demás.
+        pivote = min(palabras, key=self._cantidad_estimada) if len(palabras) > 1 else palabras[0]
+        palabras.remove(pivote)
+        resto = [(" " + palabra).encode("utf-8") for palabra in palabras]
+        if not resto and limite <= TAMANO_CACHE:
+            candidatos = self._mejores(pivote)
+        else:
+            candidatos = islice(self._candidatos(pivote), MAXIMO_CANDIDATOS)
+
+        vistos = set(slots)
+        normalizados, limites, _, _, modificados = self._almacen
+        for slot in candidatos:
+            if len(slots) >= limite:
+                break
+            if slot in vistos:
+                continue
+            vistos.add(slot)
+            if resto:
+                # Mismo cálculo que `_normalizado`, en línea: es el bucle caliente de las consultas de varias palabras.
+                texto = modificados[slot][0] if slot in modificados else normalizados[limites[slot]:limites[slot + 1]]
+                if not all(palabra in texto for palabra in resto):
+                    continue
+            slots.append(slot)
+        return [self._sugerencia(slot) for slot in slots]
+
+    # Escritura
+
+    def _slot(self, producto_id: int) -> Optional[int]:
+        slot = self._nuevos.get(producto_id)
+        if slot is None:
+            posicion = bisect_left(self._ids, producto_id, 0, self._construidos)
+            if posicion < self._construidos and self._ids[posicion] == producto_id:
+                slot = posicion
+        return slot
+
+    def _sacar(self, slot: int) -> List[str]:
+        """Quita `slot` de las listas por palabra y de los SKU; devuelve sus palabras."""
+        palabras = _palabras(self._normalizado(slot).decode("utf-8"))
+        orden = self._orden(slot)
+        for palabra in palabras:
+            lista = self._postings[palabra]
+            posicion = bisect_left(lista, orden, key=self._orden)
+            if posicion < len(lista) and lista[posicion] == slot:
+                del lista[posicion]
+        clave = self._clave_sku(slot)
+        if clave:
+            posicion = bisect_left(self._por_sku, clave, key=self._clave_sku)
+            # Puede haber SKU repetidos (sin normalizar son distintos): se busca el slot entre los iguales.
+            while posicion < len(self._por_sku) and self._por_sku[posicion] != slot:
+                if self._clave_sku(self._por_sku[posicion]) != clave:
+                    return palabras
+                posicion += 1
+            if posicion < len(self._por_sku):
+                del self._por_sku[posicion]
+        return palabras
+
+    def _guardar_textos(self, slot: int, textos: Tuple[bytes, bytes]):
+        modificados = self._almacen[-1]
+        modificados[slot] = textos
+        if len(modificados) > max(10_000, self._construidos // 4):
+            # Demasiados textos sueltos: se rearman los bloques (los slots nuevos siguen aparte).
+            slots = range(self._construidos)
+            self._almacen = (
+                *_bloque([self._normalizado(s) for s in slots]),
+                *_bloque([self._registro(s) for s in slots]),
+                {s: t for s, t in modificados.items() if s >= self._construidos},
+            )
+
+    def _invalidar(self, palabras: Iterable[str]):
+        with self._lock_cache:
+            self._version += 1
+            for palabra in palabras:
+                for largo in range(1, len(palabra) + 1):
+                    self._cache.pop(palabra[:largo], None)
+
+    def agregar(self, producto_id: int, nombre: str, sku: Optional[str], peso: float):
+        """Agrega o actualiza un producto."""
+        textos = _textos(nombre, sku)
+        palabras = _palabras(textos[0].decode("utf-8"))
+        anteriores = []
+        slot = self._slot(producto_id)
+        if slot is None:
+            slot = len(self._ids)
+            self._ids.append(producto_id)
+            self._pesos.append(-1.0)
+            self._nuevos[producto_id] = slot
+        elif self._pesos[slot] >= 0:
+            if self._pesos[slot] == peso and (self._normalizado(slot), self._registro(slot)) == textos:
+                return
+            anteriores = self._sacar(slot)
+        self._pesos[slot] = peso
+        self._guardar_textos(slot, textos)
+        for palabra in palabras:
+            lista = self._postings.get(palabra)
+            if lista is None:
+                lista = self._postings[palabra] = array("I")
+                insort(self._vocabulario, palabra)
+            insort(lista, slot, key=self._orden)
+        if self._clave_sku(slot):
+            insort(self._por_sku, slot, key=self._clave_sku)
+        self._invalidar(palabras + anteriores)
+
+    def quitar(self, producto_id: int):
+        slot = self._slot(producto_id)
+        if slot is None or self._pesos[slot] < 0:
+            return
+        palabras = self._sacar(slot)
+        self._pesos[slot] = -1.0
+        self._guardar_textos(slot, _BORRADO)
+        self._invalidar(palabras)
+
+
+# Productos en venta y, en la misma consulta, el último cursor del feed de cambios.
+CONSULTA_PRODUCTOS = (
+    "SELECT u.ultima, p.id, p.nombre, p.sku, p.destacado, p.descuento, p.stock "
+    "FROM (SELECT coalesce(max(secuencia), 0) AS ultima FROM app_productocambio) u "
+    "LEFT JOIN app_producto p ON p.en_venta = 1 ORDER BY p.id"
+)
+# Cambios posteriores al cursor con el estado actual del producto (NULL si se eliminó).
+CONSULTA_CAMBIOS = (
+    "SELECT u.ultima, c.secuencia, c.producto_id, p.nombre, p.sku, p.destacado, p.descuento, p.stock, p.en_venta "
+    "FROM (SELECT coalesce(max(secuencia), 0) AS ultima FROM app_productocambio) u "
+    "LEFT JOIN app_productocambio c ON c.secuencia > ? "
+    "LEFT JOIN app_producto p ON p.id = c.producto_id "
+    "ORDER BY c.secuencia LIMIT ?"
+)
+
+
+class ServicioSugerencias:
+    """
+    Mantiene un `IndicePrefijos` al día con el feed `app_productocambio`, que
+    registra las escrituras de Django, de la API y de las cargas masivas.
+
+    `consultar(sql, parametros)` ejecuta una consulta (con marcadores `?`) y
+    devuelve sus filas. Las sugerencias no tocan la base: como mucho una vez
+    cada `intervalo` segundos, o después de una escritura local
+    (`marcar_pendiente`), el request que llega aplica los cambios del feed. Si son más de `umbral_reconstruccion`
+    (o el cursor ya no existe) el índice se reconstruye desde cero, en un hilo
+    de fondo si `en_segundo_plano`; mientras tanto se sigue usando el anterior.
+    """
+
+    def __init__(self, consultar: Callable[[str, tuple], Iterable[tuple]], intervalo: float = 1.0,
+                 umbral_reconstruccion: int = 20_000, en_segundo_plano: bool = True,
+                 al_terminar_hilo: Optional[Callable[[], None]] = None):
+        self.consultar = consultar
+        self.intervalo = intervalo
+        self.umbral_reconstruccion = umbral_reconstruccion
+        self.en_segundo_plano = en_segundo_plano
+        self.al_terminar_hilo = al_terminar_hilo
+        self._indice: Optional[IndicePrefijos] = None
+        self._pendiente = False
+        self._revisado_en = 0.0
+        self._reconstruyendo = False
+        self._lock = threading.Lock()
+
+    def _construir(self) -> IndicePrefijos:
+        self._pendiente = False
+        filas = iter(self.consultar(CONSULTA_PRODUCTOS, ()))
+        primera = next(filas)
+        productos = (
+            (producto_id, nombre, sku, calcular_peso(destacado, descuento, stock))
+            for _, producto_id, nombre, sku, destacado, descuento, stock in chain([primera], filas)
+            if producto_id is not None  # catálogo vacío: LEFT JOIN sin productos
+        )
+        indice = IndicePrefijos(productos, cursor=primera[0])
+        self._revisado_en = time.monotonic()
+        return indice
+
+    def _reconstruir(self):
+        try:
+            with self._lock:
+                self._indice = self._construir()
+        except Exception:
+            # Se reintenta en la próxima revisión; mientras tanto se sigue usando el índice anterior.
+            pass
+        finally:
+            self._reconstruyendo = False
+            if self.al_terminar_hilo is not None:
+                self.al_terminar_hilo()
+
+    def _reconstruir_en_segundo_plano(self):
+        if not self._reconstruyendo:
+            self._reconstruyendo = True
+            threading.Thread(target=self._reconstruir, name="indice-sugerencias", daemon=True).start()
+
+    def _sincronizar(self):
+        indice = self._indice
+        self._pendiente = False
+        self._revisado_en = time.monotonic()
+        filas = list(self.consultar(CONSULTA_CAMBIOS, (indice.cursor, self.umbral_reconstruccion + 1)))
+        ultima = filas[0][0]
+        cambios = [fila[1:] for fila in filas if fila[1] is not None]
+        if ultima < indice.cursor or len(cambios) > self.umbral_reconstruccion:
+            if self.en_segundo_plano:
+                self._reconstruir_en_segundo_plano()
+            else:
+                self._indice = self._construir()
+            return
+        for secuencia, producto_id, nombre, sku, destacado, descuento, stock, en_venta in cambios:
+            if nombre is None or not en_venta:
+                indice.quitar(producto_id)
+            else:
+                indice.agregar(producto_id, nombre, sku, calcular_peso(destacado, descuento, stock))
+            indice.cursor = secuencia
+
+    def indice(self) -> IndicePrefijos:
+        if self._indice is None:
+            with self._lock:
+                if self._indice is None:
+                    self._indice = self._construir()
+            return self._indice
+        vencido = time.monotonic() - self._revisado_en >= self.intervalo
+        if (self._pendiente or vencido) and not self._reconstruyendo and self._lock.acquire(blocking=False):
+            # Si otro request ya está sincronizando se responde con el índice actual, sin esperar.
+            try:
+                self._sincronizar()
+            finally:
+                self._lock.release()
+        return self._indice
+
+    def sugerir(self, consulta: str, limite: int = 10) -> List[Sugerencia]:
+        if not _PALABRA.search(consulta):
+            return []
+        return self.indice().sugerir(consulta, limite)
+
+    def marcar_pendiente(self, **kwargs):
+        self._pendiente = True
+
+    def precargar(self):
+        """Construye el índice en un hilo de fondo (al arrancar el servidor)."""
+        if self._indice is None:
+            self._reconstruir_en_segundo_plano()
+
+    def descartar(self):
+        with self._lock:
+            self._indice = None
+
@@ -0,0 +1,46 @@
+"""
+Productos y categorías de solo lectura para listados y templates.
+
+Tuplas con nombre inmutables (sin `__dict__`) armadas desde filas crudas: no
+pasan por el identity map de SQLAlchemy ni por los modelos de Django, y ocupan
+una fracción de un `ProductoDB` o de un `Producto`. Tienen los mismos campos
+que `ProductoSnapshot`/`CategoriaSnapshot`, así que un listado se ve igual
+salga del snapshot o de la base. Para modificar un producto se usa el modelo
+de cada proyecto.
+
+Los montos son `float` en la API y `Decimal` en Django, como los entrega cada
+ORM.
+"""
+from typing import NamedTuple, Optional
+
+from ferramas_comun.catalogo_snapshot import Monto
+
+# Filas por tanda al recorrer el catálogo de a poco (`iterar_productos`).
+TAMANO_TANDA = 2000
+
+
+def precio_con_descuento(precio: Optional[Monto], descuento: Optional[Monto]) -> Optional[Monto]:
+    if precio is not None and descuento:
+        return round(precio * (1 - descuento / 100), 2)
+    return precio
+
+
+class CategoriaLectura(NamedTuple):
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+
+
+class ProductoLectura(NamedTuple):
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    precio: Monto
+    precio_final: Monto
+    descuento: Monto
+    stock: int
+    en_venta: bool
+    destacado: bool
+    sku: Optional[str]
+    categoria_id: Optional[int]
+    categoria: Optional[CategoriaLectura]
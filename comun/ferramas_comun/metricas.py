@@ -0,0 +1,134 @@
+"""
+Métricas por request, comunes a Django y a la API: tiempo del handler, tiempo
+y cantidad de consultas SQL y tiempo en llamadas HTTP salientes.
+
+Cada request abre una `Medicion` en el ContextVar `medicion_actual`; el
+pegamento de cada proyecto (un `execute_wrapper` en Django, eventos de
+SQLAlchemy en la API) suma las consultas y `medir_http()` las llamadas
+salientes. Al terminar, la medición se publica en el header `Server-Timing`
+y se agrega en un `RegistroMetricas`, que `/metrics` expone en el formato de
+texto de Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Medicion:
+    __slots__ = ("inicio", "db_segundos", "consultas", "http_segundos", "llamadas_http")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.db_segundos = 0.0
+        self.consultas = 0
+        self.http_segundos = 0.0
+        self.llamadas_http = 0
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'app;dur={total * 1000:.2f}, '
+            f'db;dur={self.db_segundos * 1000:.2f};desc="{self.consultas} consultas", '
+            f'http;dur={self.http_segundos * 1000:.2f};desc="{self.llamadas_http} llamadas"'
+        )
+
+
+medicion_actual: ContextVar[Optional[Medicion]] = ContextVar("medicion_actual", default=None)
+
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.conteos[bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    """Histogramas etiquetados por (método, ruta). Un solo lock, sin dependencias externas."""
+
+    def __init__(self, prefijo: str):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, object] = {}
+        self._definiciones = {
+            "request_duration_seconds": ("Tiempo total del handler.", BUCKETS_SEGUNDOS),
+            "request_db_seconds": ("Tiempo en consultas SQL por request.", BUCKETS_SEGUNDOS),
+            "request_db_queries": ("Consultas SQL por request.", BUCKETS_CONSULTAS),
+            "request_outbound_seconds": ("Tiempo en llamadas HTTP salientes por request.", BUCKETS_SEGUNDOS),
+        }
+
+    def registrar(self, metodo: str, ruta: str, status: int, total: float, medicion: Medicion):
+        valores = (
+            ("request_duration_seconds", total),
+            ("request_db_seconds", medicion.db_segundos),
+            ("request_db_queries", medicion.consultas),
+            ("request_outbound_seconds", medicion.http_segundos),
+        )
+        with self._lock:
+            for nombre, valor in valores:
+                clave = (nombre, metodo, ruta)
+                histograma = self._series.get(clave)
+                if histograma is None:
+                    histograma = self._series[clave] = Histograma(self._definiciones[nombre][1])
+                histograma.observar(valor)
+            clave_status = ("requests_total", metodo, ruta, str(status))
+            self._series[clave_status] = self._series.get(clave_status, 0) + 1
+
+    def exportar(self) -> str:
+        """Serializa todas las series en el formato de texto de Prometheus 0.0.4."""
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            copias = [
+                (clave, valor if isinstance(valor, int) else (list(valor.conteos), valor.suma, valor.total))
+                for clave, valor in series
+            ]
+        lineas = []
+        vistos = set()
+        for clave, valor in copias:
+            nombre = clave[0]
+            metrica = f"{self.prefijo}_{nombre}"
+            if nombre == "requests_total":
+                if nombre not in vistos:
+                    lineas.append(f"# HELP {metrica} Requests atendidos.")
+                    lineas.append(f"# TYPE {metrica} counter")
+                    vistos.add(nombre)
+                lineas.append(f'{metrica}{{method="{clave[1]}",route="{clave[2]}",status="{clave[3]}"}} {valor}')
+                continue
+            if nombre not in vistos:
+                lineas.append(f"# HELP {metrica} {self._definiciones[nombre][0]}")
+                lineas.append(f"# TYPE {metrica} histogram")
+                vistos.add(nombre)
+            conteos, suma, total = valor
+            etiquetas = f'method="{clave[1]}",route="{clave[2]}"'
+            acumulado = 0
+            for limite, conteo in zip(self._definiciones[nombre][1], conteos):
+                acumulado += conteo
+                lineas.append(f'{metrica}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+            lineas.append(f'{metrica}_bucket{{{etiquetas},le="+Inf"}} {total}')
+            lineas.append(f"{metrica}_sum{{{etiquetas}}} {suma}")
+            lineas.append(f"{metrica}_count{{{etiquetas}}} {total}")
+        return "\n".join(lineas) + "\n"
+
+
+@contextmanager
+def medir_http():
+    """Acumula en la medición actual el tiempo de una llamada HTTP saliente."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion = medicion_actual.get()
+        if medicion is not None:
+            medicion.http_segundos += time.perf_counter() - inicio
+            medicion.llamadas_http += 1
@@ -0,0 +1,248 @@
+"""
+Motor de promociones: reglas de descuento por SKU, por categoría o para todo
+el catálogo, con escalones por cantidad, ventana de fechas y segmento de
+cliente.
+
+Las reglas vigentes se compilan en un índice `(segmento, alcance) -> escalones`.
+Precio de un ítem = a lo más seis búsquedas en diccionario (SKU, categoría y
+todo el catálogo, para su segmento y para "todos") más una búsqueda binaria
+por cantidad en cada una: un listado o un carrito completo se cotiza en
+O(ítems + reglas que aplican), sin recorrer todas las reglas por ítem.
+
+Política: gana el mayor descuento no acumulable (el `descuento` propio del
+producto cuenta como uno más) y después se aplican, en cascada, todas las
+reglas acumulables.
+
+Las reglas son las filas de `app_promocion` (modelo `Promocion` de Django).
+Los dos proyectos cotizan con este motor: cada worker guarda el suyo en una
+`FuenteReglas` y le pasa cómo ejecutar `CONSULTA` con su conexión
+(`app/infrastructure/promociones.py` en Django, `app/core/promociones.py` en
+la API), así un mismo producto tiene el mismo precio en los dos servicios.
+"""
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+TODOS = "todos"
+CLIENTES = "clientes"
+INVITADOS = "invitados"
+SEGMENTOS = [(TODOS, "Todos"), (CLIENTES, "Clientes registrados"), (INVITADOS, "Invitados")]
+
+CENTAVO = Decimal("0.01")
+CIEN = Decimal(100)
+MAXIMO_CACHE = 100_000  # precios memorizados por versión de las reglas
+INTERVALO = 1.0  # segundos entre revisiones de la versión
+
+# Versión y reglas en una consulta: el LEFT JOIN solo trae filas si la versión cambió.
+CONSULTA = """
+SELECT v.version, p.id, p.nombre, p.porcentaje, p.categoria_id, p.sku, p.cantidad_minima, p.segmento,
+       p.desde, p.hasta, p.acumulable
+FROM (SELECT COUNT(*) || '/' || COALESCE(MAX(actualizada), '') AS version FROM app_promocion) v
+LEFT JOIN app_promocion p ON v.version <> ? AND p.activa
+ORDER BY p.id
+"""
+
+
+@dataclass(frozen=True)
+class Regla:
+    id: int
+    nombre: str
+    porcentaje: Decimal
+    categoria_id: Optional[int] = None
+    sku: Optional[str] = None  # si está, la regla es del SKU aunque tenga categoría
+    cantidad_minima: int = 1
+    segmento: str = TODOS
+    desde: Optional[datetime] = None
+    hasta: Optional[datetime] = None  # exclusivo
+    acumulable: bool = False
+
+    def vigente(self, momento: datetime) -> bool:
+        return (self.desde is None or self.desde <= momento) and (self.hasta is None or momento < self.hasta)
+
+    def alcance(self) -> Tuple[str, object]:
+        if self.sku:
+            return ("sku", self.sku)
+        if self.categoria_id is not None:
+            return ("categoria", self.categoria_id)
+        return ("todo", None)
+
+
+class Precio(NamedTuple):
+    precio: Decimal  # de lista
+    final: Decimal  # unitario, con todas las promociones
+    descuento: Decimal  # porcentaje efectivo total
+    promociones: Tuple[str, ...]  # nombres de las reglas aplicadas
+
+
+class _Escalones:
+    """Reglas de un mismo (segmento, alcance) ordenadas por cantidad mínima, con el acumulado de cada escalón."""
+    __slots__ = ("cantidades", "mejores", "acumulables")
+
+    def __init__(self, reglas: List[Regla]):
+        reglas = sorted(reglas, key=lambda regla: regla.cantidad_minima)
+        self.cantidades: List[int] = []
+        self.mejores: List[Optional[Regla]] = []  # mayor no acumulable con cantidad_minima <= cantidades[i]
+        self.acumulables: List[Tuple[Regla, ...]] = []
+        mejor, acumulables = None, ()
+        for regla in reglas:
+            if regla.acumulable:
+                acumulables += (regla,)
+            elif mejor is None or regla.porcentaje > mejor.porcentaje:
+                mejor = regla
+            if self.cantidades and self.cantidades[-1] == regla.cantidad_minima:
+                self.mejores[-1], self.acumulables[-1] = mejor, acumulables
+            else:
+                self.cantidades.append(regla.cantidad_minima)
+                self.mejores.append(mejor)
+                self.acumulables.append(acumulables)
+
+    def para(self, cantidad: int) -> Tuple[Optional[Regla], Tuple[Regla, ...]]:
+        escalon = bisect_right(self.cantidades, cantidad) - 1
+        if escalon < 0:
+            return None, ()
+        return self.mejores[escalon], self.acumulables[escalon]
+
+
+class MotorPromociones:
+    """
+    Reglas compiladas para un momento dado. Es inmutable: vale hasta
+    `valido_hasta` (la próxima vez que una regla empieza o termina) o hasta que
+    cambie `version`; los precios calculados se memorizan mientras tanto.
+    """
+
+    def __init__(self, reglas: Iterable[Regla], momento: datetime, version: str = ""):
+        self.version = version
+        reglas = list(reglas)
+        bordes = [borde for regla in reglas for borde in (regla.desde, regla.hasta)
+                  if borde is not None and borde > momento]
+        self.valido_hasta: Optional[datetime] = min(bordes) if bordes else None
+        grupos: Dict[tuple, List[Regla]] = {}
+        for regla in reglas:
+            if regla.vigente(momento):
+                grupos.setdefault((regla.segmento, *regla.alcance()), []).append(regla)
+        self._indice = {clave: _Escalones(grupo) for clave, grupo in grupos.items()}
+        self._skus = {clave[2] for clave in self._indice if clave[1] == "sku"}
+        self._cache: Dict[tuple, Precio] = {}
+
+    def __len__(self):
+        return len(self._indice)
+
+    @property
+    def clave(self) -> str:
+        """Identifica los precios del motor: misma versión y mismo `valido_hasta`, mismas reglas vigentes."""
+        return f"{self.version}|{self.valido_hasta.isoformat() if self.valido_hasta else ''}"
+
+    def vigente(self, momento: datetime) -> bool:
+        return self.valido_hasta is None or momento < self.valido_hasta
+
+    def precio(self, precio: Decimal, descuento: Decimal, categoria_id: Optional[int], sku: Optional[str],
+               cantidad: int = 1, segmento: str = TODOS) -> Precio:
+        """Precio unitario de un producto (`precio` de lista y su `descuento` propio) para `cantidad` unidades."""
+        # Un SKU sin reglas propias se cotiza igual que cualquier otro de su categoría y precio.
+        clave = (precio, descuento, categoria_id, sku if sku in self._skus else None, cantidad, segmento)
+        resultado = self._cache.get(clave)
+        if resultado is None:
+            if len(self._cache) >= MAXIMO_CACHE:
+                self._cache.clear()
+            resultado = self._cache[clave] = self._calcular(*clave)
+        return resultado
+
+    def _calcular(self, precio, descuento, categoria_id, sku, cantidad, segmento) -> Precio:
+        mejor_porcentaje, mejor_nombre, acumulables = Decimal(descuento or 0), None, []
+        segmentos = (segmento, TODOS) if segmento != TODOS else (TODOS,)
+        alcances = (("sku", sku), ("categoria", categoria_id), ("todo", None)) if sku else \
+            (("categoria", categoria_id), ("todo", None))
+        for segmento_regla in segmentos:
+            for alcance in alcances:
+                escalones = self._indice.get((segmento_regla, *alcance))
+                if escalones is None:
+                    continue
+                mejor, extra = escalones.para(cantidad)
+                if mejor is not None and mejor.porcentaje > mejor_porcentaje:
+                    mejor_porcentaje, mejor_nombre = mejor.porcentaje, mejor.nombre
+                acumulables.extend(extra)
+
+        final = precio * (CIEN - mejor_porcentaje) / CIEN
+        for regla in acumulables:
+            final = final * (CIEN - regla.porcentaje) / CIEN
+        final = final.quantize(CENTAVO)
+        efectivo = ((CIEN - final * CIEN / precio) if precio else Decimal(0)).quantize(CENTAVO)
+        nombres = ((mejor_nombre,) if mejor_nombre else ()) + tuple(regla.nombre for regla in acumulables)
+        return Precio(precio, final, efectivo, nombres)
+
+
+class ProductoConPrecio:
+    """
+    Un producto (modelo o del snapshot) con `precio_final` y `descuento`
+    reemplazados por los del motor; el resto de los atributos son los del
+    producto, así los templates no cambian.
+    """
+    __slots__ = ("producto", "precio_final", "descuento", "promociones")
+
+    def __init__(self, producto, precio: Precio):
+        self.producto = producto
+        self.precio_final = precio.final
+        self.descuento = precio.descuento
+        self.promociones = precio.promociones
+
+    def __getattr__(self, nombre):
+        return getattr(self.producto, nombre)
+
+
+def _fecha(valor) -> Optional[datetime]:
+    # SQLite devuelve texto; Django (USE_TZ) guarda las fechas en UTC, sin zona.
+    if valor is None:
+        return None
+    fecha = valor if isinstance(valor, datetime) else datetime.fromisoformat(valor)
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
+
+def regla(fila) -> Regla:
+    """Una fila de `CONSULTA` (sin la versión) como `Regla`."""
+    _, id_, nombre, porcentaje, categoria_id, sku, cantidad_minima, segmento, desde, hasta, acumulable = fila
+    return Regla(id=id_, nombre=nombre, porcentaje=Decimal(str(porcentaje)), categoria_id=categoria_id,
+                 sku=sku or None, cantidad_minima=cantidad_minima, segmento=segmento,
+                 desde=_fecha(desde), hasta=_fecha(hasta), acumulable=bool(acumulable))
+
+
+class FuenteReglas:
+    """
+    El motor de un worker. Como mucho cada `intervalo` segundos revisa la
+    versión de las reglas (cantidad de promociones y última modificación) con
+    `CONSULTA`, que solo si la versión cambió trae también las reglas: siempre
+    es una sola consulta. Con la versión igual se reutiliza el motor y los
+    precios que ya calculó; si pasó el inicio o fin de alguna regla se
+    recompila con las reglas en memoria, sin consultar.
+    """
+
+    def __init__(self, intervalo: float = INTERVALO):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._reglas: List[Regla] = []
+        self._motor: Optional[MotorPromociones] = None
+        self._revisado_en = 0.0
+
+    def motor(self, consultar: Callable[[str], Sequence[tuple]], intervalo: Optional[float] = None) -> MotorPromociones:
+        """`consultar(version)` ejecuta `CONSULTA` con la versión actual como parámetro y devuelve las filas."""
+        intervalo = self.intervalo if intervalo is None else intervalo
+        ahora = time.monotonic()
+        with self._lock:
+            if self._motor is None or ahora - self._revisado_en >= intervalo:
+                self._revisado_en = ahora
+                filas = consultar(self._motor.version if self._motor is not None else "")
+                version = filas[0][0]
+                if self._motor is None or version != self._motor.version:
+                    self._reglas = [regla(fila) for fila in filas if fila[1] is not None]
+                    self._motor = MotorPromociones(self._reglas, datetime.now(timezone.utc), version)
+            momento = datetime.now(timezone.utc)
+            if not self._motor.vigente(momento):
+                self._motor = MotorPromociones(self._reglas, momento, self._motor.version)
+            return self._motor
+
+    def invalidar(self):
+        """Fuerza la revisión de la versión en el próximo precio (escrituras de este proceso)."""
+        self._revisado_en = 0.0
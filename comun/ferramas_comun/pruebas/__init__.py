@@ -0,0 +1 @@
+"""Dobles de prueba compartidos por las suites de la API y de Django."""
@@ -0,0 +1,20 @@
+"""
+Informe de sentencias SQL repetidas para los presupuestos de consultas de ambas
+suites: con los literales normalizados, la forma típica de un N+1 aparece como
+una misma sentencia muchas veces.
+"""
+import re
+from collections import Counter
+from typing import Iterable
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalizar_sql(sql: str) -> str:
+    return _LITERALES.sub("?", sql)
+
+
+def describir_repetidas(sentencias: Iterable[str], minimo: int = 2) -> str:
+    repetidas = Counter(normalizar_sql(sql) for sql in sentencias).most_common()
+    lineas = [f"  {veces}x {sql}" for sql, veces in repetidas if veces >= minimo]
+    return "\n".join(lineas) or "  (sin sentencias repetidas)"
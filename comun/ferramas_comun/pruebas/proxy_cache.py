@@ -0,0 +1,71 @@
+"""
+Stand-in de un proxy inverso con caché para los tests de ambos proyectos.
+
+Guarda las respuestas GET cacheables (según `Cache-Control`) con sus surrogate
+keys y atiende purgas por HTTP en un puerto local, como lo haría Fastly o
+Varnish: una purga borra todas las entradas que tengan alguna de las claves
+del header `Surrogate-Key`. Las lecturas no pasan por HTTP: `get(ruta)` llama
+directo al `origen`, así el origen corre en el hilo del test.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ProxyCache:
+    def __init__(self, origen):
+        self.origen = origen  # ruta -> respuesta con status_code, headers y content
+        self.entradas = {}  # ruta -> (claves, contenido)
+        self.purgas = []  # claves de cada purga recibida
+        self.aciertos = 0
+        self._lock = threading.Lock()
+        proxy = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                proxy._purgar(self.headers.get("Surrogate-Key", "").split())
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_PURGE = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_port}/purga"
+
+    def cerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def get(self, ruta: str) -> bytes:
+        with self._lock:
+            if ruta in self.entradas:
+                self.aciertos += 1
+                return self.entradas[ruta][1]
+        respuesta = self.origen(ruta)
+        control = dict(
+            (directiva.strip().split("=", 1) + [""])[:2]
+            for directiva in respuesta.headers.get("Cache-Control", "").split(",") if directiva.strip()
+        )
+        if (respuesta.status_code == 200 and "public" in control
+                and int(control.get("s-maxage") or control.get("max-age") or 0) > 0):
+            with self._lock:
+                self.entradas[ruta] = (set(respuesta.headers.get("Surrogate-Key", "").split()), respuesta.content)
+        return respuesta.content
+
+    def en_cache(self, ruta: str) -> bool:
+        with self._lock:
+            return ruta in self.entradas
+
+    def _purgar(self, claves):
+        with self._lock:
+            self.purgas.append(set(claves))
+            for ruta, (etiquetas, _) in list(self.entradas.items()):
+                if etiquetas & set(claves):
+                    del self.entradas[ruta]